@@ -1,2 +1,3 @@
 from .downloads import bp as downloads_bp
 from .models import bp as models_bp
+from .media import bp as media_bp
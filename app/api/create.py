@@ -8,19 +8,27 @@ import logging
 from datetime import datetime
 import uuid
 import base64
+import hashlib
 import json
 import tempfile
-import subprocess
 import re
 from pathlib import Path
 import time
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
 from PIL import Image
 import io
 
 from app.create.workflow_loader import WorkflowLoader
 from app.create.workflow_validator import WorkflowValidator
 from app.create.workflow_history import WorkflowHistory
+from app.create.comfyui_client import ComfyUIError, get_comfyui_client
+from app.create.execution_monitor import get_execution_monitor
+from app.create.output_store import get_output_store, list_prompt_outputs
+from app.create.sweep import expand_sweep
+from app.utils.ssh_pool import get_ssh_pool
 
 logger = logging.getLogger(__name__)
 
@@ -96,6 +104,22 @@ workflow_thumbnails = {}
 # Maps prompt_id -> {'workflow_id': str, 'min_time': int}
 workflow_metadata = {}
 
+# In-memory store for batch executions
+# Maps batch_id -> {'workflow_id': str, 'created': float, 'runs': [{'index', 'overrides', 'prompt_id', 'error'}]}
+workflow_batches = {}
+
+# Prompts a batch keeps in flight at once over the instance's ComfyUI session
+BATCH_SUBMIT_CONCURRENCY = 4
+
+# In-memory record of uploaded input images known to be on each instance
+# Maps (host, port) -> {filename: time it was last seen there}
+remote_input_files = {}
+
+# Seconds an input is trusted to still be on the instance before it is
+# checked again; the instance may be replaced or its input dir cleared
+REMOTE_INPUT_TTL = 300
+remote_input_lock = threading.Lock()
+
 # Thumbnail directory
 import os
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
@@ -272,8 +296,7 @@ def execute_workflow():
     This endpoint:
     1. Extracts and uploads image files to remote instance
     2. Generates workflow JSON with image filenames
-    3. Uploads workflow JSON to remote instance
-    4. Queues workflow execution via ComfyUI API
+    3. Queues workflow execution via ComfyUI API
     
     Request JSON:
         {
@@ -318,22 +341,24 @@ def execute_workflow():
         # Process image inputs - upload to remote and replace with filenames
         image_fields = [f for f in workflow_config.inputs if f.type == 'image']
         processed_inputs = inputs.copy()
-        thumbnail_saved = False
         thumbnail_filename = None
         
+        image_inputs = {}
         for field in image_fields:
             field_value = inputs.get(field.id)
             if field_value and isinstance(field_value, str) and field_value.startswith('data:image/'):
-                # This is a base64 image - upload it and replace with filename
-                filename = _upload_image_to_remote(field_value, ssh_connection, host, port)
-                processed_inputs[field.id] = filename
-                logger.info(f"Uploaded image for {field.id}: {filename}")
-                
-                # Save thumbnail from first image input (typically input_image)
-                if not thumbnail_saved:
-                    thumbnail_filename = _save_thumbnail(field_value)
-                    thumbnail_saved = True
-                    logger.info(f"Saved thumbnail: {thumbnail_filename}")
+                image_inputs[field.id] = field_value
+        
+        if image_inputs:
+            # Base64 images - upload any the instance doesn't have yet and replace with filenames
+            filenames = _upload_images_to_remote(list(image_inputs.values()), host, port)
+            for field_id, filename in zip(image_inputs, filenames):
+                processed_inputs[field_id] = filename
+                logger.info(f"Using uploaded image for {field_id}: {filename}")
+            
+            # Save thumbnail from first image input (typically input_image)
+            thumbnail_filename = _save_thumbnail(next(iter(image_inputs.values())))
+            logger.info(f"Saved thumbnail: {thumbnail_filename}")
         
         # Generate workflow JSON using interpreter
         from app.create.interpreter_adapter import InterpreterAdapter
@@ -343,12 +368,8 @@ def execute_workflow():
         adapter = InterpreterAdapter(workflow_id, wrapper_path)
         generated_workflow = adapter.generate(processed_inputs)
         
-        # Upload workflow JSON to remote instance
-        workflow_path = _upload_workflow_to_remote(generated_workflow, ssh_connection, host, port)
-        logger.info(f"Uploaded workflow to: {workflow_path}")
-        
         # Queue workflow on ComfyUI
-        prompt_id = _queue_workflow_on_comfyui(workflow_path, ssh_connection, host, port)
+        prompt_id = _queue_workflow_on_comfyui(generated_workflow, ssh_connection, host, port)
         
         # Save queue timestamp
         workflow_queue_times[prompt_id] = time.time()
@@ -396,6 +417,271 @@ def execute_workflow():
         }), 500
 
 
+@bp.route('/execute-batch', methods=['POST'])
+def execute_batch():
+    """
+    Execute a parameter sweep of a workflow on remote ComfyUI instance
+    
+    The sweep expands to one run per combination (see app.create.sweep).
+    Inputs are validated once (swept fields per run), images shared by
+    runs are uploaded once, every workflow is generated from one loaded
+    template, and prompts are submitted over the instance's keep-alive
+    ComfyUI session with several in flight at a time.
+    
+    Request JSON:
+        {
+            "ssh_connection": "ssh -p 12345 root@host",
+            "workflow_id": "IMG_to_VIDEO",
+            "inputs": {...base inputs, as for /execute...},
+            "sweep": {
+                "product": [
+                    {"field": "cfg", "range": {"start": 3, "stop": 5, "step": 1}},
+                    {"field": "seed", "values": [1, 2]}
+                ]
+            }
+        }
+        
+    Returns:
+        JSON with batch_id and the prompt_id (or error) of each run
+    """
+    data = request.get_json()
+    
+    ssh_connection = data.get('ssh_connection')
+    workflow_id = data.get('workflow_id')
+    inputs = data.get('inputs', {})
+    sweep = data.get('sweep')
+    
+    if not ssh_connection:
+        return jsonify({
+            'success': False,
+            'message': 'ssh_connection is required'
+        }), 400
+    
+    if not workflow_id:
+        return jsonify({
+            'success': False,
+            'message': 'workflow_id is required'
+        }), 400
+    
+    if not sweep:
+        return jsonify({
+            'success': False,
+            'message': 'sweep is required'
+        }), 400
+    
+    try:
+        variants = expand_sweep(sweep)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': f'Invalid sweep: {str(e)}'
+        }), 400
+    
+    try:
+        # Parse SSH connection details
+        host, port = _parse_ssh_connection(ssh_connection)
+        
+        workflow_config = WorkflowLoader.load_workflow(workflow_id)
+        input_ids = {f.id for f in workflow_config.inputs}
+        swept_fields = set().union(*variants)
+        unknown = swept_fields - input_ids
+        if unknown:
+            return jsonify({
+                'success': False,
+                'message': f'Unknown sweep field(s): {", ".join(sorted(unknown))}'
+            }), 400
+        
+        # Validate the full input set once, then only the swept fields of each run
+        validator = WorkflowValidator(workflow_config)
+        errors = validator.validate_inputs({**inputs, **variants[0]}).errors
+        for index, overrides in enumerate(variants[1:], 1):
+            result = validator.validate_inputs({**inputs, **overrides}, fields=overrides.keys())
+            errors.extend({**error, 'run': index} for error in result.errors)
+        if errors:
+            return jsonify({
+                'success': False,
+                'message': 'Input validation failed',
+                'errors': errors
+            }), 400
+        
+        # Upload every distinct image once, whether shared or swept
+        image_fields = {f.id for f in workflow_config.inputs if f.type == 'image'}
+        images = []
+        for values in [inputs] + variants:
+            for field_id in image_fields & values.keys():
+                value = values[field_id]
+                if isinstance(value, str) and value.startswith('data:image/') and value not in images:
+                    images.append(value)
+        uploaded = dict(zip(images, _upload_images_to_remote(images, host, port))) if images else {}
+        
+        def with_filenames(values):
+            return {k: uploaded.get(v, v) if k in image_fields and isinstance(v, str) else v
+                    for k, v in values.items()}
+        
+        base_inputs = with_filenames(inputs)
+        runs = [with_filenames(overrides) for overrides in variants]
+        
+        thumbnail_filename = None
+        if images:
+            thumbnail_filename = _save_thumbnail(images[0])
+        
+        # Generate every variant from one loaded template
+        from app.create.interpreter_adapter import InterpreterAdapter
+        
+        wrapper_path = Path(f'workflows/{workflow_id}.webui.yml')
+        adapter = InterpreterAdapter(workflow_id, wrapper_path)
+        workflows = [adapter.generate({**base_inputs, **overrides}) for overrides in runs]
+        
+        # Submit over the instance's keep-alive session, several in flight at a time;
+        # the monitor tracks each prompt before it is posted
+        monitor = get_execution_monitor(host, port)
+        
+        def submit(workflow_json):
+            try:
+                return monitor.queue_prompt(workflow_json), None
+            except ComfyUIError as e:
+                return None, str(e)
+        
+        with ThreadPoolExecutor(max_workers=BATCH_SUBMIT_CONCURRENCY) as executor:
+            results = list(executor.map(submit, workflows))
+        
+        min_expected_time = workflow_config.time_estimate.get('min', 60) if workflow_config.time_estimate else 60
+        batch_id = str(uuid.uuid4())
+        batch_runs = []
+        for index, (overrides, (prompt_id, error)) in enumerate(zip(runs, results)):
+            batch_runs.append({
+                'index': index,
+                'overrides': overrides,
+                'prompt_id': prompt_id,
+                'error': error
+            })
+            if not prompt_id:
+                continue
+            workflow_queue_times[prompt_id] = time.time()
+            if thumbnail_filename:
+                workflow_thumbnails[prompt_id] = thumbnail_filename
+            workflow_metadata[prompt_id] = {
+                'workflow_id': workflow_id,
+                'min_time': min_expected_time
+            }
+        
+        workflow_batches[batch_id] = {
+            'workflow_id': workflow_id,
+            'created': time.time(),
+            'host': host,
+            'port': port,
+            'runs': batch_runs
+        }
+        
+        queued = [run['prompt_id'] for run in batch_runs if run['prompt_id']]
+        if not queued:
+            _forget_remote_inputs(host, port)
+            return jsonify({
+                'success': False,
+                'batch_id': batch_id,
+                'message': f'Failed to queue batch: {batch_runs[0]["error"]}',
+                'runs': batch_runs
+            }), 500
+        
+        # Save one history record for the batch, with the base inputs
+        try:
+            WorkflowHistory.save_history_record(
+                workflow_id=workflow_id,
+                inputs=inputs,
+                thumbnail=thumbnail_filename,
+                prompt_id=queued[0],
+                task_id=batch_id
+            )
+        except Exception as e:
+            logger.error(f"Failed to save workflow history: {e}", exc_info=True)
+        
+        logger.info(f"Queued batch {batch_id}: {len(queued)}/{len(batch_runs)} runs")
+        return jsonify({
+            'success': True,
+            'batch_id': batch_id,
+            'queued': len(queued),
+            'failed': len(batch_runs) - len(queued),
+            'runs': batch_runs,
+            'message': f'Queued {len(queued)} of {len(batch_runs)} runs'
+        })
+        
+    except Exception as e:
+        logger.error(f"Error executing batch: {e}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'message': f'Failed to execute batch: {str(e)}'
+        }), 500
+
+
+@bp.route('/batch/<batch_id>', methods=['GET'])
+def get_batch_status(batch_id):
+    """
+    Get aggregate progress of a batch execution
+    
+    Returns:
+        JSON with per-status counts, overall progress (0-1) and each run's state
+    """
+    batch = workflow_batches.get(batch_id)
+    if not batch:
+        return jsonify({
+            'success': False,
+            'message': 'Batch not found'
+        }), 404
+    
+    monitor = get_execution_monitor(batch['host'], batch['port'])
+    counts = {}
+    progress = 0.0
+    runs = []
+    for run in batch['runs']:
+        state = monitor.status(run['prompt_id']) if run['prompt_id'] else None
+        if not run['prompt_id']:
+            status = 'submit_failed'
+        else:
+            status = state['status'] if state else 'unknown'
+        counts[status] = counts.get(status, 0) + 1
+        
+        if status in ('success', 'failed', 'interrupted', 'submit_failed'):
+            progress += 1
+        elif status == 'running' and state['max']:
+            # The current node's steps stand in for the run (the sampler dominates)
+            progress += state['value'] / state['max']
+        
+        runs.append({**run, 'status': status, 'state': state})
+    
+    total = len(batch['runs'])
+    return jsonify({
+        'success': True,
+        'batch_id': batch_id,
+        'workflow_id': batch['workflow_id'],
+        'total': total,
+        'counts': counts,
+        'progress': progress / total if total else 1.0,
+        'complete': all(r['status'] in ('success', 'failed', 'interrupted', 'submit_failed') for r in runs),
+        'runs': runs
+    })
+
+
+# Host key policy shared by every remote call in this module
+REMOTE_SSH_OPTIONS = {
+    'StrictHostKeyChecking': 'yes',
+    'UserKnownHostsFile': '/root/.ssh/known_hosts'
+}
+
+
+def _run_remote_command(host, port, command, timeout=None, input=None, text=True):
+    """Run a command on the remote instance over the pooled SSH connection"""
+    return get_ssh_pool().run(
+        host, port, command, timeout=timeout, input=input, text=text, options=REMOTE_SSH_OPTIONS
+    )
+
+
+def _run_scp(host, port, source, dest):
+    """Copy a file to/from the remote instance over the pooled SSH connection"""
+    pool = get_ssh_pool()
+    scp_cmd = pool.scp_command(host, port, source, dest, options=REMOTE_SSH_OPTIONS)
+    return pool.run_argv(host, port, scp_cmd, options=REMOTE_SSH_OPTIONS)
+
+
 def _parse_ssh_connection(ssh_connection):
     """Extract host and port from SSH connection string"""
     port_match = re.search(r'-p\s+(\d+)', ssh_connection)
@@ -409,108 +695,130 @@ def _parse_ssh_connection(ssh_connection):
     return host, port
 
 
-def _generate_image_filename(base64_data):
+# ComfyUI's input directory on the instance
+COMFYUI_INPUT_DIR = '/workspace/ComfyUI/input'
+
+
+def _decode_image_data(base64_data):
     """
-    Generate a filename for an image from base64 data
-    Returns a filename like: upload_abc12345.jpeg
+    Decode a data:image/...;base64 URL
+    
+    Returns: (image bytes, format such as 'jpeg' or 'png')
     """
     if not base64_data.startswith('data:image/'):
         raise ValueError("Invalid image data format")
     
-    # Extract image format
-    header = base64_data.split(',', 1)[0]
+    header, encoded = base64_data.split(',', 1)
     image_format = header.split('/')[1].split(';')[0]  # e.g., 'jpeg', 'png'
+    if not re.fullmatch(r'[A-Za-z0-9.+-]+', image_format):
+        raise ValueError(f"Invalid image format: {image_format}")
     
-    # Generate unique filename
-    filename = f"upload_{uuid.uuid4().hex[:8]}.{image_format}"
-    return filename
+    return base64.b64decode(encoded), image_format
 
 
-def _upload_image_to_remote(base64_data, ssh_connection, host, port):
+def _content_filename(image_data, image_format):
+    """Name an uploaded image after its content, so the same image always maps to the same file"""
+    digest = hashlib.blake2b(image_data, digest_size=16).hexdigest()
+    return f"upload_{digest}.{image_format}"
+
+
+def _generate_image_filename(base64_data):
     """
-    Upload base64 image to remote ComfyUI input directory
-    
-    Returns: filename of uploaded image
+    Generate a filename for an image from base64 data
+    Returns a filename like: upload_<blake2b of the image bytes>.jpeg
+    """
+    image_data, image_format = _decode_image_data(base64_data)
+    return _content_filename(image_data, image_format)
+
+
+def _remote_input_sizes(host, port, filenames):
     """
-    # Generate filename using the same logic as export
-    filename = _generate_image_filename(base64_data)
+    Check which input files already exist on the instance with one stat call
     
-    # Extract image data
-    header, encoded = base64_data.split(',', 1)
-    image_format = header.split('/')[1].split(';')[0]
+    Returns: dict of filename -> size for the files that exist
+    """
+    names = ' '.join(filenames)
+    result = _run_remote_command(
+        host, port,
+        f"cd {COMFYUI_INPUT_DIR} 2>/dev/null && stat -c '%s %n' -- {names} 2>/dev/null; true"
+    )
     
-    # Decode base64 to bytes
-    image_data = base64.b64decode(encoded)
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to check remote inputs: {result.stderr}")
+    
+    sizes = {}
+    for line in result.stdout.splitlines():
+        size, _, name = line.strip().partition(' ')
+        if name in filenames and size.isdigit():
+            sizes[name] = int(size)
+    return sizes
+
+
+def _upload_images_to_remote(images, host, port):
+    """
+    Upload base64 images to remote ComfyUI input directory, skipping ones it already has
     
-    # Write to temporary file
-    with tempfile.NamedTemporaryFile(mode='wb', suffix=f'.{image_format}', delete=False) as tmp_file:
-        tmp_file.write(image_data)
-        tmp_path = tmp_file.name
+    Files are named by content hash. Names seen on this instance within
+    REMOTE_INPUT_TTL are trusted; the rest are checked with one remote stat
+    and only missing ones are sent, streamed over the pooled SSH connection.
     
-    try:
-        # Upload to remote instance
-        remote_path = f"/workspace/ComfyUI/input/{filename}"
-        scp_cmd = [
-            'scp',
-            '-P', port,
-            '-o', 'StrictHostKeyChecking=yes',
-            '-o', 'UserKnownHostsFile=/root/.ssh/known_hosts',
-            tmp_path,
-            f'root@{host}:{remote_path}'
-        ]
-        
-        result = subprocess.run(scp_cmd, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            raise RuntimeError(f"Failed to upload image: {result.stderr}")
-        
-        logger.info(f"Successfully uploaded image: {filename}")
-        return filename
+    Returns: filenames in the same order as `images`
+    """
+    key = (host, int(port))
+    decoded = {}
+    filenames = []
+    for base64_data in images:
+        image_data, image_format = _decode_image_data(base64_data)
+        filename = _content_filename(image_data, image_format)
+        decoded[filename] = image_data
+        filenames.append(filename)
+    
+    cutoff = time.time() - REMOTE_INPUT_TTL
+    with remote_input_lock:
+        known = {name for name, seen in remote_input_files.get(key, {}).items() if seen >= cutoff}
+    unknown = [name for name in decoded if name not in known]
+    
+    if unknown:
+        sizes = _remote_input_sizes(host, port, unknown)
+        present = [name for name in unknown if sizes.get(name) == len(decoded[name])]
+        
+        for name in unknown:
+            if name in present:
+                logger.info(f"Image already on instance: {name}")
+                continue
+            # Write under a temporary name so a broken upload never passes the size check
+            partial = f"{COMFYUI_INPUT_DIR}/.{name}.partial"
+            result = _run_remote_command(
+                host, port,
+                f"mkdir -p {COMFYUI_INPUT_DIR} && cat > {partial} && mv -f {partial} {COMFYUI_INPUT_DIR}/{name}",
+                input=decoded[name],
+                text=False
+            )
+            if result.returncode != 0:
+                stderr = result.stderr.decode(errors='replace') if isinstance(result.stderr, bytes) else result.stderr
+                raise RuntimeError(f"Failed to upload image: {stderr}")
+            logger.info(f"Successfully uploaded image: {name}")
         
-    finally:
-        # Clean up temporary file
-        Path(tmp_path).unlink(missing_ok=True)
+        seen = time.time()
+        with remote_input_lock:
+            remote_input_files.setdefault(key, {}).update((name, seen) for name in unknown)
+    
+    return filenames
 
 
-def _upload_workflow_to_remote(workflow_json, ssh_connection, host, port):
+def _upload_image_to_remote(base64_data, ssh_connection, host, port):
     """
-    Upload workflow JSON to remote instance
+    Upload base64 image to remote ComfyUI input directory
     
-    Returns: remote path to workflow file
+    Returns: filename of uploaded image
     """
-    import json
-    
-    # Generate unique workflow filename
-    filename = f"workflow_{uuid.uuid4().hex[:8]}.json"
-    
-    # Write to temporary file
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as tmp_file:
-        json.dump(workflow_json, tmp_file, indent=2)
-        tmp_path = tmp_file.name
-    
-    try:
-        # Upload to remote instance
-        remote_path = f"/tmp/{filename}"
-        scp_cmd = [
-            'scp',
-            '-P', port,
-            '-o', 'StrictHostKeyChecking=yes',
-            '-o', 'UserKnownHostsFile=/root/.ssh/known_hosts',
-            tmp_path,
-            f'root@{host}:{remote_path}'
-        ]
-        
-        result = subprocess.run(scp_cmd, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            raise RuntimeError(f"Failed to upload workflow: {result.stderr}")
-        
-        logger.info(f"Successfully uploaded workflow: {filename}")
-        return remote_path
-        
-    finally:
-        # Clean up temporary file
-        Path(tmp_path).unlink(missing_ok=True)
+    return _upload_images_to_remote([base64_data], host, port)[0]
+
+
+def _forget_remote_inputs(host, port):
+    """Drop the record of inputs on an instance, so the next upload checks again"""
+    with remote_input_lock:
+        remote_input_files.pop((host, int(port)), None)
 
 
 @bp.route('/execution-queue', methods=['POST'])
@@ -657,55 +965,106 @@ def download_output():
         }), 500
 
 
-def _get_execution_outputs(prompt_id, ssh_connection, host, port):
+@bp.route('/outputs/<prompt_id>', methods=['GET'])
+def list_output_files(prompt_id):
     """
-    Get output files for a specific execution from ComfyUI history
+    List the locally stored (or downloading) outputs of an execution
     
-    Returns list of output file objects with filename, path, type, etc.
+    Returns:
+        JSON with each file's retrieval state, size and digest
     """
-    # Get history for specific prompt_id
-    history_cmd = [
-        'ssh',
-        '-p', port,
-        '-o', 'StrictHostKeyChecking=yes',
-        '-o', 'UserKnownHostsFile=/root/.ssh/known_hosts',
-        f'root@{host}',
-        f'curl -s http://localhost:18188/history/{prompt_id}'
-    ]
+    files = get_output_store().prompt_files(prompt_id)
+    return jsonify({
+        'success': True,
+        'outputs': [record.to_dict() for record in files]
+    })
+
+
+@bp.route('/outputs/<prompt_id>/file', methods=['GET'])
+def serve_output_file(prompt_id):
+    """
+    Serve an output file from the local store
     
-    result = subprocess.run(history_cmd, capture_output=True, text=True)
+    Query params:
+        filename, subfolder, type: The output as ComfyUI reports it
+        ssh_connection: Instance to fetch from if the file isn't stored yet
     
-    if result.returncode != 0:
-        raise RuntimeError(f"Failed to get execution history: {result.stderr}")
+    Stored files are served with ETag (their content digest) and Range
+    support. A file still downloading is streamed as it arrives.
+    """
+    filename = request.args.get('filename')
+    subfolder = request.args.get('subfolder', '')
+    folder_type = request.args.get('type', 'output')
+    
+    if not filename:
+        return jsonify({
+            'success': False,
+            'message': 'filename is required'
+        }), 400
     
-    # Parse history response
-    lines = result.stdout.split('\n')
-    json_lines = [line for line in lines if line.strip().startswith('{')]
+    try:
+        store = get_output_store()
+        record = store.get(prompt_id, filename, subfolder, folder_type)
+        
+        if record is None or record.state == 'failed':
+            ssh_connection = request.args.get('ssh_connection')
+            if not ssh_connection:
+                return jsonify({
+                    'success': False,
+                    'message': record.error if record else 'Output not found'
+                }), 404
+            host, port = _parse_ssh_connection(ssh_connection)
+            record = store.fetch(get_comfyui_client(host, port), prompt_id, filename, subfolder, folder_type)
+        
+        if record.state == 'complete':
+            return send_file(
+                record.path,
+                mimetype=record.mime_type,
+                as_attachment=False,
+                download_name=filename,
+                conditional=True,
+                etag=record.digest
+            )
+        
+        # Still downloading - stream what has arrived and follow the rest
+        headers = {'Content-Length': str(record.size)} if record.size else {}
+        return Response(store.iter_file(record), mimetype=record.mime_type, headers=headers)
+        
+    except Exception as e:
+        logger.error(f"Error serving output file: {e}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'message': f'Failed to serve output file: {str(e)}'
+        }), 500
+
+
+def _get_execution_outputs(prompt_id, ssh_connection, host, port):
+    """
+    Get output files for a specific execution from ComfyUI history
     
-    if not json_lines:
-        raise ValueError(f"No JSON response found in history output")
+    Returns list of output file objects with filename, path, type, etc.
+    Each also carries the URL it is served from locally and the state of
+    its retrieval, which starts here if it hasn't already.
+    """
+    client = get_comfyui_client(host, port)
     
-    history_data = json.loads(json_lines[0].strip())
+    # Get history for specific prompt_id
+    history_data = client.get_history(prompt_id)
     
     # Extract outputs from history
     outputs = []
     if prompt_id in history_data:
-        prompt_outputs = history_data[prompt_id].get('outputs', {})
-        
-        for node_id, node_outputs in prompt_outputs.items():
-            # Check for different output types (images, gifs, videos)
-            for output_type in ['images', 'gifs', 'videos']:
-                if output_type in node_outputs:
-                    for output_file in node_outputs[output_type]:
-                        outputs.append({
-                            'node_id': node_id,
-                            'filename': output_file.get('filename'),
-                            'subfolder': output_file.get('subfolder', ''),
-                            'type': output_file.get('type', 'output'),
-                            'format': output_file.get('format', ''),
-                            'fullpath': output_file.get('fullpath', ''),
-                            'output_type': output_type
-                        })
+        store = get_output_store()
+        for output in list_prompt_outputs(history_data[prompt_id].get('outputs', {})):
+            record = store.fetch(client, prompt_id, output['filename'], output['subfolder'], output['type'])
+            output['state'] = record.state
+            output['url'] = f"/create/outputs/{prompt_id}/file?" + urlencode({
+                'filename': output['filename'],
+                'subfolder': output['subfolder'],
+                'type': output['type'],
+                'ssh_connection': ssh_connection
+            })
+            outputs.append(output)
     
     return outputs
 
@@ -727,16 +1086,7 @@ def _download_output_file(file_path, filename, ssh_connection, host, port):
     local_path = downloads_dir / local_filename
     
     # Download file via SCP
-    scp_cmd = [
-        'scp',
-        '-P', port,
-        '-o', 'StrictHostKeyChecking=yes',
-        '-o', 'UserKnownHostsFile=/root/.ssh/known_hosts',
-        f'root@{host}:{file_path}',
-        str(local_path)
-    ]
-    
-    result = subprocess.run(scp_cmd, capture_output=True, text=True)
+    result = _run_scp(host, port, f'root@{host}:{file_path}', str(local_path))
     
     if result.returncode != 0:
         raise RuntimeError(f"Failed to download file: {result.stderr}")
@@ -754,48 +1104,17 @@ def _get_comfyui_queue_status(ssh_connection, host, port):
     - queue_pending: list of pending workflows
     - recent_history: list of recently completed workflows
     """
-    # Get queue status
-    queue_cmd = [
-        'ssh',
-        '-p', port,
-        '-o', 'StrictHostKeyChecking=yes',
-        '-o', 'UserKnownHostsFile=/root/.ssh/known_hosts',
-        f'root@{host}',
-        'curl -s http://localhost:18188/queue'
-    ]
+    client = get_comfyui_client(host, port)
     
-    result = subprocess.run(queue_cmd, capture_output=True, text=True)
-    
-    if result.returncode != 0:
-        raise RuntimeError(f"Failed to get queue status: {result.stderr}")
-    
-    # Parse queue response
-    lines = result.stdout.split('\n')
-    json_lines = [line for line in lines if line.strip().startswith('{')]
-    
-    if not json_lines:
-        raise ValueError(f"No JSON response found in queue output")
-    
-    queue_data = json.loads(json_lines[0].strip())
+    # Get queue status
+    queue_data = client.get_queue()
     
     # Get recent history (last 10 executions)
-    history_cmd = [
-        'ssh',
-        '-p', port,
-        '-o', 'StrictHostKeyChecking=yes',
-        '-o', 'UserKnownHostsFile=/root/.ssh/known_hosts',
-        f'root@{host}',
-        'curl -s http://localhost:18188/history?max_items=10'
-    ]
-    
-    result = subprocess.run(history_cmd, capture_output=True, text=True)
-    
-    history_data = {}
-    if result.returncode == 0:
-        lines = result.stdout.split('\n')
-        json_lines = [line for line in lines if line.strip().startswith('{')]
-        if json_lines:
-            history_data = json.loads(json_lines[0].strip())
+    try:
+        history_data = client.get_history(max_items=10)
+    except ComfyUIError as e:
+        logger.warning(f"Failed to get recent history: {e}")
+        history_data = {}
     
     # Process queue items
     running_items = []
@@ -822,11 +1141,15 @@ def _get_comfyui_queue_status(ssh_connection, host, port):
         # Get thumbnail if available
         thumbnail = workflow_thumbnails.get(prompt_id)
         
+        # Live node progress pushed by the execution monitor, if tracked
+        live = get_execution_monitor(host, port).status(prompt_id)
+        
         running_items.append({
             'prompt_id': prompt_id,
             'status': 'running',
             'start_time': start_time,
-            'thumbnail': thumbnail
+            'thumbnail': thumbnail,
+            'progress': {k: live[k] for k in ('node', 'value', 'max', 'nodes_done')} if live else None
         })
     
     pending_items = []
@@ -932,57 +1255,27 @@ def _get_comfyui_queue_status(ssh_connection, host, port):
     }
 
 
-def _queue_workflow_on_comfyui(workflow_path, ssh_connection, host, port):
+def _queue_workflow_on_comfyui(workflow_json, ssh_connection, host, port):
     """
     Queue workflow on remote ComfyUI instance via API
     
+    The prompt is queued through the instance's execution monitor so its
+    progress is pushed to the /create SocketIO namespace.
+    
     Returns: ComfyUI prompt_id
     """
-    # Create the API payload by wrapping the workflow in a "prompt" key
-    # ComfyUI expects: {"prompt": {...workflow nodes...}, "client_id": "optional"}
-    payload_cmd = f'jq -c \'. | {{prompt: .}}\' {workflow_path}'
-    
-    # Execute curl command on remote to queue workflow
-    queue_cmd = [
-        'ssh',
-        '-p', port,
-        '-o', 'StrictHostKeyChecking=yes',
-        '-o', 'UserKnownHostsFile=/root/.ssh/known_hosts',
-        f'root@{host}',
-        f'bash -c "{payload_cmd} | curl -s -X POST http://localhost:18188/prompt -H \'Content-Type: application/json\' -d @-"'
-    ]
-    
-    result = subprocess.run(queue_cmd, capture_output=True, text=True)
-    
-    if result.returncode != 0:
-        raise RuntimeError(f"Failed to queue workflow: {result.stderr}")
-    
-    # Parse response to get prompt_id
-    import json
+    monitor = get_execution_monitor(host, port)
     try:
-        # Filter out vast.ai welcome message from stdout
-        lines = result.stdout.split('\n')
-        # Find the JSON response (starts with '{')
-        json_lines = [line for line in lines if line.strip().startswith('{')]
-        
-        if not json_lines:
-            raise ValueError(f"No JSON response found in output: {result.stdout}")
-        
-        response_text = json_lines[0].strip()
-        response = json.loads(response_text)
-        
-        prompt_id = response.get('prompt_id')
-        if not prompt_id:
-            # Check if there's an error in the response
-            if 'error' in response:
-                raise ValueError(f"ComfyUI error: {response.get('error')}")
-            raise ValueError(f"No prompt_id in ComfyUI response: {response}")
-        
-        logger.info(f"Queued workflow with prompt_id: {prompt_id}")
-        return prompt_id
-    except (json.JSONDecodeError, ValueError) as e:
-        logger.error(f"Failed to parse ComfyUI response: {result.stdout}")
-        raise RuntimeError(f"Invalid response from ComfyUI: {str(e)}")
+        prompt_id = monitor.queue_prompt(workflow_json)
+    except ComfyUIError as e:
+        if e.details:
+            logger.error(f"ComfyUI rejected workflow: {e.details}")
+        # The input directory may have been cleared behind our back
+        _forget_remote_inputs(host, port)
+        raise RuntimeError(f"Failed to queue workflow: {str(e)}")
+    
+    logger.info(f"Queued workflow with prompt_id: {prompt_id}")
+    return prompt_id
 
 
 def _save_thumbnail(base64_image):
@@ -1568,31 +1861,13 @@ def _upload_workflow_to_browseragent(workflow_json, ssh_connection, host, port):
         remote_path = f"/workspace/ComfyUI/user/default/workflows/{filename}"
         
         # First, ensure the target directory exists on remote instance
-        mkdir_cmd = [
-            'ssh',
-            '-p', port,
-            '-o', 'StrictHostKeyChecking=yes',
-            '-o', 'UserKnownHostsFile=/root/.ssh/known_hosts',
-            f'root@{host}',
-            'mkdir -p /workspace/ComfyUI/user/default/workflows'
-        ]
-        
-        mkdir_result = subprocess.run(mkdir_cmd, capture_output=True, text=True)
+        mkdir_result = _run_remote_command(host, port, 'mkdir -p /workspace/ComfyUI/user/default/workflows')
         
         if mkdir_result.returncode != 0:
             logger.warning(f"Failed to create remote directory (may already exist): {mkdir_result.stderr}")
         
         # Now copy the workflow file
-        scp_cmd = [
-            'scp',
-            '-P', port,
-            '-o', 'StrictHostKeyChecking=yes',
-            '-o', 'UserKnownHostsFile=/root/.ssh/known_hosts',
-            tmp_path,
-            f'root@{host}:{remote_path}'
-        ]
-        
-        result = subprocess.run(scp_cmd, capture_output=True, text=True)
+        result = _run_scp(host, port, tmp_path, f'root@{host}:{remote_path}')
         
         if result.returncode != 0:
             raise RuntimeError(f"Failed to upload workflow: {result.stderr}")
@@ -1612,16 +1887,11 @@ def _queue_workflow_with_browseragent(workflow_path, ssh_connection, host, port)
     Returns: ComfyUI prompt_id
     """
     # Execute BrowserAgent queue script on remote
-    queue_cmd = [
-        'ssh',
-        '-p', port,
-        '-o', 'StrictHostKeyChecking=yes',
-        '-o', 'UserKnownHostsFile=/root/.ssh/known_hosts',
-        f'root@{host}',
-        f'cd ~/BrowserAgent && ./.venv/bin/python examples/comfyui/queue_workflow_ui_click.py --workflow-path {workflow_path} --comfyui-url http://localhost:18188'
-    ]
-    
-    result = subprocess.run(queue_cmd, capture_output=True, text=True, timeout=60)
+    result = _run_remote_command(
+        host, port,
+        f'cd ~/BrowserAgent && ./.venv/bin/python examples/comfyui/queue_workflow_ui_click.py --workflow-path {workflow_path} --comfyui-url http://localhost:18188',
+        timeout=60
+    )
     
     if result.returncode != 0:
         raise RuntimeError(f"Failed to queue workflow via BrowserAgent: {result.stderr}")
@@ -0,0 +1,90 @@
+"""
+Flask API endpoints for searching synced media by generation metadata.
+"""
+
+import logging
+from flask import Blueprint, request, jsonify
+
+from ..sync.ingest.metadata_index import get_metadata_index, MAX_PER_PAGE
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('media', __name__, url_prefix='/media')
+
+
+def _int_arg(name: str, default=None):
+    """Read an integer query parameter, raising ValueError on junk."""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return default
+    return int(value)
+
+
+@bp.route('/search', methods=['GET', 'OPTIONS'])
+def search_media():
+    """
+    Search synced media by prompt, seed, sampler, model, LoRA or workflow.
+
+    Query parameters:
+        q: Free text matched against prompt, negative prompt, model, LoRAs,
+           sampler and path (all terms must match; the last is a prefix)
+        seed: Exact seed
+        model: Model name substring
+        sampler: Sampler name
+        workflow: Workflow hash
+        page: 1-based page number (default 1)
+        per_page: Results per page (default 50, max 200)
+
+    Returns:
+    {
+        "success": true,
+        "total": 1234,
+        "page": 1,
+        "per_page": 50,
+        "results": [{"path": "...", "prompt": "...", "seed": 42, ...}]
+    }
+    """
+    if request.method == 'OPTIONS':
+        return ("", 204)
+
+    try:
+        seed = _int_arg('seed')
+        page = _int_arg('page', 1)
+        per_page = _int_arg('per_page', 50)
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'seed, page and per_page must be integers'
+        }), 400
+
+    try:
+        result = get_metadata_index().search(
+            query=request.args.get('q', ''),
+            seed=seed,
+            model=request.args.get('model'),
+            sampler=request.args.get('sampler'),
+            workflow=request.args.get('workflow'),
+            page=page,
+            per_page=min(per_page, MAX_PER_PAGE)
+        )
+        return jsonify({'success': True, **result})
+
+    except Exception as e:
+        logger.error(f"Error searching media index: {e}")
+        return jsonify({
+            'success': False,
+            'message': f'Error searching media index: {str(e)}'
+        }), 500
+
+
+@bp.route('/search/stats', methods=['GET'])
+def search_stats():
+    """Report how many files the metadata index holds."""
+    try:
+        return jsonify({'success': True, **get_metadata_index().get_stats()})
+    except Exception as e:
+        logger.error(f"Error reading media index stats: {e}")
+        return jsonify({
+            'success': False,
+            'message': f'Error reading media index stats: {str(e)}'
+        }), 500
@@ -11,6 +11,8 @@ import logging
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass, asdict
 
+from app.utils.ssh_pool import get_ssh_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -132,25 +134,19 @@ class ModelScanner:
         Returns:
             Command stdout
         """
-        # Build SSH command
-        ssh_cmd = [
-            'ssh',
-            '-p', str(self.ssh_port),
-            '-o', 'ConnectTimeout=10',
-            '-o', 'StrictHostKeyChecking=accept-new',
-            '-o', 'BatchMode=yes',
-            f'root@{self.ssh_host}',
-            command
-        ]
-        
-        logger.debug(f"Running SSH command: {' '.join(ssh_cmd)}")
+        logger.debug(f"Running SSH command on {self.ssh_host}:{self.ssh_port}: {command}")
         
         try:
-            result = subprocess.run(
-                ssh_cmd,
-                capture_output=True,
-                text=True,
-                timeout=timeout
+            # Reuse the pooled master connection instead of a fresh handshake
+            result = get_ssh_pool().run(
+                self.ssh_host,
+                self.ssh_port,
+                command,
+                timeout=timeout,
+                options={
+                    'StrictHostKeyChecking': 'accept-new',
+                    'BatchMode': 'yes'
+                }
             )
             
             if result.returncode != 0:
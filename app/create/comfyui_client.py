@@ -0,0 +1,331 @@
+"""
+ComfyUI Client - Talk to a remote ComfyUI over a persistent SSH tunnel.
+
+Each instance gets one local port forwarded to ComfyUI's port on the
+instance and one keep-alive HTTP session on top of it, so an API call
+costs a local HTTP round trip instead of an SSH handshake plus `curl`.
+"""
+
+import logging
+import socket
+import subprocess
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from app.utils.ssh_pool import get_ssh_pool
+
+logger = logging.getLogger(__name__)
+
+# Port ComfyUI listens on inside the instance
+COMFYUI_REMOTE_PORT = 18188
+
+# Seconds to wait for a new tunnel to accept connections
+TUNNEL_READY_TIMEOUT = 15
+
+# Default seconds per HTTP request
+DEFAULT_TIMEOUT = 30
+
+# Methods safe to resend after a connection error that may have reached ComfyUI
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+# Host key policy for tunnels; matches the create API's remote calls
+TUNNEL_SSH_OPTIONS = {
+    'StrictHostKeyChecking': 'yes',
+    'UserKnownHostsFile': '/root/.ssh/known_hosts'
+}
+
+
+class ComfyUIError(Exception):
+    """ComfyUI rejected a request or could not be reached."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, details: Any = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.details = details
+
+
+def _never_sent(error: requests.ConnectionError) -> bool:
+    """True if the connection was never established, so the request can't have arrived."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def _free_port() -> int:
+    """Ask the OS for an unused local port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class SSHTunnel:
+    """A local port forwarded to a port on the instance by its own ssh process."""
+
+    def __init__(
+        self,
+        host: str,
+        port,
+        remote_port: int = COMFYUI_REMOTE_PORT,
+        user: str = 'root',
+        options: Optional[Dict[str, str]] = None
+    ):
+        self.host = host
+        self.port = port
+        self.remote_port = remote_port
+        self.user = user
+        self.options = TUNNEL_SSH_OPTIONS if options is None else options
+        self.local_port: Optional[int] = None
+        self._proc: Optional[subprocess.Popen] = None
+
+    def is_alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self):
+        """
+        Start the forward and wait until the local port accepts connections.
+
+        Raises:
+            ComfyUIError: If ssh exits or the port doesn't open in time
+        """
+        self.close()
+        self.local_port = _free_port()
+        cmd = get_ssh_pool().forward_command(
+            self.host, self.port, self.local_port, self.remote_port,
+            user=self.user, options=self.options
+        )
+        self._proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        )
+
+        deadline = time.monotonic() + TUNNEL_READY_TIMEOUT
+        while time.monotonic() < deadline:
+            if self._proc.poll() is not None:
+                stderr = self._proc.stderr.read().decode(errors='replace').strip()
+                self._proc = None
+                raise ComfyUIError(f"SSH tunnel to {self.host}:{self.port} failed: {stderr}")
+            try:
+                with socket.create_connection(('127.0.0.1', self.local_port), timeout=1):
+                    logger.info(
+                        f"Tunnel localhost:{self.local_port} -> {self.host}:{self.remote_port} is up"
+                    )
+                    return
+            except OSError:
+                time.sleep(0.1)
+
+        self.close()
+        raise ComfyUIError(f"SSH tunnel to {self.host}:{self.port} did not open within {TUNNEL_READY_TIMEOUT}s")
+
+    def close(self):
+        """Stop the ssh process."""
+        if self._proc is not None:
+            if self._proc.poll() is None:
+                self._proc.terminate()
+                try:
+                    self._proc.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self._proc.kill()
+                    self._proc.wait()
+            if self._proc.stderr:
+                self._proc.stderr.close()
+            self._proc = None
+
+
+class ComfyUIClient:
+    """HTTP client for one instance's ComfyUI, reached through an SSH tunnel."""
+
+    def __init__(
+        self,
+        host: str,
+        port,
+        remote_port: int = COMFYUI_REMOTE_PORT,
+        timeout: float = DEFAULT_TIMEOUT,
+        tunnel: Optional[SSHTunnel] = None
+    ):
+        """
+        Args:
+            host: Instance SSH host
+            port: Instance SSH port
+            remote_port: ComfyUI port on the instance
+            timeout: Seconds per HTTP request
+            tunnel: Tunnel to use instead of starting an SSH forward
+        """
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.tunnel = tunnel or SSHTunnel(host, port, remote_port)
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self.tunnel.local_port}'
+
+    def _ensure_tunnel(self):
+        with self._lock:
+            if not self.tunnel.is_alive():
+                self.tunnel.start()
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """
+        Send a request, restarting the tunnel once if the connection fails.
+
+        Non-idempotent requests (queueing a prompt) are only resent if the
+        connection was refused, since a reset after sending could otherwise
+        queue the same prompt twice.
+
+        Raises:
+            ComfyUIError: If ComfyUI can't be reached or answers with an error
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        self._ensure_tunnel()
+        try:
+            response = self._session.request(method, self.base_url + path, **kwargs)
+        except requests.ConnectionError as e:
+            if method not in IDEMPOTENT_METHODS and not _never_sent(e):
+                raise ComfyUIError(f"Connection to ComfyUI on {self.host} dropped during {method} {path}: {e}")
+            # The tunnel may have died between the liveness check and the request
+            logger.info(f"Connection to ComfyUI on {self.host} failed, restarting tunnel")
+            with self._lock:
+                self.tunnel.start()
+            try:
+                response = self._session.request(method, self.base_url + path, **kwargs)
+            except requests.RequestException as e:
+                raise ComfyUIError(f"ComfyUI on {self.host} is unreachable: {e}")
+        except requests.RequestException as e:
+            raise ComfyUIError(f"ComfyUI request {method} {path} failed: {e}")
+
+        if response.status_code >= 400:
+            try:
+                details = response.json()
+            except ValueError:
+                details = response.text
+            raise ComfyUIError(
+                f"ComfyUI {method} {path} returned {response.status_code}",
+                status_code=response.status_code,
+                details=details
+            )
+        return response
+
+    def queue_prompt(
+        self,
+        prompt: Dict[str, Any],
+        client_id: Optional[str] = None,
+        prompt_id: Optional[str] = None
+    ) -> str:
+        """
+        Queue a workflow in API format.
+
+        Args:
+            prompt: Workflow in API format
+            client_id: Websocket client that should receive the prompt's events
+            prompt_id: ID to queue the prompt under instead of letting ComfyUI pick one
+
+        Returns:
+            The prompt_id ComfyUI queued the prompt under
+
+        Raises:
+            ComfyUIError: With ComfyUI's error and node_errors as details if rejected
+        """
+        payload: Dict[str, Any] = {'prompt': prompt}
+        if client_id:
+            payload['client_id'] = client_id
+        if prompt_id:
+            payload['prompt_id'] = prompt_id
+        try:
+            data = self._request('POST', '/prompt', json=payload).json()
+        except ComfyUIError as e:
+            if e.status_code is None:
+                raise
+            error = e.details.get('error') if isinstance(e.details, dict) else e.details
+            message = error.get('message') if isinstance(error, dict) else error
+            raise ComfyUIError(f"ComfyUI error: {message}", status_code=e.status_code, details=e.details)
+
+        prompt_id = data.get('prompt_id')
+        if not prompt_id:
+            raise ComfyUIError(f"No prompt_id in ComfyUI response: {data}", details=data)
+        return prompt_id
+
+    def get_queue(self) -> Dict[str, Any]:
+        """Running and pending queue entries."""
+        return self._request('GET', '/queue').json()
+
+    def get_history(self, prompt_id: Optional[str] = None, max_items: Optional[int] = None) -> Dict[str, Any]:
+        """History of one prompt, or of the most recent prompts (keyed by prompt_id)."""
+        if prompt_id:
+            return self._request('GET', f'/history/{prompt_id}').json()
+        params = {'max_items': max_items} if max_items else None
+        return self._request('GET', '/history', params=params).json()
+
+    def get_object_info(self, node_class: Optional[str] = None) -> Dict[str, Any]:
+        """Node definitions, for all nodes or one node class."""
+        path = f'/object_info/{node_class}' if node_class else '/object_info'
+        return self._request('GET', path).json()
+
+    def view(
+        self,
+        filename: str,
+        subfolder: str = '',
+        folder_type: str = 'output',
+        stream: bool = False,
+        headers: Optional[Dict[str, str]] = None
+    ) -> requests.Response:
+        """
+        Fetch a file ComfyUI produced (or was given) through /view.
+
+        Args:
+            filename: File name as reported in the prompt's outputs
+            subfolder: Subfolder within the type's directory
+            folder_type: 'output', 'input' or 'temp'
+            stream: Leave the body unread so callers can iterate over it
+            headers: Extra request headers (e.g. Range)
+        """
+        return self._request(
+            'GET', '/view',
+            params={'filename': filename, 'subfolder': subfolder, 'type': folder_type},
+            stream=stream,
+            headers=headers
+        )
+
+    def websocket_url(self, client_id: str) -> str:
+        """URL of ComfyUI's /ws event stream for `client_id`, starting the tunnel if needed."""
+        self._ensure_tunnel()
+        return f'ws://127.0.0.1:{self.tunnel.local_port}/ws?clientId={client_id}'
+
+    def close(self):
+        """Close the HTTP session and the tunnel."""
+        self._session.close()
+        with self._lock:
+            self.tunnel.close()
+
+
+# One client per instance
+_clients: Dict[Tuple[str, int], ComfyUIClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_comfyui_client(host: str, port) -> ComfyUIClient:
+    """Get the shared ComfyUI client for an instance, creating it on first use."""
+    key = (host, int(port))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = ComfyUIClient(host, port)
+            _clients[key] = client
+        return client
+
+
+def close_comfyui_clients():
+    """Close every client and its tunnel."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
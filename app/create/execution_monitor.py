@@ -0,0 +1,335 @@
+"""
+Execution Monitor - Follow ComfyUI executions through its /ws event stream.
+
+One background subscriber per instance listens to ComfyUI's websocket
+while it has prompts in flight, tracks each prompt's node-level progress
+and relays updates to the Flask-SocketIO `/create` namespace (one room per
+prompt_id). Prompts are queued through the monitor, under its client_id
+and a prompt_id it picks and tracks before posting, so that no event
+ComfyUI sends for them can arrive before they are tracked. Finished
+prompts are handed to the output store, which starts retrieving their
+outputs right away.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.create.comfyui_client import ComfyUIClient, ComfyUIError, get_comfyui_client
+from app.create.output_store import get_output_store
+
+logger = logging.getLogger(__name__)
+
+# SocketIO namespace the updates are emitted on
+SOCKETIO_NAMESPACE = '/create'
+
+# Backoff between reconnect attempts, in seconds
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 30.0
+
+# Seconds to block on the socket before checking whether to stop
+RECEIVE_TIMEOUT = 1.0
+
+# Seconds a finished prompt's state stays queryable before it is dropped
+FINISHED_PROMPT_TTL = 3600.0
+
+# ComfyUI message types that end a prompt, and the status each maps to
+TERMINAL_EVENTS = {
+    'execution_success': 'success',
+    'execution_error': 'failed',
+    'execution_interrupted': 'interrupted'
+}
+
+
+def _socketio_emit(event: str, payload: Dict[str, Any], room: str):
+    """Emit on the app's SocketIO server, if one is running."""
+    from app.sync.websocket_progress import get_socketio
+
+    socketio = get_socketio()
+    if socketio:
+        try:
+            socketio.emit(event, payload, namespace=SOCKETIO_NAMESPACE, room=room)
+        except Exception as e:
+            logger.error(f"Failed to emit {event} via WebSocket: {e}")
+
+
+def _connect_websocket(url: str):
+    """Open a websocket connection (simple-websocket client)."""
+    import simple_websocket
+    return simple_websocket.Client.connect(url)
+
+
+class ExecutionMonitor:
+    """Tracks the prompts queued on one ComfyUI instance."""
+
+    def __init__(
+        self,
+        client: ComfyUIClient,
+        emit: Optional[Callable[[str, Dict[str, Any], str], None]] = None,
+        connect: Optional[Callable[[str], Any]] = None,
+        on_complete: Optional[Callable[[ComfyUIClient, str, Dict[str, Any]], None]] = None
+    ):
+        """
+        Args:
+            client: Client for the instance's ComfyUI
+            emit: Called as emit(event, payload, prompt_id) for every update
+            connect: Opens a websocket for a URL (for tests)
+            on_complete: Called as on_complete(client, prompt_id, payload) when a prompt finishes
+        """
+        self.client = client
+        self.client_id = uuid.uuid4().hex
+        self._emit = emit or _socketio_emit
+        self._connect = connect or _connect_websocket
+        self._on_complete = on_complete
+        self._prompts: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def queue_prompt(self, prompt: Dict[str, Any]) -> str:
+        """
+        Queue a workflow on the instance and follow it.
+
+        Returns:
+            The prompt_id it was queued under
+
+        Raises:
+            ComfyUIError: If ComfyUI rejects the workflow or can't be reached
+        """
+        prompt_id = str(uuid.uuid4())
+        self.track(prompt_id)
+        try:
+            queued_id = self.client.queue_prompt(prompt, client_id=self.client_id, prompt_id=prompt_id)
+        except Exception:
+            self.untrack(prompt_id)
+            raise
+
+        if queued_id != prompt_id:
+            # ComfyUI too old to take our prompt_id: its events may already
+            # have been dropped, so settle the prompt from history if it's done
+            logger.info(f"ComfyUI on {self.client.host} assigned its own prompt_id {queued_id}")
+            self.untrack(prompt_id)
+            self.track(queued_id)
+            self._settle_from_history(queued_id)
+        return queued_id
+
+    def track(self, prompt_id: str):
+        """Follow a prompt queued with this monitor's client_id."""
+        with self._lock:
+            self._prune_finished()
+            self._prompts.setdefault(prompt_id, {
+                'prompt_id': prompt_id,
+                'status': 'pending',
+                'node': None,
+                'value': 0,
+                'max': 0,
+                'nodes_done': 0,
+                'error': None,
+                'updated': time.time()
+            })
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name=f'comfyui-ws-{self.client.host}', daemon=True
+                )
+                self._thread.start()
+
+    def untrack(self, prompt_id: str):
+        """Stop following a prompt, e.g. one ComfyUI refused to queue."""
+        with self._lock:
+            self._prompts.pop(prompt_id, None)
+
+    def status(self, prompt_id: str) -> Optional[Dict[str, Any]]:
+        """Latest known state of a tracked prompt."""
+        with self._lock:
+            self._prune_finished()
+            state = self._prompts.get(prompt_id)
+            return dict(state) if state else None
+
+    def stop(self):
+        """Stop the subscriber thread."""
+        self._stop.set()
+        thread = self._thread
+        if thread:
+            thread.join(timeout=RECEIVE_TIMEOUT * 5)
+
+    def _prune_finished(self):
+        """Drop prompts that finished more than FINISHED_PROMPT_TTL ago. Call with the lock held."""
+        cutoff = time.time() - FINISHED_PROMPT_TTL
+        expired = [
+            p for p, s in self._prompts.items()
+            if s['status'] not in ('pending', 'running') and s['updated'] < cutoff
+        ]
+        for prompt_id in expired:
+            del self._prompts[prompt_id]
+
+    def _has_active(self) -> bool:
+        return any(s['status'] in ('pending', 'running') for s in self._prompts.values())
+
+    def _run(self):
+        """Hold the websocket open while prompts are in flight, reconnecting as needed."""
+        delay = RECONNECT_DELAY
+        while not self._stop.is_set():
+            with self._lock:
+                if not self._has_active():
+                    self._thread = None
+                    return
+
+            ws = None
+            try:
+                ws = self._connect(self.client.websocket_url(self.client_id))
+                delay = RECONNECT_DELAY
+                # Catch up on anything that finished while we weren't listening
+                self._resume()
+                while not self._stop.is_set():
+                    message = ws.receive(timeout=RECEIVE_TIMEOUT)
+                    if isinstance(message, str):
+                        self._handle(json.loads(message))
+                    with self._lock:
+                        if not self._has_active():
+                            break
+            except Exception as e:
+                logger.info(f"ComfyUI websocket on {self.client.host} dropped: {e}; retrying in {delay:.0f}s")
+                self._stop.wait(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+            finally:
+                if ws is not None:
+                    try:
+                        ws.close()
+                    except Exception:
+                        pass
+
+        with self._lock:
+            self._thread = None
+
+    def _resume(self):
+        """Settle prompts that finished while disconnected, from ComfyUI's history."""
+        with self._lock:
+            active = [p for p, s in self._prompts.items() if s['status'] in ('pending', 'running')]
+        for prompt_id in active:
+            self._settle_from_history(prompt_id)
+
+    def _settle_from_history(self, prompt_id: str):
+        """Finish a prompt if ComfyUI's history says it is done."""
+        try:
+            history = self.client.get_history(prompt_id)
+        except ComfyUIError as e:
+            logger.warning(f"Could not check history for {prompt_id}: {e}")
+            return
+        entry = history.get(prompt_id)
+        if not entry:
+            return
+        status = entry.get('status', {})
+        if status.get('status_str') == 'error':
+            self._finish(prompt_id, 'failed', outputs=entry.get('outputs', {}))
+        elif status.get('completed', False):
+            self._finish(prompt_id, 'success', outputs=entry.get('outputs', {}))
+
+    def _handle(self, message: Dict[str, Any]):
+        """Apply one ComfyUI event to the tracked state and relay it."""
+        event = message.get('type')
+        data = message.get('data') or {}
+        prompt_id = data.get('prompt_id')
+        with self._lock:
+            state = self._prompts.get(prompt_id)
+            if state is None or state['status'] not in ('pending', 'running'):
+                return
+
+        if event == 'execution_start':
+            self._update(prompt_id, 'execution_node', status='running')
+
+        elif event == 'executing':
+            if data.get('node') is None:
+                # Older ComfyUI signals the end of a prompt this way
+                self._finish(prompt_id, 'success')
+            else:
+                with self._lock:
+                    if state['node'] is not None:
+                        state['nodes_done'] += 1
+                self._update(prompt_id, 'execution_node', status='running', node=data['node'], value=0, max=0)
+
+        elif event == 'execution_cached':
+            with self._lock:
+                state['nodes_done'] += len(data.get('nodes') or [])
+
+        elif event == 'progress':
+            self._update(
+                prompt_id, 'execution_progress',
+                status='running', node=data.get('node'), value=data.get('value', 0), max=data.get('max', 0)
+            )
+
+        elif event == 'executed':
+            self._emit('execution_output', {
+                'prompt_id': prompt_id,
+                'node': data.get('node'),
+                'output': data.get('output') or {}
+            }, prompt_id)
+
+        elif event in TERMINAL_EVENTS:
+            error = None
+            if event == 'execution_error':
+                error = {
+                    'node': data.get('node_id'),
+                    'node_type': data.get('node_type'),
+                    'message': data.get('exception_message')
+                }
+            self._finish(prompt_id, TERMINAL_EVENTS[event], error=error)
+
+    def _update(self, prompt_id: str, event: str, **changes):
+        with self._lock:
+            state = self._prompts.get(prompt_id)
+            if state is None:
+                return
+            state.update(changes, updated=time.time())
+            payload = dict(state)
+        self._emit(event, payload, prompt_id)
+
+    def _finish(self, prompt_id: str, status: str, error: Optional[Dict] = None, outputs: Optional[Dict] = None):
+        with self._lock:
+            state = self._prompts.get(prompt_id)
+            if state is None or state['status'] not in ('pending', 'running'):
+                return
+            state.update(status=status, node=None, error=error, updated=time.time())
+            payload = dict(state)
+        if outputs is not None:
+            payload['outputs'] = outputs
+        self._emit('execution_complete', payload, prompt_id)
+        logger.info(f"Prompt {prompt_id} finished: {status}")
+        if self._on_complete:
+            try:
+                self._on_complete(self.client, prompt_id, payload)
+            except Exception as e:
+                logger.error(f"Completion handler failed for {prompt_id}: {e}", exc_info=True)
+
+
+# One monitor per instance
+_monitors: Dict[Tuple[str, int], ExecutionMonitor] = {}
+_monitors_lock = threading.Lock()
+
+
+def get_execution_monitor(host: str, port) -> ExecutionMonitor:
+    """Get the shared execution monitor for an instance, creating it on first use."""
+    key = (host, int(port))
+    with _monitors_lock:
+        monitor = _monitors.get(key)
+        if monitor is None:
+            monitor = ExecutionMonitor(
+                get_comfyui_client(host, port),
+                on_complete=get_output_store().on_complete
+            )
+            _monitors[key] = monitor
+        return monitor
+
+
+def find_execution_status(prompt_id: str) -> Optional[Dict[str, Any]]:
+    """Latest known state of a prompt on any instance."""
+    with _monitors_lock:
+        monitors = list(_monitors.values())
+    for monitor in monitors:
+        state = monitor.status(prompt_id)
+        if state:
+            return state
+    return None
@@ -23,6 +23,9 @@ class InterpreterAdapter:
         """
         self.workflow_id = workflow_id
         self.interpreter = WorkflowInterpreter(str(wrapper_path))
+        # Base workflow, loaded on first use; apply_actions copies it, so
+        # one adapter can generate many variants from a single load
+        self._base_workflow = None
         logger.info(f"Initialized interpreter for workflow: {workflow_id}")
     
     def convert_ui_inputs_to_interpreter_format(self, ui_inputs: Dict[str, Any]) -> Dict[str, Any]:
@@ -206,9 +209,11 @@ class InterpreterAdapter:
         logger.info(f"✅ Generated {len(actions)} actions from interpreter")
         
         # Load base workflow
-        logger.info(f"📂 Loading base workflow...")
-        workflow = self.interpreter._load_workflow()
-        logger.info(f"✅ Loaded base workflow with {len(workflow.get('nodes', []))} nodes")
+        if self._base_workflow is None:
+            logger.info(f"📂 Loading base workflow...")
+            self._base_workflow = self.interpreter._load_workflow()
+            logger.info(f"✅ Loaded base workflow with {len(self._base_workflow.get('nodes', []))} nodes")
+        workflow = self._base_workflow
         
         # Apply actions to workflow
         logger.info(f"🔧 Applying {len(actions)} actions to workflow...")
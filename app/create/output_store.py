@@ -0,0 +1,334 @@
+"""
+Output Store - Retrieve ComfyUI outputs as soon as a prompt completes.
+
+Outputs are fetched through ComfyUI's /view endpoint over the instance's
+tunnel, resuming with Range requests if the connection drops, and stored
+content-addressed under downloads/outputs/objects/<digest>. A file can
+be read while it is still downloading, so large videos stream to the
+browser as they arrive.
+"""
+
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+
+from app.create.comfyui_client import ComfyUIClient, ComfyUIError
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+OUTPUT_STORE_DIR = os.path.join(BASE_DIR, 'downloads', 'outputs')
+
+# Output kinds ComfyUI reports per node
+OUTPUT_TYPES = ('images', 'gifs', 'videos')
+
+# Bytes per read from ComfyUI and per chunk served to the browser
+CHUNK_SIZE = 1024 * 1024
+
+# Attempts per file before giving up, with a growing delay between them
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 1.0
+
+# Concurrent downloads per store
+MAX_WORKERS = 2
+
+
+def list_prompt_outputs(outputs: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Flatten a prompt's history outputs into one entry per file.
+
+    Args:
+        outputs: The `outputs` mapping of a /history entry (node_id -> outputs)
+    """
+    files = []
+    for node_id, node_outputs in outputs.items():
+        for output_type in OUTPUT_TYPES:
+            for output_file in node_outputs.get(output_type, []):
+                files.append({
+                    'node_id': node_id,
+                    'filename': output_file.get('filename'),
+                    'subfolder': output_file.get('subfolder', ''),
+                    'type': output_file.get('type', 'output'),
+                    'format': output_file.get('format', ''),
+                    'fullpath': output_file.get('fullpath', ''),
+                    'output_type': output_type
+                })
+    return files
+
+
+class OutputFile:
+    """One output file and where its download stands."""
+
+    def __init__(self, prompt_id: str, filename: str, subfolder: str = '', folder_type: str = 'output'):
+        self.prompt_id = prompt_id
+        self.filename = filename
+        self.subfolder = subfolder
+        self.folder_type = folder_type
+        self.mime_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        self.state = 'pending'
+        self.bytes_received = 0
+        self.size: Optional[int] = None
+        self.digest: Optional[str] = None
+        self.path: Optional[str] = None
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+
+    @property
+    def key(self) -> str:
+        return output_key(self.prompt_id, self.filename, self.subfolder, self.folder_type)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'prompt_id': self.prompt_id,
+            'filename': self.filename,
+            'subfolder': self.subfolder,
+            'type': self.folder_type,
+            'mime_type': self.mime_type,
+            'state': self.state,
+            'bytes_received': self.bytes_received,
+            'size': self.size,
+            'digest': self.digest,
+            'error': self.error
+        }
+
+
+def output_key(prompt_id: str, filename: str, subfolder: str = '', folder_type: str = 'output') -> str:
+    return f'{prompt_id}/{folder_type}/{subfolder}/{filename}'
+
+
+class OutputStore:
+    """Content-addressed local copies of ComfyUI outputs."""
+
+    def __init__(self, root: str = OUTPUT_STORE_DIR, max_workers: int = MAX_WORKERS):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.partial_dir = os.path.join(root, 'partial')
+        self.index_path = os.path.join(root, 'index.json')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.partial_dir, exist_ok=True)
+
+        self._files: Dict[str, OutputFile] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='comfyui-output')
+        self._load_index()
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _load_index(self):
+        """Restore completed files whose objects are still on disk."""
+        try:
+            with open(self.index_path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        for entry in entries:
+            path = self._object_path(entry['digest'])
+            if not os.path.exists(path):
+                continue
+            record = OutputFile(entry['prompt_id'], entry['filename'], entry['subfolder'], entry['type'])
+            record.state = 'complete'
+            record.digest = entry['digest']
+            record.size = record.bytes_received = entry['size']
+            record.path = path
+            record.done.set()
+            self._files[record.key] = record
+
+    def _save_index(self):
+        """Write completed files to the index (caller holds the lock)."""
+        entries = [
+            {k: v for k, v in r.to_dict().items() if k in ('prompt_id', 'filename', 'subfolder', 'type', 'digest', 'size')}
+            for r in self._files.values() if r.state == 'complete'
+        ]
+        tmp_path = f'{self.index_path}.{uuid.uuid4().hex[:8]}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.index_path)
+
+    def get(self, prompt_id: str, filename: str, subfolder: str = '', folder_type: str = 'output') -> Optional[OutputFile]:
+        with self._lock:
+            return self._files.get(output_key(prompt_id, filename, subfolder, folder_type))
+
+    def prompt_files(self, prompt_id: str) -> List[OutputFile]:
+        with self._lock:
+            return [r for r in self._files.values() if r.prompt_id == prompt_id]
+
+    def on_complete(self, client: ComfyUIClient, prompt_id: str, payload: Dict[str, Any]):
+        """Execution monitor hook: start retrieving a finished prompt's outputs."""
+        if payload.get('status') != 'success':
+            return
+        self._executor.submit(self._retrieve_prompt, client, prompt_id, payload.get('outputs'))
+
+    def _retrieve_prompt(self, client: ComfyUIClient, prompt_id: str, outputs: Optional[Dict[str, Any]]):
+        try:
+            if outputs is None:
+                outputs = client.get_history(prompt_id).get(prompt_id, {}).get('outputs', {})
+            for item in list_prompt_outputs(outputs):
+                self.fetch(client, prompt_id, item['filename'], item['subfolder'], item['type'])
+        except Exception as e:
+            logger.error(f"Failed to retrieve outputs for {prompt_id}: {e}", exc_info=True)
+
+    def fetch(
+        self,
+        client: ComfyUIClient,
+        prompt_id: str,
+        filename: str,
+        subfolder: str = '',
+        folder_type: str = 'output'
+    ) -> OutputFile:
+        """
+        Start downloading an output unless it is already stored or on its way.
+
+        Returns:
+            The file's record; its `done` event is set when it settles
+        """
+        key = output_key(prompt_id, filename, subfolder, folder_type)
+        with self._lock:
+            record = self._files.get(key)
+            if record is not None and record.state != 'failed':
+                return record
+            record = OutputFile(prompt_id, filename, subfolder, folder_type)
+            self._files[key] = record
+        self._executor.submit(self._download, client, record)
+        return record
+
+    def _download(self, client: ComfyUIClient, record: OutputFile):
+        """Copy one output from /view into the store, resuming after dropped connections."""
+        partial = os.path.join(self.partial_dir, f'{uuid.uuid4().hex}.part')
+        digest = hashlib.blake2b()
+        attempts = 0
+
+        try:
+            with open(partial, 'wb') as f:
+                with self._lock:
+                    record.path = partial
+                    record.state = 'downloading'
+
+                while True:
+                    received = record.bytes_received
+                    headers = {'Range': f'bytes={received}-'} if received else None
+                    try:
+                        response = client.view(
+                            record.filename, record.subfolder, record.folder_type, stream=True, headers=headers
+                        )
+                        with response:
+                            if received and response.status_code != 206:
+                                # Range ignored: start over
+                                f.seek(0)
+                                f.truncate()
+                                digest = hashlib.blake2b()
+                                record.bytes_received = received = 0
+                            record.size = _total_size(response, received)
+                            for chunk in response.iter_content(CHUNK_SIZE):
+                                f.write(chunk)
+                                f.flush()
+                                digest.update(chunk)
+                                record.bytes_received += len(chunk)
+                        if record.size is None or record.bytes_received >= record.size:
+                            break
+                        raise ComfyUIError(f"Connection closed at {record.bytes_received}/{record.size} bytes")
+                    except (ComfyUIError, requests.RequestException) as e:
+                        attempts += 1
+                        if attempts >= MAX_ATTEMPTS:
+                            raise
+                        logger.info(f"Retrying {record.filename} from byte {record.bytes_received}: {e}")
+                        time.sleep(RETRY_DELAY * attempts)
+
+            record.digest = digest.hexdigest()
+            object_path = self._object_path(record.digest)
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            with self._lock:
+                if os.path.exists(object_path):
+                    # Same content already stored
+                    os.remove(partial)
+                else:
+                    os.replace(partial, object_path)
+                record.path = object_path
+                record.size = record.bytes_received
+                record.state = 'complete'
+                self._save_index()
+            logger.info(f"Stored output {record.filename} ({record.size} bytes) as {record.digest}")
+
+        except Exception as e:
+            logger.error(f"Failed to retrieve output {record.filename}: {e}")
+            with self._lock:
+                record.state = 'failed'
+                record.error = str(e)
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+
+        finally:
+            record.done.set()
+
+    def iter_file(self, record: OutputFile, poll_interval: float = 0.1) -> Iterator[bytes]:
+        """
+        Yield a file's bytes, following it while it is still downloading.
+
+        Stops early if the download fails.
+        """
+        while True:
+            with self._lock:
+                path = record.path
+                try:
+                    f = open(path, 'rb') if path else None
+                except FileNotFoundError:
+                    f = None
+            if f is not None:
+                break
+            if record.done.wait(poll_interval) and record.state != 'complete':
+                return
+
+        with f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if chunk:
+                    yield chunk
+                    continue
+                if record.done.is_set():
+                    # Drain anything written between the read and the event
+                    chunk = f.read()
+                    if chunk and record.state == 'complete':
+                        yield chunk
+                    return
+                record.done.wait(poll_interval)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _total_size(response: requests.Response, offset: int) -> Optional[int]:
+    """Full file size from Content-Range, or from Content-Length plus the resume offset."""
+    content_range = response.headers.get('Content-Range', '')
+    if '/' in content_range:
+        total = content_range.rsplit('/', 1)[1]
+        if total.isdigit():
+            return int(total)
+    length = response.headers.get('Content-Length')
+    if length and length.isdigit():
+        return int(length) + (offset if response.status_code == 206 else 0)
+    return None
+
+
+# Global store instance
+_store: Optional[OutputStore] = None
+_store_lock = threading.Lock()
+
+
+def get_output_store() -> OutputStore:
+    """Get the global output store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = OutputStore()
+        return _store
@@ -0,0 +1,97 @@
+"""
+Sweep - Expand a parameter sweep spec into per-run input overrides.
+
+A spec is one of:
+
+    {"field": "seed", "values": [1, 2, 3]}                  explicit values
+    {"field": "cfg", "range": {"start": 3, "stop": 5, "step": 0.5}}
+                                                            stop is inclusive
+    {"zip": [spec, spec, ...]}                              advance in lockstep
+    {"product": [spec, spec, ...]}                          every combination
+
+and expands to a list of {field: value} dicts, one per run.
+"""
+
+import itertools
+import math
+from typing import Any, Dict, List
+
+# Most runs a single sweep may expand to
+MAX_SWEEP_SIZE = 500
+
+
+def _range_values(spec: Dict[str, Any]) -> List[Any]:
+    start = spec.get('start')
+    stop = spec.get('stop')
+    step = spec.get('step', 1)
+    if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (start, stop, step)):
+        raise ValueError("range needs numeric start, stop and step")
+    if step == 0 or (stop - start) / step < 0:
+        raise ValueError(f"range step {step} never reaches {stop} from {start}")
+
+    count = math.floor((stop - start) / step + 1e-9) + 1
+    if count > MAX_SWEEP_SIZE:
+        raise ValueError(f"range expands to {count} values (max {MAX_SWEEP_SIZE})")
+    if all(isinstance(v, int) for v in (start, stop, step)):
+        return [start + i * step for i in range(count)]
+    # Round away float drift so 0.1 steps give 3.3, not 3.3000000000000003
+    return [round(start + i * step, 10) for i in range(count)]
+
+
+def expand_sweep(spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Expand a sweep spec into the input overrides for each run.
+
+    Raises:
+        ValueError: If the spec is malformed or expands past MAX_SWEEP_SIZE
+    """
+    if not isinstance(spec, dict):
+        raise ValueError(f"sweep spec must be an object, got {type(spec).__name__}")
+
+    if 'field' in spec:
+        field = spec['field']
+        if 'values' in spec:
+            values = spec['values']
+            if not isinstance(values, list) or not values:
+                raise ValueError(f"values for {field} must be a non-empty list")
+            if len(values) > MAX_SWEEP_SIZE:
+                raise ValueError(f"values for {field} has {len(values)} entries (max {MAX_SWEEP_SIZE})")
+        elif 'range' in spec:
+            values = _range_values(spec['range'])
+        else:
+            raise ValueError(f"sweep axis {field} needs values or range")
+        return [{field: value} for value in values]
+
+    for combinator in ('zip', 'product'):
+        if combinator in spec and (not isinstance(spec[combinator], list) or not spec[combinator]):
+            raise ValueError(f"{combinator} needs a non-empty list of specs")
+
+    if 'zip' in spec:
+        axes = [expand_sweep(s) for s in spec['zip']]
+        lengths = {len(axis) for axis in axes}
+        if len(lengths) > 1:
+            raise ValueError(f"zip axes have different lengths: {sorted(lengths)}")
+        _check_size('zip', lengths.pop())
+        return [_merge(combo) for combo in zip(*axes)]
+
+    if 'product' in spec:
+        axes = [expand_sweep(s) for s in spec['product']]
+        _check_size('product', math.prod(len(axis) for axis in axes))
+        return [_merge(combo) for combo in itertools.product(*axes)]
+
+    raise ValueError("sweep spec needs field, zip or product")
+
+
+def _check_size(combinator: str, size: int):
+    if size > MAX_SWEEP_SIZE:
+        raise ValueError(f"{combinator} expands to {size} runs (max {MAX_SWEEP_SIZE})")
+
+
+def _merge(parts) -> Dict[str, Any]:
+    merged: Dict[str, Any] = {}
+    for part in parts:
+        overlap = merged.keys() & part.keys()
+        if overlap:
+            raise ValueError(f"field swept twice: {', '.join(sorted(overlap))}")
+        merged.update(part)
+    return merged
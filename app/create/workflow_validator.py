@@ -4,7 +4,7 @@ Validates user inputs against workflow requirements
 """
 
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, List, Optional
 
 from app.create.workflow_loader import WorkflowConfig, InputConfig
 
@@ -43,20 +43,24 @@ class WorkflowValidator:
         """
         self.config = config
     
-    def validate_inputs(self, inputs: Dict[str, Any]) -> ValidationResult:
+    def validate_inputs(self, inputs: Dict[str, Any], fields: Optional[Iterable[str]] = None) -> ValidationResult:
         """
         Validate all inputs
         
         Args:
             inputs: User input values
+            fields: Only validate these input ids (default: all)
             
         Returns:
             ValidationResult with errors and warnings
         """
         result = ValidationResult()
+        only = set(fields) if fields is not None else None
         
         # Validate each input
         for input_config in self.config.inputs:
+            if only is not None and input_config.id not in only:
+                continue
             try:
                 # Check if input is conditionally shown
                 if input_config.depends_on:
@@ -11,6 +11,8 @@ import re
 from typing import Dict, List, Tuple, Optional, Callable
 from pathlib import Path
 
+from ..utils.ssh_pool import get_ssh_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -360,24 +362,18 @@ class ResourceInstaller:
         # Check if path exists
         check_cmd = f'test -e {path} && echo "exists" || echo "not_found"'
         
-        ssh_cmd = [
-            'ssh',
-            '-p', str(ssh_port),
-            '-i', self.ssh_key,
-            '-o', 'ConnectTimeout=10',
-            '-o', 'StrictHostKeyChecking=yes',
-            '-o', 'UserKnownHostsFile=/root/.ssh/known_hosts',
-            '-o', 'IdentitiesOnly=yes',
-            f'root@{ssh_host}',
-            check_cmd
-        ]
-        
         try:
-            result = subprocess.run(
-                ssh_cmd,
-                capture_output=True,
-                text=True,
-                timeout=30
+            result = get_ssh_pool().run(
+                ssh_host,
+                ssh_port,
+                check_cmd,
+                timeout=30,
+                identity_file=self.ssh_key,
+                options={
+                    'StrictHostKeyChecking': 'yes',
+                    'UserKnownHostsFile': '/root/.ssh/known_hosts',
+                    'IdentitiesOnly': 'yes'
+                }
             )
             
             exists = 'exists' in result.stdout
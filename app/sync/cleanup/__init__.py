@@ -3,5 +3,6 @@ Cleanup engine for old media files
 """
 
 from .cleanup_engine import CleanupEngine
+from .space_scheduler import SpacePressureScheduler, SpaceTarget
 
-__all__ = ['CleanupEngine']
+__all__ = ['CleanupEngine', 'SpacePressureScheduler', 'SpaceTarget']
@@ -4,15 +4,20 @@ Engine for cleaning up old media files
 
 import asyncio
 import logging
+import os
 from datetime import datetime, timedelta
-from typing import Optional, Callable, List
+from typing import Optional, Callable, List, Sequence, Union
 from pathlib import Path
 
 from ..models import CleanupConfig, CleanupResult, FileInfo
 from ..transport import TransportAdapter
+from ..engine.manifest import ManifestManager
 
 logger = logging.getLogger(__name__)
 
+# Listed files checked against the manifest at a time
+SCAN_CHUNK_SIZE = 5000
+
 
 class CleanupEngine:
     """Engine for cleaning up old media files."""
@@ -26,7 +31,8 @@ class CleanupEngine:
         age_hours: int = 24,
         dry_run: bool = False,
         transport: Optional[TransportAdapter] = None,
-        progress_callback: Optional[Callable] = None
+        progress_callback: Optional[Callable] = None,
+        manifest: Optional[ManifestManager] = None
     ) -> CleanupResult:
         """
         Clean up media files older than specified age.
@@ -37,6 +43,8 @@ class CleanupEngine:
             dry_run: If True, only report what would be deleted
             transport: Optional transport adapter for remote cleanup
             progress_callback: Optional progress reporting
+            manifest: Only remove remote files this manifest records as
+                     synced at their current size and mtime
         
         Returns:
             CleanupResult: Statistics about cleanup operation
@@ -52,7 +60,7 @@ class CleanupEngine:
             logger.info(f"Starting cleanup: path={target_path}, age={age_hours}h, dry_run={dry_run}")
             
             # Scan for old files
-            old_files = await self._scan_old_files(target_path, age_hours, transport)
+            old_files = await self._scan_old_files(target_path, age_hours, transport, manifest)
             result.files_scanned = len(old_files)
             
             logger.info(f"Found {len(old_files)} files older than {age_hours} hours")
@@ -89,33 +97,150 @@ class CleanupEngine:
             result.errors.append(str(e))
             return result
     
+    async def cleanup_for_space(
+        self,
+        target_path: str,
+        bytes_needed: int,
+        transport: TransportAdapter,
+        manifest: Union[ManifestManager, Sequence[ManifestManager]],
+        dry_run: bool = False,
+        progress_callback: Optional[Callable] = None
+    ) -> CleanupResult:
+        """
+        Free space on a remote by evicting the oldest already-synced files.
+        
+        Only files whose manifest entry matches the remote size and mtime are
+        candidates, so nothing that still needs syncing is ever removed.
+        
+        Args:
+            target_path: Remote folder to evict from
+            bytes_needed: Stop once this many bytes have been freed
+            transport: Transport adapter for the remote
+            manifest: Manifest(s) of files already synced from this remote; a
+                     file synced in any of them may be evicted
+            dry_run: If True, only report what would be deleted
+            progress_callback: Optional progress reporting
+        
+        Returns:
+            CleanupResult: Statistics about cleanup operation
+        """
+        result = CleanupResult(
+            files_scanned=0,
+            files_deleted=0,
+            space_freed_bytes=0,
+            dry_run=dry_run
+        )
+        
+        try:
+            # Stream the listing through the manifest in chunks, keeping only
+            # synced files that may be evicted
+            candidates = []
+            chunk = []
+            
+            manifests = [manifest] if isinstance(manifest, ManifestManager) else list(manifest)
+            
+            def add_synced():
+                unsynced = set.intersection(*({f.path for f in m.changed_files(chunk)} for m in manifests))
+                candidates.extend(
+                    f for f in chunk if f.path not in unsynced and not self._should_preserve(f.path)
+                )
+                result.files_scanned += len(chunk)
+                chunk.clear()
+            
+            async for stat in transport.iter_files(target_path):
+                chunk.append(stat)
+                if len(chunk) >= SCAN_CHUNK_SIZE:
+                    add_synced()
+            if chunk:
+                add_synced()
+            
+            candidates.sort(key=lambda f: f.mtime)
+            
+            victims = []
+            planned = 0
+            for stat in candidates:
+                if planned >= bytes_needed:
+                    break
+                victims.append(FileInfo(
+                    path=stat.path,
+                    size=stat.size,
+                    created=datetime.fromtimestamp(stat.mtime),
+                    modified=datetime.fromtimestamp(stat.mtime)
+                ))
+                planned += stat.size
+            
+            logger.info(
+                f"Space cleanup on {target_path}: need {bytes_needed} bytes, "
+                f"{len(candidates)} synced candidates, evicting {len(victims)} files ({planned} bytes)"
+            )
+            
+            if planned < bytes_needed:
+                result.errors.append(
+                    f"Only {planned} of {bytes_needed} bytes can be freed from already-synced files"
+                )
+            
+            if dry_run:
+                result.space_freed_bytes = planned
+                return result
+            
+            batch_size = self.config.max_files_per_batch
+            for i in range(0, len(victims), batch_size):
+                deleted = await self._delete_batch(victims[i:i + batch_size], transport)
+                
+                result.files_deleted += len(deleted)
+                result.space_freed_bytes += sum(f.size for f in deleted)
+                
+                if progress_callback:
+                    progress_callback({
+                        'files_scanned': result.files_scanned,
+                        'files_deleted': result.files_deleted,
+                        'space_freed': result.space_freed_bytes
+                    })
+            
+            return result
+        
+        except Exception as e:
+            logger.error(f"Space cleanup error: {e}")
+            result.errors.append(str(e))
+            return result
+    
     async def _scan_old_files(
         self,
         path: str,
         age_hours: int,
-        transport: Optional[TransportAdapter] = None
+        transport: Optional[TransportAdapter] = None,
+        manifest: Optional[ManifestManager] = None
     ) -> List[FileInfo]:
         """Scan directory for old files."""
         cutoff_time = datetime.now() - timedelta(hours=age_hours)
         old_files = []
         
         if transport:
-            # Remote scanning via transport
-            files = await transport.list_files(path)
+            # Remote scanning via transport, streamed so only old files are kept
+            chunk = []
             
-            for file_stat in files:
-                file_time = datetime.fromtimestamp(file_stat.mtime)
-                if file_time < cutoff_time:
-                    # Check against exclude patterns
-                    if self._should_preserve(file_stat.path):
+            def add_old():
+                unsynced = {f.path for f in manifest.changed_files(chunk)} if manifest else set()
+                for file_stat in chunk:
+                    if file_stat.path in unsynced:
                         continue
-                    
+                    file_time = datetime.fromtimestamp(file_stat.mtime)
                     old_files.append(FileInfo(
                         path=file_stat.path,
                         size=file_stat.size,
                         created=file_time,
                         modified=file_time
                     ))
+                chunk.clear()
+            
+            async for file_stat in transport.iter_files(path):
+                # Check against exclude patterns
+                if datetime.fromtimestamp(file_stat.mtime) < cutoff_time and not self._should_preserve(file_stat.path):
+                    chunk.append(file_stat)
+                    if len(chunk) >= SCAN_CHUNK_SIZE:
+                        add_old()
+            if chunk:
+                add_old()
         else:
             # Local scanning
             path_obj = Path(path)
@@ -149,26 +274,49 @@ class CleanupEngine:
         files: List[FileInfo],
         transport: Optional[TransportAdapter] = None
     ) -> List[FileInfo]:
-        """Delete a batch of files."""
+        """
+        Delete a batch of files.
+        
+        Returns:
+            The files actually removed; files that were already gone freed
+            nothing and are left out
+        """
         deleted = []
         
-        for file in files:
+        if transport:
+            # Remote deletion: one round trip for the whole batch
             try:
-                if transport:
-                    # Remote deletion
-                    success = await transport.delete_file(file.path)
-                else:
-                    # Local deletion
-                    import os
-                    os.remove(file.path)
-                    success = True
-                
-                if success:
-                    logger.info(f"Deleted: {file.path} ({file.size} bytes)")
+                result = await transport.delete_files([f.path for f in files])
+            except Exception as e:
+                logger.error(f"Error deleting batch of {len(files)} files: {e}")
+                return deleted
+            
+            removed = set(result.deleted)
+            missing = set(result.missing)
+            for file in files:
+                if file.path in missing:
+                    logger.debug(f"Already gone: {file.path}")
+                elif file.path in removed:
+                    logger.debug(f"Deleted: {file.path} ({file.size} bytes)")
                     deleted.append(file)
                 else:
                     logger.warning(f"Failed to delete: {file.path}")
             
+            if result.error:
+                logger.warning(f"Batch delete reported: {result.error}")
+            logger.info(f"Deleted {len(deleted)}/{len(files)} files in batch")
+            return deleted
+        
+        for file in files:
+            try:
+                # Local deletion
+                os.remove(file.path)
+                logger.info(f"Deleted: {file.path} ({file.size} bytes)")
+                deleted.append(file)
+            
+            except FileNotFoundError:
+                logger.debug(f"Already gone: {file.path}")
+            
             except Exception as e:
                 logger.error(f"Error deleting {file.path}: {e}")
         
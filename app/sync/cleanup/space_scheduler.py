@@ -0,0 +1,278 @@
+"""
+Space-pressure-driven cleanup of remote instances
+"""
+
+import asyncio
+import threading
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from ..models import CleanupConfig, CleanupResult
+from ..engine.manifest import ManifestManager, find_manifests
+from ..transport import TransportAdapter
+from ..transport.ssh_rsync import SSHRsyncAdapter
+from .cleanup_engine import CleanupEngine
+
+logger = logging.getLogger(__name__)
+
+GB = 1024 ** 3
+
+# Output folders checked on each instance, keyed by the UI that writes them
+DEFAULT_OUTPUT_PATHS = {
+    'comfyui': '/workspace/ComfyUI/output',
+    'forge': '/workspace/stable-diffusion-webui/outputs'
+}
+
+
+@dataclass
+class SpaceTarget:
+    """A remote output folder watched for low disk space."""
+    host: str
+    port: int
+    path: str
+    source_type: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.host}:{self.port}:{self.path}"
+
+
+def vastai_targets(output_paths: Dict[str, str] = None) -> List[SpaceTarget]:
+    """Build targets for every running Vast.ai instance."""
+    try:
+        from ...vastai.vast_manager import VastManager
+        from ...vastai.vastai_utils import get_ssh_port
+    except ImportError:
+        from vastai.vast_manager import VastManager
+        from vastai.vastai_utils import get_ssh_port
+
+    output_paths = output_paths or DEFAULT_OUTPUT_PATHS
+    targets = []
+
+    for instance in VastManager().list_instances():
+        if instance.get('cur_state') != 'running':
+            continue
+
+        host = (
+            instance.get('public_ip') or
+            instance.get('public_ipaddr') or
+            instance.get('ip_address') or
+            instance.get('publicIp')
+        )
+        if not host:
+            continue
+
+        port = int(get_ssh_port(instance) or 22)
+        for source_type, path in output_paths.items():
+            targets.append(SpaceTarget(host=host, port=port, path=path, source_type=source_type))
+
+    return targets
+
+
+class SpacePressureScheduler:
+    """
+    Periodically sample free space on remote instances and evict
+    already-synced outputs, oldest first, when it drops below
+    `CleanupConfig.min_free_space_gb`.
+    """
+
+    def __init__(
+        self,
+        config: CleanupConfig,
+        manifest_dir: str = "/app/logs/manifests",
+        interval: float = 300,
+        target_provider: Callable[[], List[SpaceTarget]] = vastai_targets,
+        transport_factory: Callable[[SpaceTarget], TransportAdapter] = None
+    ):
+        """
+        Args:
+            config: Cleanup configuration; min_free_space_gb must be set
+            manifest_dir: Directory holding the sync manifests
+            interval: Seconds between space checks
+            target_provider: Returns the folders to watch on each check
+            transport_factory: Builds a transport for a target
+        """
+        if not config.min_free_space_gb:
+            raise ValueError("min_free_space_gb must be set for space-pressure cleanup")
+
+        self.config = config
+        self.manifest_dir = manifest_dir
+        self.interval = interval
+        self.target_provider = target_provider
+        self.transport_factory = transport_factory or (
+            lambda target: SSHRsyncAdapter(host=target.host, port=target.port)
+        )
+        self.cleanup_engine = CleanupEngine(config)
+
+        self._status: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        # Held for a whole check_all, which may run on the sampling thread
+        # or on the orchestrator loop for /space/check
+        self._check_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def min_free_bytes(self) -> int:
+        return int(self.config.min_free_space_gb * GB)
+
+    @property
+    def target_free_bytes(self) -> int:
+        target_gb = self.config.target_free_space_gb or self.config.min_free_space_gb
+        return int(max(target_gb, self.config.min_free_space_gb) * GB)
+
+    def start(self):
+        """Start the background sampling thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run_loop,
+            daemon=True,
+            name="space-pressure-cleanup"
+        )
+        self._thread.start()
+        logger.info(
+            f"Space-pressure cleanup started: min free {self.config.min_free_space_gb} GB, "
+            f"every {self.interval}s"
+        )
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the background thread."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                asyncio.run(self.check_all())
+            except Exception as e:
+                logger.error(f"Space-pressure check failed: {e}", exc_info=True)
+            self._stop_event.wait(self.interval)
+
+    async def check_all(self) -> List[dict]:
+        """
+        Check every target once, concurrently.
+
+        Only one check runs at a time: two checks would read the same free
+        space and each evict the whole shortfall. A call made while another
+        check is in flight is skipped and returns the last results.
+        """
+        if not self._check_lock.acquire(blocking=False):
+            logger.info("Space check already running, returning the last results")
+            with self._lock:
+                return list(self._status.values())
+        try:
+            targets = await asyncio.to_thread(self.target_provider)
+            return list(await asyncio.gather(*[self.check_target(t) for t in targets]))
+        finally:
+            self._check_lock.release()
+
+    async def check_target(self, target: SpaceTarget) -> dict:
+        """
+        Sample free space for one target and evict if it is under pressure.
+
+        Returns:
+            Status dict for the target
+        """
+        status = {
+            'host': target.host,
+            'port': target.port,
+            'path': target.path,
+            'checked_at': datetime.now().isoformat(),
+            'free_bytes': None,
+            'evicted_files': 0,
+            'freed_bytes': 0,
+            'error': None
+        }
+
+        transport = self.transport_factory(target)
+
+        try:
+            free_bytes = await transport.get_free_space(target.path)
+            status['free_bytes'] = free_bytes
+
+            if free_bytes < self.min_free_bytes:
+                result = await self._evict(target, transport, self.target_free_bytes - free_bytes)
+                status['evicted_files'] = result.files_deleted
+                status['freed_bytes'] = result.space_freed_bytes
+                status['free_bytes'] = free_bytes + result.space_freed_bytes
+                if result.errors:
+                    status['error'] = '; '.join(result.errors)
+        except Exception as e:
+            # Missing output folders and unreachable hosts are expected
+            logger.debug(f"Space check skipped for {target.key}: {e}")
+            status['error'] = str(e)
+
+        with self._lock:
+            self._status[target.key] = status
+        return status
+
+    async def _evict(self, target: SpaceTarget, transport: TransportAdapter, bytes_needed: int) -> CleanupResult:
+        # Every manifest a sync of this instance wrote, whichever source
+        # type or fleet name it ran under
+        manifest_paths = find_manifests(self.manifest_dir, target.host, target.port)
+        if not manifest_paths:
+            return CleanupResult(
+                files_scanned=0,
+                files_deleted=0,
+                space_freed_bytes=0,
+                errors=[f"No sync manifest for {target.host}:{target.port}; nothing is known to be synced"]
+            )
+
+        logger.warning(
+            f"Low space on {target.key}: evicting {bytes_needed} bytes of already-synced files"
+        )
+
+        manifests = [ManifestManager(path) for path in manifest_paths]
+        try:
+            result = await self.cleanup_engine.cleanup_for_space(
+                target.path,
+                bytes_needed,
+                transport,
+                manifests
+            )
+        finally:
+            for manifest in manifests:
+                manifest.close()
+
+        logger.info(
+            f"Space cleanup on {target.key}: deleted {result.files_deleted} files, "
+            f"freed {result.space_freed_bytes} bytes"
+        )
+        return result
+
+    def get_status(self) -> dict:
+        """Latest check result for each target."""
+        with self._lock:
+            targets = list(self._status.values())
+        return {
+            'running': bool(self._thread and self._thread.is_alive()),
+            'min_free_space_gb': self.config.min_free_space_gb,
+            'target_free_space_gb': self.target_free_bytes / GB,
+            'interval': self.interval,
+            'targets': targets
+        }
+
+
+# Global scheduler instance
+_space_scheduler = None
+
+
+def get_space_scheduler() -> Optional[SpacePressureScheduler]:
+    """Get the global scheduler, if one has been configured."""
+    return _space_scheduler
+
+
+def start_space_scheduler(config: CleanupConfig, **kwargs) -> SpacePressureScheduler:
+    """Create (or replace) and start the global scheduler."""
+    global _space_scheduler
+    if _space_scheduler is not None:
+        _space_scheduler.stop()
+    _space_scheduler = SpacePressureScheduler(config, **kwargs)
+    _space_scheduler.start()
+    return _space_scheduler
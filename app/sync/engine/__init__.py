@@ -4,5 +4,6 @@ Sync engine components
 
 from .manifest import ManifestManager
 from .sync_engine import SyncEngine
+from .watcher import FolderWatcher
 
-__all__ = ['ManifestManager', 'SyncEngine']
+__all__ = ['ManifestManager', 'SyncEngine', 'FolderWatcher']
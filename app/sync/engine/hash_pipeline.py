@@ -0,0 +1,139 @@
+"""
+Content hashing of synced files across a process pool
+"""
+
+import asyncio
+import hashlib
+import logging
+import mmap
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# BLAKE2b with its default 64-byte digest, as printed by coreutils `b2sum`,
+# so a remote copy can be hashed without installing anything there
+HASH_ALGORITHM = 'blake2b'
+
+# Files handed to a worker per task; amortizes pickling and IPC per call
+HASH_CHUNK_SIZE = 32
+
+# Files at least this large are hashed through mmap, smaller ones with reads
+MMAP_THRESHOLD = 1024 * 1024
+READ_BUFFER_SIZE = 1024 * 1024
+
+
+def hash_file(path: str) -> str:
+    """Hex BLAKE2b digest of a local file."""
+    digest = hashlib.blake2b()
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        else:
+            buffer = bytearray(READ_BUFFER_SIZE)
+            view = memoryview(buffer)
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                digest.update(view[:n])
+    return digest.hexdigest()
+
+
+def _hash_chunk(paths: List[str]) -> List[Tuple[str, Optional[str]]]:
+    """Worker entry point: hash a chunk of files, None for unreadable ones."""
+    results = []
+    for path in paths:
+        try:
+            results.append((path, hash_file(path)))
+        except OSError:
+            results.append((path, None))
+    return results
+
+
+class HashPipeline:
+    """
+    Hash local files across a process pool.
+
+    hashlib releases the GIL on large buffers, but a pool also spreads the
+    per-file open/read work over every core and keeps it off the event loop.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: int = HASH_CHUNK_SIZE):
+        """
+        Args:
+            max_workers: Pool size (defaults to the CPU count)
+            chunk_size: Files per worker task
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: the server is multi-threaded, so forking could copy held locks
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    async def hash_files(self, paths: Iterable[str]) -> Dict[str, str]:
+        """
+        Hash the given local files.
+
+        Args:
+            paths: Local file paths
+
+        Returns:
+            Digest per path; paths that could not be read are left out
+        """
+        paths = list(paths)
+        if not paths:
+            return {}
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        chunks = [paths[i:i + self.chunk_size] for i in range(0, len(paths), self.chunk_size)]
+
+        outcomes = await asyncio.gather(
+            *[loop.run_in_executor(executor, _hash_chunk, chunk) for chunk in chunks],
+            return_exceptions=True
+        )
+
+        digests = {}
+        for chunk, outcome in zip(chunks, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Hash worker failed on {len(chunk)} file(s): {outcome}")
+                continue
+            digests.update((path, digest) for path, digest in outcome if digest is not None)
+        return digests
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+
+# Global pipeline instance
+_hash_pipeline: Optional[HashPipeline] = None
+_hash_pipeline_lock = threading.Lock()
+
+
+def get_hash_pipeline() -> HashPipeline:
+    """Get the global hash pipeline instance."""
+    global _hash_pipeline
+    with _hash_pipeline_lock:
+        if _hash_pipeline is None:
+            _hash_pipeline = HashPipeline()
+        return _hash_pipeline
@@ -1,145 +1,582 @@
 """
 Manifest manager for tracking synced files
+
+Entries are stored in SQLite (WAL mode) so that a sync can upsert thousands
+of files in a single transaction and diff remote listings with indexed
+queries instead of rewriting a JSON document per file.
 """
 
+import glob
 import json
 import os
+import sqlite3
+import threading
 import logging
+from collections.abc import Mapping
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Tuple
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
 
 from ..models import FileManifest, FileStat
 
 logger = logging.getLogger(__name__)
 
+# Rows sent to SQLite per executemany call when streaming remote listings
+INSERT_CHUNK_SIZE = 5000
+
+# Bound parameters per IN (...) lookup; stays under SQLite's variable limit
+QUERY_CHUNK_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS manifest (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    checksum TEXT,
+    last_sync TEXT,
+    xmp_done INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS watermarks (
+    prefix TEXT PRIMARY KEY,
+    max_mtime REAL NOT NULL,
+    last_full_scan TEXT
+);
+CREATE TABLE IF NOT EXISTS sources (
+    host TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    last_sync TEXT,
+    PRIMARY KEY (host, port)
+);
+"""
+
+
+@dataclass
+class Watermark:
+    """Incremental listing state for one source folder."""
+    prefix: str
+    max_mtime: float
+    last_full_scan: Optional[datetime] = None
+
+
+def manifest_path_for(manifest_dir: str, source_type: str, host: str, instance_name: Optional[str] = None) -> str:
+    """
+    Manifest database used for syncs of `source_type` from `host`.
+
+    Fleet members get their own database, since several instances can sit
+    behind one host address with identical remote paths.
+    """
+    if instance_name:
+        return f"{manifest_dir}/{source_type}_{host}_{instance_name}.db"
+    return f"{manifest_dir}/{source_type}_{host}.db"
+
+
+def find_manifests(manifest_dir: str, host: str, port: int) -> List[str]:
+    """
+    Manifest databases holding files synced from the instance at host:port.
+
+    Matches every source type and fleet member name written for `host`,
+    then keeps those whose recorded sources include `port`. Manifests from
+    before sources were recorded are kept on the host match alone.
+    """
+    escaped = glob.escape(host)
+    candidates = set(glob.glob(os.path.join(manifest_dir, f"*_{escaped}.db")))
+    candidates.update(glob.glob(os.path.join(manifest_dir, f"*_{escaped}_*.db")))
+
+    found = []
+    for path in sorted(candidates):
+        try:
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                sources = conn.execute("SELECT host, port FROM sources").fetchall()
+            except sqlite3.OperationalError:
+                sources = []
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Skipping unreadable manifest {path}: {e}")
+            continue
+        if not sources or (host, int(port)) in sources:
+            found.append(path)
+    return found
+
+
+def _prefix_range(prefix: str) -> Tuple[str, str]:
+    """Bounds of the paths under `prefix`, for an indexed range query."""
+    base = prefix.rstrip('/') + '/'
+    return base, base[:-1] + chr(ord('/') + 1)
+
+
+def _row_to_entry(row) -> FileManifest:
+    return FileManifest(
+        path=row[0],
+        size=row[1],
+        mtime=row[2],
+        checksum=row[3],
+        last_sync=datetime.fromisoformat(row[4]) if row[4] else None
+    )
+
+
+class _ManifestView(Mapping):
+    """Read-only dict-like view over the manifest table."""
+
+    def __init__(self, manager: 'ManifestManager'):
+        self._manager = manager
+
+    def __getitem__(self, path: str) -> FileManifest:
+        entry = self._manager.get_entry(path)
+        if entry is None:
+            raise KeyError(path)
+        return entry
+
+    def __contains__(self, path) -> bool:
+        return self._manager.get_entry(path) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        with self._manager._lock:
+            paths = [row[0] for row in self._manager._conn.execute("SELECT path FROM manifest")]
+        return iter(paths)
+
+    def __len__(self) -> int:
+        with self._manager._lock:
+            return self._manager._conn.execute("SELECT COUNT(*) FROM manifest").fetchone()[0]
+
+    def values(self):
+        with self._manager._lock:
+            rows = self._manager._conn.execute(
+                "SELECT path, size, mtime, checksum, last_sync FROM manifest"
+            ).fetchall()
+        return [_row_to_entry(row) for row in rows]
+
 
 class ManifestManager:
     """Manage file manifests for change detection."""
-    
+
     def __init__(self, manifest_path: str):
-        self.manifest_path = Path(manifest_path)
-        self.manifest: Dict[str, FileManifest] = {}
-        self._load_manifest()
-    
-    def _load_manifest(self):
-        """Load manifest from disk."""
-        if self.manifest_path.exists():
-            try:
-                with open(self.manifest_path, 'r') as f:
-                    data = json.load(f)
-                    
-                for path, entry in data.items():
-                    self.manifest[path] = FileManifest(
-                        path=entry['path'],
-                        size=entry['size'],
-                        mtime=entry['mtime'],
-                        checksum=entry.get('checksum'),
-                        last_sync=datetime.fromisoformat(entry['last_sync']) if entry.get('last_sync') else None
-                    )
-                
-                logger.info(f"Loaded manifest with {len(self.manifest)} entries")
-            except Exception as e:
-                logger.error(f"Failed to load manifest: {e}")
-                self.manifest = {}
-        else:
-            logger.info("No existing manifest found, starting fresh")
-            self.manifest = {}
-    
-    def _save_manifest(self):
-        """Save manifest to disk."""
+        path = Path(manifest_path)
+
+        # Legacy manifests were JSON documents; keep the database beside them
+        self.legacy_path = path.with_suffix('.json')
+        self.manifest_path = path.with_suffix('.db')
+
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._conn = self._connect()
+        self.manifest = _ManifestView(self)
+        self._migrate_legacy_manifest()
+
+        logger.info(f"Loaded manifest with {len(self.manifest)} entries")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the manifest database."""
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.manifest_path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+
+        # Columns added after the first SQLite release
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(manifest)")}
+        if 'xmp_done' not in columns:
+            conn.execute("ALTER TABLE manifest ADD COLUMN xmp_done INTEGER NOT NULL DEFAULT 0")
+
+        conn.commit()
+        return conn
+
+    def _migrate_legacy_manifest(self):
+        """Import a legacy JSON manifest once, then move it aside."""
+        if not self.legacy_path.exists():
+            return
+
         try:
-            # Ensure directory exists
-            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Convert to serializable format
-            data = {}
-            for path, entry in self.manifest.items():
-                data[path] = {
-                    'path': entry.path,
-                    'size': entry.size,
-                    'mtime': entry.mtime,
-                    'checksum': entry.checksum,
-                    'last_sync': entry.last_sync.isoformat() if entry.last_sync else None
-                }
-            
-            with open(self.manifest_path, 'w') as f:
-                json.dump(data, f, indent=2)
-            
-            logger.debug(f"Saved manifest with {len(self.manifest)} entries")
+            with open(self.legacy_path, 'r') as f:
+                data = json.load(f)
         except Exception as e:
-            logger.error(f"Failed to save manifest: {e}")
-    
+            logger.warning(f"Skipping unreadable legacy manifest {self.legacy_path}: {e}")
+            return
+
+        with self.batch():
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO manifest (path, size, mtime, checksum, last_sync) VALUES (?, ?, ?, ?, ?)",
+                (
+                    (entry['path'], entry['size'], entry['mtime'], entry.get('checksum'), entry.get('last_sync'))
+                    for entry in data.values()
+                )
+            )
+
+        migrated_path = self.legacy_path.with_suffix('.json.migrated')
+        self.legacy_path.rename(migrated_path)
+        logger.info(f"Migrated {len(data)} legacy manifest entries from {self.legacy_path}")
+
+    @contextmanager
+    def batch(self):
+        """
+        Group manifest writes into a single transaction.
+
+        Writes made inside the block are committed once on exit, or rolled
+        back if the block raises. Nested blocks join the outer transaction.
+        """
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            except Exception:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._conn.rollback()
+                raise
+            else:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._conn.commit()
+
+    def _commit(self):
+        """Commit unless a batch is open."""
+        if self._batch_depth == 0:
+            self._conn.commit()
+
+    def get_entry(self, file_path: str) -> Optional[FileManifest]:
+        """Get the manifest entry for a path, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, size, mtime, checksum, last_sync FROM manifest WHERE path = ?",
+                (file_path,)
+            ).fetchone()
+        return _row_to_entry(row) if row else None
+
     def get_changes(
         self,
-        remote_files: List[FileStat]
+        remote_files: Iterable[FileStat],
+        prefix: Optional[str] = None,
+        detect_deletions: bool = True
     ) -> Tuple[List[str], List[str], List[str]]:
         """
         Compare remote files with manifest.
-        
+
+        Remote stats are streamed into a temporary table in chunks and diffed
+        with indexed joins, so the manifest is never materialized in Python.
+
+        Args:
+            remote_files: Remote file stats (any iterable)
+            prefix: Only report deletions for manifest paths under this prefix
+            detect_deletions: Set False when `remote_files` is a partial
+                (incremental) listing, so absent files aren't reported deleted
+
         Returns:
             (new_files, modified_files, deleted_files)
         """
-        new_files = []
-        modified_files = []
-        deleted_files = []
-        
-        remote_by_path = {f.path: f for f in remote_files}
-        
-        # Find new and modified files
-        for path, stat in remote_by_path.items():
-            if path not in self.manifest:
-                new_files.append(path)
-            else:
-                manifest_entry = self.manifest[path]
-                if manifest_entry.needs_sync(stat):
-                    modified_files.append(path)
-        
-        # Find deleted files (files in manifest but not in remote)
-        for path in self.manifest:
-            if path not in remote_by_path:
-                deleted_files.append(path)
-        
+        with self._lock:
+            conn = self._conn
+            conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS remote_scan "
+                "(path TEXT PRIMARY KEY, size INTEGER, mtime REAL)"
+            )
+            conn.execute("DELETE FROM remote_scan")
+
+            chunk = []
+            for stat in remote_files:
+                chunk.append((stat.path, stat.size, stat.mtime))
+                if len(chunk) >= INSERT_CHUNK_SIZE:
+                    conn.executemany("INSERT OR REPLACE INTO remote_scan VALUES (?, ?, ?)", chunk)
+                    chunk = []
+            if chunk:
+                conn.executemany("INSERT OR REPLACE INTO remote_scan VALUES (?, ?, ?)", chunk)
+
+            new_files = [row[0] for row in conn.execute(
+                "SELECT r.path FROM remote_scan r "
+                "LEFT JOIN manifest m ON m.path = r.path WHERE m.path IS NULL"
+            )]
+
+            # Mirrors FileManifest.needs_sync: size changed or remote is newer
+            modified_files = [row[0] for row in conn.execute(
+                "SELECT r.path FROM remote_scan r "
+                "JOIN manifest m ON m.path = r.path "
+                "WHERE m.size != r.size OR m.mtime < r.mtime"
+            )]
+
+            deleted_files = []
+            if detect_deletions:
+                deleted_query = (
+                    "SELECT m.path FROM manifest m "
+                    "LEFT JOIN remote_scan r ON r.path = m.path WHERE r.path IS NULL"
+                )
+                params: tuple = ()
+                if prefix:
+                    deleted_query += " AND m.path >= ? AND m.path < ?"
+                    params = _prefix_range(prefix)
+                deleted_files = [row[0] for row in conn.execute(deleted_query, params)]
+
+            conn.execute("DELETE FROM remote_scan")
+            self._commit()
+
         logger.info(f"Changes detected - New: {len(new_files)}, Modified: {len(modified_files)}, Deleted: {len(deleted_files)}")
-        
+
         return new_files, modified_files, deleted_files
-    
+
+    def changed_files(self, remote_files: List[FileStat], scan_prefix: Optional[str] = None) -> List[FileStat]:
+        """
+        Return the files that are new or modified compared to the manifest.
+
+        Meant for one chunk of a streamed listing at a time; unlike
+        `get_changes` it returns the stats themselves, so the listing
+        doesn't have to be held in full.
+
+        Args:
+            remote_files: One chunk of a remote listing
+            scan_prefix: Also record the listed paths for the full scan of
+                this prefix opened with `begin_scan`, so `scan_deletions`
+                can report what the listing no longer contains
+        """
+        with self._lock:
+            conn = self._conn
+            conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS remote_scan "
+                "(path TEXT PRIMARY KEY, size INTEGER, mtime REAL)"
+            )
+            conn.execute("DELETE FROM remote_scan")
+            for i in range(0, len(remote_files), INSERT_CHUNK_SIZE):
+                conn.executemany(
+                    "INSERT OR REPLACE INTO remote_scan VALUES (?, ?, ?)",
+                    ((f.path, f.size, f.mtime) for f in remote_files[i:i + INSERT_CHUNK_SIZE])
+                )
+            if scan_prefix is not None:
+                self._create_scan_seen()
+                conn.executemany(
+                    "INSERT OR IGNORE INTO scan_seen VALUES (?, ?)",
+                    ((scan_prefix, f.path) for f in remote_files)
+                )
+
+            # Mirrors FileManifest.needs_sync: size changed or remote is newer
+            changed = {row[0] for row in conn.execute(
+                "SELECT r.path FROM remote_scan r "
+                "LEFT JOIN manifest m ON m.path = r.path "
+                "WHERE m.path IS NULL OR m.size != r.size OR m.mtime < r.mtime"
+            )}
+
+            conn.execute("DELETE FROM remote_scan")
+            self._commit()
+
+        return [f for f in remote_files if f.path in changed]
+
+    def _create_scan_seen(self):
+        self._conn.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS scan_seen "
+            "(prefix TEXT NOT NULL, path TEXT NOT NULL, PRIMARY KEY (prefix, path))"
+        )
+
+    def begin_scan(self, prefix: str):
+        """
+        Start recording a full streamed listing of `prefix`.
+
+        Paths are kept per prefix, so full scans of different source
+        folders on one manifest can run at the same time.
+        """
+        with self._lock:
+            self._create_scan_seen()
+            self._conn.execute("DELETE FROM scan_seen WHERE prefix = ?", (prefix,))
+            self._commit()
+
+    def scan_deletions(self, prefix: str) -> List[str]:
+        """
+        Manifest paths under `prefix` missing from the full scan recorded
+        since `begin_scan`. The recorded paths are discarded.
+        """
+        with self._lock:
+            conn = self._conn
+            self._create_scan_seen()
+            deleted_files = [row[0] for row in conn.execute(
+                "SELECT m.path FROM manifest m "
+                "LEFT JOIN scan_seen s ON s.prefix = ? AND s.path = m.path "
+                "WHERE s.path IS NULL AND m.path >= ? AND m.path < ?",
+                (prefix,) + _prefix_range(prefix)
+            )]
+            conn.execute("DELETE FROM scan_seen WHERE prefix = ?", (prefix,))
+            self._commit()
+        return deleted_files
+
     def update_manifest(self, file_path: str, stat: FileStat, checksum: str = None):
         """Update manifest with new file state."""
-        self.manifest[file_path] = FileManifest(
-            path=file_path,
-            size=stat.size,
-            mtime=stat.mtime,
-            checksum=checksum,
-            last_sync=datetime.now()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO manifest (path, size, mtime, checksum, last_sync) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime = excluded.mtime, "
+                "checksum = excluded.checksum, last_sync = excluded.last_sync",
+                (file_path, stat.size, stat.mtime, checksum, datetime.now().isoformat())
+            )
+            self._commit()
+
+    def update_many(self, stats: Iterable[FileStat]) -> int:
+        """
+        Upsert many file states in one transaction.
+
+        Returns:
+            Number of entries written
+        """
+        now = datetime.now().isoformat()
+        count = 0
+        with self.batch():
+            chunk = []
+            for stat in stats:
+                chunk.append((stat.path, stat.size, stat.mtime, now))
+                if len(chunk) >= INSERT_CHUNK_SIZE:
+                    self._upsert_chunk(chunk)
+                    count += len(chunk)
+                    chunk = []
+            if chunk:
+                self._upsert_chunk(chunk)
+                count += len(chunk)
+
+        logger.debug(f"Upserted {count} manifest entries")
+        return count
+
+    def _upsert_chunk(self, chunk: list):
+        self._conn.executemany(
+            "INSERT INTO manifest (path, size, mtime, last_sync) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime = excluded.mtime, "
+            "last_sync = excluded.last_sync, "
+            "checksum = CASE WHEN manifest.size = excluded.size AND manifest.mtime = excluded.mtime "
+            "THEN manifest.checksum ELSE NULL END, "
+            "xmp_done = CASE WHEN manifest.size = excluded.size AND manifest.mtime = excluded.mtime "
+            "THEN manifest.xmp_done ELSE 0 END",
+            chunk
         )
-        self._save_manifest()
-    
+
+    def pending_xmp(self, file_paths: Iterable[str]) -> List[str]:
+        """Return the paths whose XMP sidecar has not been generated yet."""
+        paths = list(file_paths)
+        done = set()
+        with self._lock:
+            for i in range(0, len(paths), QUERY_CHUNK_SIZE):
+                chunk = paths[i:i + QUERY_CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                done.update(row[0] for row in self._conn.execute(
+                    f"SELECT path FROM manifest WHERE xmp_done = 1 AND path IN ({placeholders})",
+                    chunk
+                ))
+        return [p for p in paths if p not in done]
+
+    def mark_xmp_done(self, file_paths: Iterable[str]):
+        """Record that XMP sidecars exist for these paths."""
+        with self.batch():
+            self._conn.executemany(
+                "UPDATE manifest SET xmp_done = 1 WHERE path = ?",
+                ((p,) for p in file_paths)
+            )
+
+    def cached_checksums(self, stats: Iterable[FileStat]) -> Dict[str, str]:
+        """
+        Return stored checksums that are still valid for these file states.
+
+        A checksum only counts when the entry's size and mtime match the
+        stat; `update_many` clears it whenever either changes.
+        """
+        stats = list(stats)
+        cached = {}
+        with self._lock:
+            for i in range(0, len(stats), QUERY_CHUNK_SIZE):
+                chunk = {s.path: s for s in stats[i:i + QUERY_CHUNK_SIZE]}
+                placeholders = ','.join('?' * len(chunk))
+                for path, size, mtime, checksum in self._conn.execute(
+                    f"SELECT path, size, mtime, checksum FROM manifest "
+                    f"WHERE checksum IS NOT NULL AND path IN ({placeholders})",
+                    list(chunk)
+                ):
+                    stat = chunk[path]
+                    if size == stat.size and mtime == stat.mtime:
+                        cached[path] = checksum
+        return cached
+
+    def set_checksums(self, checksums: Mapping[str, str]):
+        """Store content checksums for paths already in the manifest."""
+        with self.batch():
+            self._conn.executemany(
+                "UPDATE manifest SET checksum = ? WHERE path = ?",
+                ((checksum, path) for path, checksum in checksums.items())
+            )
+
     def remove_from_manifest(self, file_path: str):
         """Remove file from manifest."""
-        if file_path in self.manifest:
-            del self.manifest[file_path]
-            self._save_manifest()
-    
+        with self._lock:
+            self._conn.execute("DELETE FROM manifest WHERE path = ?", (file_path,))
+            self._commit()
+
+    def remove_many(self, file_paths: Iterable[str]):
+        """Remove many files from the manifest in one transaction."""
+        with self.batch():
+            self._conn.executemany("DELETE FROM manifest WHERE path = ?", ((p,) for p in file_paths))
+
+    def get_watermark(self, prefix: str) -> Optional[Watermark]:
+        """Get the incremental listing watermark for a source folder."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT prefix, max_mtime, last_full_scan FROM watermarks WHERE prefix = ?",
+                (prefix,)
+            ).fetchone()
+        if not row:
+            return None
+        return Watermark(
+            prefix=row[0],
+            max_mtime=row[1],
+            last_full_scan=datetime.fromisoformat(row[2]) if row[2] else None
+        )
+
+    def set_watermark(self, prefix: str, max_mtime: float, full_scan: bool = False):
+        """
+        Record the newest mtime fully synced for a source folder.
+
+        Args:
+            prefix: Source folder
+            max_mtime: Files at or below this mtime need not be listed again
+            full_scan: The listing that produced it covered the whole folder
+        """
+        with self._lock:
+            if full_scan:
+                self._conn.execute(
+                    "INSERT INTO watermarks (prefix, max_mtime, last_full_scan) VALUES (?, ?, ?) "
+                    "ON CONFLICT(prefix) DO UPDATE SET max_mtime = excluded.max_mtime, "
+                    "last_full_scan = excluded.last_full_scan",
+                    (prefix, max_mtime, datetime.now().isoformat())
+                )
+            else:
+                self._conn.execute(
+                    "INSERT INTO watermarks (prefix, max_mtime) VALUES (?, ?) "
+                    "ON CONFLICT(prefix) DO UPDATE SET max_mtime = excluded.max_mtime",
+                    (prefix, max_mtime)
+                )
+            self._commit()
+
+    def record_source(self, host: str, port: int):
+        """Note that files in this manifest were synced from host:port."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sources (host, port, last_sync) VALUES (?, ?, ?) "
+                "ON CONFLICT(host, port) DO UPDATE SET last_sync = excluded.last_sync",
+                (host, int(port), datetime.now().isoformat())
+            )
+            self._commit()
+
     def clear(self):
         """Clear the manifest."""
-        self.manifest = {}
-        self._save_manifest()
-    
+        with self._lock:
+            self._conn.execute("DELETE FROM manifest")
+            self._conn.execute("DELETE FROM watermarks")
+            self._commit()
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
     def get_stats(self) -> dict:
         """Get manifest statistics."""
-        if not self.manifest:
-            return {
-                'total_files': 0,
-                'total_size': 0,
-                'last_sync': None
-            }
-        
-        total_size = sum(entry.size for entry in self.manifest.values())
-        last_sync = max((entry.last_sync for entry in self.manifest.values() if entry.last_sync), default=None)
-        
+        with self._lock:
+            total_files, total_size, last_sync = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), MAX(last_sync) FROM manifest"
+            ).fetchone()
+
         return {
-            'total_files': len(self.manifest),
+            'total_files': total_files,
             'total_size': total_size,
-            'last_sync': last_sync.isoformat() if last_sync else None
+            'last_sync': last_sync
         }
@@ -4,22 +4,52 @@ Core sync execution engine
 
 import asyncio
 import logging
-from typing import Optional, Callable
-from datetime import datetime
+import os
+import random
+import uuid
+from typing import Dict, List, Optional, Callable, Set, Tuple
+from datetime import datetime, timedelta
 
-from ..models import SyncConfig, SyncResult
+from ..models import SyncConfig, SyncResult, FileStat, MediaEvent, MediaEventData, BatchTransferResult
 from ..transport import TransportAdapter
+from ..ingest import MediaEventManager
 from .manifest import ManifestManager
+from .transfer_planner import TransferPlanner, relative_path
 
 logger = logging.getLogger(__name__)
 
+# Seconds re-listed below the watermark on incremental listings
+WATERMARK_SLACK_SECONDS = 2.0
+
+# Listed files diffed against the manifest at a time
+SCAN_CHUNK_SIZE = 5000
+
+# Longest wait between transfer retries, in seconds
+MAX_RETRY_DELAY = 60.0
+
+
+def retry_delay(base: float, attempt: int) -> float:
+    """Exponential backoff for retry `attempt` (1-based) with equal jitter."""
+    delay = min(MAX_RETRY_DELAY, base * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
 
 class SyncEngine:
     """Core sync execution engine."""
     
-    def __init__(self, transport: TransportAdapter, manifest_path: str = None):
+    def __init__(
+        self,
+        transport: TransportAdapter,
+        manifest_path: str = None,
+        event_manager: Optional[MediaEventManager] = None,
+        sync_id: Optional[str] = None
+    ):
         self.transport = transport
         self.manifest = ManifestManager(manifest_path) if manifest_path else None
+        self.event_manager = event_manager
+        self.sync_id = sync_id
+        self.planner = TransferPlanner()
+        self._transfer_slots: Optional[asyncio.Semaphore] = None
     
     async def sync_folder(
         self,
@@ -54,15 +84,15 @@ class SyncEngine:
             
             # Use manifest-based change detection if available
             if self.manifest:
-                remote_files = await self.transport.list_files(source)
-                new_files, modified_files, deleted_files = self.manifest.get_changes(remote_files)
+                full_scan, changed_files, deleted_files, listed_mtime = await self._scan_changes(source, config)
                 
-                logger.info(f"Manifest analysis: {len(new_files)} new, {len(modified_files)} modified")
+                if deleted_files:
+                    self.manifest.remove_many(deleted_files)
+                    logger.info(f"Removed {len(deleted_files)} deleted files from manifest for {source}")
                 
-                # For now, we'll still use rsync for the actual transfer
-                # but this gives us intelligence about what changed
-                if not new_files and not modified_files:
+                if not changed_files:
                     logger.info("No changes detected, skipping transfer")
+                    self._advance_watermark(source, listed_mtime, [], full_scan)
                     duration = (datetime.now() - start_time).total_seconds()
                     return SyncResult(
                         success=True,
@@ -71,8 +101,18 @@ class SyncEngine:
                         duration=duration,
                         errors=[]
                     )
+                
+                result, transferred = await self._sync_changed_files(
+                    source, dest, changed_files, config, progress_callback, start_time
+                )
+                
+                transferred_paths = {f.path for f in transferred}
+                pending = [f for f in changed_files if f.path not in transferred_paths]
+                self._advance_watermark(source, listed_mtime, pending, full_scan)
+                
+                return result
             
-            # Perform the transfer
+            # No manifest: fall back to a whole-folder rsync
             if progress_callback:
                 progress_callback({
                     'stage': 'transferring',
@@ -90,15 +130,9 @@ class SyncEngine:
             if result.success:
                 logger.info(f"Sync completed: {result.bytes_transferred} bytes in {duration:.2f}s")
                 
-                # Update manifest if available
-                if self.manifest:
-                    remote_files = await self.transport.list_files(source)
-                    for file_stat in remote_files:
-                        self.manifest.update_manifest(file_stat.path, file_stat)
-                
                 return SyncResult(
                     success=True,
-                    files_transferred=1,  # folder count
+                    files_transferred=result.files_transferred,
                     bytes_transferred=result.bytes_transferred,
                     duration=duration,
                     errors=[]
@@ -126,6 +160,513 @@ class SyncEngine:
                 errors=errors
             )
     
+    async def sync_files(
+        self,
+        source: str,
+        dest: str,
+        files: List[FileStat],
+        config: SyncConfig,
+        progress_callback: Optional[Callable] = None
+    ) -> SyncResult:
+        """
+        Sync specific files reported by a change feed.
+        
+        Files the manifest already holds at the same size and mtime are
+        skipped. The folder watermark is left alone, so the next regular
+        sync still lists anything the feed missed.
+        
+        Args:
+            source: Source folder root the files live under
+            dest: Destination folder
+            files: Remote file stats to sync
+            config: Sync configuration
+            progress_callback: Function to report progress
+        
+        Returns:
+            SyncResult for the files actually transferred
+        """
+        start_time = datetime.now()
+        
+        try:
+            if self.manifest:
+                new_files, modified_files, _ = self.manifest.get_changes(files, detect_deletions=False)
+                changed = set(new_files)
+                changed.update(modified_files)
+                files = [f for f in files if f.path in changed]
+            
+            if not files:
+                return SyncResult(
+                    success=True,
+                    files_transferred=0,
+                    bytes_transferred=0,
+                    duration=(datetime.now() - start_time).total_seconds()
+                )
+            
+            result, _ = await self._sync_changed_files(
+                source, dest, files, config, progress_callback, start_time
+            )
+            return result
+        
+        except Exception as e:
+            logger.error(f"Sync error: {e}")
+            return SyncResult(
+                success=False,
+                files_transferred=0,
+                bytes_transferred=0,
+                duration=(datetime.now() - start_time).total_seconds(),
+                errors=[str(e)]
+            )
+    
+    async def _scan_changes(
+        self,
+        source: str,
+        config: SyncConfig
+    ) -> Tuple[bool, List[FileStat], List[str], Optional[float]]:
+        """
+        Stream the remote listing through the manifest diff in chunks.
+        
+        Only changed files are kept, so memory follows the size of the
+        change set rather than of the remote tree. The listing is
+        incremental when a watermark allows it. A full listing also records
+        every listed path in the manifest database, so manifest entries
+        under `source` that are no longer listed come back as deleted.
+        
+        Returns:
+            (full_scan, changed files, deleted paths, newest mtime listed or None)
+        """
+        watermark = self.manifest.get_watermark(source) if config.incremental_listing else None
+        
+        full_scan = (
+            watermark is None or
+            watermark.last_full_scan is None or
+            datetime.now() - watermark.last_full_scan > timedelta(hours=config.full_reconcile_hours)
+        )
+        
+        # Re-list a small window below the watermark so files sharing its
+        # mtime, or written while the last listing ran, are not missed
+        since = None if full_scan else watermark.max_mtime - WATERMARK_SLACK_SECONDS
+        scan_prefix = source if full_scan else None
+        if full_scan:
+            self.manifest.begin_scan(source)
+        
+        changed_files: List[FileStat] = []
+        listed = 0
+        newest: Optional[float] = None
+        chunk: List[FileStat] = []
+        
+        def diff_chunk():
+            nonlocal listed, newest
+            changed_files.extend(self.manifest.changed_files(chunk, scan_prefix))
+            listed += len(chunk)
+            chunk_newest = max(f.mtime for f in chunk)
+            newest = chunk_newest if newest is None else max(newest, chunk_newest)
+            chunk.clear()
+        
+        async for stat in self.transport.iter_files(source, since):
+            chunk.append(stat)
+            if len(chunk) >= SCAN_CHUNK_SIZE:
+                diff_chunk()
+        if chunk:
+            diff_chunk()
+        
+        deleted_files: List[str] = []
+        if full_scan:
+            deleted_files = self.manifest.scan_deletions(source)
+            logger.info(
+                f"Full listing of {source}: {listed} files, {len(changed_files)} changed, "
+                f"{len(deleted_files)} deleted"
+            )
+        else:
+            logger.info(
+                f"Incremental listing of {source} since {since:.0f}: "
+                f"{listed} files, {len(changed_files)} changed"
+            )
+        return full_scan, changed_files, deleted_files, newest
+    
+    def _advance_watermark(
+        self,
+        source: str,
+        listed_mtime: Optional[float],
+        pending: List[FileStat],
+        full_scan: bool
+    ):
+        """
+        Move the watermark past everything listed, but not past files that
+        still need syncing, so the next incremental listing includes them.
+        
+        Args:
+            listed_mtime: Newest mtime in the listing, None if it was empty
+        """
+        if listed_mtime is None:
+            if full_scan:
+                self.manifest.set_watermark(source, 0.0, full_scan=True)
+            return
+        
+        mark = listed_mtime
+        
+        previous = self.manifest.get_watermark(source)
+        if previous and not full_scan:
+            mark = max(mark, previous.max_mtime)
+        
+        if pending:
+            mark = min(mark, min(f.mtime for f in pending) - WATERMARK_SLACK_SECONDS)
+        
+        self.manifest.set_watermark(source, mark, full_scan=full_scan)
+    
+    async def _sync_changed_files(
+        self,
+        source: str,
+        dest: str,
+        changed_files: List[FileStat],
+        config: SyncConfig,
+        progress_callback: Optional[Callable],
+        start_time: datetime
+    ) -> Tuple[SyncResult, List[FileStat]]:
+        """
+        Transfer only the changed files, sharded across parallel rsync workers.
+        
+        Per-file results are written back to the manifest in one batch, so
+        files that failed are picked up again by the next sync's diff.
+        
+        Returns:
+            (result, files that were transferred)
+        """
+        plan = self.planner.plan(source, dest, changed_files, config.parallel_transfers)
+        
+        if progress_callback:
+            progress_callback({
+                'stage': 'transferring',
+                'message': f'Transferring {plan.total_files} files from {source} '
+                           f'with {len(plan.buckets)} worker(s)',
+                'planned_files': plan.total_files,
+                'planned_bytes': plan.total_bytes
+            })
+        
+        slots = self._transfer_slots or asyncio.Semaphore(config.parallel_transfers)
+        
+        async def run_bucket(bucket):
+            return await self._transfer_with_retry(
+                source, dest, bucket.relative_paths(source), config, slots, progress_callback,
+                file_sizes={relative_path(source, f.path): f.size for f in bucket.files}
+            )
+        
+        results = await asyncio.gather(
+            *[run_bucket(bucket) for bucket in plan.buckets],
+            return_exceptions=True
+        )
+        
+        stats_by_relative = {relative_path(source, f.path): f for f in changed_files}
+        transferred: List[FileStat] = []
+        received: List[str] = []
+        errors = []
+        
+        for bucket, result in zip(plan.buckets, results):
+            if isinstance(result, Exception):
+                logger.error(f"Transfer worker {bucket.index} failed: {result}")
+                errors.append(str(result))
+                continue
+            transferred.extend(stats_by_relative[p] for p in result.transferred if p in stats_by_relative)
+            # Files rsync skipped as already current don't need new sidecars
+            received.extend(result.received)
+            if result.failed:
+                errors.append(
+                    f"{len(result.failed)} file(s) failed in worker {bucket.index} "
+                    f"after {config.retry_attempts + 1} attempt(s): "
+                    f"{result.error or 'unknown error'}"
+                )
+        
+        checksums = {}
+        rejected = set()
+        if config.calculate_hashes and transferred:
+            checksums, rejected = await self._hash_transferred(
+                source, dest, transferred, config, progress_callback
+            )
+            if rejected:
+                errors.append(
+                    f"{len(rejected)} file(s) from {source} failed verification and will be re-sent"
+                )
+                transferred = [f for f in transferred if f.path not in rejected]
+        
+        if self.manifest and transferred:
+            self.manifest.update_many(transferred)
+            if checksums:
+                self.manifest.set_checksums(checksums)
+        
+        received_stats = [
+            stats_by_relative[p] for p in received
+            if p in stats_by_relative and stats_by_relative[p].path not in rejected
+        ]
+        
+        xmp_written: List[str] = []
+        if config.generate_xmp and received_stats:
+            xmp_written = await self._generate_xmp(dest, received_stats, source, progress_callback)
+        
+        if self.event_manager and received_stats:
+            await self._emit_synced(source, dest, received_stats, xmp_written)
+        
+        duration = (datetime.now() - start_time).total_seconds()
+        bytes_transferred = sum(f.size for f in transferred)
+        
+        logger.info(
+            f"Sync completed: {len(transferred)}/{plan.total_files} files, "
+            f"{bytes_transferred} bytes in {duration:.2f}s"
+        )
+        
+        return SyncResult(
+            success=not errors,
+            files_transferred=len(transferred),
+            bytes_transferred=bytes_transferred,
+            duration=duration,
+            errors=errors,
+            xmp_written=len(xmp_written)
+        ), transferred
+    
+    async def _transfer_with_retry(
+        self,
+        source: str,
+        dest: str,
+        relative_paths: List[str],
+        config: SyncConfig,
+        slots: asyncio.Semaphore,
+        progress_callback: Optional[Callable],
+        file_sizes: Optional[Dict[str, int]] = None
+    ) -> BatchTransferResult:
+        """
+        Transfer files, retrying only the ones that failed.
+        
+        Up to `config.retry_attempts` retries follow the first run, each
+        after an exponential backoff with jitter. The wait happens outside
+        the worker slot so other buckets keep transferring meanwhile.
+        
+        Every attempt reports progress under one `transfer_id` for the
+        batch, on top of the files earlier attempts delivered, so a failed
+        attempt's partial counters are replaced rather than added to.
+        
+        Args:
+            file_sizes: Size per relative path, used to carry finished
+                files' bytes over to the next attempt's progress
+        
+        Returns:
+            BatchTransferResult merged over all attempts; `received` is
+            always a list
+        """
+        pending = list(relative_paths)
+        transferred: List[str] = []
+        received: List[str] = []
+        bytes_transferred = 0
+        error = None
+        start = datetime.now()
+        
+        batch_id = uuid.uuid4().hex[:12]
+        delivered = {'bytes': 0, 'files': 0}
+        
+        def batch_progress(update: dict):
+            if 'transfer_id' in update:
+                update = dict(
+                    update,
+                    transfer_id=batch_id,
+                    transferred_bytes=delivered['bytes'] + update.get('transferred_bytes', 0),
+                    transferred_files=delivered['files'] + update.get('transferred_files', 0)
+                )
+            progress_callback(update)
+        
+        for attempt in range(config.retry_attempts + 1):
+            if attempt:
+                delay = retry_delay(config.retry_delay_seconds, attempt)
+                logger.warning(
+                    f"Retrying {len(pending)} file(s) from {source} in {delay:.1f}s "
+                    f"(attempt {attempt}/{config.retry_attempts}): {error}"
+                )
+                await asyncio.sleep(delay)
+            
+            async with slots:
+                try:
+                    result = await self.transport.transfer_files(
+                        source,
+                        dest,
+                        pending,
+                        progress_callback=batch_progress if progress_callback else None
+                    )
+                except Exception as e:
+                    result = BatchTransferResult(
+                        success=False,
+                        bytes_transferred=0,
+                        duration=0,
+                        failed=list(pending),
+                        error=str(e)
+                    )
+            
+            transferred.extend(result.transferred)
+            attempt_received = result.received if result.received is not None else result.transferred
+            received.extend(attempt_received)
+            delivered['files'] += len(attempt_received)
+            delivered['bytes'] += sum((file_sizes or {}).get(p, 0) for p in attempt_received)
+            bytes_transferred += result.bytes_transferred
+            
+            failed = set(result.failed)
+            pending = [p for p in pending if p in failed]
+            error = result.error
+            if not pending:
+                break
+        
+        return BatchTransferResult(
+            success=not pending,
+            bytes_transferred=bytes_transferred,
+            duration=(datetime.now() - start).total_seconds(),
+            transferred=transferred,
+            failed=pending,
+            error=error if pending else None,
+            received=received
+        )
+    
+    async def _hash_transferred(
+        self,
+        source: str,
+        dest: str,
+        transferred: List[FileStat],
+        config: SyncConfig,
+        progress_callback: Optional[Callable]
+    ) -> Tuple[Dict[str, str], Set[str]]:
+        """
+        Hash the local copies of transferred files, verifying them against
+        digests of the source files when `config.verify_transfers` is set.
+        
+        Files whose manifest entry already holds a checksum for the same
+        size and mtime are not hashed again. A copy that doesn't match its
+        source is deleted so the next sync transfers it whole again; files
+        the source can't hash are kept unverified.
+        
+        Returns:
+            (checksum per remote path, remote paths that failed verification)
+        """
+        from .hash_pipeline import get_hash_pipeline
+        
+        cached = self.manifest.cached_checksums(transferred) if self.manifest else {}
+        local_to_stat = {
+            os.path.join(dest, relative_path(source, f.path)): f
+            for f in transferred if f.path not in cached
+        }
+        if not local_to_stat:
+            return {}, set()
+        
+        if progress_callback:
+            progress_callback({
+                'stage': 'verifying',
+                'message': f'Hashing {len(local_to_stat)} files from {source}'
+            })
+        
+        try:
+            local = await get_hash_pipeline().hash_files(local_to_stat.keys())
+        except Exception as e:
+            logger.error(f"Hashing failed for {dest}: {e}")
+            return {}, set()
+        checksums = {local_to_stat[p].path: digest for p, digest in local.items()}
+        
+        if not config.verify_transfers:
+            return checksums, set()
+        
+        by_relative = {relative_path(source, f.path): f for f in local_to_stat.values()}
+        try:
+            remote = await self.transport.hash_files(source, list(by_relative))
+        except NotImplementedError:
+            return checksums, set()
+        except Exception as e:
+            logger.warning(f"Could not hash files on the source, {source} left unverified: {e}")
+            return checksums, set()
+        
+        rejected = set()
+        for rel, stat in by_relative.items():
+            expected = remote.get(rel)
+            actual = checksums.get(stat.path)
+            if expected is None or actual is None or expected == actual:
+                continue
+            logger.warning(f"Checksum mismatch for {stat.path}, removing local copy")
+            rejected.add(stat.path)
+            del checksums[stat.path]
+            try:
+                os.remove(os.path.join(dest, rel))
+            except OSError as e:
+                logger.error(f"Could not remove corrupt copy of {stat.path}: {e}")
+        
+        return checksums, rejected
+    
+    async def _generate_xmp(
+        self,
+        dest: str,
+        received: List[FileStat],
+        source: str,
+        progress_callback: Optional[Callable]
+    ) -> List[str]:
+        """
+        Write XMP sidecars for images this sync just received.
+        
+        Images already marked done in the manifest are skipped, and
+        finished ones are marked, so each image is decoded once.
+        
+        Returns:
+            Local paths of images that got a new sidecar
+        """
+        from .xmp_pipeline import get_xmp_pipeline
+        
+        remote_paths = [f.path for f in received]
+        if self.manifest:
+            remote_paths = self.manifest.pending_xmp(remote_paths)
+        
+        local_to_remote = {
+            os.path.join(dest, relative_path(source, path)): path
+            for path in remote_paths
+        }
+        if not local_to_remote:
+            return []
+        
+        if progress_callback:
+            progress_callback({
+                'stage': 'processing',
+                'message': f'Generating XMP sidecars for {len(local_to_remote)} images'
+            })
+        
+        try:
+            result = await get_xmp_pipeline().process(local_to_remote.keys())
+        except Exception as e:
+            logger.error(f"XMP generation failed for {dest}: {e}")
+            return []
+        
+        if self.manifest and result.done:
+            self.manifest.mark_xmp_done(local_to_remote[p] for p in result.done)
+        
+        return result.written
+    
+    async def _emit_synced(
+        self,
+        source: str,
+        dest: str,
+        received: List[FileStat],
+        xmp_written: List[str]
+    ):
+        """
+        Emit a FILE_SYNCED event per file rsync wrote.
+        
+        The event manager coalesces them into batches per subscriber; a
+        full subscriber queue makes this wait, which holds back this
+        folder's completion but not transfers already running elsewhere.
+        """
+        if not self.event_manager.has_subscribers(MediaEvent.FILE_SYNCED, MediaEvent.BATCH_SYNCED):
+            return
+        
+        now = datetime.now()
+        with_xmp = set(xmp_written)
+        for stat in received:
+            local_path = os.path.join(dest, relative_path(source, stat.path))
+            await self.event_manager.emit(MediaEventData(
+                event_type=MediaEvent.FILE_SYNCED,
+                timestamp=now,
+                sync_id=self.sync_id or '',
+                file_path=local_path,
+                file_size=stat.size,
+                metadata={'mtime': stat.mtime, 'remote_path': stat.path},
+                xmp_path=local_path + '.xmp' if local_path in with_xmp else None
+            ))
+    
     async def sync_folders_parallel(
         self,
         folder_pairs: list,
@@ -144,17 +685,32 @@ class SyncEngine:
             List of SyncResult objects
         """
         semaphore = asyncio.Semaphore(config.parallel_transfers)
+        # Folders and the rsync workers inside them draw from one budget,
+        # so nesting never runs more than parallel_transfers rsyncs at once
+        self._transfer_slots = asyncio.Semaphore(config.parallel_transfers)
+        completed = 0
         
         async def sync_with_semaphore(src: str, dest: str):
+            nonlocal completed
             async with semaphore:
-                return await self.sync_folder(src, dest, config, progress_callback)
+                result = await self.sync_folder(src, dest, config, progress_callback)
+            completed += 1
+            if progress_callback:
+                progress_callback({
+                    'completed_folders': completed,
+                    'current_folder': src
+                })
+            return result
         
         tasks = [
             sync_with_semaphore(src, dest)
             for src, dest in folder_pairs
         ]
         
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            self._transfer_slots = None
         
         # Convert exceptions to error results
         processed_results = []
@@ -0,0 +1,111 @@
+"""
+Transfer planner for file-level parallel syncs
+"""
+
+import heapq
+import logging
+from dataclasses import dataclass, field
+from typing import Iterable, List
+
+from ..models import FileStat
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TransferBucket:
+    """A set of files transferred together by one rsync worker."""
+    index: int
+    files: List[FileStat] = field(default_factory=list)
+    total_bytes: int = 0
+
+    def relative_paths(self, source_root: str) -> List[str]:
+        """Paths relative to the source root, as expected by `rsync --files-from`."""
+        return [relative_path(source_root, f.path) for f in self.files]
+
+
+@dataclass
+class TransferPlan:
+    """Size-balanced partition of changed files across transfer workers."""
+    source: str
+    dest: str
+    buckets: List[TransferBucket] = field(default_factory=list)
+
+    @property
+    def total_files(self) -> int:
+        return sum(len(b.files) for b in self.buckets)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(b.total_bytes for b in self.buckets)
+
+
+def relative_path(source_root: str, path: str) -> str:
+    """Strip the source root from a remote path."""
+    root = source_root.rstrip('/') + '/'
+    if path.startswith(root):
+        return path[len(root):]
+    return path.lstrip('/')
+
+
+class TransferPlanner:
+    """Turn a manifest diff into a size-balanced transfer plan."""
+
+    def __init__(self, min_bucket_bytes: int = 0):
+        """
+        Args:
+            min_bucket_bytes: Don't open another worker for less than this
+                much data; small syncs are cheaper as a single rsync
+        """
+        self.min_bucket_bytes = min_bucket_bytes
+
+    def plan(
+        self,
+        source: str,
+        dest: str,
+        changed_files: Iterable[FileStat],
+        workers: int
+    ) -> TransferPlan:
+        """
+        Shard changed files into at most `workers` buckets of similar total size.
+
+        Uses greedy longest-processing-time assignment: files are taken
+        largest first and each goes to the currently lightest bucket.
+
+        Args:
+            source: Source folder root
+            dest: Destination folder
+            changed_files: Files that need transferring
+            workers: Maximum number of concurrent rsync workers
+
+        Returns:
+            TransferPlan with non-empty buckets
+        """
+        files = sorted(changed_files, key=lambda f: f.size, reverse=True)
+        total_bytes = sum(f.size for f in files)
+
+        bucket_count = max(1, min(workers, len(files)))
+        if self.min_bucket_bytes > 0:
+            bucket_count = max(1, min(bucket_count, total_bytes // self.min_bucket_bytes))
+
+        buckets = [TransferBucket(index=i) for i in range(bucket_count)]
+        heap = [(0, i) for i in range(bucket_count)]
+
+        for stat in files:
+            load, i = heapq.heappop(heap)
+            buckets[i].files.append(stat)
+            buckets[i].total_bytes += stat.size
+            heapq.heappush(heap, (load + stat.size, i))
+
+        plan = TransferPlan(
+            source=source,
+            dest=dest,
+            buckets=[b for b in buckets if b.files]
+        )
+
+        logger.info(
+            f"Transfer plan for {source}: {plan.total_files} files, "
+            f"{plan.total_bytes} bytes across {len(plan.buckets)} worker(s)"
+        )
+
+        return plan
@@ -0,0 +1,157 @@
+"""
+Watch-mode sync driven by a remote change feed
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..models import SyncConfig, FileStat, WatchStatus
+from ..transport import TransportAdapter
+from .sync_engine import SyncEngine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RECONNECT_DELAY = 5.0
+MAX_RECONNECT_DELAY = 60.0
+
+
+class FolderWatcher:
+    """
+    Keep destination folders current from a remote change feed.
+
+    Files reported by `transport.watch_files` are debounced per path (a file
+    is sent once it has been quiet for `config.watch_debounce_seconds`) and
+    transferred in micro-batches of at most `config.watch_max_batch` files.
+    A regular incremental sync runs on start and after every reconnect to
+    pick up anything written while the feed was down.
+    """
+
+    def __init__(
+        self,
+        engine: SyncEngine,
+        transport: TransportAdapter,
+        config: SyncConfig,
+        roots: List[Tuple[str, str]],
+        status: WatchStatus,
+        progress_callback: Optional[Callable] = None,
+        reconnect_delay: float = DEFAULT_RECONNECT_DELAY
+    ):
+        """
+        Args:
+            engine: Sync engine holding the manifest for this instance
+            transport: Transport providing the change feed
+            config: Sync configuration (watch_* fields control batching)
+            roots: (remote folder, destination folder) pairs to watch
+            status: Status record updated as the watch runs
+            progress_callback: Function to report transfer progress
+            reconnect_delay: Initial wait before re-opening a dropped feed
+        """
+        self.engine = engine
+        self.transport = transport
+        self.config = config
+        self.roots = sorted(roots, key=lambda r: len(r[0]), reverse=True)
+        self.status = status
+        self.progress_callback = progress_callback
+        self.reconnect_delay = reconnect_delay
+
+        self._pending: Dict[str, Tuple[FileStat, float]] = {}
+
+    def _root_for(self, path: str) -> Optional[Tuple[str, str]]:
+        for source, dest in self.roots:
+            if path.startswith(source.rstrip('/') + '/'):
+                return source, dest
+        return None
+
+    def _on_file(self, stat: FileStat):
+        """Record a feed event; a repeat event for the same path restarts its debounce."""
+        self._pending[stat.path] = (stat, asyncio.get_running_loop().time())
+        self.status.files_seen += 1
+        self.status.last_event = datetime.now()
+
+    def _on_mode(self, mode: str):
+        self.status.mode = mode
+
+    async def run(self):
+        """Watch until cancelled, reconnecting with backoff when the feed drops."""
+        delay = self.reconnect_delay
+
+        while True:
+            await self._catch_up()
+
+            flusher = asyncio.get_running_loop().create_task(self._flush_loop())
+            try:
+                async for stat in self.transport.watch_files(
+                    [source for source, _ in self.roots],
+                    poll_interval=self.config.watch_poll_interval,
+                    settle_seconds=self.config.watch_debounce_seconds,
+                    on_mode=self._on_mode
+                ):
+                    delay = self.reconnect_delay
+                    self._on_file(stat)
+            except asyncio.CancelledError:
+                raise
+            except NotImplementedError:
+                raise
+            except Exception as e:
+                logger.error(f"Watch feed for {self.status.source_host} failed: {e}")
+                self.status.last_error = str(e)
+            finally:
+                flusher.cancel()
+                await asyncio.gather(flusher, return_exceptions=True)
+
+            # Files already reported have finished writing; don't hold them
+            await self._flush(force=True)
+
+            self.status.reconnects += 1
+            self.status.mode = None
+            logger.info(f"Watch feed for {self.status.source_host} dropped, reconnecting in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    async def _catch_up(self):
+        """Sync each root normally; the manifest watermark keeps this incremental."""
+        for source, dest in self.roots:
+            result = await self.engine.sync_folder(source, dest, self.config, self.progress_callback)
+            self._record(result)
+
+    async def _flush_loop(self):
+        interval = max(0.1, self.config.watch_debounce_seconds / 2)
+        while True:
+            await asyncio.sleep(interval)
+            await self._flush()
+
+    async def _flush(self, force: bool = False):
+        """Transfer files whose debounce has expired (all pending ones if forced)."""
+        now = asyncio.get_running_loop().time()
+        ready = [
+            stat for stat, seen in self._pending.values()
+            if force or now - seen >= self.config.watch_debounce_seconds
+        ]
+        if not ready:
+            return
+        for stat in ready:
+            del self._pending[stat.path]
+
+        by_root: Dict[Tuple[str, str], List[FileStat]] = {}
+        for stat in ready:
+            root = self._root_for(stat.path)
+            if root is None:
+                logger.debug(f"Watch event outside watched roots: {stat.path}")
+                continue
+            by_root.setdefault(root, []).append(stat)
+
+        batch_size = max(1, self.config.watch_max_batch)
+        for (source, dest), stats in by_root.items():
+            for i in range(0, len(stats), batch_size):
+                result = await self.engine.sync_files(
+                    source, dest, stats[i:i + batch_size], self.config, self.progress_callback
+                )
+                self.status.batches += 1
+                self._record(result)
+
+    def _record(self, result):
+        self.status.files_synced += result.files_transferred
+        if result.errors:
+            self.status.last_error = result.errors[-1]
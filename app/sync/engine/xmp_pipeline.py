@@ -0,0 +1,186 @@
+"""
+In-process XMP sidecar generation for freshly synced images
+"""
+
+import asyncio
+import contextlib
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple
+
+from ...utils.xmp_tool import is_valid_image, extract_prompt, create_or_update_xmp
+
+logger = logging.getLogger(__name__)
+
+# Images handed to a worker per task; amortizes pickling and IPC per call
+XMP_CHUNK_SIZE = 50
+
+# Per-image outcomes reported by workers
+XMP_WRITTEN = 'written'
+XMP_EXISTS = 'exists'
+XMP_NO_PROMPT = 'no_prompt'
+XMP_ERROR = 'error'
+
+
+@dataclass
+class XmpBatchResult:
+    """Outcome of generating sidecars for a set of images."""
+    written: List[str] = field(default_factory=list)
+    existing: List[str] = field(default_factory=list)
+    no_prompt: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+
+    @property
+    def done(self) -> List[str]:
+        """Images that need no further work: a sidecar exists or there's nothing to write."""
+        return self.written + self.existing + self.no_prompt
+
+
+def _generate_xmp_chunk(image_paths: List[str], overwrite: bool) -> List[Tuple[str, str]]:
+    """
+    Worker entry point: write sidecars for a chunk of images.
+
+    Runs in a pool process. xmp_tool reports per-file status on stdout,
+    which is swallowed here; the status tuple is returned instead.
+    """
+    results = []
+    for image_path in image_paths:
+        try:
+            if os.path.exists(image_path + '.xmp') and not overwrite:
+                results.append((image_path, XMP_EXISTS))
+                continue
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                prompt = extract_prompt(image_path)
+                if prompt is None:
+                    results.append((image_path, XMP_ERROR))
+                    continue
+                if not prompt:
+                    results.append((image_path, XMP_NO_PROMPT))
+                    continue
+                create_or_update_xmp(image_path, prompt, overwrite=overwrite)
+
+            status = XMP_WRITTEN if os.path.exists(image_path + '.xmp') else XMP_ERROR
+            results.append((image_path, status))
+        except Exception:
+            results.append((image_path, XMP_ERROR))
+    return results
+
+
+class XmpPipeline:
+    """
+    Generate XMP sidecars across a process pool.
+
+    Replaces the post-sync `find | xargs xmp_tool` pass: callers hand in
+    only the images a sync just wrote, and PNG decoding runs in parallel
+    without blocking the event loop.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        chunk_size: int = XMP_CHUNK_SIZE,
+        overwrite: bool = False
+    ):
+        """
+        Args:
+            max_workers: Pool size (defaults to the CPU count)
+            chunk_size: Images per worker task
+            overwrite: Rewrite sidecars that already exist
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.overwrite = overwrite
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: the server is multi-threaded, so forking could copy held locks
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    async def process(self, image_paths: Iterable[str]) -> XmpBatchResult:
+        """
+        Write sidecars for the given local image paths.
+
+        Non-PNG paths are ignored; paths missing on disk are reported as failed.
+
+        Args:
+            image_paths: Local paths of images to process
+
+        Returns:
+            XmpBatchResult grouping paths by outcome
+        """
+        result = XmpBatchResult()
+        paths = []
+        for path in image_paths:
+            if not is_valid_image(path):
+                continue
+            if os.path.isfile(path):
+                paths.append(path)
+            else:
+                result.failed.append(path)
+        if not paths:
+            return result
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        chunks = [paths[i:i + self.chunk_size] for i in range(0, len(paths), self.chunk_size)]
+
+        outcomes = await asyncio.gather(
+            *[loop.run_in_executor(executor, _generate_xmp_chunk, chunk, self.overwrite) for chunk in chunks],
+            return_exceptions=True
+        )
+
+        for chunk, outcome in zip(chunks, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"XMP worker failed on {len(chunk)} image(s): {outcome}")
+                result.failed.extend(chunk)
+                continue
+            for path, status in outcome:
+                if status == XMP_WRITTEN:
+                    result.written.append(path)
+                elif status == XMP_EXISTS:
+                    result.existing.append(path)
+                elif status == XMP_NO_PROMPT:
+                    result.no_prompt.append(path)
+                else:
+                    result.failed.append(path)
+
+        logger.info(
+            f"XMP pipeline: {len(result.written)} written, {len(result.existing)} existing, "
+            f"{len(result.no_prompt)} without prompt, {len(result.failed)} failed"
+        )
+        return result
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+
+# Global pipeline instance
+_xmp_pipeline: Optional[XmpPipeline] = None
+_xmp_pipeline_lock = threading.Lock()
+
+
+def get_xmp_pipeline() -> XmpPipeline:
+    """Get the global XMP pipeline instance."""
+    global _xmp_pipeline
+    with _xmp_pipeline_lock:
+        if _xmp_pipeline is None:
+            _xmp_pipeline = XmpPipeline()
+        return _xmp_pipeline
@@ -4,5 +4,12 @@ Ingest interface for database integration
 
 from .ingest_interface import MediaIngestInterface
 from .event_manager import MediaEventManager
+from .metadata_index import MetadataIndex, MetadataIndexIngest, get_metadata_index
 
-__all__ = ['MediaIngestInterface', 'MediaEventManager']
+__all__ = [
+    'MediaIngestInterface',
+    'MediaEventManager',
+    'MetadataIndex',
+    'MetadataIndexIngest',
+    'get_metadata_index'
+]
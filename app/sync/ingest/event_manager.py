@@ -4,21 +4,150 @@ Event manager for media events
 
 import asyncio
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from ..models import MediaEvent, MediaEventData
 from .ingest_interface import MediaIngestInterface
 
 logger = logging.getLogger(__name__)
 
+# Per-file events are queued per subscriber and delivered in batches
+FILE_EVENTS = (MediaEvent.FILE_SYNCED, MediaEvent.BATCH_SYNCED)
+
+DEFAULT_QUEUE_SIZE = 2000
+DEFAULT_MAX_BATCH_SIZE = 200
+DEFAULT_MAX_LATENCY = 1.0  # seconds
+
+# Queue marker asking the delivery task to send its partial batch now
+_FLUSH = object()
+
+
+class _SubscriberQueue:
+    """
+    Bounded event queue drained by one delivery task.
+
+    BATCH_SYNCED subscribers receive coalesced `on_batch_synced` calls of up
+    to `max_batch_size` events, flushed at most `max_latency` seconds after
+    the first event of a batch arrived. FILE_SYNCED subscribers receive
+    `on_file_synced` per event, still through the queue. When the queue is
+    full, `put` waits, so a slow subscriber slows the producer down instead
+    of growing memory.
+    """
+
+    def __init__(
+        self,
+        subscriber: MediaIngestInterface,
+        event_type: MediaEvent,
+        max_size: int,
+        max_batch_size: int,
+        max_latency: float
+    ):
+        self.subscriber = subscriber
+        self.event_type = event_type
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self.delivered = 0
+        self.failed = 0
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def put(self, event: MediaEventData):
+        await self.queue.put(event)
+
+    async def request_flush(self):
+        """Make the current partial batch go out without waiting for max_latency."""
+        await self.queue.put(_FLUSH)
+
+    async def _next_batch(self) -> List[MediaEventData]:
+        batch = []
+        loop = asyncio.get_running_loop()
+        deadline = None
+
+        while len(batch) < self.max_batch_size:
+            if not batch:
+                item = await self.queue.get()
+            elif not self.queue.empty():
+                # Take what's already queued without waiting
+                item = self.queue.get_nowait()
+            else:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            if item is _FLUSH:
+                self.queue.task_done()
+                if batch:
+                    break
+                continue
+
+            batch.append(item)
+            if deadline is None:
+                deadline = loop.time() + self.max_latency
+        return batch
+
+    async def _deliver(self, batch: List[MediaEventData]):
+        if self.event_type == MediaEvent.BATCH_SYNCED:
+            await self.subscriber.on_batch_synced(batch)
+        else:
+            for event in batch:
+                await self.subscriber.on_file_synced(event)
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._deliver(batch)
+                self.delivered += len(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.error(
+                    f"Subscriber notification failed: "
+                    f"event={self.event_type.value}, "
+                    f"subscriber={self.subscriber.__class__.__name__}, "
+                    f"events={len(batch)}, error={str(e)}"
+                )
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            'subscriber': self.subscriber.__class__.__name__,
+            'event_type': self.event_type.value,
+            'queued': self.queue.qsize(),
+            'delivered': self.delivered,
+            'failed': self.failed
+        }
+
 
 class MediaEventManager:
     """Manage media events and notify subscribers."""
-    
-    def __init__(self):
+
+    def __init__(
+        self,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_latency: float = DEFAULT_MAX_LATENCY
+    ):
+        """
+        Args:
+            queue_size: Per-subscriber bound on undelivered file events
+            max_batch_size: Most events handed to one on_batch_synced call
+            max_latency: Longest a queued event waits for its batch to fill
+        """
+        self.queue_size = queue_size
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+
         self._subscribers: Dict[MediaEvent, List[MediaIngestInterface]] = {
             event: [] for event in MediaEvent
         }
-    
+        self._queues: Dict[Tuple[MediaEvent, int], _SubscriberQueue] = {}
+        self._queue_loop: Optional[asyncio.AbstractEventLoop] = None
+
     def subscribe(
         self,
         event_type: MediaEvent,
@@ -27,23 +156,38 @@ class MediaEventManager:
         """Subscribe to specific event type."""
         if event_type not in self._subscribers:
             self._subscribers[event_type] = []
-        
+
         self._subscribers[event_type].append(subscriber)
         logger.info(f"Subscriber registered for {event_type.value}")
-    
+
+    def has_subscribers(self, *event_types: MediaEvent) -> bool:
+        """Return True if anyone listens for any of the event types."""
+        return any(self._subscribers.get(event_type) for event_type in event_types)
+
     async def emit(self, event: MediaEventData):
-        """Emit event to all subscribers."""
+        """
+        Emit event to all subscribers.
+
+        Per-file events (FILE_SYNCED, BATCH_SYNCED) are queued for both
+        FILE_SYNCED and BATCH_SYNCED subscribers and delivered in the
+        background; this waits only while a subscriber's queue is full.
+        Other events are delivered before returning.
+        """
+        if event.event_type in FILE_EVENTS:
+            await self._enqueue(event)
+            return
+
         subscribers = self._subscribers.get(event.event_type, [])
-        
+
         if not subscribers:
             logger.debug(f"No subscribers for event {event.event_type.value}")
             return
-        
+
         results = await asyncio.gather(
             *[self._notify_subscriber(sub, event) for sub in subscribers],
             return_exceptions=True
         )
-        
+
         # Log any failures
         for i, result in enumerate(results):
             if isinstance(result, Exception):
@@ -53,7 +197,54 @@ class MediaEventManager:
                     f"subscriber={subscribers[i].__class__.__name__}, "
                     f"error={str(result)}"
                 )
-    
+
+    async def _enqueue(self, event: MediaEventData):
+        for event_type in FILE_EVENTS:
+            for subscriber in list(self._subscribers.get(event_type, [])):
+                await self._queue_for(event_type, subscriber).put(event)
+
+    def _queue_for(self, event_type: MediaEvent, subscriber: MediaIngestInterface) -> _SubscriberQueue:
+        """Get or start the delivery queue for a subscriber on the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._queue_loop is not loop:
+            # Queues belong to one loop; a new loop starts with fresh ones
+            self._queues = {}
+            self._queue_loop = loop
+
+        key = (event_type, id(subscriber))
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = _SubscriberQueue(
+                subscriber,
+                event_type,
+                self.queue_size,
+                self.max_batch_size,
+                self.max_latency
+            )
+            self._queues[key] = queue
+        return queue
+
+    async def flush(self):
+        """Deliver every queued file event now, without waiting out max_latency."""
+        if self._queue_loop is not asyncio.get_running_loop():
+            return
+        queues = list(self._queues.values())
+        for queue in queues:
+            await queue.request_flush()
+        await asyncio.gather(*[q.queue.join() for q in queues])
+
+    async def close(self):
+        """Deliver what's queued, then stop the delivery tasks."""
+        await self.flush()
+        for queue in self._queues.values():
+            queue.task.cancel()
+        await asyncio.gather(*[q.task for q in self._queues.values()], return_exceptions=True)
+        self._queues = {}
+
+    def get_queue_stats(self) -> List[dict]:
+        """Depth and delivery counters for each subscriber queue."""
+        return [q.stats() for q in self._queues.values()]
+
     async def _notify_subscriber(
         self,
         subscriber: MediaIngestInterface,
@@ -61,11 +252,7 @@ class MediaEventManager:
     ):
         """Notify a single subscriber."""
         try:
-            if event.event_type == MediaEvent.FILE_SYNCED:
-                return await subscriber.on_file_synced(event)
-            elif event.event_type == MediaEvent.BATCH_SYNCED:
-                return await subscriber.on_batch_synced([event])
-            elif event.event_type == MediaEvent.SYNC_COMPLETE:
+            if event.event_type == MediaEvent.SYNC_COMPLETE:
                 return await subscriber.on_sync_complete(
                     event.sync_id,
                     event.metadata
@@ -73,7 +260,7 @@ class MediaEventManager:
         except Exception as e:
             logger.error(f"Error notifying subscriber: {e}")
             raise
-    
+
     def unsubscribe(
         self,
         event_type: MediaEvent,
@@ -83,16 +270,26 @@ class MediaEventManager:
         if event_type in self._subscribers:
             try:
                 self._subscribers[event_type].remove(subscriber)
+                self._stop_queue(event_type, subscriber)
                 logger.info(f"Subscriber unregistered from {event_type.value}")
             except ValueError:
                 logger.warning(f"Subscriber was not subscribed to {event_type.value}")
-    
+
     def clear_subscribers(self, event_type: MediaEvent = None):
         """Clear subscribers for specific event type or all."""
         if event_type:
+            for subscriber in self._subscribers[event_type]:
+                self._stop_queue(event_type, subscriber)
             self._subscribers[event_type] = []
         else:
             for event in MediaEvent:
+                for subscriber in self._subscribers[event]:
+                    self._stop_queue(event, subscriber)
                 self._subscribers[event] = []
-        
+
         logger.info("Subscribers cleared")
+
+    def _stop_queue(self, event_type: MediaEvent, subscriber: MediaIngestInterface):
+        queue = self._queues.pop((event_type, id(subscriber)), None)
+        if queue is not None and self._queue_loop is not None and not self._queue_loop.is_closed():
+            self._queue_loop.call_soon_threadsafe(queue.task.cancel)
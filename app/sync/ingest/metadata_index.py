@@ -0,0 +1,507 @@
+"""
+Full-text index of generation metadata for synced media
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from ..models import MediaEventData
+from ...utils.png_metadata import read_generation_metadata
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = "/app/logs/media_index.db"
+
+# Media types worth indexing; only PNGs carry readable metadata today
+INDEXED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp', '.gif', '.mp4', '.webm', '.mov'}
+
+MAX_PER_PAGE = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    indexed_at TEXT NOT NULL,
+    source TEXT,
+    prompt TEXT,
+    negative TEXT,
+    seed INTEGER,
+    sampler TEXT,
+    model TEXT,
+    loras TEXT,
+    workflow_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS media_seed ON media(seed);
+CREATE INDEX IF NOT EXISTS media_workflow_hash ON media(workflow_hash);
+CREATE INDEX IF NOT EXISTS media_mtime ON media(mtime);
+CREATE VIRTUAL TABLE IF NOT EXISTS media_fts USING fts5(
+    prompt, negative, model, loras, sampler, path,
+    content='media', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS media_ai AFTER INSERT ON media BEGIN
+    INSERT INTO media_fts(rowid, prompt, negative, model, loras, sampler, path)
+    VALUES (new.id, new.prompt, new.negative, new.model, new.loras, new.sampler, new.path);
+END;
+CREATE TRIGGER IF NOT EXISTS media_ad AFTER DELETE ON media BEGIN
+    INSERT INTO media_fts(media_fts, rowid, prompt, negative, model, loras, sampler, path)
+    VALUES ('delete', old.id, old.prompt, old.negative, old.model, old.loras, old.sampler, old.path);
+END;
+CREATE TRIGGER IF NOT EXISTS media_au AFTER UPDATE ON media BEGIN
+    INSERT INTO media_fts(media_fts, rowid, prompt, negative, model, loras, sampler, path)
+    VALUES ('delete', old.id, old.prompt, old.negative, old.model, old.loras, old.sampler, old.path);
+    INSERT INTO media_fts(rowid, prompt, negative, model, loras, sampler, path)
+    VALUES (new.id, new.prompt, new.negative, new.model, new.loras, new.sampler, new.path);
+END;
+"""
+
+# bm25 column weights: prompt matches rank above model/LoRA/path matches
+FTS_WEIGHTS = "10.0, 2.0, 4.0, 4.0, 1.0, 1.0"
+
+RECORD_COLUMNS = (
+    'path', 'size', 'mtime', 'source', 'prompt', 'negative',
+    'seed', 'sampler', 'model', 'loras', 'workflow_hash'
+)
+
+# A1111/Forge settings line: `Key: value, Key: "quoted, value", ...`
+_PARAM_RE = re.compile(r'\s*([\w ]+):\s*("(?:\\.|[^\\"])+"|[^,]*)(?:,|$)')
+_LORA_TAG_RE = re.compile(r'<lora:([^:>]+)(?::[^>]*)?>')
+
+
+@dataclass
+class MediaRecord:
+    """Searchable metadata for one media file."""
+    path: str
+    size: int
+    mtime: float
+    source: Optional[str] = None  # 'forge', 'comfyui', or None without metadata
+    prompt: Optional[str] = None
+    negative: Optional[str] = None
+    seed: Optional[int] = None
+    sampler: Optional[str] = None
+    model: Optional[str] = None
+    loras: List[str] = field(default_factory=list)
+    workflow_hash: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _unique(items: Iterable[str]) -> List[str]:
+    return list(dict.fromkeys(i for i in items if i))
+
+
+def parse_forge_parameters(text: str) -> dict:
+    """
+    Parse an A1111/Forge `parameters` block.
+
+    Args:
+        text: Prompt, optional `Negative prompt:` section, and a settings line
+
+    Returns:
+        Dict with prompt, negative, seed, sampler, model and loras
+    """
+    lines = text.strip().split('\n')
+    settings = {}
+    if lines and lines[-1].lstrip().startswith('Steps:'):
+        settings = {k.strip(): v.strip().strip('"') for k, v in _PARAM_RE.findall(lines.pop())}
+
+    body = '\n'.join(lines)
+    prompt, _, negative = body.partition('Negative prompt:')
+
+    lora_hashes = settings.get('Lora hashes', '')
+    loras = _LORA_TAG_RE.findall(prompt) + [
+        entry.split(':')[0].strip() for entry in lora_hashes.split(',') if ':' in entry
+    ]
+
+    return {
+        'prompt': prompt.strip(),
+        'negative': negative.strip() or None,
+        'seed': _to_int(settings.get('Seed')),
+        'sampler': settings.get('Sampler'),
+        'model': settings.get('Model') or settings.get('Model hash'),
+        'loras': _unique(loras)
+    }
+
+
+def _is_link(value) -> bool:
+    return isinstance(value, list) and len(value) == 2 and isinstance(value[1], int)
+
+
+def _node_text(graph: dict, link, depth: int = 0) -> Optional[str]:
+    """Follow a conditioning link back to the text that produced it."""
+    if not _is_link(link) or depth > 8:
+        return None
+    node = graph.get(str(link[0]))
+    if not isinstance(node, dict):
+        return None
+    inputs = node.get('inputs', {})
+    for key in ('text', 'text_g', 'prompt'):
+        if isinstance(inputs.get(key), str):
+            return inputs[key]
+    for value in inputs.values():
+        if _is_link(value):
+            text = _node_text(graph, value, depth + 1)
+            if text:
+                return text
+    return None
+
+
+def workflow_hash(graph: Optional[dict] = None, workflow: Optional[dict] = None) -> Optional[str]:
+    """
+    Hash a ComfyUI node graph's structure, ignoring widget values.
+
+    Renders from the same workflow with different prompts or seeds share
+    a hash.
+    """
+    if graph:
+        structure = sorted(
+            (
+                str(node_id),
+                node.get('class_type'),
+                sorted((k, [str(v[0]), v[1]]) for k, v in node.get('inputs', {}).items() if _is_link(v))
+            )
+            for node_id, node in graph.items() if isinstance(node, dict)
+        )
+    elif workflow:
+        structure = [
+            sorted((str(n.get('id')), n.get('type')) for n in workflow.get('nodes', []) if isinstance(n, dict)),
+            sorted(map(str, workflow.get('links') or []))
+        ]
+    else:
+        return None
+    return hashlib.sha1(json.dumps(structure, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def parse_comfyui_metadata(prompt_json: Optional[str], workflow_json: Optional[str]) -> dict:
+    """
+    Parse ComfyUI `prompt` (API graph) and `workflow` (UI graph) metadata.
+
+    Returns:
+        Dict with prompt, negative, seed, sampler, model, loras and workflow_hash
+    """
+    def _load(raw):
+        try:
+            value = json.loads(raw) if raw else None
+            return value if isinstance(value, dict) else None
+        except ValueError:
+            return None
+
+    graph = _load(prompt_json)
+    workflow = _load(workflow_json)
+    parsed = {'loras': [], 'workflow_hash': workflow_hash(graph, workflow)}
+    if not graph:
+        return parsed
+
+    models, loras = [], []
+    for node in graph.values():
+        if not isinstance(node, dict):
+            continue
+        inputs = node.get('inputs', {})
+
+        for key in ('ckpt_name', 'unet_name'):
+            if isinstance(inputs.get(key), str):
+                models.append(inputs[key])
+        if isinstance(inputs.get('lora_name'), str):
+            loras.append(inputs['lora_name'])
+
+        seed = inputs.get('seed', inputs.get('noise_seed'))
+        if parsed.get('seed') is None and not _is_link(seed) and _to_int(seed) is not None:
+            parsed['seed'] = _to_int(seed)
+        if parsed.get('sampler') is None and isinstance(inputs.get('sampler_name'), str):
+            parsed['sampler'] = inputs['sampler_name']
+        if parsed.get('prompt') is None and 'positive' in inputs:
+            parsed['prompt'] = _node_text(graph, inputs['positive'])
+            parsed['negative'] = _node_text(graph, inputs.get('negative'))
+
+    parsed['model'] = ', '.join(_unique(models)) or None
+    parsed['loras'] = _unique(loras)
+    return parsed
+
+
+def build_record(path: str, size: int, mtime: float) -> MediaRecord:
+    """
+    Read a media file's embedded generation metadata into a record.
+
+    Files without readable metadata still get a record, so they are
+    searchable by path.
+    """
+    record = MediaRecord(path=path, size=size, mtime=mtime)
+    if os.path.splitext(path)[1].lower() != '.png':
+        return record
+
+    try:
+        metadata = read_generation_metadata(path)
+    except (OSError, ValueError) as e:
+        logger.debug(f"No metadata for {path}: {e}")
+        return record
+
+    if 'parameters' in metadata:
+        parsed = parse_forge_parameters(metadata['parameters'])
+        record.source = 'forge'
+    elif 'prompt' in metadata or 'workflow' in metadata:
+        parsed = parse_comfyui_metadata(metadata.get('prompt'), metadata.get('workflow'))
+        record.source = 'comfyui'
+    else:
+        return record
+
+    for key, value in parsed.items():
+        setattr(record, key, value)
+    return record
+
+
+def _fts_query(text: str) -> str:
+    """Quote each term so user input can't hit FTS5 query syntax; the last term matches as a prefix."""
+    terms = ['"' + t.replace('"', '""') + '"' for t in text.split()]
+    if terms:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+
+class MetadataIndex:
+    """SQLite FTS5 index of generation metadata."""
+
+    def __init__(self, db_path: str = DEFAULT_INDEX_PATH):
+        self.db_path = Path(db_path)
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """Open the database on first use, so registering the index has no side effects."""
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            return self._conn
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        conn.commit()
+        return conn
+
+    def needs_index(self, path: str, size: int, mtime: float) -> bool:
+        """Return True if the file is new or changed since it was indexed."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT size, mtime FROM media WHERE path = ?", (path,)
+            ).fetchone()
+        return row is None or row['size'] != size or row['mtime'] != mtime
+
+    def index_records(self, records: Iterable[MediaRecord]) -> int:
+        """
+        Insert or refresh records in one transaction.
+
+        Returns:
+            Number of records written
+        """
+        now = datetime.now().isoformat()
+        rows = [
+            (
+                r.path, r.size, r.mtime, r.source, r.prompt, r.negative, r.seed,
+                r.sampler, r.model, ' '.join(r.loras) or None, r.workflow_hash, now
+            )
+            for r in records
+        ]
+        if not rows:
+            return 0
+
+        with self._lock:
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO media (path, size, mtime, source, prompt, negative, seed, "
+                    "sampler, model, loras, workflow_hash, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime = excluded.mtime, "
+                    "source = excluded.source, prompt = excluded.prompt, negative = excluded.negative, "
+                    "seed = excluded.seed, sampler = excluded.sampler, model = excluded.model, "
+                    "loras = excluded.loras, workflow_hash = excluded.workflow_hash, "
+                    "indexed_at = excluded.indexed_at",
+                    rows
+                )
+        return len(rows)
+
+    def index_files(self, files: Iterable[tuple]) -> int:
+        """
+        Read and index (path, size, mtime) entries that changed since the last run.
+
+        Returns:
+            Number of files indexed
+        """
+        records = [
+            build_record(path, size, mtime)
+            for path, size, mtime in files
+            if os.path.splitext(path)[1].lower() in INDEXED_EXTENSIONS
+            and self.needs_index(path, size, mtime)
+        ]
+        return self.index_records(records)
+
+    def remove(self, paths: Iterable[str]) -> int:
+        """Drop files from the index."""
+        with self._lock:
+            with self._db:
+                cursor = self._db.executemany(
+                    "DELETE FROM media WHERE path = ?", ((p,) for p in paths)
+                )
+        return cursor.rowcount
+
+    def contains(self, path: str) -> bool:
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM media WHERE path = ?", (path,)
+            ).fetchone() is not None
+
+    def search(
+        self,
+        query: str = '',
+        seed: Optional[int] = None,
+        model: Optional[str] = None,
+        sampler: Optional[str] = None,
+        workflow: Optional[str] = None,
+        page: int = 1,
+        per_page: int = 50
+    ) -> dict:
+        """
+        Search indexed media.
+
+        Text queries are ranked by bm25 (prompt matches weigh most); without
+        one, results are newest first.
+
+        Args:
+            query: Free text matched against prompt, negative, model, LoRAs, sampler and path
+            seed: Exact seed
+            model: Substring of the model name
+            sampler: Exact sampler name (case-insensitive)
+            workflow: Exact workflow hash
+            page: 1-based page number
+            per_page: Results per page (capped at MAX_PER_PAGE)
+
+        Returns:
+            Dict with total, page, per_page and results
+        """
+        per_page = max(1, min(per_page, MAX_PER_PAGE))
+        page = max(1, page)
+
+        joins, where, params = '', [], []
+        if query.strip():
+            joins = "JOIN media_fts ON media_fts.rowid = media.id"
+            where.append("media_fts MATCH ?")
+            params.append(_fts_query(query))
+            order = f"bm25(media_fts, {FTS_WEIGHTS}), media.mtime DESC"
+        else:
+            order = "media.mtime DESC"
+        if seed is not None:
+            where.append("media.seed = ?")
+            params.append(seed)
+        if model:
+            where.append("media.model LIKE ?")
+            params.append(f"%{model}%")
+        if sampler:
+            where.append("media.sampler = ? COLLATE NOCASE")
+            params.append(sampler)
+        if workflow:
+            where.append("media.workflow_hash = ?")
+            params.append(workflow)
+
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ''
+        columns = ', '.join(f"media.{c}" for c in RECORD_COLUMNS)
+
+        with self._lock:
+            total = self._db.execute(
+                f"SELECT COUNT(*) FROM media {joins} {where_sql}", params
+            ).fetchone()[0]
+            rows = self._db.execute(
+                f"SELECT {columns} FROM media {joins} {where_sql} ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [per_page, (page - 1) * per_page]
+            ).fetchall()
+
+        results = []
+        for row in rows:
+            item = dict(row)
+            item['loras'] = item['loras'].split() if item['loras'] else []
+            results.append(item)
+
+        return {
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'results': results
+        }
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            total, with_metadata = self._db.execute(
+                "SELECT COUNT(*), COUNT(source) FROM media"
+            ).fetchone()
+        return {'total_files': total, 'with_metadata': with_metadata}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class MetadataIndexIngest:
+    """MediaIngestInterface implementation that feeds the metadata index."""
+
+    def __init__(self, index: MetadataIndex):
+        self.index = index
+
+    async def on_file_synced(self, event: MediaEventData) -> bool:
+        return await self.on_batch_synced([event]) == 1
+
+    async def on_batch_synced(self, events: List[MediaEventData]) -> int:
+        files = [
+            (e.file_path, e.file_size, e.metadata.get('mtime', 0.0))
+            for e in events
+        ]
+        # Header reads and SQLite writes stay off the sync event loop
+        return await asyncio.to_thread(self.index.index_files, files)
+
+    async def on_sync_complete(self, sync_id: str, summary: dict) -> bool:
+        return True
+
+    async def verify_file_exists(self, file_path: str) -> bool:
+        return self.index.contains(file_path)
+
+
+# Global index instance
+_metadata_index: Optional[MetadataIndex] = None
+_metadata_index_lock = threading.Lock()
+
+
+def get_metadata_index(db_path: Optional[str] = None) -> MetadataIndex:
+    """
+    Get the global metadata index.
+
+    Args:
+        db_path: Database path, honoured on first call only
+    """
+    global _metadata_index
+    with _metadata_index_lock:
+        if _metadata_index is None:
+            _metadata_index = MetadataIndex(db_path or DEFAULT_INDEX_PATH)
+        return _metadata_index
@@ -18,11 +18,21 @@ class SyncConfig:
     source_port: int
     dest_path: str  # Destination configuration
     source_path: Optional[str] = None
+    instance_name: Optional[str] = None  # Fleet member name; namespaces the destination and manifest
     
     # Sync options
     folders: List[str] = field(default_factory=list)
     parallel_transfers: int = 3
-    bandwidth_limit_mbps: Optional[int] = None
+    host_transfer_limit: Optional[int] = None  # Most concurrent transfers across all syncs from source_host
+    bandwidth_limit_mbps: Optional[float] = None  # rsync budget, split across the workers running
+    bandwidth_group: Optional[str] = None  # Syncs in one group share a single bandwidth_limit_mbps
+    incremental_listing: bool = True  # List only files newer than the last sync's watermark
+    full_reconcile_hours: float = 24.0  # Force a full listing at least this often
+    
+    # Watch mode options
+    watch_debounce_seconds: float = 2.0  # Quiet time after a file's last event before it's sent
+    watch_max_batch: int = 100  # Most files per micro-batch transfer
+    watch_poll_interval: float = 2.0  # Seconds between scans when inotify is unavailable
     
     # Cleanup options
     enable_cleanup: bool = True
@@ -31,18 +41,78 @@ class SyncConfig:
     
     # Processing options
     generate_xmp: bool = True
-    calculate_hashes: bool = False
+    calculate_hashes: bool = False  # BLAKE2b of each synced file, cached in the manifest
     extract_metadata: bool = True
     
     # Advanced options
     retry_attempts: int = 3
     retry_delay_seconds: int = 5
-    verify_transfers: bool = True
+    verify_transfers: bool = True  # With calculate_hashes, compare against digests taken on the source
+
+
+@dataclass
+class WatchStatus:
+    """State of a continuous watch-mode sync."""
+    watch_id: str
+    source_host: str
+    source_port: int
+    roots: List[str] = field(default_factory=list)
+    mode: Optional[str] = None  # 'inotify' or 'poll' once the remote feed is up
+    running: bool = True
+    started_at: datetime = field(default_factory=datetime.now)
+    last_event: Optional[datetime] = None
+    files_seen: int = 0
+    files_synced: int = 0
+    batches: int = 0
+    reconnects: int = 0
+    last_error: Optional[str] = None
+    
+    def to_dict(self) -> dict:
+        return {
+            'watch_id': self.watch_id,
+            'source_host': self.source_host,
+            'source_port': self.source_port,
+            'roots': self.roots,
+            'mode': self.mode,
+            'running': self.running,
+            'started_at': self.started_at.isoformat(),
+            'last_event': self.last_event.isoformat() if self.last_event else None,
+            'files_seen': self.files_seen,
+            'files_synced': self.files_synced,
+            'batches': self.batches,
+            'reconnects': self.reconnects,
+            'last_error': self.last_error
+        }
 
 
 @dataclass
+class RemoteSubdir:
+    """File count and size of one subfolder in a remote output tree."""
+    folder: str
+    name: str  # empty for files directly under the folder
+    files: int
+    bytes: int
+
+
+@dataclass
+class RemoteTree:
+    """Remote output folders discovered in a single round trip."""
+    base_path: str
+    subdirs: List[RemoteSubdir] = field(default_factory=list)
+    missing_folders: List[str] = field(default_factory=list)
+    
+    @property
+    def total_files(self) -> int:
+        return sum(s.files for s in self.subdirs)
+    
+    @property
+    def total_bytes(self) -> int:
+        return sum(s.bytes for s in self.subdirs)
+
+
+@dataclass(slots=True)
 class FileStat:
-    """File metadata."""
+    """File metadata; slotted, since listings hold one per remote file."""
     path: str
     size: int
     mtime: float
@@ -57,6 +127,29 @@ class TransferResult:
     duration: float
     hash: Optional[str] = None
     error: Optional[str] = None
+    files_transferred: int = 0
+
+
+@dataclass
+class BatchTransferResult:
+    """Result of transferring a list of files in one operation."""
+    success: bool
+    bytes_transferred: int
+    duration: float
+    transferred: List[str] = field(default_factory=list)  # paths relative to the source root
+    failed: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    received: Optional[List[str]] = None  # files rsync itemized as written; None if unknown
+
+
+@dataclass
+class BatchDeleteResult:
+    """Result of deleting a list of files in one operation."""
+    deleted: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    # Paths in `deleted` that were already gone, so nothing was freed
+    missing: List[str] = field(default_factory=list)
 
 
 @dataclass
@@ -67,6 +160,7 @@ class SyncResult:
     bytes_transferred: int
     duration: float
     errors: List[str] = field(default_factory=list)
+    xmp_written: int = 0
 
 
 @dataclass
@@ -160,6 +254,7 @@ class CleanupConfig:
     preserve_patterns: List[str] = field(default_factory=list)
     exclude_patterns: List[str] = field(default_factory=list)
     min_free_space_gb: Optional[int] = None  # Force cleanup if space low
+    target_free_space_gb: Optional[int] = None  # Evict until this much is free (default: min_free_space_gb)
     max_files_per_batch: int = 100
 
 
@@ -223,3 +318,16 @@ class SyncJob:
     start_time: datetime
     end_time: Optional[datetime] = None
     result: Optional[SyncResult] = None
+    sync_id: Optional[str] = None
+
+
+@dataclass
+class FleetJob:
+    """A group of sync jobs run concurrently, one per instance."""
+    id: str
+    sync_id: str  # Aggregated progress record for the whole fleet
+    status: str
+    start_time: datetime
+    members: Dict[str, str] = field(default_factory=dict)  # instance name -> SyncJob id
+    bandwidth_limit_mbps: Optional[float] = None
+    end_time: Optional[datetime] = None
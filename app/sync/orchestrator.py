@@ -3,15 +3,19 @@ Sync orchestrator - central coordinator for media sync operations
 """
 
 import asyncio
+import threading
 import uuid
 import logging
-from typing import Optional, Dict
+from concurrent.futures import Future
+from typing import Awaitable, Optional, Dict, List, Tuple
 from datetime import datetime
 
-from .models import SyncConfig, SyncJob, SyncResult
-from .engine import SyncEngine
+from .models import SyncConfig, SyncJob, SyncResult, MediaEvent, MediaEventData, WatchStatus, FleetJob
+from .engine import SyncEngine, FolderWatcher
+from .engine.manifest import ManifestManager, manifest_path_for
 from .transport.ssh_rsync import SSHRsyncAdapter
-from .progress import ProgressManager
+from .transport.transfer_controller import TransferController
+from .progress import ProgressManager, TransferProgressTracker
 from .cleanup import CleanupEngine
 from .ingest import MediaEventManager
 
@@ -25,7 +29,22 @@ class SyncOrchestrator:
         self.manifest_dir = manifest_dir
         self.progress_manager = ProgressManager()
         self.event_manager = MediaEventManager()
+        # Per-host adaptive concurrency and bandwidth budgets for every rsync run
+        self.transfer_controller = TransferController()
         self._active_jobs: Dict[str, SyncJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._watches: Dict[str, Tuple[WatchStatus, asyncio.Task]] = {}
+        self._fleets: Dict[str, FleetJob] = {}
+        self._fleet_members: Dict[str, str] = {}  # member sync_id -> fleet id
+        
+        # Long-lived event loop that owns every sync job; Flask handlers
+        # submit coroutines to it from their request threads
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+        
+        # Fold member progress into each fleet's aggregated progress record
+        self.progress_manager.register_callback(self._aggregate_fleet_progress)
         
         # Try to setup WebSocket progress reporting
         try:
@@ -38,6 +57,61 @@ class SyncOrchestrator:
         except Exception as e:
             logger.warning(f"Failed to setup WebSocket progress reporter: {e}")
     
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the background event loop thread on first use."""
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name='sync-orchestrator-loop',
+                    daemon=True
+                )
+                self._loop_thread.start()
+                logger.info("Started sync orchestrator event loop")
+            return self._loop
+    
+    def submit(self, coro: Awaitable) -> Future:
+        """
+        Schedule a coroutine on the orchestrator's event loop.
+        
+        Safe to call from any thread (e.g. a Flask request handler).
+        
+        Returns:
+            concurrent.futures.Future resolving to the coroutine's result
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+    
+    def run(self, coro: Awaitable, timeout: Optional[float] = None):
+        """Submit a coroutine and block the calling thread for its result."""
+        return self.submit(coro).result(timeout)
+    
+    def shutdown(self, timeout: float = 5.0):
+        """Cancel running jobs and stop the event loop thread."""
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = self._loop_thread = None
+        
+        if loop is None:
+            return
+        
+        async def _cancel_all():
+            tasks = list(self._tasks.values())
+            tasks.extend(task for _, task in self._watches.values())
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.event_manager.close()
+        
+        try:
+            asyncio.run_coroutine_threadsafe(_cancel_all(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"Failed to cancel sync jobs on shutdown: {e}")
+        
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        loop.close()
+    
     async def start_sync(self, config: SyncConfig) -> SyncJob:
         """
         Initiate a new sync operation.
@@ -56,7 +130,8 @@ class SyncOrchestrator:
             id=job_id,
             config=config,
             status='initializing',
-            start_time=datetime.now()
+            start_time=datetime.now(),
+            sync_id=sync_id
         )
         
         self._active_jobs[job_id] = job
@@ -64,14 +139,36 @@ class SyncOrchestrator:
         # Create progress tracker
         progress = self.progress_manager.create_progress(sync_id, job_id)
         
-        # Start sync in background
-        asyncio.create_task(self._execute_sync(job, sync_id, progress))
+        # Start sync in background; keep a reference so it can be cancelled
+        task = asyncio.get_running_loop().create_task(self._execute_sync(job, sync_id, progress))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
         
         return job
     
+    def _make_transport(self, config: SyncConfig, budget_group: str) -> SSHRsyncAdapter:
+        """
+        SSH/rsync transport whose runs go through the transfer controller.
+        
+        A sync's bandwidth_limit_mbps is shared by its own workers unless
+        the config names a bandwidth_group to share it with other syncs.
+        """
+        budgets = []
+        if config.bandwidth_limit_mbps:
+            budgets.append((config.bandwidth_group or budget_group, config.bandwidth_limit_mbps))
+        return SSHRsyncAdapter(
+            host=config.source_host,
+            port=config.source_port,
+            controller=self.transfer_controller,
+            max_workers=config.parallel_transfers,
+            budgets=budgets,
+            host_limit=config.host_transfer_limit
+        )
+    
     async def _execute_sync(self, job: SyncJob, sync_id: str, progress):
         """Execute the sync operation."""
         config = job.config
+        engine = None
         
         try:
             logger.info(f"Starting sync job {job.id}")
@@ -83,27 +180,23 @@ class SyncOrchestrator:
             })
             
             # Create transport adapter
-            transport = SSHRsyncAdapter(
-                host=config.source_host,
-                port=config.source_port
-            )
+            transport = self._make_transport(config, sync_id)
             
             # Create sync engine with manifest
-            manifest_path = f"{self.manifest_dir}/{config.source_type}_{config.source_host}.json"
-            engine = SyncEngine(transport, manifest_path)
-            
-            # Prepare folder pairs
-            folder_pairs = []
-            base_dest = config.dest_path
-            
-            if config.folders:
-                for folder in config.folders:
-                    source_path = f"{config.source_path}/{folder}" if config.source_path else folder
-                    dest_path = f"{base_dest}/{folder}"
-                    folder_pairs.append((source_path, dest_path))
-            else:
-                # Sync entire source path
-                folder_pairs.append((config.source_path or "", base_dest))
+            manifest_path = manifest_path_for(
+                self.manifest_dir, config.source_type, config.source_host, config.instance_name
+            )
+            engine = SyncEngine(
+                transport,
+                manifest_path,
+                event_manager=self.event_manager,
+                sync_id=sync_id
+            )
+            # Lets space-pressure cleanup find this manifest for the instance
+            engine.manifest.record_source(config.source_host, config.source_port)
+            
+            # Prepare folder pairs from one remote tree listing
+            folder_pairs = await self._plan_folder_pairs(config, transport)
             
             self.progress_manager.update_progress(sync_id, {
                 'status': 'transferring',
@@ -111,28 +204,21 @@ class SyncOrchestrator:
                 'current_stage': 'Transferring folders'
             })
             
-            # Progress callback
-            def progress_callback(update):
-                self.progress_manager.update_progress(sync_id, update)
-            
-            # Execute sync
-            if config.parallel_transfers > 1 and len(folder_pairs) > 1:
-                logger.info(f"Syncing {len(folder_pairs)} folders in parallel")
-                results = await engine.sync_folders_parallel(
-                    folder_pairs,
-                    config,
-                    progress_callback
-                )
-            else:
-                logger.info(f"Syncing {len(folder_pairs)} folders sequentially")
-                results = []
-                for i, (src, dest) in enumerate(folder_pairs):
-                    self.progress_manager.update_progress(sync_id, {
-                        'completed_folders': i,
-                        'current_folder': src
-                    })
-                    result = await engine.sync_folder(src, dest, config, progress_callback)
-                    results.append(result)
+            # Aggregate per-worker rsync progress into job-level counters
+            tracker = TransferProgressTracker(
+                lambda update: self.progress_manager.update_progress(sync_id, update)
+            )
+            progress_callback = tracker.update
+            
+            # Folder pairs share a worker pool of config.parallel_transfers
+            logger.info(f"Syncing {len(folder_pairs)} folders with up to {config.parallel_transfers} workers")
+            results = await engine.sync_folders_parallel(
+                folder_pairs,
+                config,
+                progress_callback
+            )
+            
+            tracker.flush()
             
             # Aggregate results
             total_files = sum(r.files_transferred for r in results if r.success)
@@ -152,13 +238,15 @@ class SyncOrchestrator:
             )
             
             # Cleanup if enabled
-            if config.enable_cleanup and success:
+            # Only folders this job synced are cleaned, and only of files
+            # its manifest records as synced
+            if config.enable_cleanup and success and folder_pairs:
                 self.progress_manager.update_progress(sync_id, {
                     'status': 'cleaning',
                     'current_stage': 'Cleaning up old media'
                 })
                 
-                await self._run_cleanup(config, transport, progress_callback)
+                await self._run_cleanup(config, transport, folder_pairs, engine.manifest, progress_callback)
             
             # Mark complete
             job.status = 'complete' if success else 'failed'
@@ -167,6 +255,16 @@ class SyncOrchestrator:
             self.progress_manager.complete_progress(sync_id, success)
             
             logger.info(f"Sync job {job.id} completed: success={success}, files={total_files}, bytes={total_bytes}")
+            
+            await self._finish_ingest(job, sync_id)
+        
+        except asyncio.CancelledError:
+            # rsync subprocesses are killed by the transport as the cancellation unwinds
+            logger.info(f"Sync job {job.id} cancelled")
+            job.status = 'cancelled'
+            job.end_time = datetime.now()
+            self.progress_manager.complete_progress(sync_id, False, status='cancelled')
+            raise
         
         except Exception as e:
             logger.error(f"Sync job {job.id} failed: {e}")
@@ -181,42 +279,409 @@ class SyncOrchestrator:
             )
             
             self.progress_manager.complete_progress(sync_id, False)
+        
+        finally:
+            if engine:
+                engine.manifest.close()
+    
+    async def _finish_ingest(self, job: SyncJob, sync_id: str):
+        """Drain queued file events, then tell subscribers the sync is done."""
+        try:
+            await self.event_manager.flush()
+            await self.event_manager.emit(MediaEventData(
+                event_type=MediaEvent.SYNC_COMPLETE,
+                timestamp=datetime.now(),
+                sync_id=sync_id,
+                file_path='',
+                file_size=0,
+                metadata={
+                    'job_id': job.id,
+                    'status': job.status,
+                    'files_transferred': job.result.files_transferred if job.result else 0,
+                    'bytes_transferred': job.result.bytes_transferred if job.result else 0
+                }
+            ))
+        except Exception as e:
+            logger.error(f"Media ingest for sync job {job.id} failed: {e}")
+    
+    async def _plan_folder_pairs(self, config: SyncConfig, transport) -> List[Tuple[str, str]]:
+        """
+        Build (source, dest) pairs for a sync.
+        
+        Configured folders are described with a single remote call that also
+        resolves the output root when `source_path` is unset; each non-empty
+        subfolder becomes its own pair so the worker pool can spread them out.
+        """
+        base_dest = config.dest_path
+        
+        if not config.folders:
+            # Sync entire source path
+            return [(config.source_path or "", base_dest)]
+        
+        try:
+            tree = await transport.get_remote_tree(config.source_path, config.folders)
+        except Exception as e:
+            if not config.source_path:
+                raise
+            logger.warning(f"Remote tree discovery failed, syncing configured folders as-is: {e}")
+            return [
+                (f"{config.source_path}/{folder}", f"{base_dest}/{folder}")
+                for folder in config.folders
+            ]
+        
+        for folder in tree.missing_folders:
+            logger.info(f"Remote folder missing: {tree.base_path}/{folder} - skipping")
+        
+        folder_pairs = []
+        for folder in config.folders:
+            subdirs = [s for s in tree.subdirs if s.folder == folder]
+            if any(s.name == '' and s.files for s in subdirs):
+                # Loose files at the folder root: sync the folder as one unit
+                folder_pairs.append((f"{tree.base_path}/{folder}", f"{base_dest}/{folder}"))
+                continue
+            folder_pairs.extend(
+                (f"{tree.base_path}/{folder}/{s.name}", f"{base_dest}/{folder}/{s.name}")
+                for s in subdirs if s.name and s.files
+            )
+        
+        logger.info(
+            f"Remote tree {tree.base_path}: {len(folder_pairs)} folders, "
+            f"{tree.total_files} files, {tree.total_bytes} bytes"
+        )
+        return folder_pairs
+    
+    async def start_watch(self, config: SyncConfig) -> WatchStatus:
+        """
+        Start continuous watch-mode sync for an instance.
+        
+        One watch runs per instance: it keeps a single SSH session open on
+        the remote output folders and transfers files in micro-batches as
+        they finish writing. Starting a watch for an instance that already
+        has one running returns the existing watch.
+        
+        Args:
+            config: Sync configuration; source, folders and destination are
+                   resolved as for `start_sync`
+        
+        Returns:
+            WatchStatus: Live status record for the watch
+        """
+        for status, task in self._watches.values():
+            if (status.source_host, status.source_port) == (config.source_host, config.source_port) and not task.done():
+                return status
+        
+        watch_id = f"watch_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{str(uuid.uuid4())[:8]}"
+        
+        transport = self._make_transport(config, watch_id)
+        manifest_path = manifest_path_for(
+            self.manifest_dir, config.source_type, config.source_host, config.instance_name
+        )
+        engine = SyncEngine(
+            transport,
+            manifest_path,
+            event_manager=self.event_manager,
+            sync_id=watch_id
+        )
+        try:
+            engine.manifest.record_source(config.source_host, config.source_port)
+            
+            roots = await self._plan_watch_roots(config, transport)
+            if not roots:
+                raise ValueError("No remote folders to watch")
+        except BaseException:
+            engine.manifest.close()
+            raise
+        
+        status = WatchStatus(
+            watch_id=watch_id,
+            source_host=config.source_host,
+            source_port=config.source_port,
+            roots=[source for source, _ in roots]
+        )
+        watcher = FolderWatcher(engine, transport, config, roots, status)
+        
+        task = asyncio.get_running_loop().create_task(self._run_watch(watcher))
+        self._watches[watch_id] = (status, task)
+        
+        logger.info(f"Started watch {watch_id} on {config.source_host}: {len(roots)} folders")
+        return status
     
-    async def _run_cleanup(self, config: SyncConfig, transport, progress_callback):
-        """Run cleanup operation."""
+    async def _run_watch(self, watcher: FolderWatcher):
+        status = watcher.status
+        try:
+            await watcher.run()
+        except asyncio.CancelledError:
+            logger.info(f"Watch {status.watch_id} stopped")
+            raise
+        except Exception as e:
+            logger.error(f"Watch {status.watch_id} failed: {e}")
+            status.last_error = str(e)
+        finally:
+            status.running = False
+            watcher.engine.manifest.close()
+    
+    async def _plan_watch_roots(self, config: SyncConfig, transport) -> List[Tuple[str, str]]:
+        """(remote folder, destination) pairs to watch: each configured folder that exists."""
+        if not config.folders:
+            if not config.source_path:
+                raise ValueError("source_path or folders is required to watch")
+            return [(config.source_path, config.dest_path)]
+        
+        tree = await transport.get_remote_tree(config.source_path, config.folders)
+        return [
+            (f"{tree.base_path}/{folder}", f"{config.dest_path}/{folder}")
+            for folder in config.folders
+            if folder not in tree.missing_folders
+        ]
+    
+    async def stop_watch(self, watch_id: str) -> bool:
+        """Stop a watch; returns False if it isn't running."""
+        entry = self._watches.get(watch_id)
+        if entry is None or entry[1].done():
+            return False
+        
+        _, task = entry
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return True
+    
+    def get_watch_status(self, watch_id: str) -> Optional[WatchStatus]:
+        """Get status of a watch."""
+        entry = self._watches.get(watch_id)
+        return entry[0] if entry else None
+    
+    def list_watches(self) -> List[WatchStatus]:
+        """List all watches, running or stopped."""
+        return [status for status, _ in self._watches.values()]
+    
+    async def _run_cleanup(
+        self,
+        config: SyncConfig,
+        transport,
+        folder_pairs: List[Tuple[str, str]],
+        manifest: ManifestManager,
+        progress_callback
+    ):
+        """Remove old, already-synced files from the synced remote folders."""
         try:
             cleanup_engine = CleanupEngine()
             
-            # Cleanup source (remote)
-            if config.source_path:
+            for source, _ in folder_pairs:
+                if not source:
+                    continue
                 result = await cleanup_engine.cleanup_old_media(
-                    target_path=config.source_path,
+                    target_path=source,
                     age_hours=config.cleanup_age_hours,
                     dry_run=config.cleanup_dry_run,
                     transport=transport,
-                    progress_callback=progress_callback
+                    progress_callback=progress_callback,
+                    manifest=manifest
                 )
                 
-                logger.info(f"Cleanup: deleted {result.files_deleted} files, freed {result.space_freed_bytes} bytes")
+                logger.info(
+                    f"Cleanup of {source}: deleted {result.files_deleted} files, "
+                    f"freed {result.space_freed_bytes} bytes"
+                )
         
         except Exception as e:
             logger.error(f"Cleanup error: {e}")
     
+    async def start_fleet_sync(
+        self,
+        configs: Dict[str, SyncConfig],
+        bandwidth_limit_mbps: Optional[float] = None,
+        per_host_transfers: Optional[int] = None
+    ) -> FleetJob:
+        """
+        Sync several instances concurrently.
+        
+        Each member syncs into `<dest_path>/<name>` with its own manifest.
+        The bandwidth budget is shared by the rsync workers of all members,
+        and members behind the same host address share `per_host_transfers`
+        workers.
+        Progress of all members is summed into one record under the fleet's
+        `sync_id`.
+        
+        Args:
+            configs: Sync configuration per instance name
+            bandwidth_limit_mbps: Total budget for the whole fleet, None for unlimited
+            per_host_transfers: Most concurrent transfers per host address
+        
+        Returns:
+            FleetJob: Handle with the member job ids
+        """
+        fleet_id = str(uuid.uuid4())
+        fleet = FleetJob(
+            id=fleet_id,
+            sync_id=f"fleet_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{fleet_id[:8]}",
+            status='running',
+            start_time=datetime.now(),
+            bandwidth_limit_mbps=bandwidth_limit_mbps
+        )
+        self._fleets[fleet_id] = fleet
+        
+        progress = self.progress_manager.create_progress(fleet.sync_id, fleet_id)
+        progress.status = 'transferring'
+        progress.current_stage = f'Syncing {len(configs)} instances'
+        
+        planned = self._plan_fleet(configs, bandwidth_limit_mbps, per_host_transfers, fleet.sync_id)
+        for name, config in planned.items():
+            job = await self.start_sync(config)
+            fleet.members[name] = job.id
+            self._fleet_members[job.sync_id] = fleet_id
+        
+        task = asyncio.get_running_loop().create_task(self._execute_fleet(fleet))
+        self._tasks[fleet_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(fleet_id, None))
+        
+        logger.info(f"Started fleet sync {fleet_id}: {len(configs)} instances")
+        return fleet
+    
+    @staticmethod
+    def _plan_fleet(
+        configs: Dict[str, SyncConfig],
+        bandwidth_limit_mbps: Optional[float],
+        per_host_transfers: Optional[int],
+        bandwidth_group: str
+    ) -> Dict[str, SyncConfig]:
+        """Namespace each member, cap workers per host address and put all members in one bandwidth group."""
+        for name, config in configs.items():
+            config.instance_name = name
+            config.dest_path = f"{config.dest_path.rstrip('/')}/{name}"
+            if per_host_transfers:
+                # Members on one address draw from a shared cap in the transfer
+                # controller, so any of them may use it all while the others idle
+                config.parallel_transfers = per_host_transfers
+                config.host_transfer_limit = per_host_transfers
+            if bandwidth_limit_mbps:
+                config.bandwidth_limit_mbps = bandwidth_limit_mbps
+                config.bandwidth_group = bandwidth_group
+        return configs
+    
+    async def _execute_fleet(self, fleet: FleetJob):
+        """Wait for every member, then settle the fleet's status and progress."""
+        await asyncio.gather(*[self.wait_for_job(job_id) for job_id in fleet.members.values()])
+        
+        statuses = [self._active_jobs[job_id].status for job_id in fleet.members.values()]
+        if all(status == 'complete' for status in statuses):
+            fleet.status = 'complete'
+        elif all(status == 'cancelled' for status in statuses):
+            fleet.status = 'cancelled'
+        else:
+            fleet.status = 'failed'
+        fleet.end_time = datetime.now()
+        
+        self._aggregate_fleet(fleet)
+        self.progress_manager.complete_progress(
+            fleet.sync_id, fleet.status == 'complete', status=fleet.status
+        )
+        logger.info(f"Fleet sync {fleet.id} finished: {fleet.status}")
+    
+    def _aggregate_fleet_progress(self, progress):
+        """Progress callback: re-total a fleet when one of its members moves."""
+        fleet_id = self._fleet_members.get(progress.sync_id)
+        if fleet_id is not None:
+            self._aggregate_fleet(self._fleets[fleet_id])
+    
+    def _aggregate_fleet(self, fleet: FleetJob):
+        members = []
+        for job_id in fleet.members.values():
+            job = self._active_jobs.get(job_id)
+            member = self.progress_manager.get_progress(job.sync_id) if job else None
+            if member is not None:
+                members.append(member)
+        
+        running = sum(1 for p in members if p.status not in ['complete', 'failed', 'cancelled'])
+        update = {
+            'total_folders': sum(p.total_folders for p in members),
+            'completed_folders': sum(p.completed_folders for p in members),
+            'total_files': sum(p.total_files for p in members),
+            'transferred_files': sum(p.transferred_files for p in members),
+            'total_bytes': sum(p.total_bytes for p in members),
+            'transferred_bytes': sum(p.transferred_bytes for p in members),
+            'errors': [e for p in members for e in p.errors]
+        }
+        if fleet.status == 'running':
+            update['current_stage'] = f'{running} of {len(fleet.members)} instances syncing'
+        self.progress_manager.update_progress(fleet.sync_id, update)
+    
+    def get_fleet_status(self, fleet_id: str) -> Optional[FleetJob]:
+        """Get a fleet sync."""
+        return self._fleets.get(fleet_id)
+    
+    async def cancel_fleet(self, fleet_id: str) -> bool:
+        """Cancel every running member of a fleet sync."""
+        fleet = self._fleets.get(fleet_id)
+        if not fleet or fleet.status != 'running':
+            return False
+        
+        await asyncio.gather(*[self.cancel_job(job_id) for job_id in fleet.members.values()])
+        task = self._tasks.get(fleet_id)
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+        return True
+    
     def get_job_status(self, job_id: str) -> Optional[SyncJob]:
         """Get current status of a sync job."""
         return self._active_jobs.get(job_id)
     
     def list_active_jobs(self) -> list:
         """List all active sync jobs."""
-        return [job for job in self._active_jobs.values() if job.status not in ['complete', 'failed']]
+        return [job for job in self._active_jobs.values() if job.status not in ['complete', 'failed', 'cancelled']]
+    
+    async def wait_for_job(self, job_id: str, timeout: Optional[float] = None) -> Optional[SyncJob]:
+        """
+        Wait for a sync job to finish.
+        
+        Args:
+            job_id: Job to wait for
+            timeout: Maximum seconds to wait; the job keeps running on timeout
+        
+        Returns:
+            The job (possibly still running if the timeout expired)
+        """
+        task = self._tasks.get(job_id)
+        if task is not None:
+            # asyncio.wait leaves the job running on timeout and doesn't raise
+            # when the job itself was cancelled; cancelling the waiter still does
+            await asyncio.wait([task], timeout=timeout)
+        return self._active_jobs.get(job_id)
     
     async def cancel_job(self, job_id: str) -> bool:
-        """Cancel a running sync job."""
-        # Note: This is a simplified implementation
-        # Full cancellation would require task tracking
+        """
+        Cancel a running sync job.
+        
+        The job's task is cancelled, which kills any rsync processes it
+        has in flight, and the call returns once the job has unwound.
+        """
         job = self._active_jobs.get(job_id)
-        if job and job.status not in ['complete', 'failed']:
+        if not job or job.status in ['complete', 'failed', 'cancelled']:
+            return False
+        
+        task = self._tasks.get(job_id)
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        
+        if job.status != 'cancelled':
+            # Cancelled before the job got to run
             job.status = 'cancelled'
             job.end_time = datetime.now()
-            return True
-        return False
+            for progress in list(self.progress_manager._progress_store.values()):
+                if progress.job_id == job_id:
+                    self.progress_manager.complete_progress(progress.sync_id, False, status='cancelled')
+        return True
+
+
+# Global orchestrator instance shared by the v2 API and the legacy adapter
+_orchestrator = None
+_orchestrator_lock = threading.Lock()
+
+
+def get_orchestrator() -> SyncOrchestrator:
+    """Get or create the global orchestrator instance."""
+    global _orchestrator
+    with _orchestrator_lock:
+        if _orchestrator is None:
+            _orchestrator = SyncOrchestrator()
+        return _orchestrator
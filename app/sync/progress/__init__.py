@@ -3,5 +3,6 @@ Progress tracking system
 """
 
 from .progress_manager import ProgressManager
+from .transfer_progress import TransferProgressTracker
 
-__all__ = ['ProgressManager']
+__all__ = ['ProgressManager', 'TransferProgressTracker']
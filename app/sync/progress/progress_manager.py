@@ -97,11 +97,11 @@ class ProgressManager:
             else:
                 progress.estimated_time_remaining = 0
     
-    def complete_progress(self, sync_id: str, success: bool = True):
-        """Mark a sync as complete."""
+    def complete_progress(self, sync_id: str, success: bool = True, status: Optional[str] = None):
+        """Mark a sync as complete (or with an explicit final status such as 'cancelled')."""
         if sync_id in self._progress_store:
             progress = self._progress_store[sync_id]
-            progress.status = 'complete' if success else 'failed'
+            progress.status = status or ('complete' if success else 'failed')
             progress.progress_percent = 100.0 if success else progress.progress_percent
             progress.end_time = datetime.now()
             progress.last_update = datetime.now()
@@ -117,7 +117,7 @@ class ProgressManager:
         """List all active sync operations."""
         return [
             p for p in self._progress_store.values()
-            if p.status not in ['complete', 'failed']
+            if p.status not in ['complete', 'failed', 'cancelled']
         ]
     
     def cleanup_old(self, max_age_seconds: int = 3600):
@@ -126,7 +126,7 @@ class ProgressManager:
         to_remove = []
         
         for sync_id, progress in self._progress_store.items():
-            if progress.status in ['complete', 'failed'] and progress.end_time:
+            if progress.status in ['complete', 'failed', 'cancelled'] and progress.end_time:
                 age = (current_time - progress.end_time).total_seconds()
                 if age > max_age_seconds:
                     to_remove.append(sync_id)
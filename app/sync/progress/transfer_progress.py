@@ -0,0 +1,103 @@
+"""
+Aggregation of live transfer progress across concurrent rsync workers
+"""
+
+import time
+import threading
+import logging
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TransferProgressTracker:
+    """
+    Fold per-worker rsync progress into job-level counters.
+
+    Each rsync run reports cumulative counters tagged with a `transfer_id`.
+    The tracker keeps the latest values per run, sums them, and forwards
+    job-level `transferred_bytes`/`transferred_files`/`total_*` updates to
+    the wrapped callback at most once per `min_interval` seconds.
+
+    Updates without a `transfer_id` (stage messages, planned totals) are
+    forwarded immediately.
+    """
+
+    def __init__(self, callback: Callable[[dict], None], min_interval: float = 0.5):
+        """
+        Args:
+            callback: Receives aggregated progress dicts (e.g. ProgressManager.update_progress)
+            min_interval: Minimum seconds between forwarded transfer updates
+        """
+        self.callback = callback
+        self.min_interval = min_interval
+
+        self._lock = threading.Lock()
+        self._transfers: Dict[str, dict] = {}
+        self._planned_files = 0
+        self._planned_bytes = 0
+        self._current_file: Optional[str] = None
+        self._last_emit: Optional[float] = None
+        self._dirty = False
+
+    def update(self, update: dict):
+        """Progress callback to hand to the sync engine and transport."""
+        transfer_id = update.get('transfer_id')
+
+        if transfer_id is None:
+            with self._lock:
+                self._planned_files += update.get('planned_files', 0)
+                self._planned_bytes += update.get('planned_bytes', 0)
+                passthrough = {k: v for k, v in update.items() if k not in ('planned_files', 'planned_bytes')}
+                if 'planned_files' in update or 'planned_bytes' in update:
+                    passthrough.update(self._snapshot())
+            if passthrough:
+                self._emit(passthrough)
+            return
+
+        with self._lock:
+            self._transfers[transfer_id] = update
+            if update.get('current_file'):
+                self._current_file = update['current_file']
+            self._dirty = True
+
+            now = time.monotonic()
+            if self._last_emit is not None and now - self._last_emit < self.min_interval:
+                return
+            self._last_emit = now
+            self._dirty = False
+            snapshot = self._snapshot()
+
+        self._emit(snapshot)
+
+    def flush(self):
+        """Forward any progress held back by throttling."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._last_emit = time.monotonic()
+            snapshot = self._snapshot()
+
+        self._emit(snapshot)
+
+    def _snapshot(self) -> dict:
+        transfers = self._transfers.values()
+        transferred_bytes = sum(t.get('transferred_bytes', 0) for t in transfers)
+        transferred_files = sum(t.get('transferred_files', 0) for t in transfers)
+        estimated_bytes = sum(t.get('estimated_total_bytes', 0) for t in transfers)
+        estimated_files = sum(t.get('estimated_total_files', 0) for t in transfers)
+
+        return {
+            'transferred_bytes': transferred_bytes,
+            'transferred_files': transferred_files,
+            'total_bytes': max(self._planned_bytes, estimated_bytes, transferred_bytes),
+            'total_files': max(self._planned_files, estimated_files, transferred_files),
+            'current_file': self._current_file
+        }
+
+    def _emit(self, update: dict):
+        try:
+            self.callback(update)
+        except Exception as e:
+            logger.error(f"Progress callback failed: {e}")
@@ -2,13 +2,14 @@
 Adapter to make the new sync system compatible with legacy sync_utils.run_sync interface
 """
 
-import asyncio
 import logging
 import os
-from typing import Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
 
-from .orchestrator import SyncOrchestrator
-from .models import SyncConfig, SyncJob
+from .orchestrator import get_orchestrator
+from .models import SyncConfig
+from .sync_utils import save_sync_log
 
 logger = logging.getLogger(__name__)
 
@@ -22,44 +23,37 @@ DEFAULT_FOLDERS = [
     'extras-images'
 ]
 
-# Global orchestrator instance
-_orchestrator = None
+# Maximum time run_sync_v2 blocks waiting for a job, in seconds
+SYNC_WAIT_TIMEOUT = 600
 
 
-def get_orchestrator() -> SyncOrchestrator:
-    """Get or create the global orchestrator instance."""
-    global _orchestrator
-    if _orchestrator is None:
-        _orchestrator = SyncOrchestrator()
-    return _orchestrator
-
-
-async def _poll_job_status(orchestrator: SyncOrchestrator, job_id: str, max_wait: int = 600) -> Optional[SyncJob]:
-    """
-    Poll job status asynchronously to avoid blocking.
-    
-    Uses asyncio.to_thread() to run synchronous get_job_status in a thread,
-    preventing blocking of the event loop during progress polling.
-    
-    Args:
-        orchestrator: The orchestrator instance
-        job_id: Job ID to poll
-        max_wait: Maximum time to wait in seconds
+def _build_config(host: str, port: str, sync_type: str, cleanup: bool,
+                  folders: list = None, source_path: str = None) -> SyncConfig:
+    """Sync configuration used by the legacy endpoints."""
+    # Use default folders if not provided
+    if not folders:
+        folders = DEFAULT_FOLDERS
     
-    Returns:
-        The final job status or None if timeout
-    """
-    elapsed = 0
-    while elapsed < max_wait:
-        # Run synchronous get_job_status in a thread to avoid blocking
-        job_status = await asyncio.to_thread(orchestrator.get_job_status, job_id)
-        if job_status and job_status.status in ['complete', 'failed']:
-            return job_status
-        await asyncio.sleep(2)
-        elapsed += 2
+    # Get destination path from environment or default (the container's media mount)
+    dest_path = os.environ.get('MEDIA_BASE', '/media')
     
-    # Timeout - get final status
-    return await asyncio.to_thread(orchestrator.get_job_status, job_id)
+    # With no source_path the output root is resolved from the remote
+    # UI_HOME during tree discovery
+    return SyncConfig(
+        source_type=sync_type.lower(),
+        source_host=host,
+        source_port=int(port),
+        source_path=source_path,
+        dest_path=dest_path,
+        folders=folders,
+        parallel_transfers=3,
+        enable_cleanup=cleanup,
+        cleanup_age_hours=24,
+        cleanup_dry_run=False,
+        generate_xmp=True,
+        calculate_hashes=False,
+        extract_metadata=True
+    )
 
 
 def run_sync_v2(host: str, port: str, sync_type: str, cleanup: bool = True, 
@@ -81,54 +75,19 @@ def run_sync_v2(host: str, port: str, sync_type: str, cleanup: bool = True,
     Returns:
         dict: Result with success, message, and output
     """
+    start_time = datetime.now()
+    
     try:
-        # Detect source path if not provided
-        if not source_path:
-            if sync_type.lower() == 'forge':
-                source_path = '/workspace/stable-diffusion-webui/outputs'
-            elif sync_type.lower() == 'comfyui':
-                source_path = '/workspace/ComfyUI/output'
-            else:
-                source_path = '/workspace/stable-diffusion-webui/outputs'
-        
-        # Use default folders if not provided
-        if not folders:
-            folders = DEFAULT_FOLDERS
-        
-        # Get destination path from environment or default
-        dest_path = os.environ.get('MEDIA_BASE', '/mnt/qnap-sd/SecretFolder')
-        
-        # Create config
-        config = SyncConfig(
-            source_type=sync_type.lower(),
-            source_host=host,
-            source_port=int(port),
-            source_path=source_path,
-            dest_path=dest_path,
-            folders=folders,
-            parallel_transfers=3,
-            enable_cleanup=cleanup,
-            cleanup_age_hours=24,
-            cleanup_dry_run=False,
-            generate_xmp=True,
-            calculate_hashes=False,
-            extract_metadata=True
-        )
+        config = _build_config(host, port, sync_type, cleanup, folders, source_path)
         
         # Start sync
         orchestrator = get_orchestrator()
         
-        # Run async operation in sync context
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        job = loop.run_until_complete(orchestrator.start_sync(config))
-        
-        # Poll for completion using asyncio.to_thread() to avoid blocking
-        final_job = loop.run_until_complete(_poll_job_status(orchestrator, job.id, max_wait=600))
+        # The job runs on the orchestrator's event loop; this thread only waits for it
+        job = orchestrator.run(orchestrator.start_sync(config))
+        final_job = orchestrator.run(orchestrator.wait_for_job(job.id, timeout=SYNC_WAIT_TIMEOUT))
         
-        loop.close()
-        
-        # Get final status if polling returned None
+        # Fall back to the recorded status if the job is no longer tracked
         if not final_job:
             final_job = orchestrator.get_job_status(job.id)
         
@@ -139,32 +98,54 @@ def run_sync_v2(host: str, port: str, sync_type: str, cleanup: bool = True,
                 'output': ''
             }
         
+        progress = orchestrator.progress_manager.get_progress(job.sync_id)
+        folders_synced = progress.completed_folders if progress else 0
+        
         if final_job.status == 'complete' and final_job.result and final_job.result.success:
             result = final_job.result
+            rate = result.bytes_transferred / result.duration if result.duration else 0
             output = (f"Sync completed successfully\n"
                      f"Files transferred: {result.files_transferred}\n"
                      f"Bytes transferred: {result.bytes_transferred:,}\n"
                      f"Duration: {result.duration:.2f}s\n"
-                     f"Transfer rate: {result.bytes_transferred / result.duration / 1024 / 1024:.2f} MB/s")
+                     f"Transfer rate: {rate / 1024 / 1024:.2f} MB/s")
             
-            return {
+            sync_result = {
                 'success': True,
                 'message': f'{sync_type} sync completed successfully',
                 'output': output,
                 'job_id': job.id,
+                'sync_id': job.sync_id,
                 'files_transferred': result.files_transferred,
                 'bytes_transferred': result.bytes_transferred,
-                'duration': result.duration
+                'duration': result.duration,
+                'stats': {
+                    'files_transferred': result.files_transferred,
+                    'total_size': result.bytes_transferred,
+                    'total_time': result.duration,
+                    'transfer_rate': rate
+                },
+                'summary': {
+                    'folders_synced': folders_synced,
+                    'files_transferred': result.files_transferred,
+                    'bytes_transferred': result.bytes_transferred,
+                    'duration_seconds': result.duration,
+                    'cleanup_enabled': cleanup
+                }
             }
         else:
             errors = final_job.result.errors if final_job.result else ['Unknown error']
-            return {
+            sync_result = {
                 'success': False,
                 'message': f'{sync_type} sync failed',
                 'output': '\n'.join(errors),
                 'job_id': job.id,
+                'sync_id': job.sync_id,
                 'errors': errors
             }
+        
+        save_sync_log(sync_type, sync_result, start_time, datetime.now())
+        return sync_result
     
     except Exception as e:
         logger.error(f"Sync error: {e}")
@@ -173,3 +154,51 @@ def run_sync_v2(host: str, port: str, sync_type: str, cleanup: bool = True,
             'message': f'Sync error: {str(e)}',
             'output': str(e)
         }
+
+
+def start_fleet_sync_v2(instances: List[Tuple[str, str, str]], sync_type: str, cleanup: bool = True,
+                        folders: list = None, bandwidth_limit_mbps: Optional[float] = None,
+                        per_host_transfers: Optional[int] = None) -> dict:
+    """
+    Start syncing several instances at once without waiting for them.
+    
+    Args:
+        instances: (name, host, port) per instance; the name becomes the
+                   instance's folder under the media destination
+        sync_type: Type of sync ('vastai', ...)
+        cleanup: Whether to cleanup old media on each instance
+        folders: List of folders to sync (default: DEFAULT_FOLDERS)
+        bandwidth_limit_mbps: Total budget shared by the whole fleet
+        per_host_transfers: Most concurrent transfers per host address
+    
+    Returns:
+        dict: Result with the fleet id, its aggregated progress sync_id and
+              the member job ids
+    """
+    try:
+        configs = {
+            name: _build_config(host, port, sync_type, cleanup, folders)
+            for name, host, port in instances
+        }
+        
+        orchestrator = get_orchestrator()
+        fleet = orchestrator.run(orchestrator.start_fleet_sync(
+            configs,
+            bandwidth_limit_mbps=bandwidth_limit_mbps,
+            per_host_transfers=per_host_transfers
+        ))
+        
+        return {
+            'success': True,
+            'message': f'{sync_type} fleet sync started for {len(configs)} instances',
+            'fleet_id': fleet.id,
+            'sync_id': fleet.sync_id,
+            'jobs': fleet.members
+        }
+    
+    except Exception as e:
+        logger.error(f"Fleet sync error: {e}")
+        return {
+            'success': False,
+            'message': f'Fleet sync error: {str(e)}'
+        }
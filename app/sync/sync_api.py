@@ -20,7 +20,10 @@ from flask_cors import CORS
 
 # Import our refactored modules
 try:
-    from .sync_utils import run_sync, FORGE_HOST, FORGE_PORT, COMFY_HOST, COMFY_PORT
+    from .sync_utils import FORGE_HOST, FORGE_PORT, COMFY_HOST, COMFY_PORT
+    # v1 sync endpoints run on the shared orchestrator (tree discovery + worker pool)
+    from .sync_adapter import run_sync_v2 as run_sync, start_fleet_sync_v2
+    from .orchestrator import get_orchestrator
     from ..vastai.vast_manager import VastManager
     from ..vastai.vastai_utils import parse_ssh_connection, parse_host_port, read_api_key_from_file, get_ssh_port
     from ..utils.sync_logs import get_logs_manifest, get_log_file_content, get_active_syncs, get_latest_sync, get_sync_progress
@@ -32,18 +35,22 @@ try:
     from .background_tasks import get_task_manager
     from .ssh_host_key_manager import SSHHostKeyManager
     from .toolbar_state import ToolbarStateManager
+    from ..utils.ssh_pool import get_ssh_pool
 except ImportError:
     # Handle imports for both module and direct execution
     import sys
     import os
     sys.path.append(os.path.dirname(os.path.dirname(__file__)))
     from sync_utils import run_sync, FORGE_HOST, FORGE_PORT, COMFY_HOST, COMFY_PORT
+    get_orchestrator = None
+    start_fleet_sync_v2 = None
     from vastai.vast_manager import VastManager
     from vastai.vastai_utils import parse_ssh_connection, parse_host_port, read_api_key_from_file, get_ssh_port
     from utils.sync_logs import get_logs_manifest, get_log_file_content, get_active_syncs, get_latest_sync, get_sync_progress
     from utils.config_loader import load_config, load_api_key
     from webui.templates import get_index_template
     from background_tasks import get_task_manager
+    from utils.ssh_pool import get_ssh_pool
     try:
         from ssh_host_key_manager import SSHHostKeyManager
         from ssh_test import SSHTester
@@ -73,6 +80,14 @@ except ImportError:
 app.register_blueprint(models_bp)
 logger.info("Registered Models API blueprint")
 
+# Register Media search API blueprint
+try:
+    from app.api import media_bp
+except ImportError:
+    from ..api import media_bp
+app.register_blueprint(media_bp)
+logger.info("Registered Media search API blueprint")
+
 # Register Create API blueprint
 try:
     from app.api.create import bp as create_bp
@@ -379,6 +394,19 @@ def sync_comfy():
     return jsonify(result)
 
 
+def _instance_ssh_endpoint(instance):
+    """SSH (host, port) of a VastAI instance; host is None without a public IP."""
+    # Always use public_ip as the SSH host (authoritative), not ssh_host
+    ssh_host = (
+        instance.get('public_ip') or 
+        instance.get('public_ipaddr') or 
+        instance.get('ip_address') or
+        instance.get('publicIp')
+    )
+    ssh_port = str(get_ssh_port(instance) or 22)
+    return ssh_host, ssh_port
+
+
 @app.route('/sync/vastai', methods=['POST', 'OPTIONS'])
 def sync_vastai():
     """Sync from VastAI (auto-discover running instance)"""
@@ -395,15 +423,7 @@ def sync_vastai():
                 'message': 'No running VastAI instance found'
             })
         
-        # Extract SSH connection details
-        # Always use public_ip as the SSH host (authoritative), not ssh_host
-        ssh_host = (
-            running_instance.get('public_ip') or 
-            running_instance.get('public_ipaddr') or 
-            running_instance.get('ip_address') or
-            running_instance.get('publicIp')
-        )
-        ssh_port = str(get_ssh_port(running_instance) or 22)
+        ssh_host, ssh_port = _instance_ssh_endpoint(running_instance)
         
         if not ssh_host:
             return jsonify({
@@ -447,6 +467,84 @@ def sync_vastai():
         })
 
 
+@app.route('/sync/vastai/fleet', methods=['POST', 'OPTIONS'])
+def sync_vastai_fleet():
+    """
+    Sync every running VastAI instance concurrently.
+    
+    Each instance syncs into its own `vast-<id>` folder under the media
+    destination. Returns immediately; follow the aggregated progress with
+    the returned sync_id or /api/v2/sync/fleet/<fleet_id>.
+    
+    Request body (all optional):
+    {
+        "cleanup": true,
+        "folders": ["txt2img-images"],
+        "bandwidth_limit_mbps": 400,
+        "per_host_transfers": 4
+    }
+    """
+    if request.method == 'OPTIONS':
+        return ("", 204)
+    if start_fleet_sync_v2 is None:
+        return jsonify({
+            'success': False,
+            'message': 'Fleet sync is not available'
+        })
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        vast_manager = VastManager()
+        running = [i for i in vast_manager.list_instances() if i.get('cur_state') == 'running']
+        
+        instances = []
+        skipped = []
+        for instance in running:
+            ssh_host, ssh_port = _instance_ssh_endpoint(instance)
+            if ssh_host:
+                instances.append((f"vast-{instance.get('id')}", ssh_host, ssh_port))
+            else:
+                skipped.append(instance.get('id'))
+        
+        if skipped:
+            logger.warning(f"Skipping running VastAI instances without a public IP: {skipped}")
+        
+        if not instances:
+            return jsonify({
+                'success': False,
+                'message': 'No running VastAI instance found'
+            })
+        
+        logger.info(f"Starting fleet sync of {len(instances)} VastAI instances")
+        
+        result = start_fleet_sync_v2(
+            instances,
+            "VastAI",
+            cleanup=data.get('cleanup', True),
+            folders=data.get('folders'),
+            bandwidth_limit_mbps=data.get('bandwidth_limit_mbps'),
+            per_host_transfers=data.get('per_host_transfers')
+        )
+        if result['success']:
+            result['instances'] = [
+                {'name': name, 'host': host, 'port': port} for name, host, port in instances
+            ]
+            result['skipped_instances'] = skipped
+        return jsonify(result)
+        
+    except FileNotFoundError:
+        return jsonify({
+            'success': False,
+            'message': 'VastAI configuration files not found (config.yaml or api_key.txt)'
+        })
+    except Exception as e:
+        logger.error(f"VastAI fleet sync error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'VastAI fleet sync error: {str(e)}'
+        })
+
+
 @app.route('/sync/vastai-connection', methods=['POST', 'OPTIONS'])
 def sync_vastai_connection():
     """Sync from VastAI using manual connection string"""
@@ -2208,6 +2306,11 @@ def get_sync_progress_route(sync_id):
     """Get progress for a specific sync operation"""
     logger.debug(f"Progress requested for sync_id: {sync_id}")
     result = get_sync_progress(sync_id)
+    if not result.get('success') and get_orchestrator is not None:
+        # Orchestrator-run syncs keep their progress in memory
+        progress = get_orchestrator().progress_manager.get_progress(sync_id)
+        if progress:
+            result = {"success": True, "progress": progress.to_dict()}
     logger.debug(f"Progress result: {result}")
     return jsonify(result)
 
@@ -5509,41 +5612,38 @@ def catalog_check_downloads():
                 logger.info(f"[CATALOG]   - search_path: {search_path}")
                 logger.info(f"[CATALOG]   - patterns: {patterns}")
                 
-                for pattern in patterns:
-                    ssh_cmd = [
-                        'ssh',
-                        '-p', str(ssh_port),
-                        '-i', ssh_key,
-                        '-o', 'ConnectTimeout=5',
-                        '-o', 'StrictHostKeyChecking=yes',
-                        '-o', 'UserKnownHostsFile=/root/.ssh/known_hosts',
-                        '-o', 'IdentitiesOnly=yes',
-                        f'root@{ssh_host}',
-                        f'find {search_path} -maxdepth 2 -name "{pattern}" 2>/dev/null | head -1'
-                    ]
+                # Check every pattern in a single round trip over the pooled connection
+                find_cmd = ' || '.join(
+                    f'find {search_path} -maxdepth 2 -name "{pattern}" 2>/dev/null | head -1 | grep .'
+                    for pattern in patterns
+                )
+                
+                logger.info(f"[CATALOG] 🔧 Remote command: {find_cmd}")
+                
+                try:
+                    result = get_ssh_pool().run(
+                        ssh_host,
+                        ssh_port,
+                        find_cmd,
+                        timeout=10,
+                        identity_file=ssh_key,
+                        options={
+                            'StrictHostKeyChecking': 'yes',
+                            'UserKnownHostsFile': '/root/.ssh/known_hosts',
+                            'IdentitiesOnly': 'yes'
+                        }
+                    )
                     
-                    logger.info(f"[CATALOG] 🔧 SSH command: {' '.join(ssh_cmd)}")
+                    logger.info(f"[CATALOG] 📊 Result: returncode={result.returncode}, stdout='{result.stdout.strip()}', stderr='{result.stderr.strip()}'")
                     
-                    try:
-                        result = subprocess.run(
-                            ssh_cmd,
-                            capture_output=True,
-                            text=True,
-                            timeout=10
-                        )
-                        
-                        logger.info(f"[CATALOG] 📊 Result: returncode={result.returncode}, stdout='{result.stdout.strip()}', stderr='{result.stderr.strip()}'")
-                        
-                        if result.returncode == 0 and result.stdout.strip():
-                            found = True
-                            found_path = result.stdout.strip()
-                            logger.info(f"[CATALOG] ✅ Found file: {found_path}")
-                            break
-                        else:
-                            logger.info(f"[CATALOG] ❌ Pattern {pattern} not found")
-                    except Exception as e:
-                        logger.warning(f"[CATALOG] ⚠️  Error checking pattern {pattern}: {e}")
-                        continue
+                    if result.returncode == 0 and result.stdout.strip():
+                        found = True
+                        found_path = result.stdout.strip().splitlines()[0]
+                        logger.info(f"[CATALOG] ✅ Found file: {found_path}")
+                    else:
+                        logger.info("[CATALOG] ❌ No pattern matched")
+                except Exception as e:
+                    logger.warning(f"[CATALOG] ⚠️  Error checking patterns {patterns}: {e}")
                 
                 results[file_path] = {
                     'downloaded': found,
@@ -2,30 +2,21 @@
 Media Sync API v2 - Enhanced endpoints using the redesigned sync system
 """
 
-import asyncio
 import logging
 from flask import Blueprint, jsonify, request
-from datetime import datetime
 
-from .orchestrator import SyncOrchestrator
-from .models import SyncConfig
+from .orchestrator import get_orchestrator
+from .models import SyncConfig, CleanupConfig, MediaEvent
+from .cleanup.space_scheduler import get_space_scheduler, start_space_scheduler
+from .ingest import MetadataIndexIngest, get_metadata_index
 
 logger = logging.getLogger(__name__)
 
 # Create Blueprint for v2 API
 sync_v2_bp = Blueprint('sync_v2', __name__, url_prefix='/api/v2/sync')
 
-# Global orchestrator instance
-_orchestrator = None
-
-
-def get_orchestrator() -> SyncOrchestrator:
-    """Get or create the global orchestrator instance."""
-    global _orchestrator
-    if _orchestrator is None:
-        _orchestrator = SyncOrchestrator()
-    return _orchestrator
-
+# Seconds a request thread waits for the orchestrator loop to accept work
+SUBMIT_TIMEOUT = 30
 
 @sync_v2_bp.route('/start', methods=['POST'])
 def start_sync():
@@ -41,6 +32,7 @@ def start_sync():
         "dest_path": "/media",
         "folders": ["txt2img-images", "img2img-images"],
         "parallel_transfers": 3,
+        "bandwidth_limit_mbps": 200,
         "enable_cleanup": true,
         "cleanup_age_hours": 24,
         "cleanup_dry_run": false
@@ -75,6 +67,7 @@ def start_sync():
             dest_path=data['dest_path'],
             folders=data.get('folders', []),
             parallel_transfers=data.get('parallel_transfers', 3),
+            bandwidth_limit_mbps=data.get('bandwidth_limit_mbps'),
             enable_cleanup=data.get('enable_cleanup', True),
             cleanup_age_hours=data.get('cleanup_age_hours', 24),
             cleanup_dry_run=data.get('cleanup_dry_run', False),
@@ -86,16 +79,13 @@ def start_sync():
         # Start sync
         orchestrator = get_orchestrator()
         
-        # Run async operation in sync context
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        job = loop.run_until_complete(orchestrator.start_sync(config))
-        loop.close()
+        # Schedule on the orchestrator's event loop; the job keeps running there
+        job = orchestrator.run(orchestrator.start_sync(config), timeout=SUBMIT_TIMEOUT)
         
         return jsonify({
             'success': True,
             'job_id': job.id,
-            'sync_id': f"sync_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{job.id[:8]}",
+            'sync_id': job.sync_id,
             'message': 'Sync started successfully'
         })
     
@@ -281,10 +271,7 @@ def cancel_job(job_id):
     try:
         orchestrator = get_orchestrator()
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        cancelled = loop.run_until_complete(orchestrator.cancel_job(job_id))
-        loop.close()
+        cancelled = orchestrator.run(orchestrator.cancel_job(job_id), timeout=SUBMIT_TIMEOUT)
         
         if cancelled:
             return jsonify({
@@ -305,7 +292,340 @@ def cancel_job(job_id):
         }), 500
 
 
+@sync_v2_bp.route('/fleet/<fleet_id>', methods=['GET'])
+def get_fleet(fleet_id):
+    """
+    Get status and aggregated progress of a fleet sync.
+    
+    Returns:
+    {
+        "success": true,
+        "fleet": {
+            "id": "uuid",
+            "sync_id": "fleet_20251021_120000_abc123",
+            "status": "running",
+            "members": {"vast-123": {"job_id": "uuid", "status": "transferring"}}
+        },
+        "progress": {"transferred_files": 20, "total_files": 44, ...}
+    }
+    """
+    try:
+        orchestrator = get_orchestrator()
+        fleet = orchestrator.get_fleet_status(fleet_id)
+        
+        if not fleet:
+            return jsonify({
+                'success': False,
+                'error': 'Fleet not found'
+            }), 404
+        
+        members = {}
+        for name, job_id in fleet.members.items():
+            job = orchestrator.get_job_status(job_id)
+            members[name] = {
+                'job_id': job_id,
+                'status': job.status if job else None,
+                'sync_id': job.sync_id if job else None
+            }
+        
+        progress = orchestrator.progress_manager.get_progress(fleet.sync_id)
+        
+        return jsonify({
+            'success': True,
+            'fleet': {
+                'id': fleet.id,
+                'sync_id': fleet.sync_id,
+                'status': fleet.status,
+                'start_time': fleet.start_time.isoformat(),
+                'end_time': fleet.end_time.isoformat() if fleet.end_time else None,
+                'bandwidth_limit_mbps': fleet.bandwidth_limit_mbps,
+                'members': members
+            },
+            'progress': progress.to_dict() if progress else None
+        })
+    
+    except Exception as e:
+        logger.error(f"Failed to get fleet status: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'An error occurred while retrieving fleet status'
+        }), 500
+
+
+@sync_v2_bp.route('/fleet/<fleet_id>/cancel', methods=['POST'])
+def cancel_fleet(fleet_id):
+    """Cancel every running member of a fleet sync."""
+    try:
+        orchestrator = get_orchestrator()
+        cancelled = orchestrator.run(orchestrator.cancel_fleet(fleet_id), timeout=SUBMIT_TIMEOUT)
+        
+        if cancelled:
+            return jsonify({
+                'success': True,
+                'message': 'Fleet sync cancelled'
+            })
+        return jsonify({
+            'success': False,
+            'error': 'Fleet not found or already finished'
+        }), 404
+    
+    except Exception as e:
+        logger.error(f"Failed to cancel fleet: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'An error occurred while cancelling the fleet sync'
+        }), 500
+
+
+@sync_v2_bp.route('/watch/start', methods=['POST'])
+def start_watch():
+    """
+    Start continuous watch-mode sync for an instance.
+    
+    Request body: same fields as /start, plus optional
+    "watch_debounce_seconds", "watch_max_batch" and "watch_poll_interval".
+    
+    Returns:
+    {
+        "success": true,
+        "watch": {"watch_id": "watch_20251021_120000_abc123", "mode": null, ...}
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        required = ['source_type', 'source_host', 'source_port', 'dest_path']
+        for field in required:
+            if field not in data:
+                return jsonify({
+                    'success': False,
+                    'error': f'Missing required field: {field}'
+                }), 400
+        
+        config = SyncConfig(
+            source_type=data['source_type'],
+            source_host=data['source_host'],
+            source_port=int(data['source_port']),
+            source_path=data.get('source_path'),
+            dest_path=data['dest_path'],
+            folders=data.get('folders', []),
+            parallel_transfers=data.get('parallel_transfers', 3),
+            bandwidth_limit_mbps=data.get('bandwidth_limit_mbps'),
+            enable_cleanup=False,
+            generate_xmp=data.get('generate_xmp', True),
+            calculate_hashes=data.get('calculate_hashes', False),
+            extract_metadata=data.get('extract_metadata', True),
+            watch_debounce_seconds=float(data.get('watch_debounce_seconds', 2.0)),
+            watch_max_batch=int(data.get('watch_max_batch', 100)),
+            watch_poll_interval=float(data.get('watch_poll_interval', 2.0))
+        )
+        
+        orchestrator = get_orchestrator()
+        status = orchestrator.run(orchestrator.start_watch(config), timeout=SUBMIT_TIMEOUT)
+        
+        return jsonify({
+            'success': True,
+            'watch': status.to_dict()
+        })
+    
+    except Exception as e:
+        logger.error(f"Failed to start watch: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'An error occurred while starting the watch'
+        }), 500
+
+
+@sync_v2_bp.route('/watch/<watch_id>/stop', methods=['POST'])
+def stop_watch(watch_id):
+    """Stop a running watch."""
+    try:
+        orchestrator = get_orchestrator()
+        stopped = orchestrator.run(orchestrator.stop_watch(watch_id), timeout=SUBMIT_TIMEOUT)
+        
+        if stopped:
+            return jsonify({
+                'success': True,
+                'message': 'Watch stopped'
+            })
+        return jsonify({
+            'success': False,
+            'error': 'Watch not found or not running'
+        }), 404
+    
+    except Exception as e:
+        logger.error(f"Failed to stop watch: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'An error occurred while stopping the watch'
+        }), 500
+
+
+@sync_v2_bp.route('/watch', methods=['GET'])
+def list_watches():
+    """
+    List watches and their counters.
+    
+    Returns:
+    {
+        "success": true,
+        "watches": [{"watch_id": "...", "mode": "inotify", "files_synced": 12, ...}]
+    }
+    """
+    try:
+        orchestrator = get_orchestrator()
+        return jsonify({
+            'success': True,
+            'watches': [status.to_dict() for status in orchestrator.list_watches()]
+        })
+    
+    except Exception as e:
+        logger.error(f"Failed to list watches: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'An error occurred while listing watches'
+        }), 500
+
+
+@sync_v2_bp.route('/transfers', methods=['GET'])
+def transfer_stats():
+    """
+    Report the transfer controller's per-host concurrency and throughput.
+    
+    Returns:
+    {
+        "success": true,
+        "total_budget_mbps": 400,
+        "hosts": [{"host": "1.2.3.4:22", "limit": 3, "active": 2, "failed": 0, ...}]
+    }
+    """
+    try:
+        controller = get_orchestrator().transfer_controller
+        return jsonify({
+            'success': True,
+            'total_budget_mbps': controller.total_budget_mbps,
+            'hosts': controller.get_stats()
+        })
+    
+    except Exception as e:
+        logger.error(f"Failed to get transfer stats: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'An error occurred while retrieving transfer stats'
+        }), 500
+
+
+@sync_v2_bp.route('/space', methods=['GET'])
+def space_status():
+    """
+    Get the latest free-space samples from the space-pressure scheduler.
+    
+    Returns:
+    {
+        "success": true,
+        "space": {
+            "running": true,
+            "min_free_space_gb": 10,
+            "targets": [{"host": "...", "path": "...", "free_bytes": 123, ...}]
+        }
+    }
+    """
+    scheduler = get_space_scheduler()
+    if scheduler is None:
+        return jsonify({
+            'success': False,
+            'error': 'Space-pressure cleanup is not configured'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'space': scheduler.get_status()
+    })
+
+
+@sync_v2_bp.route('/space/check', methods=['POST'])
+def space_check():
+    """Run a space-pressure check on all instances now."""
+    scheduler = get_space_scheduler()
+    if scheduler is None:
+        return jsonify({
+            'success': False,
+            'error': 'Space-pressure cleanup is not configured'
+        }), 404
+    
+    try:
+        orchestrator = get_orchestrator()
+        targets = orchestrator.run(scheduler.check_all(), timeout=600)
+        return jsonify({
+            'success': True,
+            'targets': targets
+        })
+    
+    except Exception as e:
+        logger.error(f"Failed to run space check: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'An error occurred while checking free space'
+        }), 500
+
+
+def _load_app_config() -> dict:
+    """The app's config.yaml settings, or an empty dict if it can't be loaded."""
+    try:
+        try:
+            from ..utils.config_loader import load_config
+        except ImportError:
+            from utils.config_loader import load_config
+        
+        return load_config() or {}
+    except Exception as e:
+        logger.debug(f"App config unavailable: {e}")
+        return {}
+
+
+def _start_space_scheduler():
+    """Start space-pressure cleanup if `cleanup_min_free_space_gb` is configured."""
+    config = _load_app_config()
+    
+    min_free_gb = config.get('cleanup_min_free_space_gb')
+    if not min_free_gb:
+        return
+    
+    start_space_scheduler(
+        CleanupConfig(
+            min_free_space_gb=min_free_gb,
+            target_free_space_gb=config.get('cleanup_target_free_space_gb')
+        ),
+        interval=config.get('cleanup_space_check_interval', 300)
+    )
+
+
+def _register_media_index():
+    """Feed synced files into the metadata search index."""
+    config = _load_app_config()
+    
+    try:
+        index = get_metadata_index(config.get('media_index_path'))
+        get_orchestrator().event_manager.subscribe(
+            MediaEvent.BATCH_SYNCED,
+            MetadataIndexIngest(index)
+        )
+    except Exception as e:
+        logger.warning(f"Media metadata index unavailable: {e}")
+
+
+def _configure_transfers():
+    """Apply the global rsync bandwidth budget (`transfer_budget_mbps`)."""
+    budget = _load_app_config().get('transfer_budget_mbps')
+    if budget:
+        get_orchestrator().transfer_controller.total_budget_mbps = float(budget)
+        logger.info(f"Transfer bandwidth budget: {budget} Mbps")
+
+
 def register_v2_api(app):
     """Register the v2 API blueprint with the Flask app."""
     app.register_blueprint(sync_v2_bp)
+    _configure_transfers()
+    _start_space_scheduler()
+    _register_media_index()
     logger.info("Registered Sync API v2")
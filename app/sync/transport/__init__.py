@@ -2,9 +2,11 @@
 Transport adapters for different sync mechanisms
 """
 
+import os
 from abc import ABC, abstractmethod
-from typing import List, Optional, Callable
-from ..models import FileStat, TransferResult
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Callable
+from ..models import FileStat, TransferResult, BatchTransferResult, BatchDeleteResult, RemoteTree
 
 
 class TransportAdapter(ABC):
@@ -15,6 +17,31 @@ class TransportAdapter(ABC):
         """List files at remote path."""
         pass
     
+    async def list_files_since(self, path: str, since: float) -> List[FileStat]:
+        """
+        List files at remote path modified after `since` (epoch seconds).
+        
+        The default implementation filters a full listing; adapters should
+        override this to filter on the remote side.
+        """
+        return [f for f in await self.list_files(path) if f.mtime > since]
+    
+    async def iter_files(self, path: str, since: Optional[float] = None) -> AsyncIterator[FileStat]:
+        """
+        Stream files at remote path, only those modified after `since` if given.
+        
+        Unlike `list_files`, a failed listing raises instead of coming back
+        empty. The default implementation yields from `list_files` and
+        `list_files_since`; adapters should override this to parse the
+        remote listing as it arrives.
+        """
+        if since is None:
+            files = await self.list_files(path)
+        else:
+            files = await self.list_files_since(path, since)
+        for stat in files:
+            yield stat
+    
     @abstractmethod
     async def transfer_file(
         self,
@@ -35,11 +62,94 @@ class TransportAdapter(ABC):
         """Transfer entire folder."""
         pass
     
+    async def transfer_files(
+        self,
+        source_root: str,
+        dest: str,
+        relative_paths: List[str],
+        progress_callback: Optional[Callable] = None
+    ) -> BatchTransferResult:
+        """
+        Transfer a list of files under a common root.
+        
+        The default implementation transfers files one at a time; adapters
+        should override this with a single batched operation.
+        """
+        start_time = datetime.now()
+        result = BatchTransferResult(success=True, bytes_transferred=0, duration=0.0)
+        
+        for rel_path in relative_paths:
+            dest_path = os.path.join(dest, rel_path)
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            file_result = await self.transfer_file(
+                f"{source_root.rstrip('/')}/{rel_path}",
+                dest_path,
+                progress_callback=progress_callback
+            )
+            if file_result.success:
+                result.transferred.append(rel_path)
+                result.bytes_transferred += file_result.bytes_transferred
+            else:
+                result.failed.append(rel_path)
+                result.error = file_result.error
+        
+        result.success = not result.failed
+        result.duration = (datetime.now() - start_time).total_seconds()
+        return result
+    
     @abstractmethod
     async def delete_file(self, path: str) -> bool:
         """Delete a file."""
         pass
     
+    async def delete_files(self, paths: List[str]) -> BatchDeleteResult:
+        """
+        Delete a list of files.
+        
+        The default implementation deletes files one at a time; adapters
+        should override this with a single batched operation.
+        """
+        result = BatchDeleteResult()
+        
+        for path in paths:
+            if await self.delete_file(path):
+                result.deleted.append(path)
+            else:
+                result.failed.append(path)
+        
+        return result
+    
+    async def get_remote_tree(self, base_path: Optional[str], folders: List[str]) -> RemoteTree:
+        """Describe output folders and their subdirs in one call."""
+        raise NotImplementedError(f"{type(self).__name__} cannot describe remote trees")
+    
+    async def get_free_space(self, path: str) -> int:
+        """Free bytes on the filesystem holding `path`."""
+        raise NotImplementedError(f"{type(self).__name__} cannot report free space")
+    
+    async def hash_files(self, root: str, relative_paths: List[str]) -> Dict[str, str]:
+        """
+        BLAKE2b digests (as printed by `b2sum`) of files under `root`.
+        
+        Returns:
+            Digest per relative path; files that could not be hashed are left out
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot hash remote files")
+    
+    def watch_files(
+        self,
+        paths: List[str],
+        poll_interval: float = 2.0,
+        settle_seconds: float = 2.0,
+        on_mode: Optional[Callable[[str], None]] = None
+    ) -> AsyncIterator[FileStat]:
+        """
+        Stream stats of files as they finish being written under `paths`.
+        
+        The iterator ends when the feed drops; callers reconnect.
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot watch for changes")
+    
     @abstractmethod
     async def get_file_stat(self, path: str) -> FileStat:
         """Get file metadata."""
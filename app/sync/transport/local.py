@@ -0,0 +1,327 @@
+"""
+Local-filesystem transport adapter
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from . import TransportAdapter
+from ..models import FileStat, TransferResult, BatchTransferResult, BatchDeleteResult, RemoteTree, RemoteSubdir
+
+logger = logging.getLogger(__name__)
+
+# Temporary name suffix while a copy is in flight, like rsync's dot files
+PARTIAL_SUFFIX = '.partial'
+
+
+def _scan_dir(directory: str) -> Tuple[List[str], List[FileStat]]:
+    """Subdirectories and regular files directly inside `directory`."""
+    subdirs, files = [], []
+    try:
+        entries = os.scandir(directory)
+    except OSError:
+        return subdirs, files
+    with entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    files.append(FileStat(path=entry.path, size=stat.st_size, mtime=stat.st_mtime))
+            except OSError:
+                continue
+    return subdirs, files
+
+
+def _walk_files(path: str) -> List[FileStat]:
+    """Stat every regular file under `path`, like `find -type f`."""
+    files = []
+    stack = [path]
+    while stack:
+        subdirs, found = _scan_dir(stack.pop())
+        stack.extend(subdirs)
+        files.extend(found)
+    return files
+
+
+def _copy_file(source: str, dest: str) -> Tuple[int, bool]:
+    """
+    Copy one file with its mtime, skipping it when dest is already current.
+
+    Mirrors the rsync flags the SSH adapter uses: a destination with the
+    same size and mtime is left alone, and one that is newer is kept
+    (--update). The copy goes to a temporary name first, so an interrupted
+    transfer never leaves a truncated file under the real name.
+
+    Returns:
+        (bytes copied, whether the file was written)
+    """
+    src_stat = os.stat(source)
+    try:
+        dest_stat = os.stat(dest)
+        if dest_stat.st_size == src_stat.st_size and dest_stat.st_mtime_ns == src_stat.st_mtime_ns:
+            return 0, False
+        if dest_stat.st_mtime_ns > src_stat.st_mtime_ns:
+            return 0, False
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(os.path.dirname(dest) or '.', exist_ok=True)
+    partial = dest + PARTIAL_SUFFIX
+    try:
+        shutil.copyfile(source, partial)
+        os.utime(partial, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+        os.replace(partial, dest)
+    except BaseException:
+        try:
+            os.remove(partial)
+        except OSError:
+            pass
+        raise
+    return src_stat.st_size, True
+
+
+class LocalTransportAdapter(TransportAdapter):
+    """
+    Transport between two local directories.
+
+    Implements the whole TransportAdapter interface with plain filesystem
+    calls run in threads, so the sync engine, manifest and cleanup paths
+    can be exercised and benchmarked without a remote host. "Remote" paths
+    are simply local paths.
+    """
+
+    async def list_files(self, path: str) -> List[FileStat]:
+        """List files under a local folder."""
+        return await asyncio.to_thread(_walk_files, path)
+
+    async def list_files_since(self, path: str, since: float) -> List[FileStat]:
+        """List files under a local folder modified after `since`."""
+        files = await asyncio.to_thread(_walk_files, path)
+        return [f for f in files if f.mtime > since]
+
+    async def iter_files(self, path: str, since: Optional[float] = None) -> AsyncIterator[FileStat]:
+        """Stream files under a local folder one directory at a time."""
+        stack = [path]
+        while stack:
+            subdirs, files = await asyncio.to_thread(_scan_dir, stack.pop())
+            stack.extend(subdirs)
+            for stat in files:
+                if since is None or stat.mtime > since:
+                    yield stat
+
+    async def transfer_file(
+        self,
+        source: str,
+        dest: str,
+        progress_callback: Optional[Callable] = None
+    ) -> TransferResult:
+        """Copy a single file."""
+        start_time = datetime.now()
+        try:
+            copied, written = await asyncio.to_thread(_copy_file, source, dest)
+            return TransferResult(
+                success=True,
+                bytes_transferred=copied,
+                duration=(datetime.now() - start_time).total_seconds(),
+                files_transferred=1 if written else 0
+            )
+        except Exception as e:
+            logger.error(f"Local copy failed for {source}: {e}")
+            return TransferResult(
+                success=False,
+                bytes_transferred=0,
+                duration=(datetime.now() - start_time).total_seconds(),
+                error=str(e)
+            )
+
+    async def transfer_folder(
+        self,
+        source: str,
+        dest: str,
+        progress_callback: Optional[Callable] = None
+    ) -> TransferResult:
+        """Copy every file under a folder."""
+        root = source.rstrip('/')
+        files = await self.list_files(root)
+        result = await self.transfer_files(
+            root,
+            dest,
+            [os.path.relpath(f.path, root) for f in files],
+            progress_callback=progress_callback
+        )
+        return TransferResult(
+            success=result.success,
+            bytes_transferred=result.bytes_transferred,
+            duration=result.duration,
+            error=result.error,
+            files_transferred=len(result.received or [])
+        )
+
+    async def transfer_files(
+        self,
+        source_root: str,
+        dest: str,
+        relative_paths: List[str],
+        progress_callback: Optional[Callable] = None
+    ) -> BatchTransferResult:
+        """
+        Copy a list of files under a common root in one worker thread.
+
+        Like the rsync batch, files that are already current count as
+        transferred but are not listed in `received`.
+        """
+        root = source_root.rstrip('/')
+
+        def copy_all() -> BatchTransferResult:
+            start = time.monotonic()
+            result = BatchTransferResult(success=True, bytes_transferred=0, duration=0.0, received=[])
+            for rel_path in relative_paths:
+                try:
+                    copied, written = _copy_file(os.path.join(root, rel_path), os.path.join(dest, rel_path))
+                except OSError as e:
+                    result.failed.append(rel_path)
+                    result.error = str(e)
+                    continue
+                result.transferred.append(rel_path)
+                result.bytes_transferred += copied
+                if written:
+                    result.received.append(rel_path)
+            result.success = not result.failed
+            result.duration = time.monotonic() - start
+            return result
+
+        result = await asyncio.to_thread(copy_all)
+        if progress_callback:
+            # Same counters the rsync adapter reports, for one finished run
+            progress_callback({
+                'transfer_id': uuid.uuid4().hex[:12],
+                'transferred_bytes': result.bytes_transferred,
+                'transferred_files': len(result.received),
+                'current_file': result.received[-1] if result.received else None,
+                'estimated_total_bytes': result.bytes_transferred,
+                'estimated_total_files': len(relative_paths)
+            })
+        return result
+
+    async def delete_file(self, path: str) -> bool:
+        """Delete a local file; a file that is already gone counts as deleted."""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Error deleting file: {e}")
+            return False
+        return True
+
+    async def delete_files(self, paths: List[str]) -> BatchDeleteResult:
+        """Delete many local files in one worker thread."""
+        def delete_all() -> BatchDeleteResult:
+            result = BatchDeleteResult()
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    result.missing.append(path)
+                except OSError as e:
+                    result.failed.append(path)
+                    result.error = str(e)
+                    continue
+                result.deleted.append(path)
+            return result
+
+        return await asyncio.to_thread(delete_all)
+
+    async def get_remote_tree(self, base_path: Optional[str], folders: List[str]) -> RemoteTree:
+        """
+        Describe output folders and their subdirs.
+
+        Args:
+            base_path: Output root; there is no UI_HOME to resolve it from locally
+            folders: Top-level folders to describe
+        """
+        if not base_path:
+            raise Exception("LocalTransportAdapter needs an explicit base path")
+
+        def describe() -> RemoteTree:
+            tree = RemoteTree(base_path=base_path)
+            for folder in folders:
+                top = os.path.join(base_path, folder)
+                if not os.path.isdir(top):
+                    tree.missing_folders.append(folder)
+                    continue
+                subdirs: Dict[str, List[int]] = {}
+                for stat in _walk_files(top):
+                    rel = os.path.relpath(stat.path, top)
+                    name = rel.split(os.sep, 1)[0] if os.sep in rel else ''
+                    entry = subdirs.setdefault(name, [0, 0])
+                    entry[0] += 1
+                    entry[1] += stat.size
+                for name, (count, size) in sorted(subdirs.items()):
+                    tree.subdirs.append(RemoteSubdir(folder=folder, name=name, files=count, bytes=size))
+            return tree
+
+        return await asyncio.to_thread(describe)
+
+    async def get_free_space(self, path: str) -> int:
+        """Free bytes on the filesystem holding `path`."""
+        return shutil.disk_usage(path).free
+
+    async def hash_files(self, root: str, relative_paths: List[str]) -> Dict[str, str]:
+        """BLAKE2b digests of files under `root`, computed in a worker thread."""
+        from ..engine.hash_pipeline import hash_file
+
+        def hash_all() -> Dict[str, str]:
+            digests = {}
+            for rel_path in relative_paths:
+                try:
+                    digests[rel_path] = hash_file(os.path.join(root, rel_path))
+                except OSError:
+                    continue
+            return digests
+
+        return await asyncio.to_thread(hash_all)
+
+    async def watch_files(
+        self,
+        paths: List[str],
+        poll_interval: float = 2.0,
+        settle_seconds: float = 2.0,
+        on_mode: Optional[Callable[[str], None]] = None
+    ) -> AsyncIterator[FileStat]:
+        """
+        Poll folders for new or changed files, like the remote polling fallback.
+
+        Files present when the watch starts are not reported. A new or
+        changed file is reported once its mtime is `settle_seconds` old.
+        """
+        seen: Dict[str, Tuple[int, float]] = {}
+        for path in paths:
+            for stat in await asyncio.to_thread(_walk_files, path):
+                seen[stat.path] = (stat.size, stat.mtime)
+
+        if on_mode:
+            on_mode('poll')
+
+        while True:
+            await asyncio.sleep(poll_interval)
+            cutoff = time.time() - settle_seconds
+            for path in paths:
+                for stat in await asyncio.to_thread(_walk_files, path):
+                    if stat.mtime > cutoff or seen.get(stat.path) == (stat.size, stat.mtime):
+                        continue
+                    seen[stat.path] = (stat.size, stat.mtime)
+                    yield stat
+
+    async def get_file_stat(self, path: str) -> FileStat:
+        """Get local file metadata."""
+        stat = os.stat(path)
+        return FileStat(path=path, size=stat.st_size, mtime=stat.st_mtime, ctime=stat.st_ctime)
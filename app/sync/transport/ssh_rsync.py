@@ -3,66 +3,334 @@ SSH/Rsync transport adapter
 """
 
 import asyncio
+import contextlib
 import subprocess
 import os
+import json
+import re
+import shlex
+import uuid
 import logging
-from typing import List, Optional, Callable
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional, Callable, Set, Tuple
 from datetime import datetime
 
 from . import TransportAdapter
-from ..models import FileStat, TransferResult
+from .transfer_controller import TransferController, TransferSlot
+from ..models import FileStat, TransferResult, BatchTransferResult, BatchDeleteResult, RemoteTree, RemoteSubdir
+from ...utils.ssh_pool import get_ssh_pool
+from ...utils.progress_parsers import RsyncProgressParser
 
 logger = logging.getLogger(__name__)
 
+# Bytes read from rsync's stdout per chunk while streaming progress
+READ_CHUNK_SIZE = 64 * 1024
+
+# Reads a NUL-delimited path list on stdin, removes the files with as few
+# rm invocations as xargs allows, and echoes back (NUL-delimited) every
+# path that no longer exists afterwards. Paths that were already gone
+# beforehand are also echoed up front, prefixed with \001
+BULK_DELETE_COMMAND = (
+    "xargs -0 sh -c '"
+    "for f; do [ -e \"$f\" ] || [ -L \"$f\" ] || printf \"\\001%s\\0\" \"$f\"; done; "
+    "rm -f -- \"$@\" 2>/dev/null; "
+    "for f; do [ -e \"$f\" ] || [ -L \"$f\" ] || printf \"%s\\0\" \"$f\"; done"
+    "' sh"
+)
+
+# Reads a NUL-delimited list of paths relative to the working directory on
+# stdin and prints `<blake2b digest>  <path>` per file; names b2sum has to
+# escape come back prefixed with a backslash and are skipped by the parser
+BULK_HASH_COMMAND = "xargs -0 -r b2sum --"
+
+# Run remotely with `python3 - <base> <folder>...`. Resolves the output
+# directory from UI_HOME when no base is given, then prints the per-subdir
+# file count and byte total for every folder as one JSON document.
+REMOTE_TREE_SCRIPT = r"""
+import json, os, sys
+
+base, folders = sys.argv[1], sys.argv[2:]
+if not base:
+    home = os.environ.get('UI_HOME', '')
+    if not home:
+        try:
+            with open('/etc/environment') as env:
+                for line in env:
+                    key, _, value = line.strip().partition('=')
+                    if key == 'UI_HOME':
+                        home = value.strip().strip('"\'')
+        except OSError:
+            pass
+    for name in ('output', 'outputs'):
+        if home and os.path.isdir(os.path.join(home, name)):
+            base = os.path.join(home, name)
+            break
+    if not base:
+        print(json.dumps({'error': 'No output directory found under UI_HOME=%r' % home}))
+        sys.exit(0)
+
+tree = {'base': base, 'folders': {}, 'missing': []}
+for folder in folders:
+    top = os.path.join(base, folder)
+    if not os.path.isdir(top):
+        tree['missing'].append(folder)
+        continue
+    subdirs = {}
+    for root, dirs, files in os.walk(top):
+        rel = os.path.relpath(root, top)
+        entry = subdirs.setdefault('' if rel == '.' else rel.split(os.sep, 1)[0], [0, 0])
+        for name in files:
+            try:
+                entry[1] += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                continue
+            entry[0] += 1
+    tree['folders'][folder] = subdirs
+print(json.dumps(tree))
+"""
+
+
+# Run remotely with `sh -c <script> sh <settle> <interval> <dir>...`. Prints
+# `#mode inotify|poll`, then one `path|size|mtime` line per finished file.
+# inotify reports close_write/moved_to, so files are complete when seen;
+# the polling fallback only reports files untouched for <settle> seconds.
+# Blank heartbeat lines make the script exit once the SSH channel is gone;
+# in inotify mode a failed heartbeat kills the whole process group, since
+# the inotifywait pipeline would otherwise live on until its next event.
+WATCH_SCRIPT = r"""
+settle=$1; interval=$2; shift 2
+report() {
+  while IFS= read -r f; do
+    [ -f "$f" ] && find "$f" -maxdepth 0 -printf '%p|%s|%T@\n'
+  done
+}
+if command -v inotifywait >/dev/null 2>&1; then
+  echo '#mode inotify'
+  (trap '' PIPE; while sleep 15; do echo || kill 0; done) &
+  heartbeat=$!
+  trap 'kill $heartbeat 2>/dev/null' EXIT
+  inotifywait -m -r -q -e close_write -e moved_to --format '%w%f' "$@" | report
+else
+  echo '#mode poll'
+  marker=$(mktemp) && next=$(mktemp) || exit 1
+  trap 'rm -f "$marker" "$next"' EXIT
+  touch -d "@$(( $(date +%s) - settle ))" "$marker"
+  while :; do
+    touch -d "@$(( $(date +%s) - settle ))" "$next"
+    find "$@" -type f -newer "$marker" ! -newer "$next" -printf '%p|%s|%T@\n' 2>/dev/null
+    mv -f "$next" "$marker"
+    next=$(mktemp) || exit 1
+    echo || exit
+    sleep "$interval"
+  done
+fi
+"""
+
+
+@dataclass
+class RsyncOutput:
+    """Parsed outcome of a streamed rsync run."""
+    returncode: int
+    received_files: List[str] = field(default_factory=list)
+    bytes_transferred: int = 0
+    total_size: int = 0
+    stderr: str = ""
+
+
+def _parse_find_record(record: bytes) -> Optional[FileStat]:
+    """Parse one `<size> <mtime> <path>` record from the remote find."""
+    size, _, rest = record.partition(b' ')
+    mtime, _, path = rest.partition(b' ')
+    try:
+        return FileStat(path=os.fsdecode(path), size=int(size), mtime=float(mtime))
+    except ValueError:
+        return None
+
 
 class SSHRsyncAdapter(TransportAdapter):
     """SSH/Rsync-based transport for remote syncing."""
     
-    def __init__(self, host: str, port: int, user: str = "root"):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str = "root",
+        controller: Optional[TransferController] = None,
+        max_workers: int = 3,
+        budgets: Optional[List[Tuple[str, float]]] = None,
+        host_limit: Optional[int] = None
+    ):
+        """
+        Args:
+            host: SSH host
+            port: SSH port
+            user: SSH user
+            controller: Gates rsync runs per host and assigns their --bwlimit
+            max_workers: Most concurrent rsync runs the controller may allow this host
+            budgets: (group, Mbps) bandwidth budgets this transport's runs count against
+            host_limit: Most concurrent rsync runs across every port on this host
+        """
         self.host = host
         self.port = port
         self.user = user
+        self.controller = controller
+        self.max_workers = max_workers
+        self.budgets = budgets or []
+        self.host_limit = host_limit
+        # (source root, relative path) of files whose last run was cut short;
+        # their partials wait in .rsync-tmp for the next attempt
+        self._interrupted: Set[Tuple[str, str]] = set()
         self.ssh_key = os.path.expanduser("~/.ssh/id_ed25519")
+        self.pool = get_ssh_pool()
+    
+    def _ssh_command(self, command: str) -> List[str]:
+        """Build an ssh argv that reuses the pooled master connection."""
+        return self.pool.ssh_command(
+            self.host, self.port, command,
+            user=self.user, identity_file=self.ssh_key
+        )
+    
+    async def _run_remote(self, command: str, input: Optional[bytes] = None):
+        """Run a command over the pooled master, honoring the per-host session cap."""
+        return await self.pool.run_async(
+            self.host, self.port, command,
+            user=self.user, input=input, identity_file=self.ssh_key
+        )
+    
+    def _rsync_shell(self) -> str:
+        """Build the rsync remote shell, multiplexed over the pooled master."""
+        return self.pool.rsync_shell(
+            self.host, self.port,
+            user=self.user, identity_file=self.ssh_key,
+            options={'StrictHostKeyChecking': 'no'}
+        )
+    
+    @contextlib.asynccontextmanager
+    async def _transfer_slot(self):
+        """Hold a controller slot for one rsync run; unlimited without a controller."""
+        if self.controller is None:
+            yield TransferSlot(self.host, None)
+            return
+        async with self.controller.slot(
+            f"{self.host}:{self.port}", self.max_workers, self.budgets,
+            address=self.host, address_limit=self.host_limit
+        ) as slot:
+            yield slot
+    
+    def _rsync_args(self, bwlimit_kib: Optional[int] = None, resume: bool = False) -> List[str]:
+        """
+        Optimized rsync flags shared by folder and file-list transfers.
+        
+        With `resume`, delta transfer is enabled so partials kept in
+        .rsync-tmp serve as the basis and only their missing data is sent.
+        """
+        args = [
+            "rsync",
+            "-rlD",  # recursive, links, devices
+            "--times",  # preserve modification times (retain original file dates)
+            "--compress",
+            "--compress-level=6",
+            "--no-whole-file" if resume else "--whole-file",
+            "--update",
+            # NOTE: --delete flags removed - we only delete on source (remote), never destination (NAS)
+            "--info=progress2",
+            "--info=stats2",
+            "--itemize-changes",
+            "--no-perms", "--no-owner", "--no-group",
+            "--omit-dir-times",
+            "--partial",
+            "--partial-dir=.rsync-tmp",
+            "--protect-args",  # remote paths are passed verbatim, not word-split by the remote shell
+            "-e", self._rsync_shell(),
+        ]
+        if bwlimit_kib:
+            args.append(f"--bwlimit={bwlimit_kib}")
+        return args
     
     async def list_files(self, path: str) -> List[FileStat]:
         """List files at remote path using SSH."""
-        cmd = [
-            "ssh",
-            "-p", str(self.port),
-            "-i", self.ssh_key,
-            f"{self.user}@{self.host}",
-            f"find {path} -type f -printf '%p|%s|%T@\\n'"
-        ]
-        
+        return await self._collect_files(path)
+    
+    async def list_files_since(self, path: str, since: float) -> List[FileStat]:
+        """List only files modified after `since`, filtered by the remote find."""
+        return await self._collect_files(path, since)
+    
+    async def _collect_files(self, path: str, since: Optional[float] = None) -> List[FileStat]:
         try:
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await proc.communicate()
-            
-            if proc.returncode != 0:
-                logger.error(f"SSH list failed: {stderr.decode()}")
-                return []
-            
-            files = []
-            for line in stdout.decode().splitlines():
-                if not line.strip():
-                    continue
-                parts = line.split('|')
-                if len(parts) >= 3:
-                    files.append(FileStat(
-                        path=parts[0],
-                        size=int(parts[1]),
-                        mtime=float(parts[2])
-                    ))
-            
-            return files
+            return [stat async for stat in self.iter_files(path, since)]
         except Exception as e:
             logger.error(f"Error listing files: {e}")
             return []
     
+    async def iter_files(self, path: str, since: Optional[float] = None) -> AsyncIterator[FileStat]:
+        """
+        Stream a remote find, parsing NUL-terminated records as they arrive.
+        
+        Only the current read chunk is buffered, so listing a large tree
+        doesn't hold its whole output in memory, and any filename is safe.
+        
+        Raises:
+            Exception: If find fails; records already yielded may be partial
+        """
+        predicate = f"-newermt @{since:.6f}" if since is not None else ""
+        command = f"find {shlex.quote(path)} -type f {predicate} -printf '%s %T@ %p\\0'"
+        
+        async with self.pool.stream_async(
+            self.host, self.port, command,
+            user=self.user, identity_file=self.ssh_key
+        ) as proc:
+            # Drain stderr alongside so a noisy find can't block on a full pipe
+            stderr_task = asyncio.ensure_future(proc.stderr.read())
+            try:
+                pending = b''
+                while True:
+                    chunk = await proc.stdout.read(READ_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    records = (pending + chunk).split(b'\0')
+                    pending = records.pop()
+                    for record in records:
+                        stat = _parse_find_record(record)
+                        if stat is not None:
+                            yield stat
+                
+                await proc.wait()
+                stderr = await stderr_task
+            finally:
+                stderr_task.cancel()
+            
+            if proc.returncode != 0:
+                raise Exception(f"Remote listing of {path} failed: {stderr.decode(errors='replace').strip()}")
+    
+    async def get_remote_tree(self, base_path: Optional[str], folders: List[str]) -> RemoteTree:
+        """
+        Discover output folders, their subdirs and per-subdir file counts and
+        sizes in a single SSH round trip.
+        
+        Args:
+            base_path: Remote output root, or None to resolve it from UI_HOME
+            folders: Top-level folders to describe
+        """
+        args = ' '.join(shlex.quote(a) for a in [base_path or ''] + list(folders))
+        returncode, stdout, stderr = await self._run_remote(
+            f"python3 - {args}",
+            input=REMOTE_TREE_SCRIPT.encode()
+        )
+        
+        if returncode != 0:
+            raise Exception(f"Remote tree discovery failed: {stderr.decode(errors='replace').strip()}")
+        
+        data = json.loads(stdout.decode())
+        if 'error' in data:
+            raise Exception(data['error'])
+        
+        tree = RemoteTree(base_path=data['base'], missing_folders=data.get('missing', []))
+        for folder in folders:
+            for name, (count, size) in sorted(data['folders'].get(folder, {}).items()):
+                tree.subdirs.append(RemoteSubdir(folder=folder, name=name, files=count, bytes=size))
+        
+        return tree
+    
     async def transfer_file(
         self,
         source: str,
@@ -75,7 +343,8 @@ class SSHRsyncAdapter(TransportAdapter):
         cmd = [
             "rsync",
             "-avz",
-            "-e", f"ssh -p {self.port} -i {self.ssh_key}",
+            "--protect-args",
+            "-e", self._rsync_shell(),
             f"{self.user}@{self.host}:{source}",
             dest
         ]
@@ -122,108 +391,255 @@ class SSHRsyncAdapter(TransportAdapter):
         progress_callback: Optional[Callable] = None
     ) -> TransferResult:
         """Transfer entire folder using rsync."""
-        start_time = datetime.now()
+        async with self._transfer_slot() as slot:
+            start_time = datetime.now()
+            
+            cmd = [
+                *self._rsync_args(slot.bwlimit_kib),
+                f"{self.user}@{self.host}:{source}/",
+                dest
+            ]
+            
+            try:
+                output = await self._run_rsync(cmd, progress_callback=progress_callback)
+                
+                duration = (datetime.now() - start_time).total_seconds()
+                slot.done(output.bytes_transferred, output.returncode == 0)
+                
+                if output.returncode == 0:
+                    return TransferResult(
+                        success=True,
+                        bytes_transferred=output.bytes_transferred,
+                        duration=duration,
+                        files_transferred=len(output.received_files)
+                    )
+                else:
+                    return TransferResult(
+                        success=False,
+                        bytes_transferred=0,
+                        duration=duration,
+                        error=output.stderr
+                    )
+            except Exception as e:
+                duration = (datetime.now() - start_time).total_seconds()
+                logger.error(f"Transfer error: {e}")
+                slot.done(0, False)
+                return TransferResult(
+                    success=False,
+                    bytes_transferred=0,
+                    duration=duration,
+                    error=str(e)
+                )
+    
+    async def transfer_files(
+        self,
+        source_root: str,
+        dest: str,
+        relative_paths: List[str],
+        progress_callback: Optional[Callable] = None
+    ) -> BatchTransferResult:
+        """
+        Transfer a list of files with a single `rsync --files-from` run.
         
-        # Optimized rsync flags
-        cmd = [
-            "rsync",
-            "-rlD",  # recursive, links, devices
-            "--times",  # preserve modification times (retain original file dates)
-            "--compress",
-            "--compress-level=6",
-            "--whole-file",
-            "--update",
-            # NOTE: --delete flags removed - we only delete on source (remote), never destination (NAS)
-            "--info=progress2",
-            "--info=stats2",
-            "--itemize-changes",
-            "--no-perms", "--no-owner", "--no-group",
-            "--omit-dir-times",
-            "--partial",
-            "--partial-dir=.rsync-tmp",
-            "-e", f"ssh -p {self.port} -i {self.ssh_key} -o StrictHostKeyChecking=no",
-            f"{self.user}@{self.host}:{source}/",
-            dest
-        ]
+        Files whose previous run was cut short are sent in delta mode, so
+        the partial rsync kept in .rsync-tmp is resumed instead of resent.
+        """
+        root = source_root.rstrip('/')
+        resume = any((root, p) in self._interrupted for p in relative_paths)
         
-        try:
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await proc.communicate()
+        async with self._transfer_slot() as slot:
+            start_time = datetime.now()
             
-            duration = (datetime.now() - start_time).total_seconds()
+            cmd = [
+                *self._rsync_args(slot.bwlimit_kib, resume=resume),
+                "--from0",
+                "--files-from=-",
+                f"{self.user}@{self.host}:{root}/",
+                dest
+            ]
+            file_list = b"\0".join(p.encode() for p in relative_paths)
             
-            if proc.returncode == 0:
-                # Parse rsync output for statistics
-                output = stdout.decode()
-                bytes_transferred = self._parse_rsync_bytes(output)
+            try:
+                os.makedirs(dest, exist_ok=True)
+                output = await self._run_rsync(cmd, stdin_data=file_list, progress_callback=progress_callback)
                 
-                return TransferResult(
-                    success=True,
-                    bytes_transferred=bytes_transferred,
-                    duration=duration
+                duration = (datetime.now() - start_time).total_seconds()
+                slot.done(output.bytes_transferred, output.returncode == 0)
+                
+                if output.returncode == 0:
+                    # --update may skip files that are already current; they still count as synced
+                    transferred, failed = list(relative_paths), []
+                else:
+                    # Partial transfer: only files rsync itemized made it across
+                    received = set(output.received_files)
+                    transferred = [p for p in relative_paths if p in received]
+                    failed = [p for p in relative_paths if p not in received]
+                
+                self._interrupted.difference_update((root, p) for p in transferred)
+                self._interrupted.update((root, p) for p in failed)
+                
+                return BatchTransferResult(
+                    success=output.returncode == 0,
+                    bytes_transferred=output.bytes_transferred,
+                    duration=duration,
+                    transferred=transferred,
+                    failed=failed,
+                    error=output.stderr if output.returncode != 0 else None,
+                    received=output.received_files
                 )
-            else:
-                return TransferResult(
+            except Exception as e:
+                duration = (datetime.now() - start_time).total_seconds()
+                logger.error(f"Batch transfer error: {e}")
+                slot.done(0, False)
+                self._interrupted.update((root, p) for p in relative_paths)
+                return BatchTransferResult(
                     success=False,
                     bytes_transferred=0,
                     duration=duration,
-                    error=stderr.decode()
+                    failed=list(relative_paths),
+                    error=str(e)
                 )
-        except Exception as e:
-            duration = (datetime.now() - start_time).total_seconds()
-            logger.error(f"Transfer error: {e}")
-            return TransferResult(
-                success=False,
-                bytes_transferred=0,
-                duration=duration,
-                error=str(e)
-            )
     
     async def delete_file(self, path: str) -> bool:
         """Delete a file via SSH."""
-        cmd = [
-            "ssh",
-            "-p", str(self.port),
-            "-i", self.ssh_key,
-            f"{self.user}@{self.host}",
-            f"rm -f {path}"
-        ]
-        
         try:
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            await proc.communicate()
-            return proc.returncode == 0
+            returncode, _, _ = await self._run_remote(f"rm -f {path}")
+            return returncode == 0
         except Exception as e:
             logger.error(f"Error deleting file: {e}")
             return False
     
+    async def delete_files(self, paths: List[str]) -> BatchDeleteResult:
+        """
+        Delete many files over a single SSH session.
+        
+        Paths are streamed NUL-delimited to a remote `xargs -0 rm -f`, which
+        reports back the paths that are gone, so arbitrary filenames are safe
+        and each path gets its own success flag.
+        """
+        result = BatchDeleteResult()
+        if not paths:
+            return result
+        
+        try:
+            file_list = b''.join(p.encode() + b'\0' for p in paths)
+            returncode, stdout, stderr = await self._run_remote(BULK_DELETE_COMMAND, input=file_list)
+            
+            records = stdout.decode(errors='replace').split('\0')
+            removed = {r for r in records if not r.startswith('\x01')}
+            missing = {r[1:] for r in records if r.startswith('\x01')}
+            for path in paths:
+                (result.deleted if path in removed else result.failed).append(path)
+            result.missing = [p for p in paths if p in missing]
+            
+            if returncode != 0 or result.failed:
+                result.error = stderr.decode(errors='replace').strip() or f"{len(result.failed)} file(s) not deleted"
+        except Exception as e:
+            logger.error(f"Error deleting files: {e}")
+            result.deleted = []
+            result.failed = list(paths)
+            result.error = str(e)
+        
+        return result
+    
+    async def get_free_space(self, path: str) -> int:
+        """Get free bytes on the remote filesystem holding `path`."""
+        # No pipe, so a df failure (e.g. missing path) shows in the exit status
+        returncode, stdout, stderr = await self._run_remote(f"df -P -B1 {shlex.quote(path)}")
+        
+        if returncode != 0:
+            raise Exception(f"Failed to get free space: {stderr.decode(errors='replace').strip()}")
+        
+        # Filesystem 1-blocks Used Available Capacity Mounted-on
+        lines = stdout.decode(errors='replace').strip().splitlines()
+        fields = lines[-1].split() if len(lines) > 1 else []
+        if len(fields) < 6 or not fields[3].isdigit():
+            raise Exception(f"Unexpected df output for {path}: {stdout.decode(errors='replace').strip()!r}")
+        return int(fields[3])
+    
+    async def hash_files(self, root: str, relative_paths: List[str]) -> Dict[str, str]:
+        """
+        Hash files under `root` remotely in one batched `b2sum` call.
+        
+        Raises:
+            Exception: If the remote command fails outright (e.g. no b2sum)
+        """
+        if not relative_paths:
+            return {}
+        
+        file_list = b''.join(p.encode() + b'\0' for p in relative_paths)
+        returncode, stdout, stderr = await self._run_remote(
+            f"cd {shlex.quote(root)} && {BULK_HASH_COMMAND}", input=file_list
+        )
+        
+        digests = {}
+        for line in stdout.decode(errors='replace').splitlines():
+            digest, sep, path = line.partition('  ')
+            if sep and not digest.startswith('\\'):
+                digests[path] = digest
+        
+        # b2sum exits 1 when some files were unreadable; those are just missing
+        if returncode != 0 and not digests:
+            raise Exception(f"Remote hashing failed: {stderr.decode(errors='replace').strip()}")
+        return digests
+    
+    async def watch_files(
+        self,
+        paths: List[str],
+        poll_interval: float = 2.0,
+        settle_seconds: float = 2.0,
+        on_mode: Optional[Callable[[str], None]] = None
+    ) -> AsyncIterator[FileStat]:
+        """
+        Stream finished files from a long-lived SSH session.
+        
+        Uses `inotifywait -m` on the remote when installed, otherwise a
+        `find -newer` polling loop. Ends when the session drops.
+        
+        Args:
+            paths: Remote directories to watch recursively
+            poll_interval: Seconds between scans in polling mode
+            settle_seconds: Polling mode only reports files this much older than the scan
+            on_mode: Called with 'inotify' or 'poll' once the remote side starts
+        """
+        args = ' '.join(shlex.quote(a) for a in [
+            str(int(settle_seconds)), str(poll_interval), *paths
+        ])
+        command = f"sh -c {shlex.quote(WATCH_SCRIPT)} sh {args}"
+        
+        async with self.pool.stream_async(
+            self.host, self.port, command,
+            user=self.user, identity_file=self.ssh_key
+        ) as proc:
+            async for raw in proc.stdout:
+                line = raw.decode(errors='replace').rstrip('\n')
+                if not line:
+                    continue
+                if line.startswith('#mode '):
+                    mode = line[len('#mode '):]
+                    logger.info(f"Watching {len(paths)} folder(s) on {self.host} via {mode}")
+                    if on_mode:
+                        on_mode(mode)
+                    continue
+                
+                path, _, rest = line.rpartition('|')
+                path, _, size = path.rpartition('|')
+                try:
+                    yield FileStat(path=path, size=int(size), mtime=float(rest))
+                except ValueError:
+                    logger.debug(f"Ignoring malformed watch line: {line!r}")
+            
+            await proc.wait()
+            if proc.returncode:
+                stderr = (await proc.stderr.read()).decode(errors='replace').strip()
+                logger.warning(f"Watch session on {self.host} ended ({proc.returncode}): {stderr}")
+    
     async def get_file_stat(self, path: str) -> FileStat:
         """Get file metadata via SSH."""
-        cmd = [
-            "ssh",
-            "-p", str(self.port),
-            "-i", self.ssh_key,
-            f"{self.user}@{self.host}",
-            f"stat -c '%s|%Y' {path}"
-        ]
-        
         try:
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await proc.communicate()
+            returncode, stdout, stderr = await self._run_remote(f"stat -c '%s|%Y' {path}")
             
-            if proc.returncode == 0:
+            if returncode == 0:
                 parts = stdout.decode().strip().split('|')
                 if len(parts) >= 2:
                     return FileStat(
@@ -237,13 +653,96 @@ class SSHRsyncAdapter(TransportAdapter):
             logger.error(f"Error getting file stat: {e}")
             raise
     
-    def _parse_rsync_bytes(self, output: str) -> int:
-        """Parse bytes transferred from rsync output."""
-        import re
+    async def _run_rsync(
+        self,
+        cmd: List[str],
+        stdin_data: Optional[bytes] = None,
+        progress_callback: Optional[Callable] = None
+    ) -> RsyncOutput:
+        """
+        Run rsync and parse its output as it arrives.
+        
+        Progress2 and itemized lines are parsed incrementally and reported to
+        `progress_callback` as cumulative counters tagged with a per-run
+        `transfer_id`, so concurrent workers can be aggregated upstream.
+        """
+        transfer_id = uuid.uuid4().hex[:12]
+        output = RsyncOutput(returncode=-1)
+        state = {
+            'transfer_id': transfer_id,
+            'transferred_bytes': 0,
+            'transferred_files': 0,
+            'current_file': None,
+            'estimated_total_bytes': 0,
+            'estimated_total_files': 0
+        }
+        
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE if stdin_data is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        
+        async def feed_stdin():
+            try:
+                proc.stdin.write(stdin_data)
+                await proc.stdin.drain()
+            finally:
+                proc.stdin.close()
         
-        # Look for "total size is X"
-        match = re.search(r'total size is ([\d,]+)', output)
-        if match:
-            return int(match.group(1).replace(',', ''))
+        tasks = [asyncio.ensure_future(proc.stderr.read())]
+        if stdin_data is not None:
+            tasks.append(asyncio.ensure_future(feed_stdin()))
+        
+        def handle_line(line: str):
+            parsed = RsyncProgressParser.parse_line(line)
+            if not parsed:
+                return
+            if parsed['type'] == 'progress':
+                state['transferred_bytes'] = parsed['bytes']
+                if parsed['percent'] > 0:
+                    state['estimated_total_bytes'] = parsed['bytes'] * 100 // parsed['percent']
+                if 'total_files' in parsed:
+                    state['estimated_total_files'] = parsed['total_files']
+            elif parsed['type'] == 'item':
+                if not parsed['received']:
+                    return
+                output.received_files.append(parsed['path'])
+                state['transferred_files'] = len(output.received_files)
+                state['current_file'] = parsed['path']
+            elif parsed['type'] == 'stats':
+                output.total_size = parsed['total_size']
+                return
+            if progress_callback:
+                progress_callback(dict(state))
+        
+        try:
+            buffer = ''
+            while True:
+                chunk = await proc.stdout.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                buffer += chunk.decode(errors='replace')
+                lines = re.split(r'[\r\n]', buffer)
+                buffer = lines.pop()
+                for line in lines:
+                    if line:
+                        handle_line(line)
+            if buffer:
+                handle_line(buffer)
+            
+            await proc.wait()
+        except asyncio.CancelledError:
+            if proc.returncode is None:
+                proc.kill()
+            raise
+        finally:
+            results = await asyncio.gather(*tasks, return_exceptions=True)
         
-        return 0
+        stderr = results[0]
+        output.returncode = proc.returncode
+        output.stderr = stderr.decode(errors='replace') if isinstance(stderr, bytes) else ''
+        # total_size is the size of the whole source tree, not what was sent
+        output.bytes_transferred = state['transferred_bytes']
+        return output
@@ -0,0 +1,227 @@
+"""
+Bandwidth budget and adaptive per-host concurrency for rsync workers
+"""
+
+import asyncio
+import contextlib
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Budget shared by every transfer the controller runs
+GLOBAL_GROUP = '__global__'
+
+# AIMD tuning
+DECREASE_FACTOR = 0.5  # Limit multiplier after a failed transfer
+MIN_SAMPLE_BYTES = 4 * 1024 * 1024  # Smaller transfers don't say much about throughput
+THROUGHPUT_GAIN = 0.1  # A level must beat the one below by this much to keep growing
+RATE_SMOOTHING = 0.3  # EWMA weight of a new throughput sample
+
+
+def mbps_to_bwlimit(mbps: float) -> int:
+    """Convert megabits per second to rsync's --bwlimit unit (KiB/s), at least 1."""
+    return max(1, int(mbps * 1_000_000 / 8 / 1024))
+
+
+@dataclass
+class _HostState:
+    """Concurrency limit and throughput history of one host."""
+    limit: float
+    max_workers: int
+    active: int = 0
+    active_by_group: Dict[str, int] = field(default_factory=dict)
+    rates: Dict[int, float] = field(default_factory=dict)  # concurrency level -> bytes/s
+    completed: int = 0
+    failed: int = 0
+
+    @property
+    def level(self) -> int:
+        return max(1, int(self.limit))
+
+
+class TransferSlot:
+    """A running transfer's bandwidth share; report its outcome with `done`."""
+
+    def __init__(self, host: str, bwlimit_kib: Optional[int]):
+        self.host = host
+        self.bwlimit_kib = bwlimit_kib
+        self.started = time.monotonic()
+        self.bytes_transferred = 0
+        self.success: Optional[bool] = None
+
+    def done(self, bytes_transferred: int, success: bool):
+        self.bytes_transferred = bytes_transferred
+        self.success = success
+
+
+class TransferController:
+    """
+    Gate rsync workers per host and share bandwidth budgets between them.
+
+    Each host gets an AIMD concurrency limit between 1 and the largest
+    `max_workers` asked for: a failed transfer halves it, a successful one
+    adds 1/limit (about one worker per round of transfers) as long as the
+    extra worker actually raised the host's throughput.
+
+    Budgets are split across the workers that can run at once: a worker
+    starting in a group gets `budget / capacity` as its rsync --bwlimit,
+    where capacity sums the limits of the hosts the group is using. The
+    global budget covers every worker; syncs can add their own group.
+    rsync can't change its limit while running, so a worker keeps the
+    share it started with.
+
+    Instances behind one address (several containers on a machine) can
+    also share a fixed cap on top of their own limits.
+    """
+
+    def __init__(self, total_budget_mbps: Optional[float] = None):
+        """
+        Args:
+            total_budget_mbps: Budget shared by all transfers, None for unlimited
+        """
+        self.total_budget_mbps = total_budget_mbps
+        self._hosts: Dict[str, _HostState] = {}
+        self._address_active: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._cond: Optional[asyncio.Condition] = None
+        self._cond_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._cond_loop is not loop:
+            self._cond = asyncio.Condition()
+            self._cond_loop = loop
+        return self._cond
+
+    def _host(self, host: str, max_workers: int) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState(limit=float(max(1, math.ceil(max_workers / 2))), max_workers=max_workers)
+            self._hosts[host] = state
+        elif max_workers > state.max_workers:
+            state.max_workers = max_workers
+        return state
+
+    @contextlib.asynccontextmanager
+    async def slot(
+        self,
+        host: str,
+        max_workers: int,
+        budgets: Optional[List[Tuple[str, float]]] = None,
+        address: Optional[str] = None,
+        address_limit: Optional[int] = None
+    ):
+        """
+        Wait for a worker slot on `host` and hold it for one transfer.
+
+        Args:
+            host: Host address the transfer reads from
+            max_workers: Ceiling for this host's concurrency
+            budgets: (group, Mbps) budgets the transfer counts against
+            address: Machine the host runs on, shared with other hosts
+            address_limit: Most transfers at once across every host on `address`
+
+        Yields:
+            TransferSlot with the rsync bandwidth cap to use
+        """
+        groups = list(budgets or [])
+        if self.total_budget_mbps:
+            groups.append((GLOBAL_GROUP, self.total_budget_mbps))
+
+        cond = self._condition()
+        async with cond:
+            state = self._host(host, max_workers)
+            await cond.wait_for(lambda: (
+                state.active < min(state.level, state.max_workers) and
+                (not address_limit or self._address_active.get(address, 0) < address_limit)
+            ))
+            with self._lock:
+                state.active += 1
+                if address_limit:
+                    self._address_active[address] = self._address_active.get(address, 0) + 1
+                for group, _ in groups:
+                    state.active_by_group[group] = state.active_by_group.get(group, 0) + 1
+                bwlimit = self._share(groups)
+
+        slot = TransferSlot(host, bwlimit)
+        try:
+            yield slot
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            slot.success = False
+            raise
+        finally:
+            concurrency = state.active
+            with self._lock:
+                state.active -= 1
+                if address_limit:
+                    self._address_active[address] -= 1
+                for group, _ in groups:
+                    state.active_by_group[group] -= 1
+                if slot.success is not None:
+                    self._record(state, slot, concurrency)
+            async with cond:
+                cond.notify_all()
+
+    def _share(self, groups: List[Tuple[str, float]]) -> Optional[int]:
+        """Smallest per-worker share across the groups, in KiB/s."""
+        shares = []
+        for group, budget in groups:
+            capacity = sum(
+                min(s.level, s.max_workers) for s in self._hosts.values()
+                if s.active_by_group.get(group)
+            )
+            shares.append(budget / max(1, capacity))
+        return mbps_to_bwlimit(min(shares)) if shares else None
+
+    def _record(self, state: _HostState, slot: TransferSlot, concurrency: int):
+        """Apply one transfer's outcome to the host's limit."""
+        if not slot.success:
+            state.failed += 1
+            state.limit = max(1.0, state.limit * DECREASE_FACTOR)
+            logger.info(f"Transfer from {slot.host} failed, concurrency limit now {state.level}")
+            return
+
+        state.completed += 1
+        elapsed = time.monotonic() - slot.started
+        if slot.bytes_transferred >= MIN_SAMPLE_BYTES and elapsed > 0:
+            # Whole-host throughput at this concurrency level
+            rate = slot.bytes_transferred / elapsed * concurrency
+            level = state.level
+            previous = state.rates.get(level)
+            state.rates[level] = rate if previous is None else (
+                RATE_SMOOTHING * rate + (1 - RATE_SMOOTHING) * previous
+            )
+            below = state.rates.get(level - 1)
+            if below is not None and state.rates[level] < below * (1 + THROUGHPUT_GAIN):
+                # The last worker added didn't help; settle one level down
+                if state.rates[level] < below * (1 - THROUGHPUT_GAIN):
+                    state.limit = max(1.0, state.limit - 1)
+                return
+
+        state.limit = min(float(state.max_workers), state.limit + 1 / state.limit)
+
+    def get_stats(self) -> List[dict]:
+        """Limit, activity and outcomes per host."""
+        with self._lock:
+            return [
+                {
+                    'host': host,
+                    'limit': state.level,
+                    'max_workers': state.max_workers,
+                    'active': state.active,
+                    'completed': state.completed,
+                    'failed': state.failed,
+                    'throughput_mbps': {
+                        level: round(rate * 8 / 1_000_000, 2)
+                        for level, rate in sorted(state.rates.items())
+                    }
+                }
+                for host, state in self._hosts.items()
+            ]
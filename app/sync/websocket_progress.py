@@ -81,6 +81,39 @@ def init_socketio(app):
         """Client disconnected from resources namespace."""
         logger.info("Client disconnected from resource installation websocket")
     
+    # Workflow execution progress handlers
+    @_socketio.on('subscribe_execution', namespace='/create')
+    def handle_subscribe_execution(data):
+        """Client subscribes to progress updates for a queued prompt."""
+        prompt_id = data.get('prompt_id')
+        if prompt_id:
+            from app.create.execution_monitor import find_execution_status
+            join_room(prompt_id)
+            emit('subscribed', {'prompt_id': prompt_id, 'state': find_execution_status(prompt_id)})
+            logger.info(f"Client subscribed to execution progress: {prompt_id}")
+        else:
+            emit('error', {'message': 'prompt_id required'})
+    
+    @_socketio.on('unsubscribe_execution', namespace='/create')
+    def handle_unsubscribe_execution(data):
+        """Client unsubscribes from execution progress."""
+        prompt_id = data.get('prompt_id')
+        if prompt_id:
+            leave_room(prompt_id)
+            emit('unsubscribed', {'prompt_id': prompt_id})
+            logger.info(f"Client unsubscribed from execution progress: {prompt_id}")
+    
+    @_socketio.on('connect', namespace='/create')
+    def handle_create_connect():
+        """Client connected to create namespace."""
+        logger.info("Client connected to execution progress websocket")
+        emit('connected', {'message': 'Connected to execution progress stream'})
+    
+    @_socketio.on('disconnect', namespace='/create')
+    def handle_create_disconnect():
+        """Client disconnected from create namespace."""
+        logger.info("Client disconnected from execution progress websocket")
+    
     logger.info("Flask-SocketIO initialized")
     return _socketio
 
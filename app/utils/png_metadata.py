@@ -0,0 +1,136 @@
+"""
+Read PNG text metadata without decoding image data.
+
+Generation tools store their settings in PNG text chunks ahead of the
+pixel data: Forge/A1111 write `parameters`, ComfyUI writes `prompt` and
+`workflow` (JSON). This module walks the chunk list, reads only the
+tEXt/iTXt/zTXt payloads and seeks past everything else, stopping at the
+first IDAT. Nothing is decompressed except compressed text chunks.
+"""
+
+import struct
+import zlib
+from typing import Dict, Iterable, Optional
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+TEXT_CHUNK_TYPES = {b'tEXt', b'iTXt', b'zTXt'}
+
+# Keys written by the generators we ingest
+GENERATION_KEYS = ('parameters', 'prompt', 'workflow')
+
+# Refuse to buffer absurd text chunks from corrupt files
+MAX_TEXT_CHUNK_BYTES = 64 * 1024 * 1024
+
+_CHUNK_HEADER = struct.Struct('>I4s')
+
+
+def _decompress(data: bytes) -> bytes:
+    # Bounded so a hostile zTXt can't balloon memory
+    decompressor = zlib.decompressobj()
+    out = decompressor.decompress(data, MAX_TEXT_CHUNK_BYTES)
+    if decompressor.unconsumed_tail:
+        raise ValueError("Compressed text chunk exceeds size limit")
+    return out
+
+
+def _parse_text_chunk(chunk_type: bytes, data: bytes):
+    """Decode one text chunk into (keyword, text); returns None if malformed."""
+    keyword, sep, rest = data.partition(b'\0')
+    if not sep:
+        return None
+    key = keyword.decode('latin-1')
+
+    if chunk_type == b'tEXt':
+        return key, rest.decode('latin-1')
+
+    if chunk_type == b'zTXt':
+        # compression method byte, then zlib stream
+        if not rest or rest[0] != 0:
+            return None
+        return key, _decompress(rest[1:]).decode('latin-1')
+
+    # iTXt: compression flag, method, language\0, translated keyword\0, UTF-8 text
+    if len(rest) < 2:
+        return None
+    compressed, method = rest[0], rest[1]
+    parts = rest[2:].split(b'\0', 2)
+    if len(parts) != 3:
+        return None
+    text = parts[2]
+    if compressed:
+        if method != 0:
+            return None
+        text = _decompress(text)
+    return key, text.decode('utf-8', 'replace')
+
+
+def read_png_text(path: str, keys: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """
+    Read text metadata from a PNG's header chunks.
+
+    Args:
+        path: PNG file path
+        keys: Only return these keywords (all text chunks if None). Reading
+            stops early once every requested key has been found.
+
+    Returns:
+        Dict of keyword -> text. The first occurrence of a keyword wins.
+
+    Raises:
+        ValueError: If the file is not a PNG
+        OSError: If the file can't be read
+    """
+    wanted = set(keys) if keys is not None else None
+    found: Dict[str, str] = {}
+
+    with open(path, 'rb') as f:
+        if f.read(len(PNG_SIGNATURE)) != PNG_SIGNATURE:
+            raise ValueError(f"Not a PNG file: {path}")
+
+        while True:
+            header = f.read(_CHUNK_HEADER.size)
+            if len(header) < _CHUNK_HEADER.size:
+                break
+            length, chunk_type = _CHUNK_HEADER.unpack(header)
+
+            if chunk_type in (b'IDAT', b'IEND'):
+                break
+
+            if chunk_type not in TEXT_CHUNK_TYPES or length > MAX_TEXT_CHUNK_BYTES:
+                f.seek(length + 4, 1)  # payload + CRC
+                continue
+
+            data = f.read(length)
+            f.seek(4, 1)
+            if len(data) < length:
+                break
+
+            try:
+                parsed = _parse_text_chunk(chunk_type, data)
+            except (zlib.error, ValueError):
+                parsed = None
+            if parsed is None:
+                continue
+
+            key, text = parsed
+            if key in found or (wanted is not None and key not in wanted):
+                continue
+            found[key] = text
+            if wanted is not None and wanted.issubset(found):
+                break
+
+    return found
+
+
+def read_generation_metadata(path: str) -> Dict[str, str]:
+    """
+    Read Forge `parameters` and ComfyUI `prompt`/`workflow` metadata.
+
+    Args:
+        path: PNG file path
+
+    Returns:
+        Dict containing whichever of the generation keys are present
+    """
+    return read_png_text(path, GENERATION_KEYS)
@@ -105,3 +105,65 @@ class WgetProgressParser:
             }
         
         return None
+
+
+class RsyncProgressParser:
+    """
+    Parser for rsync --info=progress2 and --itemize-changes output.
+    
+    Rsync outputs lines like:
+    - Progress2: '    1,234,567  45%   10.00MB/s    0:00:12 (xfr#3, to-chk=10/20)'
+    - Itemized:  '>f+++++++++ txt2img-images/00001.png'
+    - Stats:     'total size is 2,048  speedup is 1.00'
+    
+    Progress2 lines are terminated by carriage returns, so callers should
+    split on both '\r' and '\n'.
+    """
+    
+    PROGRESS2_PATTERN = re.compile(
+        r'^\s*([\d,]+)\s+(\d+)%\s+([\d.]+[kKMGT]?B/s)\s+(\d+:\d{2}:\d{2})'
+        r'(?:\s+\(xfr#(\d+),\s+(?:to|ir)-chk=(\d+)/(\d+)\))?'
+    )
+    
+    # Update/item type followed by the 9-10 character attribute string
+    ITEMIZE_PATTERN = re.compile(r'^([<>ch.*])([fdLDS])([^ ]{9,10}) (.+)$')
+    
+    TOTAL_SIZE_PATTERN = re.compile(r'total size is ([\d,]+)')
+    
+    @classmethod
+    def parse_line(cls, line: str) -> Optional[Dict]:
+        """Parse a line of rsync output"""
+        match = cls.PROGRESS2_PATTERN.search(line)
+        if match:
+            result = {
+                'type': 'progress',
+                'bytes': int(match.group(1).replace(',', '')),
+                'percent': int(match.group(2)),
+                'speed': match.group(3),
+                'eta': match.group(4)
+            }
+            if match.group(5):
+                result['xfr'] = int(match.group(5))
+                result['to_check'] = int(match.group(6))
+                result['total_files'] = int(match.group(7))
+            return result
+        
+        match = cls.ITEMIZE_PATTERN.match(line)
+        if match:
+            return {
+                'type': 'item',
+                'update': match.group(1),
+                'item_type': match.group(2),
+                'attributes': match.group(3),
+                'path': match.group(4),
+                'received': match.group(1) == '>' and match.group(2) == 'f'
+            }
+        
+        match = cls.TOTAL_SIZE_PATTERN.search(line)
+        if match:
+            return {
+                'type': 'stats',
+                'total_size': int(match.group(1).replace(',', ''))
+            }
+        
+        return None
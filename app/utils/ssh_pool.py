@@ -0,0 +1,579 @@
+"""
+Shared SSH Connection Pool
+
+Keeps one multiplexed OpenSSH ControlMaster connection per (host, port, user)
+so that repeated remote calls reuse an authenticated channel instead of paying
+a full TCP + key exchange + auth handshake on every invocation.
+
+Callers with a different identity file or `-o` options (e.g. a stricter host
+key policy) get a master of their own: a channel on a shared master inherits
+whatever the master was authenticated and verified with, not the caller's
+options.
+
+All helpers return argv lists or CompletedProcess objects so callers keep
+their existing subprocess-based error handling.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import os
+import subprocess
+import threading
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONTROL_DIR = os.environ.get('SSH_CONTROL_DIR', '/tmp/vast_api_ssh')
+DEFAULT_IDLE_TIMEOUT = 300  # seconds a master may sit unused before it is closed
+DEFAULT_MAX_SESSIONS_PER_HOST = 8  # stay below sshd's default MaxSessions of 10
+DEFAULT_HEALTH_CHECK_INTERVAL = 60  # seconds between `ssh -O check` probes
+
+
+@dataclass
+class PooledHost:
+    """State for a single multiplexed master connection."""
+    host: str
+    port: int
+    user: str
+    identity_file: Optional[str]
+    options: Tuple[Tuple[str, str], ...]
+    control_path: str
+    semaphore: threading.BoundedSemaphore
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+    last_health_check: float = 0.0
+    active_sessions: int = 0
+    total_sessions: int = 0
+
+
+PoolKey = Tuple[str, int, str, Optional[str], Tuple[Tuple[str, str], ...]]
+
+
+def _pool_key(host: str, port, user: str, identity_file: Optional[str], options: Optional[Dict[str, str]]) -> PoolKey:
+    return (
+        host,
+        int(port),
+        user,
+        identity_file or None,
+        tuple(sorted((key, str(value)) for key, value in (options or {}).items()))
+    )
+
+
+class SSHConnectionPool:
+    """Pool of OpenSSH ControlMaster connections keyed by destination, identity and options."""
+
+    def __init__(
+        self,
+        control_dir: str = DEFAULT_CONTROL_DIR,
+        idle_timeout: int = DEFAULT_IDLE_TIMEOUT,
+        max_sessions_per_host: int = DEFAULT_MAX_SESSIONS_PER_HOST,
+        health_check_interval: int = DEFAULT_HEALTH_CHECK_INTERVAL,
+        connect_timeout: int = 10,
+        start_reaper: bool = True
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            control_dir: Directory holding the ControlMaster sockets
+            idle_timeout: Seconds of inactivity before a master is closed
+            max_sessions_per_host: Concurrent channels allowed per master
+            health_check_interval: Minimum seconds between master health probes
+            connect_timeout: SSH ConnectTimeout for new masters
+            start_reaper: Start the background idle-expiry thread
+        """
+        self.control_dir = control_dir
+        self.idle_timeout = idle_timeout
+        self.max_sessions_per_host = max_sessions_per_host
+        self.health_check_interval = health_check_interval
+        self.connect_timeout = connect_timeout
+        self._hosts: Dict[PoolKey, PooledHost] = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(self.control_dir, mode=0o700, exist_ok=True)
+
+        if start_reaper:
+            self._reaper_thread = threading.Thread(
+                target=self._reap_idle,
+                daemon=True,
+                name="ssh-pool-reaper"
+            )
+            self._reaper_thread.start()
+
+        logger.info(f"SSHConnectionPool initialized (control_dir={self.control_dir})")
+
+    # ------------------------------------------------------------------
+    # Host bookkeeping
+    # ------------------------------------------------------------------
+
+    def _get_host(
+        self,
+        host: str,
+        port,
+        user: str,
+        identity_file: Optional[str] = None,
+        options: Optional[Dict[str, str]] = None
+    ) -> PooledHost:
+        """Get or create the pool entry for a destination, identity and option set."""
+        key = _pool_key(host, port, user, identity_file, options)
+        with self._lock:
+            entry = self._hosts.get(key)
+            if entry is None:
+                # Socket paths are limited to ~104 bytes, so hash the key
+                digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+                entry = PooledHost(
+                    host=host,
+                    port=int(port),
+                    user=user,
+                    identity_file=key[3],
+                    options=key[4],
+                    control_path=os.path.join(self.control_dir, f"cm-{digest}"),
+                    semaphore=threading.BoundedSemaphore(self.max_sessions_per_host)
+                )
+                self._hosts[key] = entry
+            return entry
+
+    def control_path(
+        self,
+        host: str,
+        port,
+        user: str = 'root',
+        identity_file: Optional[str] = None,
+        options: Optional[Dict[str, str]] = None
+    ) -> str:
+        """Get the ControlMaster socket path for a destination and option set."""
+        return self._get_host(host, port, user, identity_file, options).control_path
+
+    # ------------------------------------------------------------------
+    # Command builders
+    # ------------------------------------------------------------------
+
+    def ssh_options(
+        self,
+        host: str,
+        port,
+        user: str = 'root',
+        identity_file: Optional[str] = None,
+        options: Optional[Dict[str, str]] = None
+    ) -> List[str]:
+        """
+        Build the `-o` option list that routes a connection through the pool.
+
+        Args:
+            host: Remote host
+            port: Remote SSH port
+            user: Remote user
+            identity_file: Optional private key path
+            options: Extra `-o Key=Value` options (e.g. host key policy)
+
+        Returns:
+            List of ssh arguments (without the destination)
+        """
+        entry = self._get_host(host, port, user, identity_file, options)
+        args = [
+            '-o', 'ControlMaster=auto',
+            '-o', f'ControlPath={entry.control_path}',
+            '-o', f'ControlPersist={self.idle_timeout}',
+            '-o', f'ConnectTimeout={self.connect_timeout}',
+            '-o', 'ServerAliveInterval=30',
+        ]
+        if identity_file:
+            args.extend(['-i', identity_file])
+        for key, value in (options or {}).items():
+            args.extend(['-o', f'{key}={value}'])
+        return args
+
+    def ssh_command(
+        self,
+        host: str,
+        port,
+        command: str,
+        user: str = 'root',
+        identity_file: Optional[str] = None,
+        options: Optional[Dict[str, str]] = None
+    ) -> List[str]:
+        """Build a full `ssh` argv that runs `command` over the pooled master."""
+        return [
+            'ssh',
+            '-p', str(port),
+            *self.ssh_options(host, port, user, identity_file, options),
+            f'{user}@{host}',
+            command
+        ]
+
+    def scp_command(
+        self,
+        host: str,
+        port,
+        source: str,
+        dest: str,
+        user: str = 'root',
+        identity_file: Optional[str] = None,
+        options: Optional[Dict[str, str]] = None
+    ) -> List[str]:
+        """
+        Build an `scp` argv that reuses the pooled master.
+
+        Remote paths in `source`/`dest` must already be prefixed with
+        `user@host:`.
+        """
+        return [
+            'scp',
+            '-P', str(port),
+            *self.ssh_options(host, port, user, identity_file, options),
+            source,
+            dest
+        ]
+
+    def rsync_shell(
+        self,
+        host: str,
+        port,
+        user: str = 'root',
+        identity_file: Optional[str] = None,
+        options: Optional[Dict[str, str]] = None
+    ) -> str:
+        """Build the value for rsync's `-e` flag so rsync rides the pooled master."""
+        return ' '.join(['ssh', '-p', str(port), *self.ssh_options(host, port, user, identity_file, options)])
+
+    def forward_command(
+        self,
+        host: str,
+        port,
+        local_port: int,
+        remote_port: int,
+        user: str = 'root',
+        identity_file: Optional[str] = None,
+        options: Optional[Dict[str, str]] = None
+    ) -> List[str]:
+        """
+        Build an `ssh -N -L` argv that forwards a local port to the remote's localhost.
+
+        The tunnel gets its own connection rather than a channel on the
+        pooled master: it lives as long as its consumer, so it would pin a
+        session slot and keep the idle reaper from ever closing the master.
+        """
+        args = [
+            'ssh',
+            '-p', str(port),
+            '-N',
+            '-L', f'127.0.0.1:{local_port}:localhost:{remote_port}',
+            '-o', 'ControlMaster=no',
+            '-o', 'ControlPath=none',
+            '-o', 'ExitOnForwardFailure=yes',
+            '-o', f'ConnectTimeout={self.connect_timeout}',
+            '-o', 'ServerAliveInterval=30',
+        ]
+        if identity_file:
+            args.extend(['-i', identity_file])
+        for key, value in (options or {}).items():
+            args.extend(['-o', f'{key}={value}'])
+        args.append(f'{user}@{host}')
+        return args
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    def _before_call(self, entry: PooledHost):
+        """Probe the master if it has not been checked recently."""
+        now = time.time()
+        if (os.path.exists(entry.control_path)
+                and now - entry.last_health_check > self.health_check_interval):
+            entry.last_health_check = now
+            if not self._check_master(entry):
+                # Stale socket left behind by a dead master; ssh refuses to
+                # multiplex over it, so remove it and let the next call reconnect
+                logger.info(f"Removing stale SSH master socket for {entry.host}:{entry.port}")
+                try:
+                    os.unlink(entry.control_path)
+                except OSError:
+                    pass
+        with self._lock:
+            entry.active_sessions += 1
+            entry.total_sessions += 1
+
+    def _after_call(self, entry: PooledHost):
+        with self._lock:
+            entry.active_sessions -= 1
+            entry.last_used = time.time()
+
+    def run(
+        self,
+        host: str,
+        port,
+        command: str,
+        user: str = 'root',
+        timeout: Optional[float] = 30,
+        input: Optional[str] = None,
+        text: bool = True,
+        identity_file: Optional[str] = None,
+        options: Optional[Dict[str, str]] = None
+    ) -> subprocess.CompletedProcess:
+        """
+        Run a command on the remote host through the pooled master.
+
+        Blocks while the per-host session cap is reached.
+
+        Returns:
+            subprocess.CompletedProcess with captured stdout/stderr
+
+        Raises:
+            subprocess.TimeoutExpired: If the command exceeds `timeout`
+        """
+        entry = self._get_host(host, port, user, identity_file, options)
+        cmd = self.ssh_command(host, port, command, user, identity_file, options)
+
+        with entry.semaphore:
+            self._before_call(entry)
+            try:
+                return subprocess.run(
+                    cmd,
+                    capture_output=True,
+                    text=text,
+                    input=input,
+                    timeout=timeout
+                )
+            finally:
+                self._after_call(entry)
+
+    def run_argv(self, host: str, port, argv: List[str], user: str = 'root',
+                 timeout: Optional[float] = None, input=None, text: bool = True,
+                 identity_file: Optional[str] = None,
+                 options: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
+        """
+        Run a pre-built argv (e.g. from `scp_command`) under the host's session cap.
+
+        Pass the same `identity_file` and `options` the argv was built with.
+        """
+        entry = self._get_host(host, port, user, identity_file, options)
+        with entry.semaphore:
+            self._before_call(entry)
+            try:
+                return subprocess.run(argv, capture_output=True, text=text, input=input, timeout=timeout)
+            finally:
+                self._after_call(entry)
+
+    async def _acquire_async(self, entry: PooledHost):
+        """Wait for a session slot without blocking the event loop."""
+        acquire = asyncio.ensure_future(asyncio.to_thread(entry.semaphore.acquire))
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            # The worker thread still takes a slot eventually; hand it back
+            acquire.add_done_callback(
+                lambda f: f.cancelled() or f.exception() is not None or entry.semaphore.release()
+            )
+            raise
+
+    async def run_async(
+        self,
+        host: str,
+        port,
+        command: str,
+        user: str = 'root',
+        input: Optional[bytes] = None,
+        identity_file: Optional[str] = None,
+        options: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, bytes, bytes]:
+        """
+        Async variant of `run` for use inside the sync engine.
+
+        Returns:
+            (returncode, stdout, stderr)
+        """
+        entry = self._get_host(host, port, user, identity_file, options)
+        cmd = self.ssh_command(host, port, command, user, identity_file, options)
+
+        await self._acquire_async(entry)
+        try:
+            self._before_call(entry)
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdin=asyncio.subprocess.PIPE if input is not None else None,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                stdout, stderr = await proc.communicate(input=input)
+                return proc.returncode, stdout, stderr
+            finally:
+                self._after_call(entry)
+        finally:
+            entry.semaphore.release()
+
+    @contextlib.asynccontextmanager
+    async def stream_async(
+        self,
+        host: str,
+        port,
+        command: str,
+        user: str = 'root',
+        identity_file: Optional[str] = None,
+        options: Optional[Dict[str, str]] = None
+    ):
+        """
+        Run a long-lived remote command, yielding its process with stdout/stderr piped.
+
+        The channel holds a session slot and counts as active for its whole
+        lifetime, so the idle reaper never closes the master under it. The
+        process is killed when the block exits.
+        """
+        entry = self._get_host(host, port, user, identity_file, options)
+        cmd = self.ssh_command(host, port, command, user, identity_file, options)
+
+        await self._acquire_async(entry)
+        try:
+            self._before_call(entry)
+            proc = None
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                yield proc
+            finally:
+                if proc is not None and proc.returncode is None:
+                    proc.kill()
+                    await proc.wait()
+                self._after_call(entry)
+        finally:
+            entry.semaphore.release()
+
+    # ------------------------------------------------------------------
+    # Health and lifecycle
+    # ------------------------------------------------------------------
+
+    def _control_command(self, entry: PooledHost, operation: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [
+                'ssh',
+                '-p', str(entry.port),
+                '-o', f'ControlPath={entry.control_path}',
+                '-O', operation,
+                f'{entry.user}@{entry.host}'
+            ],
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+
+    def _check_master(self, entry: PooledHost) -> bool:
+        try:
+            return self._control_command(entry, 'check').returncode == 0
+        except Exception as e:
+            logger.debug(f"SSH master check failed for {entry.host}:{entry.port}: {e}")
+            return False
+
+    def check(
+        self,
+        host: str,
+        port,
+        user: str = 'root',
+        identity_file: Optional[str] = None,
+        options: Optional[Dict[str, str]] = None
+    ) -> bool:
+        """Return True if a live master exists for the destination and option set."""
+        entry = self._get_host(host, port, user, identity_file, options)
+        entry.last_health_check = time.time()
+        return os.path.exists(entry.control_path) and self._check_master(entry)
+
+    def close(self, host: str, port, user: str = 'root'):
+        """Close every master connection for a destination."""
+        with self._lock:
+            keys = [key for key in self._hosts if key[:3] == (host, int(port), user)]
+            entries = [self._hosts.pop(key) for key in keys]
+        for entry in entries:
+            self._close_entry(entry)
+
+    def _close_entry(self, entry: PooledHost):
+        if os.path.exists(entry.control_path):
+            try:
+                self._control_command(entry, 'exit')
+                logger.info(f"Closed SSH master for {entry.user}@{entry.host}:{entry.port}")
+            except Exception as e:
+                logger.warning(f"Failed to close SSH master for {entry.host}:{entry.port}: {e}")
+
+    def close_idle(self) -> int:
+        """
+        Close masters that have been unused for longer than `idle_timeout`.
+
+        Returns:
+            Number of masters closed
+        """
+        now = time.time()
+        with self._lock:
+            expired = [
+                key for key, entry in self._hosts.items()
+                if entry.active_sessions == 0 and now - entry.last_used > self.idle_timeout
+            ]
+            entries = [self._hosts.pop(key) for key in expired]
+
+        for entry in entries:
+            self._close_entry(entry)
+
+        return len(entries)
+
+    def close_all(self):
+        """Close every master connection in the pool."""
+        with self._lock:
+            entries = list(self._hosts.values())
+            self._hosts.clear()
+        for entry in entries:
+            self._close_entry(entry)
+
+    def _reap_idle(self):
+        """Background thread that expires idle masters."""
+        while True:
+            time.sleep(max(1, self.idle_timeout // 4))
+            try:
+                closed = self.close_idle()
+                if closed:
+                    logger.info(f"Expired {closed} idle SSH master connection(s)")
+            except Exception as e:
+                logger.error(f"Error in SSH pool reaper: {e}")
+
+    def get_stats(self) -> dict:
+        """Get pool statistics."""
+        with self._lock:
+            return {
+                'hosts': [
+                    {
+                        'host': entry.host,
+                        'port': entry.port,
+                        'user': entry.user,
+                        'active_sessions': entry.active_sessions,
+                        'total_sessions': entry.total_sessions,
+                        'idle_seconds': round(time.time() - entry.last_used, 1),
+                        'connected': os.path.exists(entry.control_path)
+                    }
+                    for entry in self._hosts.values()
+                ],
+                'max_sessions_per_host': self.max_sessions_per_host,
+                'idle_timeout': self.idle_timeout
+            }
+
+
+# Global pool instance
+_ssh_pool = None
+_ssh_pool_lock = threading.Lock()
+
+
+def get_ssh_pool() -> SSHConnectionPool:
+    """
+    Get or create the global SSH connection pool.
+
+    Returns:
+        The global SSHConnectionPool instance
+    """
+    global _ssh_pool
+    with _ssh_pool_lock:
+        if _ssh_pool is None:
+            _ssh_pool = SSHConnectionPool()
+        return _ssh_pool
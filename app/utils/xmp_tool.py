@@ -3,9 +3,14 @@
 import sys
 import os
 import re
-from PIL import Image
 from xml.etree.ElementTree import Element, SubElement, tostring
 
+try:
+    from .png_metadata import read_png_text
+except ImportError:
+    # Run as a standalone script (sync_outputs.sh --xmp-script)
+    from png_metadata import read_png_text
+
 # Only allow .png files
 ALLOWED_EXTENSIONS = {'.png'}
 
@@ -15,10 +20,9 @@ def is_valid_image(file_path):
 def extract_prompt(png_path):
     """Extract and sanitize the 'parameters' tEXt chunk from PNG metadata."""
     try:
-        with Image.open(png_path) as img:
-            raw = img.info.get("parameters", "")
-            raw = raw.encode("utf-8", "ignore").decode("utf-8", "ignore")
-            return sanitize_xml_string(raw.strip())
+        raw = read_png_text(png_path, ("parameters",)).get("parameters", "")
+        raw = raw.encode("utf-8", "ignore").decode("utf-8", "ignore")
+        return sanitize_xml_string(raw.strip())
     except Exception as e:
         print(f"❌ Error reading {png_path}: {e}")
         return None
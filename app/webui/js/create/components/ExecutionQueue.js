@@ -4,6 +4,7 @@
  * Supports compact and detailed view modes
  * Supports hiding items via temporary ignore list
  * Supports status filtering (all, success, failed)
+ * Shows live node progress for active prompts, pushed over the /create Socket.IO namespace
  */
 
 export class ExecutionQueue {
@@ -17,9 +18,107 @@ export class ExecutionQueue {
         this.deleteMode = false; // Delete/hide mode state
         this.ignoredItems = new Set(); // Set of ignored prompt_ids
         this.statusFilter = 'all'; // 'all', 'success', or 'failed'
+        this.socket = null; // Socket.IO connection to /create
+        this.subscribedPrompts = new Set(); // prompt_ids whose progress room we joined
+        this.executionStates = new Map(); // Latest pushed state: prompt_id -> state
         this.initializeViewToggle();
         this.initializeStatusFilter();
         this.setupEventListeners();
+        this.connectProgressSocket();
+    }
+
+    /**
+     * Connect to the /create namespace for pushed execution progress
+     */
+    connectProgressSocket() {
+        if (typeof window.io !== 'function') {
+            console.warn('Socket.IO client not loaded; execution queue will not show live progress');
+            return;
+        }
+
+        this.socket = window.io('/create');
+
+        // Rooms don't survive a reconnect, so join them again
+        this.socket.on('connect', () => {
+            this.subscribedPrompts.forEach(promptId => {
+                this.socket.emit('subscribe_execution', { prompt_id: promptId });
+            });
+        });
+
+        this.socket.on('subscribed', (data) => {
+            if (data.state) {
+                this.updateExecutionProgress(data.state);
+            }
+        });
+        this.socket.on('execution_node', (state) => this.updateExecutionProgress(state));
+        this.socket.on('execution_progress', (state) => this.updateExecutionProgress(state));
+
+        this.socket.on('execution_complete', (state) => {
+            this.executionStates.delete(state.prompt_id);
+            // Move the finished prompt into history
+            if (!this.isLoading) {
+                this.refresh();
+            }
+        });
+    }
+
+    /**
+     * Join the progress rooms of the given prompts and leave all others
+     */
+    syncSubscriptions(promptIds) {
+        const wanted = new Set(promptIds);
+
+        this.subscribedPrompts.forEach(promptId => {
+            if (wanted.has(promptId)) return;
+            this.subscribedPrompts.delete(promptId);
+            this.executionStates.delete(promptId);
+            if (this.socket) {
+                this.socket.emit('unsubscribe_execution', { prompt_id: promptId });
+            }
+        });
+
+        wanted.forEach(promptId => {
+            if (this.subscribedPrompts.has(promptId)) return;
+            this.subscribedPrompts.add(promptId);
+            if (this.socket && this.socket.connected) {
+                this.socket.emit('subscribe_execution', { prompt_id: promptId });
+            }
+        });
+    }
+
+    /**
+     * Show a pushed execution state on its queue item
+     */
+    updateExecutionProgress(state) {
+        if (!state || !state.prompt_id || !this.subscribedPrompts.has(state.prompt_id)) return;
+        this.executionStates.set(state.prompt_id, state);
+        if (!this.container) return;
+
+        const item = this.container.querySelector(`.execution-queue-item[data-prompt-id="${CSS.escape(state.prompt_id)}"]`);
+        if (!item) return;
+
+        if (state.status === 'running') {
+            item.classList.remove('status-pending');
+            item.classList.add('status-running');
+            item.querySelector('.execution-queue-item-icon').textContent = '▶️';
+            const statusEl = item.querySelector('.execution-queue-item-status');
+            if (!statusEl.textContent.startsWith('running')) {
+                statusEl.textContent = 'running';
+            }
+        }
+
+        const progress = item.querySelector('.execution-queue-item-progress');
+        if (!progress || state.status !== 'running') return;
+
+        const percent = state.max > 0 ? Math.min(100, (state.value / state.max) * 100) : 0;
+        const details = [];
+        if (state.node) details.push(`node ${state.node}`);
+        if (state.max > 0) details.push(`${state.value}/${state.max}`);
+        details.push(`${state.nodes_done || 0} nodes done`);
+
+        progress.style.display = '';
+        progress.querySelector('.execution-queue-item-progress-fill').style.width = `${percent}%`;
+        progress.querySelector('.execution-queue-item-progress-text').textContent = details.join(' · ');
     }
 
     /**
@@ -258,6 +357,7 @@ export class ExecutionQueue {
     async refresh() {
         if (!this.container) return;
         if (!this.sshConnection) {
+            this.syncSubscriptions([]);
             this.renderEmptyState('No instance selected', 'Select an instance to view execution queue');
             return;
         }
@@ -355,6 +455,9 @@ export class ExecutionQueue {
             filteredHistory = filteredHistory.filter(item => item.status === 'failed');
         }
         // 'all' shows both success and failed (no additional filtering needed)
+
+        // Follow live progress only for prompts still in the queue
+        this.syncSubscriptions([...filteredRunning, ...filteredPending].map(item => item.prompt_id));
         
         const hasActiveItems = filteredRunning.length > 0 || filteredPending.length > 0;
         const hasHistory = filteredHistory.length > 0;
@@ -411,6 +514,9 @@ export class ExecutionQueue {
 
         html += '</div>';
         this.container.innerHTML = html;
+
+        // Re-apply progress pushed before this render
+        this.executionStates.forEach(state => this.updateExecutionProgress(state));
     }
 
     /**
@@ -453,6 +559,12 @@ export class ExecutionQueue {
                             </span>
                             <span class="execution-queue-item-status">${this.escapeHtml(statusText)}</span>
                         </div>
+                        <div class="execution-queue-item-progress" style="display: none;">
+                            <div class="execution-queue-item-progress-bar">
+                                <div class="execution-queue-item-progress-fill" style="width: 0%"></div>
+                            </div>
+                            <div class="execution-queue-item-progress-text"></div>
+                        </div>
                     </div>
                 </div>
                 <button class="execution-queue-delete-btn" onclick="event.stopPropagation(); window.executionQueueInstance?.hideItem('${this.escapeHtml(item.prompt_id)}')">🗑️</button>
@@ -672,6 +784,7 @@ export class ExecutionQueue {
                      data-prompt-id="${this.escapeHtml(promptId)}"
                      data-fullpath="${this.escapeHtml(output.fullpath)}"
                      data-filename="${this.escapeHtml(output.filename)}"
+                     data-url="${this.escapeHtml(output.url || '')}"
                      data-format="${this.escapeHtml(output.format || output.output_type)}">
                     <span class="execution-queue-output-icon">${this.getOutputIcon(output.output_type)}</span>
                     <span class="execution-queue-output-name">${this.escapeHtml(output.filename)}</span>
@@ -697,6 +810,7 @@ export class ExecutionQueue {
                 const outputData = {
                     fullpath: item.dataset.fullpath,
                     filename: item.dataset.filename,
+                    url: item.dataset.url,
                     format: item.dataset.format
                 };
                 this.previewOutput(item.dataset.promptId, outputData);
@@ -730,6 +844,15 @@ export class ExecutionQueue {
         try {
             // Check if already downloaded
             const downloadedSet = this.downloadedFiles.get(promptId) || new Set();
+
+            // Outputs from the local store open directly, streaming (with seeking) while they download
+            if (output.url) {
+                downloadedSet.add(output.filename);
+                this.downloadedFiles.set(promptId, downloadedSet);
+                this.markOutputViewed(promptId, output.filename);
+                window.open(output.url, '_blank');
+                return;
+            }
             
             // Download the file
             const response = await fetch('/create/download-output', {
@@ -757,14 +880,8 @@ export class ExecutionQueue {
             downloadedSet.add(output.filename);
             this.downloadedFiles.set(promptId, downloadedSet);
 
-            // Update UI to show downloaded state - use data attribute selector
-            const outputItem = document.querySelector(`[data-prompt-id="${promptId}"][data-filename="${output.filename}"]`);
-            if (outputItem) {
-                outputItem.classList.add('downloaded');
-                if (!outputItem.querySelector('.execution-queue-output-viewed')) {
-                    outputItem.insertAdjacentHTML('beforeend', '<span class="execution-queue-output-viewed">✓</span>');
-                }
-            }
+            // Update UI to show downloaded state
+            this.markOutputViewed(promptId, output.filename);
 
             // Open in new tab
             window.open(url, '_blank');
@@ -775,6 +892,19 @@ export class ExecutionQueue {
         }
     }
 
+    /**
+     * Show an output as viewed - use data attribute selector
+     */
+    markOutputViewed(promptId, filename) {
+        const outputItem = document.querySelector(`[data-prompt-id="${promptId}"][data-filename="${filename}"]`);
+        if (outputItem) {
+            outputItem.classList.add('downloaded');
+            if (!outputItem.querySelector('.execution-queue-output-viewed')) {
+                outputItem.insertAdjacentHTML('beforeend', '<span class="execution-queue-output-viewed">✓</span>');
+            }
+        }
+    }
+
     /**
      * Get icon for output type
      */
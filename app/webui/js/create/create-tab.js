@@ -882,6 +882,11 @@ async function executeWorkflow() {
                     message: 'Workflow queued on ComfyUI'
                 });
             }
+            
+            // Pick up the new prompt and follow its progress
+            if (CreateTabState.executionQueue) {
+                CreateTabState.executionQueue.refresh();
+            }
         } else {
             console.error('❌ Failed to queue workflow:', data.message);
             if (data.details) {
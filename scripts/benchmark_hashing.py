@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark Content Hashing
+
+Measures the throughput of the sync verification hash (BLAKE2b, through
+app.sync.engine.hash_pipeline) in MB/s, single-threaded per read path and
+across the process pool at increasing worker counts, with SHA-256 and MD5
+as reference points. Runs against an existing folder, or generates a
+corpus of random files.
+
+Usage:
+    python scripts/benchmark_hashing.py [--corpus DIR] [--count N] [--size-mb S] [--rounds R] [--workers W]
+"""
+
+import argparse
+import asyncio
+import glob
+import hashlib
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+from app.sync.engine import hash_pipeline
+from app.sync.engine.hash_pipeline import HashPipeline, hash_file
+
+
+def generate_corpus(directory, count, size):
+    """Write `count` files of `size` random bytes."""
+    for i in range(count):
+        with open(os.path.join(directory, f'file_{i:05d}.bin'), 'wb') as f:
+            f.write(os.urandom(size))
+
+
+def hashlib_reader(name):
+    """Plain buffered read loop with the given hashlib algorithm."""
+    def read(path):
+        digest = hashlib.new(name)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(hash_pipeline.READ_BUFFER_SIZE), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    return read
+
+
+def time_serial(reader, paths, rounds):
+    """Best-of-`rounds` and median wall time for hashing every path in this process."""
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for path in paths:
+            reader(path)
+        timings.append(time.perf_counter() - start)
+    return min(timings), statistics.median(timings)
+
+
+def time_pool(workers, paths, rounds):
+    """Best-of-`rounds` and median wall time through a HashPipeline of `workers` processes."""
+    pipeline = HashPipeline(max_workers=workers)
+    try:
+        # Start the workers before timing
+        asyncio.run(pipeline.hash_files(paths[:workers]))
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            asyncio.run(pipeline.hash_files(paths))
+            timings.append(time.perf_counter() - start)
+        return min(timings), statistics.median(timings)
+    finally:
+        pipeline.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark content hashing")
+    parser.add_argument('--corpus', help="Folder of files to hash (generated if omitted)")
+    parser.add_argument('--count', type=int, default=64, help="Files to generate")
+    parser.add_argument('--size-mb', type=float, default=8, help="Generated file size in MB")
+    parser.add_argument('--rounds', type=int, default=3, help="Timing rounds per variant")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Largest pool size to try")
+    args = parser.parse_args()
+
+    tmpdir = None
+    if args.corpus:
+        corpus = args.corpus
+    else:
+        tmpdir = tempfile.mkdtemp(prefix='hash_bench_')
+        corpus = tmpdir
+        size = int(args.size_mb * 1024 * 1024)
+        print(f"Generating {args.count} files of {args.size_mb:g} MB in {corpus} ...")
+        generate_corpus(corpus, args.count, size)
+
+    try:
+        paths = sorted(p for p in glob.glob(os.path.join(corpus, '**', '*'), recursive=True) if os.path.isfile(p))
+        if not paths:
+            print(f"No files found in {corpus}")
+            return 1
+
+        total_mb = sum(os.path.getsize(p) for p in paths) / 1024 / 1024
+        print(f"Corpus: {len(paths)} files, {total_mb:.1f} MB (warm page cache after the first round)")
+        print()
+
+        serial = {
+            'blake2b (pipeline)': hash_file,
+            'blake2b (buffered)': hashlib_reader('blake2b'),
+            'sha256': hashlib_reader('sha256'),
+            'md5': hashlib_reader('md5'),
+        }
+        print(f"{'single core':<20} {'best (s)':>10} {'median (s)':>11} {'MB/s':>9}")
+        for name, reader in serial.items():
+            best, median = time_serial(reader, paths, args.rounds)
+            print(f"{name:<20} {best:>10.4f} {median:>11.4f} {total_mb / best:>9.1f}")
+        print()
+
+        counts = sorted({1, 2, 4, 8, args.workers} & set(range(1, args.workers + 1)))
+        print(f"{'pool workers':<20} {'best (s)':>10} {'median (s)':>11} {'MB/s':>9} {'MB/s/core':>10}")
+        for workers in counts:
+            best, median = time_pool(workers, paths, args.rounds)
+            rate = total_mb / best
+            print(f"{workers:<20} {best:>10.4f} {median:>11.4f} {rate:>9.1f} {rate / workers:>10.1f}")
+        return 0
+    finally:
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Benchmark Sync Engine Hot Paths
+
+Generates synthetic output trees (sparse files, so a million of them fit
+on any disk) and times the paths every sync and cleanup walks, using the
+LocalTransportAdapter in place of a remote host:
+
+    list            LocalTransportAdapter.list_files
+    diff            ManifestManager.get_changes against a 90%-synced manifest
+    scan            SyncEngine._scan_changes: streamed listing diffed in chunks
+    plan            TransferPlanner.plan over the whole listing
+    persist         ManifestManager.update_many into a new manifest, then reopen
+    cleanup         CleanupEngine._scan_old_files through the transport
+    cleanup-local   CleanupEngine._scan_old_files on the local path
+
+Each stage runs in a fresh process so its peak RSS is its own. Results
+can be saved with --json and compared against a saved run with --baseline.
+
+Usage:
+    python scripts/benchmark_sync_engine.py [--files 1000,10000,100000] [--stages list,diff,...]
+                                            [--workdir DIR] [--json OUT] [--baseline IN]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+STAGES = ['list', 'diff', 'scan', 'plan', 'persist', 'cleanup', 'cleanup-local']
+
+# Files per day folder, like txt2img-images/2024-01-01/
+FILES_PER_DIR = 500
+
+# Spread of generated mtimes; with the 24h cleanup age about two thirds are old
+MTIME_SPAN_HOURS = 72
+
+# Share of the listing the diff stage's manifest already holds, and how
+# many of those it holds at an older mtime (so they diff as modified)
+SYNCED_FRACTION = 0.9
+MODIFIED_FRACTION = 0.05
+
+
+def file_size(rng):
+    """Draw a size resembling a generation output folder."""
+    kind = rng.random()
+    if kind < 0.02:
+        # Videos
+        return int(rng.lognormvariate(math.log(30 * 1024 * 1024), 0.5))
+    if kind < 0.12:
+        # Sidecars (.txt / .json / .xmp)
+        return int(rng.lognormvariate(math.log(2 * 1024), 0.4))
+    # PNGs
+    return int(rng.lognormvariate(math.log(1.5 * 1024 * 1024), 0.35))
+
+
+def generate_tree(root, count, seed=0):
+    """Write `count` sparse files in day folders with realistic sizes and mtimes."""
+    rng = random.Random(seed)
+    now = time.time()
+    total_bytes = 0
+    for i in range(count):
+        directory = os.path.join(root, 'txt2img-images', f'day-{i // FILES_PER_DIR:05d}')
+        if i % FILES_PER_DIR == 0:
+            os.makedirs(directory, exist_ok=True)
+        size = file_size(rng)
+        ext = rng.choice(['.txt', '.json']) if size < 64 * 1024 else ('.mp4' if size > 10 * 1024 * 1024 else '.png')
+        path = os.path.join(directory, f'{i:08d}{ext}')
+        with open(path, 'wb') as f:
+            f.truncate(size)
+        mtime = now - rng.uniform(0, MTIME_SPAN_HOURS * 3600)
+        os.utime(path, (mtime, mtime))
+        total_bytes += size
+        if count >= 100000 and (i + 1) % 100000 == 0:
+            print(f"  {i + 1}/{count} files", flush=True)
+    return total_bytes
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def run_stage(stage, root, workdir):
+    """
+    Run one stage in this (fresh) process.
+
+    Setup that isn't part of the measured path (listing the tree, seeding
+    a manifest) happens before the clock starts but counts toward RSS,
+    since a real sync holds the same data.
+
+    Returns:
+        dict with seconds, items processed and peak RSS in MB
+    """
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    from app.sync.models import CleanupConfig, FileStat, SyncConfig
+    from app.sync.transport.local import LocalTransportAdapter, _walk_files
+    from app.sync.engine.manifest import ManifestManager
+    from app.sync.engine.sync_engine import SyncEngine
+    from app.sync.engine.transfer_planner import TransferPlanner
+    from app.sync.cleanup.cleanup_engine import CleanupEngine
+
+    transport = LocalTransportAdapter()
+    files = [] if stage in ('list', 'scan', 'cleanup', 'cleanup-local') else _walk_files(root)
+
+    if stage == 'list':
+        start = time.perf_counter()
+        files = asyncio.run(transport.list_files(root))
+        items = len(files)
+
+    elif stage == 'diff':
+        manifest = ManifestManager(os.path.join(workdir, 'diff.db'))
+        synced = files[:int(len(files) * SYNCED_FRACTION)]
+        modified = int(len(synced) * MODIFIED_FRACTION)
+        manifest.update_many(
+            FileStat(path=f.path, size=f.size, mtime=f.mtime - 60) if i < modified else f
+            for i, f in enumerate(synced)
+        )
+        start = time.perf_counter()
+        manifest.get_changes(files, prefix=root)
+        items = len(files)
+        manifest.close()
+
+    elif stage == 'scan':
+        engine = SyncEngine(transport, os.path.join(workdir, 'scan.db'))
+        seed = _walk_files(root)
+        engine.manifest.update_many(seed[:int(len(seed) * SYNCED_FRACTION)])
+        items = len(seed)
+        del seed
+        config = SyncConfig(
+            source_type='bench', source_host='localhost', source_port=0,
+            dest_path=os.path.join(workdir, 'dest'), incremental_listing=False
+        )
+        start = time.perf_counter()
+        asyncio.run(engine._scan_changes(root, config))
+        engine.manifest.close()
+
+    elif stage == 'plan':
+        start = time.perf_counter()
+        TransferPlanner().plan(root, os.path.join(workdir, 'dest'), files, 8)
+        items = len(files)
+
+    elif stage == 'persist':
+        path = os.path.join(workdir, 'persist.db')
+        start = time.perf_counter()
+        manifest = ManifestManager(path)
+        manifest.update_many(files)
+        manifest.close()
+        reopened = ManifestManager(path)
+        items = reopened.get_stats()['total_files']
+        reopened.close()
+
+    elif stage == 'cleanup':
+        start = time.perf_counter()
+        old = asyncio.run(CleanupEngine(CleanupConfig())._scan_old_files(root, 24, transport))
+        items = len(old)
+
+    elif stage == 'cleanup-local':
+        start = time.perf_counter()
+        old = asyncio.run(CleanupEngine(CleanupConfig())._scan_old_files(root, 24))
+        items = len(old)
+
+    else:
+        raise ValueError(f"Unknown stage: {stage}")
+
+    return {'seconds': time.perf_counter() - start, 'items': items, 'peak_rss_mb': peak_rss_mb()}
+
+
+def measure(stage, root, workdir):
+    """Run a stage in a spawned process and return its measurements."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(run_stage, stage, root, workdir).result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sync engine hot paths")
+    parser.add_argument('--files', default='1000,10000,100000',
+                        help="Comma-separated tree sizes (up to 1000000)")
+    parser.add_argument('--stages', default=','.join(STAGES), help="Comma-separated stages to run")
+    parser.add_argument('--workdir', help="Where to generate trees (a temp dir if omitted)")
+    parser.add_argument('--keep', action='store_true', help="Keep generated trees for the next run")
+    parser.add_argument('--json', help="Write results to this file")
+    parser.add_argument('--baseline', help="Results file from an earlier run to compare against")
+    args = parser.parse_args()
+
+    sizes = [int(n) for n in args.files.split(',')]
+    stages = args.stages.split(',')
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        print(f"Unknown stage(s): {', '.join(sorted(unknown))}; choose from {', '.join(STAGES)}")
+        return 1
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {(r['files'], r['stage']): r for r in json.load(f)}
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='sync_bench_')
+    results = []
+
+    try:
+        for count in sizes:
+            root = os.path.join(workdir, f'tree_{count}')
+            if not os.path.isdir(root):
+                print(f"Generating {count} files in {root} ...", flush=True)
+                total_bytes = generate_tree(root, count)
+                print(f"  {total_bytes / 1024 ** 3:.1f} GB apparent size")
+
+            scratch = os.path.join(workdir, f'scratch_{count}')
+            print()
+            print(f"{count} files")
+            print(f"{'stage':<14} {'wall (s)':>10} {'items/s':>12} {'peak RSS (MB)':>14} {'vs baseline':>12}")
+
+            for stage in stages:
+                shutil.rmtree(scratch, ignore_errors=True)
+                os.makedirs(scratch)
+                measured = measure(stage, root, scratch)
+                rate = measured['items'] / measured['seconds'] if measured['seconds'] > 0 else float('inf')
+
+                change = ''
+                previous = baseline.get((count, stage))
+                if previous and previous['seconds'] > 0:
+                    change = f"{(measured['seconds'] / previous['seconds'] - 1) * 100:+.0f}%"
+
+                print(f"{stage:<14} {measured['seconds']:>10.3f} {rate:>12.0f} "
+                      f"{measured['peak_rss_mb']:>14.1f} {change:>12}", flush=True)
+                results.append({'files': count, 'stage': stage, **measured})
+            shutil.rmtree(scratch, ignore_errors=True)
+
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+            print()
+            print(f"Results written to {args.json}")
+        return 0
+    finally:
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Shared fakes for the sync tests
+"""
+
+import hashlib
+import io
+import os
+import uuid
+
+from app.sync.models import SyncConfig, TransferResult, BatchTransferResult, BatchDeleteResult
+from app.sync.transport import TransportAdapter
+from app.sync.engine.transfer_planner import relative_path
+
+
+class FakeTransport(TransportAdapter):
+    """
+    In-memory transport recording listings, batched transfers and deletes.
+
+    Files in `fail` always fail; files in `failures` fail that many times
+    before succeeding. With `contents`, transferred files are written into
+    dest (altered for names in `corrupt`) and reported as received. Tests
+    drive watch_files by putting stats (None drops the feed) on `feed`.
+    """
+
+    def __init__(self, files=None, fail=(), failures=None, contents=None, corrupt=(),
+                 undeletable=(), free_bytes=0):
+        self.files = files if files is not None else []
+        self.fail = set(fail)
+        self.failures = dict(failures or {})
+        self.contents = contents
+        self.corrupt = set(corrupt)
+        self.undeletable = set(undeletable)
+        self.free_bytes = free_bytes
+        self.batches = []
+        self.listings = []
+        self.hashed = []
+        self.delete_calls = []
+        self.feed = None
+        self.sessions = 0
+
+    def _listed(self, path):
+        return [f for f in self.files if f.path.startswith(path.rstrip('/') + '/')]
+
+    async def list_files(self, path):
+        self.listings.append(('full', None))
+        return self._listed(path)
+
+    async def list_files_since(self, path, since):
+        self.listings.append(('since', since))
+        return [f for f in self._listed(path) if f.mtime > since]
+
+    async def transfer_file(self, source, dest, progress_callback=None):
+        return TransferResult(success=True, bytes_transferred=0, duration=0)
+
+    async def transfer_folder(self, source, dest, progress_callback=None):
+        raise AssertionError("planned syncs must not fall back to whole-folder rsync")
+
+    async def transfer_files(self, source_root, dest, relative_paths, progress_callback=None):
+        self.batches.append(list(relative_paths))
+        failed = [p for p in relative_paths if p in self.fail or self.failures.get(p, 0) > 0]
+        for p in failed:
+            if p in self.failures:
+                self.failures[p] -= 1
+        transferred = [p for p in relative_paths if p not in failed]
+
+        if self.contents is not None:
+            for rel in relative_paths:
+                data = self.contents[rel]
+                if rel in self.corrupt:
+                    # Always differ from the original, even if it already ends in '?'
+                    data = data[:-1] + (b'!' if data.endswith(b'?') else b'?')
+                with open(os.path.join(dest, rel), 'wb') as f:
+                    f.write(data)
+
+        if progress_callback:
+            # Each run is its own rsync: finished files plus half of each
+            # failed one, like an interrupted transfer
+            sizes = {relative_path(source_root, f.path): f.size for f in self.files}
+            progress_callback({
+                'transfer_id': uuid.uuid4().hex,
+                'transferred_bytes': sum(sizes.get(p, 0) for p in transferred)
+                + sum(sizes.get(p, 0) // 2 for p in failed),
+                'transferred_files': len(transferred)
+            })
+
+        error = None
+        if failed:
+            error = 'boom' if self.fail.intersection(failed) else 'connection reset'
+        return BatchTransferResult(
+            success=not failed,
+            bytes_transferred=0,
+            duration=0,
+            transferred=transferred,
+            failed=failed,
+            error=error,
+            received=list(relative_paths) if self.contents is not None else None
+        )
+
+    async def hash_files(self, root, relative_paths):
+        if self.contents is None:
+            return await super().hash_files(root, relative_paths)
+        self.hashed.extend(relative_paths)
+        return {p: hashlib.blake2b(self.contents[p]).hexdigest() for p in relative_paths}
+
+    async def watch_files(self, paths, poll_interval=2.0, settle_seconds=2.0, on_mode=None):
+        self.sessions += 1
+        on_mode('test')
+        while True:
+            stat = await self.feed.get()
+            if stat is None:
+                return
+            yield stat
+
+    async def get_free_space(self, path):
+        return self.free_bytes
+
+    async def delete_file(self, path):
+        raise AssertionError("deletes must go through delete_files")
+
+    async def delete_files(self, paths):
+        self.delete_calls.append(list(paths))
+        return BatchDeleteResult(
+            deleted=[p for p in paths if p not in self.undeletable],
+            failed=[p for p in paths if p in self.undeletable]
+        )
+
+    async def get_file_stat(self, path):
+        raise NotImplementedError
+
+
+def sync_config(workers=3):
+    return SyncConfig(
+        source_type='forge',
+        source_host='host',
+        source_port=22,
+        dest_path='/media',
+        parallel_transfers=workers,
+        retry_delay_seconds=0
+    )
+
+
+def png_bytes(parameters=None):
+    """A tiny PNG, with Forge-style generation parameters when given."""
+    from PIL import Image
+    from PIL.PngImagePlugin import PngInfo
+
+    info = PngInfo()
+    if parameters:
+        info.add_text('parameters', parameters)
+    buffer = io.BytesIO()
+    Image.new('RGB', (2, 2)).save(buffer, format='PNG', pnginfo=info)
+    return buffer.getvalue()
@@ -0,0 +1,333 @@
+"""
+Tests for batched remote deletion in the cleanup engine
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.sync.cleanup import CleanupEngine, SpacePressureScheduler, SpaceTarget
+from app.sync.engine.manifest import ManifestManager, manifest_path_for
+from app.sync.models import CleanupConfig, FileStat, SyncResult, RemoteTree, RemoteSubdir
+from app.sync.orchestrator import SyncOrchestrator
+from app.sync.sync_adapter import run_sync_v2
+from app.sync.transport import TransportAdapter
+from app.sync.transport.ssh_rsync import SSHRsyncAdapter
+
+from conftest import FakeTransport
+
+
+class TestBatchedCleanup:
+    """Test CleanupEngine with bulk deletion."""
+
+    def test_chunks_by_max_files_per_batch(self):
+        """Test one delete_files call per chunk and freed bytes from the scan."""
+        old = time.time() - 48 * 3600
+        files = [FileStat(path=f'/out/img{i}.png', size=100 + i, mtime=old) for i in range(25)]
+        transport = FakeTransport(files, undeletable={'/out/img3.png'})
+        engine = CleanupEngine(CleanupConfig(max_files_per_batch=10))
+
+        result = asyncio.run(engine.cleanup_old_media('/out', age_hours=24, transport=transport))
+
+        assert [len(c) for c in transport.delete_calls] == [10, 10, 5]
+        assert result.files_scanned == 25
+        assert result.files_deleted == 24
+        assert result.space_freed_bytes == sum(f.size for f in files) - 103
+
+    def test_v1_sync_cleans_only_synced_files_in_synced_folders(self):
+        """Test unsynced and out-of-folder files survive a v1 sync with cleanup."""
+        old = time.time() - 48 * 3600
+        day = '/out/txt2img-images/2025-01-01'
+        synced = FileStat(path=f'{day}/synced.png', size=10, mtime=old)
+        unsynced = FileStat(path=f'{day}/unsynced.png', size=10, mtime=old)
+        outside = FileStat(path='/out/other/old.png', size=10, mtime=old)
+
+        class TreeTransport(FakeTransport):
+            def __init__(self, files, subdirs):
+                super().__init__(files)
+                self.subdirs = subdirs
+
+            async def get_remote_tree(self, base_path, folders):
+                return RemoteTree(base_path='/out', subdirs=self.subdirs)
+
+        async def fake_sync(engine, src, dest, config, progress_callback=None):
+            # The job's sync also recorded a file outside the planned folders
+            engine.manifest.update_many([synced, outside])
+            return SyncResult(success=True, files_transferred=1, bytes_transferred=10, duration=0.1)
+
+        def run(transport):
+            with tempfile.TemporaryDirectory() as tmpdir:
+                orchestrator = SyncOrchestrator(manifest_dir=tmpdir)
+                try:
+                    with patch('app.sync.orchestrator.SyncEngine.sync_folder', new=fake_sync), \
+                            patch.object(SyncOrchestrator, '_make_transport', return_value=transport), \
+                            patch('app.sync.sync_adapter.get_orchestrator', return_value=orchestrator), \
+                            patch('app.sync.sync_adapter.save_sync_log'):
+                        assert run_sync_v2('10.0.0.1', '2222', 'forge')['success']
+                finally:
+                    orchestrator.shutdown()
+
+        transport = TreeTransport(
+            [synced, unsynced, outside],
+            [RemoteSubdir(folder='txt2img-images', name='2025-01-01', files=2, bytes=20)]
+        )
+        run(transport)
+        assert transport.delete_calls == [[synced.path]]
+
+        # Nothing planned, nothing cleaned
+        transport = TreeTransport([synced, unsynced, outside], [])
+        run(transport)
+        assert transport.delete_calls == []
+
+    def test_already_gone_files_free_nothing(self):
+        """Test files that vanished before the delete don't count as freed."""
+        gb = 1024 ** 3
+        files = [FileStat(path=f'/out/img{i}.png', size=gb, mtime=1000.0 + i) for i in range(3)]
+
+        class VanishingTransport(FakeTransport):
+            async def delete_files(self, paths):
+                result = await super().delete_files(paths)
+                result.missing = [p for p in paths if p == '/out/img0.png']
+                return result
+
+        transport = VanishingTransport(files)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manifest = ManifestManager(os.path.join(tmpdir, 'm.db'))
+            manifest.update_many(files)
+            result = asyncio.run(CleanupEngine().cleanup_for_space('/out', 2 * gb, transport, manifest))
+            manifest.close()
+
+        assert result.files_deleted == 1
+        assert result.space_freed_bytes == gb
+
+    def test_default_delete_files_falls_back_to_delete_file(self):
+        """Test adapters without a bulk operation still work."""
+        class SingleDelete(FakeTransport):
+            async def delete_file(self, path):
+                return path != '/b'
+
+        result = asyncio.run(TransportAdapter.delete_files(SingleDelete([]), ['/a', '/b']))
+
+        assert result.deleted == ['/a']
+        assert result.failed == ['/b']
+
+
+class TestSpacePressureCleanup:
+    """Test eviction of already-synced files under space pressure."""
+
+    GB = 1024 ** 3
+
+    def _files(self):
+        # img0 is oldest; all are 1 GB
+        return [FileStat(path=f'/out/img{i}.png', size=self.GB, mtime=1000.0 + i) for i in range(6)]
+
+    def test_evicts_oldest_synced_files_only(self):
+        """Test unsynced files are kept and eviction stops at the target."""
+        files = self._files()
+        transport = FakeTransport(files)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manifest = ManifestManager(os.path.join(tmpdir, 'm.db'))
+            # img0 was never synced; img1 changed since it was synced
+            manifest.update_many(files[2:])
+            manifest.update_manifest('/out/img1.png', FileStat(path='/out/img1.png', size=1, mtime=1.0))
+
+            result = asyncio.run(CleanupEngine().cleanup_for_space(
+                '/out', int(2.5 * self.GB), transport, manifest
+            ))
+            manifest.close()
+
+        assert transport.delete_calls == [['/out/img2.png', '/out/img3.png', '/out/img4.png']]
+        assert result.space_freed_bytes == 3 * self.GB
+        assert result.errors == []
+
+    def test_scheduler_only_acts_below_threshold(self):
+        """Test the scheduler samples space and evicts up to the target."""
+        files = self._files()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            target = SpaceTarget(host='10.0.0.1', port=22, path='/out', source_type='comfyui')
+            manifest = ManifestManager(manifest_path_for(tmpdir, 'comfyui', '10.0.0.1'))
+            manifest.update_many(files)
+            manifest.close()
+
+            transports = {}
+
+            def factory(t):
+                return transports.setdefault('t', FakeTransport(files, free_bytes=self.free))
+
+            scheduler = SpacePressureScheduler(
+                CleanupConfig(min_free_space_gb=5, target_free_space_gb=7),
+                manifest_dir=tmpdir,
+                target_provider=lambda: [target],
+                transport_factory=factory
+            )
+
+            self.free = 6 * self.GB
+            status = asyncio.run(scheduler.check_target(target))
+            assert status['evicted_files'] == 0
+            assert transports['t'].delete_calls == []
+
+            transports.clear()
+            self.free = 4 * self.GB
+            statuses = asyncio.run(scheduler.check_all())
+
+        assert statuses[0]['evicted_files'] == 3
+        assert statuses[0]['free_bytes'] == 7 * self.GB
+        assert transports['t'].delete_calls == [['/out/img0.png', '/out/img1.png', '/out/img2.png']]
+        assert scheduler.get_status()['targets'][0]['freed_bytes'] == 3 * self.GB
+
+    def test_concurrent_checks_evict_once(self):
+        """Test a check started while another is in flight doesn't evict again."""
+        files = self._files()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            target = SpaceTarget(host='10.0.0.1', port=22, path='/out', source_type='comfyui')
+            manifest = ManifestManager(manifest_path_for(tmpdir, 'comfyui', '10.0.0.1'))
+            manifest.update_many(files)
+            manifest.close()
+
+            class SlowTransport(FakeTransport):
+                async def get_free_space(self, path):
+                    await asyncio.sleep(0.1)
+                    return self.free_bytes
+
+            transport = SlowTransport(files, free_bytes=4 * self.GB)
+            scheduler = SpacePressureScheduler(
+                CleanupConfig(min_free_space_gb=5, target_free_space_gb=7),
+                manifest_dir=tmpdir,
+                target_provider=lambda: [target],
+                transport_factory=lambda t: transport
+            )
+
+            async def both():
+                return await asyncio.gather(scheduler.check_all(), scheduler.check_all())
+
+            first, second = asyncio.run(both())
+
+        assert transport.delete_calls == [['/out/img0.png', '/out/img1.png', '/out/img2.png']]
+        assert first[0]['evicted_files'] == 3
+        assert second == []
+
+    def test_scheduler_evicts_after_vastai_sync(self):
+        """Test files synced with run_sync_v2 under the Vast.ai type are found by host and port."""
+        files = self._files()
+
+        async def fake_sync(engine, src, dest, config, progress_callback=None):
+            engine.manifest.update_many(files)
+            return SyncResult(success=True, files_transferred=len(files), bytes_transferred=0, duration=0.1)
+
+        async def one_pair(self, config, transport):
+            return [('/out', '/dst')]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            orchestrator = SyncOrchestrator(manifest_dir=tmpdir)
+            try:
+                with patch('app.sync.orchestrator.SyncEngine.sync_folder', new=fake_sync), \
+                        patch.object(SyncOrchestrator, '_plan_folder_pairs', new=one_pair), \
+                        patch('app.sync.sync_adapter.get_orchestrator', return_value=orchestrator), \
+                        patch('app.sync.sync_adapter.save_sync_log'):
+                    assert run_sync_v2('10.0.0.1', '2222', 'VastAI', cleanup=False)['success']
+            finally:
+                orchestrator.shutdown()
+
+            transports = {}
+            scheduler = SpacePressureScheduler(
+                CleanupConfig(min_free_space_gb=5, target_free_space_gb=7),
+                manifest_dir=tmpdir,
+                transport_factory=lambda t: transports.setdefault(t.port, FakeTransport(files, free_bytes=4 * self.GB))
+            )
+            synced = asyncio.run(scheduler.check_target(
+                SpaceTarget(host='10.0.0.1', port=2222, path='/out', source_type='comfyui')
+            ))
+            # Another instance behind the same address was never synced
+            neighbour = asyncio.run(scheduler.check_target(
+                SpaceTarget(host='10.0.0.1', port=2223, path='/out', source_type='comfyui')
+            ))
+
+        assert synced['evicted_files'] == 3
+        assert transports[2222].delete_calls == [['/out/img0.png', '/out/img1.png', '/out/img2.png']]
+        assert neighbour['evicted_files'] == 0 and 'No sync manifest' in neighbour['error']
+        assert transports[2223].delete_calls == []
+
+    def test_scheduler_requires_threshold(self):
+        """Test the scheduler refuses to run without min_free_space_gb."""
+        with pytest.raises(ValueError):
+            SpacePressureScheduler(CleanupConfig())
+
+
+async def run_locally(command, input=None):
+    """Stands in for SSHRsyncAdapter._run_remote with the local shell."""
+    proc = await asyncio.create_subprocess_exec(
+        'sh', '-c', command,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await proc.communicate(input)
+    return proc.returncode, stdout, stderr
+
+
+class TestSSHFreeSpace:
+    """Test reading free space with df."""
+
+    def test_reads_available_bytes(self):
+        """Test df's Available column is returned for an existing path."""
+        adapter = SSHRsyncAdapter(host='example.com', port=22)
+        adapter._run_remote = run_locally
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            free = asyncio.run(adapter.get_free_space(tmpdir))
+            stat = os.statvfs(tmpdir)
+
+        assert abs(free - stat.f_bavail * stat.f_frsize) < 256 * 1024 ** 2
+
+    def test_df_failure_raises(self):
+        """Test a missing path or unparsable output is an error, not a bogus number."""
+        adapter = SSHRsyncAdapter(host='example.com', port=22)
+        adapter._run_remote = run_locally
+
+        with pytest.raises(Exception, match='Failed to get free space'):
+            asyncio.run(adapter.get_free_space('/no/such/path'))
+
+        async def header_only(command, input=None):
+            return 0, b'Filesystem 1-blocks Used Available Capacity Mounted on\n', b''
+
+        adapter._run_remote = header_only
+        with pytest.raises(Exception, match='Unexpected df output'):
+            asyncio.run(adapter.get_free_space('/out'))
+
+
+class TestSSHBulkDelete:
+    """Test the remote bulk-delete command."""
+
+    def test_bulk_delete_script_reports_per_path(self):
+        """Test the xargs script against a local shell."""
+        adapter = SSHRsyncAdapter(host='example.com', port=22)
+        adapter._run_remote = run_locally
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            names = ['plain.png', "it's a file.png", 'new\nline.png']
+            paths = [os.path.join(tmpdir, n) for n in names]
+            for p in paths:
+                open(p, 'w').close()
+            # rm -f refuses directories, so this path survives
+            directory = os.path.join(tmpdir, 'subdir')
+            os.mkdir(directory)
+
+            result = asyncio.run(adapter.delete_files(paths + [directory]))
+
+            assert result.deleted == paths
+            assert result.failed == [directory]
+            assert result.missing == []
+            assert result.error
+            assert not any(os.path.exists(p) for p in paths)
+
+            again = asyncio.run(adapter.delete_files(paths[:2]))
+
+            assert again.deleted == paths[:2]
+            assert again.missing == paths[:2]
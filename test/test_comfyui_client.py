@@ -0,0 +1,185 @@
+"""
+Tests for the ComfyUI client
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.create.comfyui_client import ComfyUIClient, ComfyUIError
+
+
+class FakeComfyUI(BaseHTTPRequestHandler):
+    """Just enough of ComfyUI's HTTP API."""
+
+    prompts = []
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body, content_type='application/json'):
+        data = json.dumps(body).encode() if content_type == 'application/json' else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if 'bad' in payload['prompt']:
+            self._reply(400, {'error': {'message': 'Prompt outputs failed validation'}, 'node_errors': {'1': {}}})
+            return
+        self.prompts.append(payload)
+        self._reply(200, {'prompt_id': f'p{len(self.prompts)}', 'number': len(self.prompts)})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == '/queue':
+            self._reply(200, {'queue_running': [[0, 'p1', {}, {}, []]], 'queue_pending': []})
+        elif url.path == '/history/p1':
+            self._reply(200, {'p1': {'outputs': {'9': {'images': [{'filename': 'a.png'}]}}}})
+        elif url.path == '/history':
+            self._reply(200, {'max_items': query.get('max_items', [None])[0]})
+        elif url.path == '/view':
+            self._reply(200, query['filename'][0].encode(), content_type='image/png')
+        else:
+            self._reply(404, {})
+
+
+class DroppingComfyUI(FakeComfyUI):
+    """Reads the prompt, then drops the connection without answering."""
+
+    received = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        DroppingComfyUI.received += 1
+        self.close_connection = True
+        self.connection.shutdown(2)
+
+
+class StubTunnel:
+    """Stands in for the SSH forward; the fake server is already local."""
+
+    def __init__(self, local_port):
+        self.local_port = local_port
+        self.alive = False
+        self.starts = 0
+
+    def is_alive(self):
+        return self.alive
+
+    def start(self):
+        self.starts += 1
+        self.alive = True
+
+    def close(self):
+        self.alive = False
+
+
+@pytest.fixture
+def server():
+    FakeComfyUI.prompts = []
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), FakeComfyUI)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestComfyUIClient:
+    """Test the typed API calls against a fake ComfyUI."""
+
+    def test_queue_prompt_and_reads(self, server):
+        """Test queueing, queue, history and view over one session."""
+        tunnel = StubTunnel(server.server_address[1])
+        client = ComfyUIClient('host', 22, tunnel=tunnel)
+
+        prompt_id = client.queue_prompt({'1': {'class_type': 'KSampler'}}, client_id='abc')
+        queue = client.get_queue()
+        history = client.get_history('p1')
+        recent = client.get_history(max_items=10)
+        view = client.view('a.png', folder_type='output')
+        client.close()
+
+        assert prompt_id == 'p1'
+        assert FakeComfyUI.prompts[0]['client_id'] == 'abc'
+        assert queue['queue_running'][0][1] == 'p1'
+        assert history['p1']['outputs']['9']['images'][0]['filename'] == 'a.png'
+        assert recent == {'max_items': '10'}
+        assert view.content == b'a.png'
+        assert tunnel.starts == 1 and not tunnel.alive
+
+    def test_rejected_prompt_raises_with_details(self, server):
+        """Test a validation failure surfaces ComfyUI's message and node errors."""
+        client = ComfyUIClient('host', 22, tunnel=StubTunnel(server.server_address[1]))
+
+        with pytest.raises(ComfyUIError) as excinfo:
+            client.queue_prompt({'bad': {}})
+
+        assert excinfo.value.status_code == 400
+        assert 'failed validation' in str(excinfo.value)
+        assert excinfo.value.details['node_errors'] == {'1': {}}
+
+    def test_restarts_dead_tunnel_once(self, server):
+        """Test a refused connection restarts the tunnel and retries."""
+        tunnel = StubTunnel(server.server_address[1])
+        tunnel.alive = True
+        live_port = tunnel.local_port
+
+        # Point at a closed port until the tunnel is restarted
+        with ThreadingHTTPServer(('127.0.0.1', 0), FakeComfyUI) as closed:
+            tunnel.local_port = closed.server_address[1]
+        original_start = tunnel.start
+
+        def restart():
+            original_start()
+            tunnel.local_port = live_port
+
+        tunnel.start = restart
+        client = ComfyUIClient('host', 22, tunnel=tunnel)
+
+        assert client.get_queue()['queue_pending'] == []
+        assert tunnel.starts == 1
+
+    def test_refused_post_is_retried(self, server):
+        """Test a prompt that never reached ComfyUI is sent again after a restart."""
+        tunnel = StubTunnel(server.server_address[1])
+        tunnel.alive = True
+        live_port = tunnel.local_port
+        with ThreadingHTTPServer(('127.0.0.1', 0), FakeComfyUI) as closed:
+            tunnel.local_port = closed.server_address[1]
+        original_start = tunnel.start
+
+        def restart():
+            original_start()
+            tunnel.local_port = live_port
+
+        tunnel.start = restart
+        client = ComfyUIClient('host', 22, tunnel=tunnel)
+
+        assert client.queue_prompt({'1': {}}, prompt_id='mine') == 'p1'
+        assert FakeComfyUI.prompts[0]['prompt_id'] == 'mine'
+        assert tunnel.starts == 1
+
+    def test_dropped_post_is_not_resent(self):
+        """Test a prompt that may have been queued isn't queued a second time."""
+        DroppingComfyUI.received = 0
+        with ThreadingHTTPServer(('127.0.0.1', 0), DroppingComfyUI) as httpd:
+            threading.Thread(target=httpd.serve_forever, daemon=True).start()
+            tunnel = StubTunnel(httpd.server_address[1])
+            tunnel.alive = True
+            client = ComfyUIClient('host', 22, tunnel=tunnel)
+
+            with pytest.raises(ComfyUIError):
+                client.queue_prompt({'1': {}})
+            httpd.shutdown()
+
+        assert DroppingComfyUI.received == 1
+        assert tunnel.starts == 0
@@ -0,0 +1,110 @@
+"""
+Tests for content-addressed input image uploads in the create API
+"""
+
+import base64
+import subprocess
+
+import pytest
+
+from app.api import create
+
+
+def _data_url(data, fmt='png'):
+    return f'data:image/{fmt};base64,' + base64.b64encode(data).decode()
+
+
+class FakeRemote:
+    """Records remote commands; `files` is the instance's input directory."""
+
+    def __init__(self, files=None):
+        self.files = dict(files or {})
+        self.commands = []
+
+    def __call__(self, host, port, command, timeout=None, input=None, text=True):
+        self.commands.append(command)
+        if command.startswith('cd '):
+            names = command.split('-- ', 1)[1].split(' 2>')[0].split()
+            stdout = ''.join(f'{len(self.files[n])} {n}\n' for n in names if n in self.files)
+            return subprocess.CompletedProcess(command, 0, stdout, '')
+        name = command.rsplit('/', 1)[1]
+        self.files[name] = input
+        return subprocess.CompletedProcess(command, 0, b'', b'')
+
+
+@pytest.fixture
+def remote(monkeypatch):
+    fake = FakeRemote()
+    monkeypatch.setattr(create, '_run_remote_command', fake)
+    monkeypatch.setattr(create, 'remote_input_files', {})
+    return fake
+
+
+class TestInputUploads:
+    """Test dedupe of uploaded input images."""
+
+    def test_filename_is_content_hash(self):
+        """Test the same bytes always map to the same name, whatever the encoding header."""
+        first = create._generate_image_filename(_data_url(b'image-bytes'))
+        second = create._generate_image_filename(_data_url(b'image-bytes'))
+        other = create._generate_image_filename(_data_url(b'other-bytes'))
+
+        assert first == second != other
+        assert first.startswith('upload_') and first.endswith('.png')
+
+    def test_reupload_costs_nothing(self, remote):
+        """Test a second upload of the same image sends no commands at all."""
+        image = _data_url(b'seed-sweep-input')
+
+        first = create._upload_images_to_remote([image, image], '10.0.0.1', '22')
+        commands_after_first = len(remote.commands)
+        second = create._upload_images_to_remote([image], '10.0.0.1', 22)
+
+        assert first == [first[0], first[0]] and second == [first[0]]
+        assert commands_after_first == 2
+        assert len(remote.commands) == 2
+        assert remote.files[first[0]] == b'seed-sweep-input'
+
+    def test_skips_files_already_on_instance(self, remote):
+        """Test one stat batch finds existing files and only missing or truncated ones are sent."""
+        present = _data_url(b'already-there')
+        truncated = _data_url(b'partial-upload')
+        missing = _data_url(b'new-image', fmt='jpeg')
+        remote.files[create._generate_image_filename(present)] = b'already-there'
+        remote.files[create._generate_image_filename(truncated)] = b'part'
+
+        names = create._upload_images_to_remote([present, truncated, missing], '10.0.0.1', '22')
+
+        stats = [c for c in remote.commands if c.startswith('cd ')]
+        uploads = [c for c in remote.commands if not c.startswith('cd ')]
+        assert len(stats) == 1
+        assert len(uploads) == 2
+        assert remote.files[names[1]] == b'partial-upload'
+        assert names[2].endswith('.jpeg')
+
+    def test_forget_rechecks_instance(self, remote):
+        """Test forgetting an instance's inputs makes the next upload stat again."""
+        image = _data_url(b'x')
+        create._upload_images_to_remote([image], '10.0.0.1', '22')
+        create._forget_remote_inputs('10.0.0.1', '22')
+        remote.files.clear()
+
+        create._upload_images_to_remote([image], '10.0.0.1', '22')
+
+        assert len(remote.commands) == 4
+        assert create._generate_image_filename(image) in remote.files
+
+    def test_known_inputs_are_rechecked_after_ttl(self, remote, monkeypatch):
+        """Test a cached input is stat'ed again once its TTL passes, and re-sent if gone."""
+        image = _data_url(b'y')
+        create._upload_images_to_remote([image], '10.0.0.1', '22')
+        remote.files.clear()
+
+        create._upload_images_to_remote([image], '10.0.0.1', '22')
+        assert len(remote.commands) == 2
+
+        monkeypatch.setattr(create, 'REMOTE_INPUT_TTL', -1)
+        create._upload_images_to_remote([image], '10.0.0.1', '22')
+
+        assert len(remote.commands) == 4
+        assert create._generate_image_filename(image) in remote.files
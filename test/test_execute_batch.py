@@ -0,0 +1,201 @@
+"""
+Tests for parameter sweeps and the batch execution API
+"""
+
+import base64
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from app.api import create
+from app.create.comfyui_client import ComfyUIError
+from app.create.sweep import MAX_SWEEP_SIZE, expand_sweep
+from app.create.workflow_loader import InputConfig
+
+IMAGE = 'data:image/png;base64,' + base64.b64encode(b'input-image').decode()
+
+
+class TestExpandSweep:
+    """Test sweep spec expansion."""
+
+    def test_values_and_inclusive_range(self):
+        """Test explicit values and ranges, with float steps rounded."""
+        assert expand_sweep({'field': 'seed', 'values': [7, 8]}) == [{'seed': 7}, {'seed': 8}]
+        assert expand_sweep({'field': 'steps', 'range': {'start': 10, 'stop': 30, 'step': 10}}) == [
+            {'steps': 10}, {'steps': 20}, {'steps': 30}
+        ]
+        cfg = expand_sweep({'field': 'cfg', 'range': {'start': 3.0, 'stop': 3.3, 'step': 0.1}})
+        assert [run['cfg'] for run in cfg] == [3.0, 3.1, 3.2, 3.3]
+
+    def test_zip_and_product(self):
+        """Test lockstep and cartesian combination, nested."""
+        runs = expand_sweep({'product': [
+            {'zip': [
+                {'field': 'cfg', 'values': [3, 4]},
+                {'field': 'steps', 'values': [20, 30]}
+            ]},
+            {'field': 'seed', 'values': [1, 2, 3]}
+        ]})
+
+        assert len(runs) == 6
+        assert runs[0] == {'cfg': 3, 'steps': 20, 'seed': 1}
+        assert runs[-1] == {'cfg': 4, 'steps': 30, 'seed': 3}
+
+    @pytest.mark.parametrize('spec', [
+        {'zip': [{'field': 'a', 'values': [1]}, {'field': 'b', 'values': [1, 2]}]},
+        {'product': [{'field': 'a', 'values': [1]}, {'field': 'a', 'values': [2]}]},
+        {'field': 'a', 'range': {'start': 5, 'stop': 1, 'step': 1}},
+        {'field': 'a', 'values': []},
+        {'product': []},
+        {'product': [{'field': 'a', 'range': {'start': 0, 'stop': MAX_SWEEP_SIZE, 'step': 1}},
+                     {'field': 'b', 'values': [1, 2]}]},
+        {'seed': [1, 2]},
+        {'field': 'a', 'values': list(range(MAX_SWEEP_SIZE + 1))},
+        {'zip': [{'field': 'a', 'values': list(range(MAX_SWEEP_SIZE + 1))},
+                 {'field': 'b', 'range': {'start': 0, 'stop': MAX_SWEEP_SIZE, 'step': 1}}]},
+    ])
+    def test_rejects_bad_specs(self, spec):
+        """Test malformed or oversized specs raise ValueError."""
+        with pytest.raises(ValueError):
+            expand_sweep(spec)
+
+
+def _input(input_id, input_type, **kwargs):
+    return InputConfig(id=input_id, section='basic', type=input_type, label=input_id,
+                       description='', required=False, **kwargs)
+
+
+class FakeClient:
+    def __init__(self, reject=()):
+        self.reject = set(reject)
+        self.prompts = []
+
+    def queue_prompt(self, prompt, client_id=None):
+        if prompt['cfg'] in self.reject:
+            raise ComfyUIError('ComfyUI error: rejected')
+        self.prompts.append((prompt, client_id))
+        return f"p-{prompt['seed']}-{prompt['cfg']}"
+
+
+class FakeMonitor:
+    client_id = 'monitor-client'
+
+    def __init__(self, client):
+        self.client = client
+        self.states = {}
+
+    def queue_prompt(self, prompt):
+        prompt_id = self.client.queue_prompt(prompt, client_id=self.client_id)
+        self.track(prompt_id)
+        return prompt_id
+
+    def track(self, prompt_id):
+        self.states[prompt_id] = {'status': 'pending', 'value': 0, 'max': 0}
+
+    def status(self, prompt_id):
+        return self.states.get(prompt_id)
+
+
+class FakeAdapter:
+    loads = 0
+
+    def __init__(self, workflow_id, wrapper_path):
+        FakeAdapter.loads += 1
+
+    def generate(self, inputs):
+        return dict(inputs)
+
+
+@pytest.fixture
+def batch_env(monkeypatch):
+    config = SimpleNamespace(
+        inputs=[
+            _input('input_image', 'image'),
+            _input('cfg', 'slider', min=1, max=10),
+            _input('seed', 'slider')
+        ],
+        time_estimate={'min': 60}
+    )
+    uploads = []
+    client = FakeClient()
+    env = SimpleNamespace(client=client, monitor=FakeMonitor(client), uploads=uploads)
+    monkeypatch.setattr(create.WorkflowLoader, 'load_workflow', lambda workflow_id: config)
+    monkeypatch.setattr(create, '_upload_images_to_remote',
+                        lambda images, host, port: uploads.append(list(images)) or [f'img{i}.png' for i in range(len(images))])
+    monkeypatch.setattr(create, '_save_thumbnail', lambda image: 'thumb.jpg')
+    monkeypatch.setattr(create, 'get_execution_monitor', lambda host, port: env.monitor)
+    monkeypatch.setattr(create.WorkflowHistory, 'save_history_record', lambda **kwargs: 'record')
+    monkeypatch.setattr('app.create.interpreter_adapter.InterpreterAdapter', FakeAdapter)
+    FakeAdapter.loads = 0
+
+    app = Flask(__name__)
+    app.register_blueprint(create.bp)
+    env.web = app.test_client()
+    return env
+
+
+def _post(env, sweep, inputs=None):
+    return env.web.post('/create/execute-batch', json={
+        'ssh_connection': 'ssh -p 2222 root@10.0.0.1',
+        'workflow_id': 'wf',
+        'inputs': inputs if inputs is not None else {'input_image': IMAGE, 'cfg': 3},
+        'sweep': sweep
+    })
+
+
+class TestExecuteBatch:
+    """Test the batch endpoint end to end with the remote side faked."""
+
+    def test_sweep_queues_every_run(self, batch_env):
+        """Test one upload, one template load and one prompt per run, tracked as a batch."""
+        sweep = {'product': [
+            {'field': 'cfg', 'values': [3, 4]},
+            {'field': 'seed', 'range': {'start': 1, 'stop': 3}}
+        ]}
+
+        response = _post(batch_env, sweep)
+        data = response.get_json()
+
+        assert response.status_code == 200 and data['success']
+        assert data['queued'] == 6 and data['failed'] == 0
+        assert batch_env.uploads == [[IMAGE]]
+        assert FakeAdapter.loads == 1
+        prompts = [p for p, _ in batch_env.client.prompts]
+        assert all(p['input_image'] == 'img0.png' for p in prompts)
+        assert sorted((p['cfg'], p['seed']) for p in prompts) == [(c, s) for c in (3, 4) for s in (1, 2, 3)]
+        assert {client_id for _, client_id in batch_env.client.prompts} == {'monitor-client'}
+
+        batch_env.monitor.states['p-1-3'] = {'status': 'success', 'value': 0, 'max': 0}
+        batch_env.monitor.states['p-2-3'] = {'status': 'running', 'value': 5, 'max': 10}
+        status = batch_env.web.get(f"/create/batch/{data['batch_id']}").get_json()
+
+        assert status['total'] == 6
+        assert status['counts'] == {'success': 1, 'running': 1, 'pending': 4}
+        assert status['progress'] == pytest.approx(1.5 / 6)
+        assert not status['complete']
+
+    def test_partial_submission_failure(self, batch_env):
+        """Test runs ComfyUI rejects are reported without failing the batch."""
+        batch_env.client.reject = {4}
+
+        data = _post(batch_env, {'field': 'cfg', 'values': [3, 4]}, {'seed': 1}).get_json()
+
+        assert data['queued'] == 1 and data['failed'] == 1
+        assert data['runs'][1]['prompt_id'] is None and 'rejected' in data['runs'][1]['error']
+        status = batch_env.web.get(f"/create/batch/{data['batch_id']}").get_json()
+        assert status['counts'] == {'pending': 1, 'submit_failed': 1}
+
+    def test_validation_reports_failing_run(self, batch_env):
+        """Test a swept value out of range is rejected with its run index, before anything is sent."""
+        response = _post(batch_env, {'field': 'cfg', 'values': [3, 20]})
+        data = response.get_json()
+
+        assert response.status_code == 400
+        assert data['errors'] == [{'field': 'cfg', 'message': 'cfg must be at most 10', 'run': 1}]
+        assert batch_env.uploads == [] and batch_env.client.prompts == []
+
+    def test_unknown_field_and_bad_spec(self, batch_env):
+        """Test sweeping a field the workflow doesn't have, or a malformed spec, is a 400."""
+        assert _post(batch_env, {'field': 'nope', 'values': [1]}).status_code == 400
+        assert _post(batch_env, {'zip': 'seed'}).status_code == 400
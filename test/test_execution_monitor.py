@@ -0,0 +1,239 @@
+"""
+Tests for the ComfyUI execution monitor
+"""
+
+import json
+import queue
+import time
+
+import pytest
+
+from app.create.comfyui_client import ComfyUIError
+from app.create.execution_monitor import ExecutionMonitor
+
+
+class FakeSocket:
+    """Replays queued messages; raises when told to drop."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.closed = False
+
+    def receive(self, timeout=None):
+        try:
+            message = self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if isinstance(message, Exception):
+            raise message
+        return message
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    host = 'host'
+
+    def __init__(self, history=None):
+        self.history = history or {}
+        self.urls = []
+
+    def websocket_url(self, client_id):
+        self.urls.append(client_id)
+        return f'ws://fake/ws?clientId={client_id}'
+
+    def get_history(self, prompt_id=None, max_items=None):
+        return {prompt_id: self.history[prompt_id]} if prompt_id in self.history else {}
+
+
+class RacingClient(FakeClient):
+    """Pushes a cached prompt's events onto the socket before /prompt returns."""
+
+    def __init__(self, messages, assigned_id=None, reject=False):
+        super().__init__()
+        self.messages = messages
+        self.assigned_id = assigned_id
+        self.reject = reject
+        self.posted = []
+
+    def queue_prompt(self, prompt, client_id=None, prompt_id=None):
+        self.posted.append((client_id, prompt_id))
+        if self.reject:
+            raise ComfyUIError('ComfyUI error: invalid prompt')
+        prompt_id = self.assigned_id or prompt_id
+        self.messages.put(_event('execution_cached', prompt_id=prompt_id, nodes=['1', '2']))
+        self.messages.put(_event('execution_success', prompt_id=prompt_id))
+        self.history[prompt_id] = {'status': {'status_str': 'success', 'completed': True}, 'outputs': {}}
+        # Let the subscriber see the events before the response arrives
+        time.sleep(0.2)
+        return prompt_id
+
+
+def _event(kind, **data):
+    return json.dumps({'type': kind, 'data': data})
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestExecutionMonitor:
+    """Test event handling, relay and reconnect."""
+
+    def test_relays_progress_and_completion(self):
+        """Test node progress is relayed and the subscriber stops after completion."""
+        messages = queue.Queue()
+        emitted = []
+        monitor = ExecutionMonitor(
+            FakeClient(),
+            emit=lambda event, payload, room: emitted.append((event, payload, room)),
+            connect=lambda url: FakeSocket(messages)
+        )
+        for message in [
+            _event('status', status={}),
+            _event('execution_start', prompt_id='p1'),
+            _event('execution_cached', prompt_id='p1', nodes=['1', '2']),
+            _event('executing', prompt_id='p1', node='3'),
+            _event('progress', prompt_id='p1', node='3', value=5, max=20),
+            _event('progress', prompt_id='other', node='3', value=1, max=20),
+            _event('executed', prompt_id='p1', node='9', output={'images': [{'filename': 'a.png'}]}),
+            _event('executing', prompt_id='p1', node='9'),
+            _event('execution_success', prompt_id='p1'),
+        ]:
+            messages.put(message)
+
+        monitor.track('p1')
+
+        assert _wait_for(lambda: monitor._thread is None)
+        events = [e for e, _, _ in emitted]
+        assert events == [
+            'execution_node', 'execution_node', 'execution_progress',
+            'execution_output', 'execution_node', 'execution_complete'
+        ]
+        assert all(room == 'p1' for _, _, room in emitted)
+        progress = emitted[2][1]
+        assert (progress['node'], progress['value'], progress['max']) == ('3', 5, 20)
+        assert emitted[3][1]['output']['images'][0]['filename'] == 'a.png'
+        state = monitor.status('p1')
+        assert state['status'] == 'success' and state['nodes_done'] == 3
+
+    def test_error_event_carries_node_details(self):
+        """Test execution_error marks the prompt failed with the failing node."""
+        messages = queue.Queue()
+        emitted = []
+        monitor = ExecutionMonitor(
+            FakeClient(),
+            emit=lambda event, payload, room: emitted.append((event, payload)),
+            connect=lambda url: FakeSocket(messages)
+        )
+        messages.put(_event(
+            'execution_error', prompt_id='p1', node_id='4', node_type='VAEDecode', exception_message='OOM'
+        ))
+
+        monitor.track('p1')
+
+        assert _wait_for(lambda: monitor._thread is None)
+        event, payload = emitted[-1]
+        assert event == 'execution_complete'
+        assert payload['status'] == 'failed'
+        assert payload['error'] == {'node': '4', 'node_type': 'VAEDecode', 'message': 'OOM'}
+
+    def test_reconnect_resumes_from_history(self, monkeypatch):
+        """Test a dropped socket reconnects with the same client_id and settles finished prompts."""
+        monkeypatch.setattr('app.create.execution_monitor.RECONNECT_DELAY', 0.01)
+        client = FakeClient()
+        first = queue.Queue()
+        first.put(_event('executing', prompt_id='p1', node='3'))
+        first.put(ConnectionError('dropped'))
+        sockets = [FakeSocket(first), FakeSocket(queue.Queue())]
+        emitted = []
+
+        def connect(url):
+            if len(sockets) == 1:
+                # Finished while the socket was down
+                client.history['p1'] = {
+                    'status': {'status_str': 'success', 'completed': True},
+                    'outputs': {'9': {'images': [{'filename': 'a.png'}]}}
+                }
+            return sockets.pop(0)
+
+        monitor = ExecutionMonitor(client, emit=lambda e, p, r: emitted.append((e, p)), connect=connect)
+        monitor.track('p1')
+
+        assert _wait_for(lambda: monitor._thread is None)
+        assert len(client.urls) == 2 and client.urls[0] == client.urls[1] == monitor.client_id
+        event, payload = emitted[-1]
+        assert event == 'execution_complete' and payload['status'] == 'success'
+        assert payload['outputs']['9']['images'][0]['filename'] == 'a.png'
+
+    def _connected_monitor(self, client, messages, completed):
+        """A monitor whose socket is already open, following an unrelated prompt."""
+        monitor = ExecutionMonitor(
+            client,
+            emit=lambda e, p, r: None,
+            connect=lambda url: FakeSocket(messages),
+            on_complete=lambda c, prompt_id, payload: completed.append((prompt_id, payload['status']))
+        )
+        monitor.track('busy')
+        assert _wait_for(lambda: client.urls)
+        return monitor
+
+    def test_queue_prompt_tracks_before_posting(self):
+        """Test a cached prompt that finishes before /prompt returns is still settled."""
+        messages = queue.Queue()
+        completed = []
+        client = RacingClient(messages)
+        monitor = self._connected_monitor(client, messages, completed)
+
+        prompt_id = monitor.queue_prompt({'1': {}})
+
+        assert client.posted == [(monitor.client_id, prompt_id)]
+        assert _wait_for(lambda: completed)
+        assert completed == [(prompt_id, 'success')]
+        assert monitor.status(prompt_id)['nodes_done'] == 2
+        monitor.stop()
+
+    def test_queue_prompt_with_assigned_id_checks_history(self):
+        """Test a ComfyUI that ignores our prompt_id is settled from history."""
+        messages = queue.Queue()
+        completed = []
+        client = RacingClient(messages, assigned_id='theirs')
+        monitor = self._connected_monitor(client, messages, completed)
+
+        assert monitor.queue_prompt({'1': {}}) == 'theirs'
+
+        assert _wait_for(lambda: completed)
+        assert completed == [('theirs', 'success')]
+        assert monitor.status(client.posted[0][1]) is None
+        monitor.stop()
+
+    def test_rejected_prompt_is_not_tracked(self):
+        """Test a prompt ComfyUI refuses doesn't stay pending."""
+        client = RacingClient(queue.Queue(), reject=True)
+        monitor = ExecutionMonitor(client, emit=lambda e, p, r: None, connect=lambda url: FakeSocket(queue.Queue()))
+
+        with pytest.raises(ComfyUIError):
+            monitor.queue_prompt({'1': {}})
+
+        assert monitor.status(client.posted[0][1]) is None
+        assert _wait_for(lambda: monitor._thread is None)
+
+    def test_finished_prompts_expire(self, monkeypatch):
+        """Test finished prompts are dropped after the TTL; pending ones are kept."""
+        from app.create import execution_monitor
+
+        monitor = ExecutionMonitor(FakeClient(), emit=lambda e, p, r: None, connect=lambda url: FakeSocket(queue.Queue()))
+        monitor._prompts['done'] = {'prompt_id': 'done', 'status': 'success', 'updated': time.time() - 10}
+        monitor._prompts['waiting'] = {'prompt_id': 'waiting', 'status': 'pending', 'updated': time.time() - 10}
+
+        assert monitor.status('done')['status'] == 'success'
+
+        monkeypatch.setattr(execution_monitor, 'FINISHED_PROMPT_TTL', 5)
+        assert monitor.status('done') is None
+        assert monitor.status('waiting')['status'] == 'pending'
@@ -0,0 +1,178 @@
+"""
+Tests for content hashing and transfer verification
+"""
+
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from app.sync.models import FileStat
+from app.sync.transport.ssh_rsync import SSHRsyncAdapter
+from app.sync.engine import hash_pipeline as hash_module
+from app.sync.engine.sync_engine import SyncEngine
+
+from conftest import FakeTransport, sync_config
+
+
+@pytest.fixture
+def hash_pipeline(monkeypatch):
+    pipeline = hash_module.HashPipeline(max_workers=1)
+    monkeypatch.setattr(hash_module, '_hash_pipeline', pipeline)
+    yield pipeline
+    pipeline.shutdown()
+
+
+class LocalRunPool:
+    """Runs 'remote' commands with the local shell instead of ssh."""
+
+    async def run_async(self, host, port, command, user='root', input=None, identity_file=None, options=None):
+        proc = await asyncio.create_subprocess_exec(
+            'sh', '-c', command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await proc.communicate(input)
+        return proc.returncode, stdout, stderr
+
+
+def _copying_transport(contents, corrupt=()):
+    """FakeTransport whose 'source' holds `contents`, written into dest on transfer."""
+    files = [FileStat(path=f'/src/{name}', size=len(data), mtime=100.0) for name, data in contents.items()]
+    return FakeTransport(files, contents=contents, corrupt=corrupt)
+
+
+class TestHashFile:
+    """Test local digests match BLAKE2b (and b2sum) on both read paths."""
+
+    def test_buffered_and_mmap_reads(self):
+        """Test small files and files above the mmap threshold hash identically to hashlib."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name, size in [('empty', 0), ('small', 1000), ('large', hash_module.MMAP_THRESHOLD + 7)]:
+                path = os.path.join(tmpdir, name)
+                data = os.urandom(size)
+                with open(path, 'wb') as f:
+                    f.write(data)
+                assert hash_module.hash_file(path) == hashlib.blake2b(data).hexdigest()
+
+    @pytest.mark.skipif(shutil.which('b2sum') is None, reason="b2sum not installed")
+    def test_remote_digests_match_local(self):
+        """Test the batched remote command parses b2sum output per relative path."""
+        adapter = SSHRsyncAdapter('host', 22)
+        adapter.pool = LocalRunPool()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.makedirs(os.path.join(tmpdir, 'sub dir'))
+            names = ['a.png', 'sub dir/b c.png']
+            for name in names:
+                with open(os.path.join(tmpdir, name), 'wb') as f:
+                    f.write(os.urandom(2048))
+
+            digests = asyncio.run(adapter.hash_files(tmpdir, names + ['missing.png']))
+
+            assert set(digests) == set(names)
+            for name in names:
+                assert digests[name] == hash_module.hash_file(os.path.join(tmpdir, name))
+
+
+class TestTransferVerification:
+    """Test the sync engine's optional hashing stage."""
+
+    def _config(self, **fields):
+        config = sync_config(workers=2)
+        config.generate_xmp = False
+        config.calculate_hashes = True
+        for key, value in fields.items():
+            setattr(config, key, value)
+        return config
+
+    def test_mismatch_is_removed_and_resent(self, hash_pipeline):
+        """Test a corrupt copy is deleted and kept out of the manifest; good ones get checksums."""
+        contents = {f'img{i}.png': os.urandom(512) for i in range(4)}
+        transport = _copying_transport(contents, corrupt={'img2.png'})
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dest = os.path.join(tmpdir, 'dst')
+            os.makedirs(dest)
+            engine = SyncEngine(transport, os.path.join(tmpdir, 'manifest.db'))
+
+            result = asyncio.run(engine.sync_folder('/src', dest, self._config()))
+
+            assert not result.success
+            assert result.files_transferred == 3
+            assert 'failed verification' in result.errors[0]
+            assert not os.path.exists(os.path.join(dest, 'img2.png'))
+            assert '/src/img2.png' not in engine.manifest.manifest
+            for name in ['img0.png', 'img1.png', 'img3.png']:
+                entry = engine.manifest.get_entry(f'/src/{name}')
+                assert entry.checksum == hashlib.blake2b(contents[name]).hexdigest()
+
+            # The next sync re-sends only the rejected file
+            transport.corrupt = set()
+            transport.batches = []
+            result = asyncio.run(engine.sync_folder('/src', dest, self._config()))
+
+            assert result.success
+            assert transport.batches == [['img2.png']]
+
+    def test_rejection_with_unlisted_received_path(self, hash_pipeline):
+        """Test a received path the listing didn't include doesn't break rejection."""
+        contents = {'a.png': os.urandom(64), 'b.png': os.urandom(64)}
+
+        transport = _copying_transport(contents, corrupt={'a.png'})
+        original = transport.transfer_files
+
+        async def extra_received(*args, **kwargs):
+            result = await original(*args, **kwargs)
+            result.received.append('unlisted.png')
+            return result
+
+        transport.transfer_files = extra_received
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = SyncEngine(transport, os.path.join(tmpdir, 'manifest.db'))
+
+            result = asyncio.run(engine.sync_folder('/src', tmpdir, self._config()))
+
+            assert not result.success
+            assert result.files_transferred == 1
+            assert 'failed verification' in result.errors[0]
+
+    def test_unverified_without_verify_transfers(self, hash_pipeline):
+        """Test hashing alone stores local digests without asking the source."""
+        contents = {'a.png': b'aaa'}
+        transport = _copying_transport(contents, corrupt={'a.png'})
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = SyncEngine(transport, os.path.join(tmpdir, 'manifest.db'))
+
+            result = asyncio.run(engine.sync_folder('/src', tmpdir, self._config(verify_transfers=False)))
+
+            assert result.success
+            assert transport.hashed == []
+            assert engine.manifest.get_entry('/src/a.png').checksum == hashlib.blake2b(b'aa?').hexdigest()
+
+    def test_cached_checksums_follow_size_and_mtime(self):
+        """Test stored checksums are reused only while size and mtime are unchanged."""
+        stat = FileStat(path='/src/a.png', size=3, mtime=100.0)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = SyncEngine(FakeTransport([]), os.path.join(tmpdir, 'manifest.db'))
+            engine.manifest.update_many([stat])
+            engine.manifest.set_checksums({'/src/a.png': 'abc'})
+
+            assert engine.manifest.cached_checksums([stat]) == {'/src/a.png': 'abc'}
+            assert engine.manifest.cached_checksums([FileStat(path='/src/a.png', size=3, mtime=101.0)]) == {}
+
+            # Unchanged files skip hashing entirely
+            checksums, rejected = asyncio.run(engine._hash_transferred(
+                '/src', tmpdir, [stat], sync_config(), None
+            ))
+            assert (checksums, rejected) == ({}, set())
+
+            engine.manifest.update_many([FileStat(path='/src/a.png', size=4, mtime=100.0)])
+            assert engine.manifest.get_entry('/src/a.png').checksum is None
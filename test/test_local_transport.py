@@ -0,0 +1,105 @@
+"""
+Tests for the local-filesystem transport adapter
+"""
+
+import asyncio
+import os
+import tempfile
+
+from app.sync.transport.local import LocalTransportAdapter
+from app.sync.engine.sync_engine import SyncEngine
+
+from conftest import sync_config
+
+
+def _write(path, data=b'x', mtime=1000.0):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    os.utime(path, (mtime, mtime))
+
+
+class TestLocalTransport:
+    """Test the adapter against temporary directories."""
+
+    def test_sync_folder_end_to_end(self):
+        """Test the engine syncs a local tree and only sends changes the second time."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            src, dst = os.path.join(tmpdir, 'src'), os.path.join(tmpdir, 'dst')
+            for i in range(5):
+                _write(os.path.join(src, f'day{i % 2}', f'img{i}.png'), b'data' * (i + 1))
+            engine = SyncEngine(LocalTransportAdapter(), os.path.join(tmpdir, 'manifest.db'))
+            config = sync_config(workers=2)
+            config.generate_xmp = False
+
+            first = asyncio.run(engine.sync_folder(src, dst, config))
+            _write(os.path.join(src, 'day0', 'img0.png'), b'changed', mtime=2000.0)
+            second = asyncio.run(engine.sync_folder(src, dst, config))
+
+            assert first.success and first.files_transferred == 5
+            assert second.success and second.files_transferred == 1
+            with open(os.path.join(dst, 'day0', 'img0.png'), 'rb') as f:
+                assert f.read() == b'changed'
+            assert os.path.getmtime(os.path.join(dst, 'day1', 'img1.png')) == 1000.0
+
+    def test_transfer_files_skips_current(self):
+        """Test files already current count as transferred but not received."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            src, dst = os.path.join(tmpdir, 'src'), os.path.join(tmpdir, 'dst')
+            _write(os.path.join(src, 'a.png'))
+            _write(os.path.join(src, 'b.png'))
+            _write(os.path.join(dst, 'a.png'))
+            transport = LocalTransportAdapter()
+
+            result = asyncio.run(transport.transfer_files(src, dst, ['a.png', 'b.png', 'missing.png']))
+
+            assert result.transferred == ['a.png', 'b.png']
+            assert result.received == ['b.png']
+            assert result.failed == ['missing.png']
+            assert not result.success
+            assert not os.path.exists(os.path.join(dst, 'missing.png.partial'))
+
+    def test_listing_tree_and_deletes(self):
+        """Test incremental listing, tree description and batched deletes."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _write(os.path.join(tmpdir, 'out', 'day1', 'old.png'), b'12', mtime=100.0)
+            _write(os.path.join(tmpdir, 'out', 'day1', 'new.png'), b'3456', mtime=200.0)
+            _write(os.path.join(tmpdir, 'out', 'top.png'), b'7', mtime=200.0)
+            transport = LocalTransportAdapter()
+
+            recent = asyncio.run(transport.list_files_since(os.path.join(tmpdir, 'out'), 150.0))
+            tree = asyncio.run(transport.get_remote_tree(tmpdir, ['out', 'absent']))
+            deleted = asyncio.run(transport.delete_files([
+                os.path.join(tmpdir, 'out', 'top.png'),
+                os.path.join(tmpdir, 'out', 'gone.png')
+            ]))
+
+            assert sorted(os.path.basename(f.path) for f in recent) == ['new.png', 'top.png']
+            assert [(s.name, s.files, s.bytes) for s in tree.subdirs] == [('', 1, 1), ('day1', 2, 6)]
+            assert tree.missing_folders == ['absent']
+            assert len(deleted.deleted) == 2 and not deleted.failed
+            assert not os.path.exists(os.path.join(tmpdir, 'out', 'top.png'))
+
+    def test_watch_reports_new_files_only(self):
+        """Test the polling watch ignores existing files and reports settled new ones."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _write(os.path.join(tmpdir, 'old.png'))
+            transport = LocalTransportAdapter()
+            modes = []
+
+            async def run():
+                feed = transport.watch_files([tmpdir], poll_interval=0.05, settle_seconds=0, on_mode=modes.append)
+                try:
+                    first = asyncio.ensure_future(feed.__anext__())
+                    while not modes:
+                        await asyncio.sleep(0.01)
+                    _write(os.path.join(tmpdir, 'new.png'), b'12345')
+                    return await asyncio.wait_for(first, 5)
+                finally:
+                    await feed.aclose()
+
+            stat = asyncio.run(run())
+
+            assert modes == ['poll']
+            assert stat.path == os.path.join(tmpdir, 'new.png')
+            assert stat.size == 5
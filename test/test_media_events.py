@@ -0,0 +1,153 @@
+"""
+Tests for batched media event delivery
+"""
+
+import asyncio
+from datetime import datetime
+
+from app.sync.models import MediaEvent, MediaEventData
+from app.sync.ingest import MediaEventManager
+
+
+def _event(i, event_type=MediaEvent.FILE_SYNCED):
+    return MediaEventData(
+        event_type=event_type,
+        timestamp=datetime.now(),
+        sync_id='sync_1',
+        file_path=f'/media/img{i}.png',
+        file_size=i
+    )
+
+
+class RecordingSubscriber:
+    """Ingest subscriber that records deliveries, optionally blocking."""
+
+    def __init__(self, gate=None, fail=False):
+        self.batches = []
+        self.files = []
+        self.completed = []
+        self.gate = gate
+        self.fail = fail
+
+    async def on_file_synced(self, event):
+        self.files.append(event.file_path)
+        return True
+
+    async def on_batch_synced(self, events):
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.fail:
+            raise RuntimeError("indexer down")
+        self.batches.append([e.file_path for e in events])
+        return len(events)
+
+    async def on_sync_complete(self, sync_id, summary):
+        self.completed.append((sync_id, summary))
+        return True
+
+    async def verify_file_exists(self, file_path):
+        return False
+
+
+class TestMediaEventManager:
+    """Test queued, coalesced delivery."""
+
+    def test_batches_respect_max_size(self):
+        """Test queued file events are coalesced up to max_batch_size and flushed early."""
+        subscriber = RecordingSubscriber()
+
+        async def scenario():
+            manager = MediaEventManager(max_batch_size=3, max_latency=5.0)
+            manager.subscribe(MediaEvent.BATCH_SYNCED, subscriber)
+            for i in range(7):
+                await manager.emit(_event(i))
+            await manager.flush()
+            await manager.close()
+
+        asyncio.run(asyncio.wait_for(scenario(), 5))
+
+        assert [len(b) for b in subscriber.batches] == [3, 3, 1]
+        assert [p for b in subscriber.batches for p in b] == [f'/media/img{i}.png' for i in range(7)]
+
+    def test_partial_batch_flushes_after_max_latency(self):
+        """Test a lone event is delivered once the latency bound passes."""
+        subscriber = RecordingSubscriber()
+
+        async def scenario():
+            manager = MediaEventManager(max_batch_size=100, max_latency=0.05)
+            manager.subscribe(MediaEvent.BATCH_SYNCED, subscriber)
+            await manager.emit(_event(0))
+            assert subscriber.batches == []
+            await asyncio.sleep(0.3)
+            delivered = list(subscriber.batches)
+            await manager.close()
+            return delivered
+
+        assert asyncio.run(scenario()) == [['/media/img0.png']]
+
+    def test_full_queue_applies_backpressure(self):
+        """Test a stalled subscriber bounds the queue and blocks the producer."""
+
+        async def scenario():
+            gate = asyncio.Event()
+            subscriber = RecordingSubscriber(gate=gate)
+            manager = MediaEventManager(queue_size=2, max_batch_size=1, max_latency=0)
+            manager.subscribe(MediaEvent.BATCH_SYNCED, subscriber)
+
+            async def produce():
+                for i in range(6):
+                    await manager.emit(_event(i))
+
+            producer = asyncio.create_task(produce())
+            await asyncio.sleep(0.1)
+
+            assert not producer.done()
+            assert manager.get_queue_stats()[0]['queued'] <= 2
+
+            gate.set()
+            await asyncio.wait_for(producer, 2)
+            await manager.flush()
+            await manager.close()
+            return subscriber
+
+        subscriber = asyncio.run(scenario())
+        assert len(subscriber.batches) == 6
+
+    def test_failing_subscriber_is_isolated(self):
+        """Test one failing subscriber doesn't stop delivery to others."""
+        good, bad = RecordingSubscriber(), RecordingSubscriber(fail=True)
+        file_subscriber = RecordingSubscriber()
+
+        async def scenario():
+            manager = MediaEventManager(max_latency=0)
+            manager.subscribe(MediaEvent.BATCH_SYNCED, bad)
+            manager.subscribe(MediaEvent.BATCH_SYNCED, good)
+            manager.subscribe(MediaEvent.FILE_SYNCED, file_subscriber)
+            for i in range(3):
+                await manager.emit(_event(i))
+            await manager.flush()
+            stats = manager.get_queue_stats()
+            await manager.close()
+            return stats
+
+        stats = asyncio.run(scenario())
+
+        assert sum(len(b) for b in good.batches) == 3
+        assert file_subscriber.files == [f'/media/img{i}.png' for i in range(3)]
+        failed = sorted(s['failed'] for s in stats if s['event_type'] == 'batch_synced')
+        assert failed == [0, 3]
+
+    def test_sync_complete_is_delivered_directly(self):
+        """Test non-file events bypass the queues."""
+        subscriber = RecordingSubscriber()
+
+        async def scenario():
+            manager = MediaEventManager()
+            manager.subscribe(MediaEvent.SYNC_COMPLETE, subscriber)
+            complete = _event(0, MediaEvent.SYNC_COMPLETE)
+            complete.metadata = {'files_transferred': 1}
+            await manager.emit(complete)
+
+        asyncio.run(scenario())
+
+        assert subscriber.completed == [('sync_1', {'files_transferred': 1})]
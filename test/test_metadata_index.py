@@ -0,0 +1,212 @@
+"""
+Tests for the generation-metadata search index
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+
+from flask import Flask
+from PIL import Image, PngImagePlugin
+
+from app.sync.models import SyncConfig, FileStat, MediaEvent
+from app.sync.ingest import MediaEventManager, MetadataIndex, MetadataIndexIngest
+from app.sync.ingest import metadata_index as index_module
+from app.sync.ingest.metadata_index import parse_forge_parameters, parse_comfyui_metadata
+from app.sync.engine.sync_engine import SyncEngine
+
+from conftest import FakeTransport, png_bytes
+
+
+FORGE_PARAMETERS = (
+    "a castle on a hill, <lora:detail_slider:0.8>, golden hour\n"
+    "Negative prompt: blurry, lowres\n"
+    "Steps: 30, Sampler: DPM++ 2M, Schedule type: Karras, CFG scale: 7, Seed: 1234, "
+    "Size: 832x1216, Model hash: abc123, Model: juggernautXL_v9, "
+    "Lora hashes: \"detail_slider: 1a2b, film_grain: 3c4d\", Version: f2.0"
+)
+
+
+def _comfy_graph(seed, text):
+    return {
+        "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "flux_dev.safetensors"}},
+        "10": {"class_type": "LoraLoader", "inputs": {"lora_name": "anime_style.safetensors", "model": ["4", 0]}},
+        "6": {"class_type": "CLIPTextEncode", "inputs": {"text": text, "clip": ["4", 1]}},
+        "7": {"class_type": "CLIPTextEncode", "inputs": {"text": "ugly", "clip": ["4", 1]}},
+        "3": {"class_type": "KSampler", "inputs": {
+            "seed": seed, "sampler_name": "euler", "model": ["10", 0],
+            "positive": ["6", 0], "negative": ["7", 0]
+        }}
+    }
+
+
+def _png(path, **texts):
+    info = PngImagePlugin.PngInfo()
+    for key, value in texts.items():
+        info.add_text(key, value)
+    Image.new('RGB', (4, 4)).save(path, pnginfo=info)
+    stat = os.stat(path)
+    return path, stat.st_size, stat.st_mtime
+
+
+class TestMetadataParsing:
+    """Test parsing of Forge and ComfyUI metadata."""
+
+    def test_forge_parameters(self):
+        """Test prompt, negative and settings are split out."""
+        parsed = parse_forge_parameters(FORGE_PARAMETERS)
+
+        assert parsed['prompt'].startswith('a castle on a hill')
+        assert parsed['negative'] == 'blurry, lowres'
+        assert parsed['seed'] == 1234
+        assert parsed['sampler'] == 'DPM++ 2M'
+        assert parsed['model'] == 'juggernautXL_v9'
+        assert parsed['loras'] == ['detail_slider', 'film_grain']
+
+    def test_comfyui_prompt_graph(self):
+        """Test sampler inputs are traced back to their text encoders."""
+        parsed = parse_comfyui_metadata(json.dumps(_comfy_graph(7, 'a red fox')), None)
+
+        assert parsed['prompt'] == 'a red fox'
+        assert parsed['negative'] == 'ugly'
+        assert parsed['seed'] == 7
+        assert parsed['sampler'] == 'euler'
+        assert parsed['model'] == 'flux_dev.safetensors'
+        assert parsed['loras'] == ['anime_style.safetensors']
+
+    def test_workflow_hash_ignores_widget_values(self):
+        """Test renders of one graph share a hash; a different graph doesn't."""
+        a = parse_comfyui_metadata(json.dumps(_comfy_graph(1, 'cat')), None)
+        b = parse_comfyui_metadata(json.dumps(_comfy_graph(2, 'dog')), None)
+        other = _comfy_graph(1, 'cat')
+        del other["10"]
+        c = parse_comfyui_metadata(json.dumps(other), None)
+
+        assert a['workflow_hash'] == b['workflow_hash']
+        assert a['workflow_hash'] != c['workflow_hash']
+
+
+class TestMetadataIndex:
+    """Test indexing and search."""
+
+    def test_search_ranking_filters_and_pages(self):
+        """Test FTS ranking, structured filters and pagination."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = MetadataIndex(os.path.join(tmpdir, 'index.db'))
+            files = [
+                _png(os.path.join(tmpdir, 'forge.png'), parameters=FORGE_PARAMETERS),
+                _png(os.path.join(tmpdir, 'comfy.png'),
+                     prompt=json.dumps(_comfy_graph(99, 'a castle in the snow'))),
+                _png(os.path.join(tmpdir, 'plain.png')),
+            ]
+            assert index.index_files(files) == 3
+
+            result = index.search('castle')
+            assert result['total'] == 2
+            assert {r['path'] for r in result['results']} == {files[0][0], files[1][0]}
+
+            assert index.search('cast')['total'] == 2  # last term is a prefix
+            assert index.search('castle snow')['total'] == 1
+            assert index.search('juggernaut')['results'][0]['seed'] == 1234
+            assert index.search('detail_slider')['results'][0]['loras'] == ['detail_slider', 'film_grain']
+            assert index.search(seed=99)['results'][0]['sampler'] == 'euler'
+            assert index.search(sampler='dpm++ 2m')['total'] == 1
+            assert index.search(model='flux')['total'] == 1
+            assert index.search('"unbalanced (quote')['total'] == 0
+
+            page = index.search(per_page=2, page=2)
+            assert page['total'] == 3
+            assert len(page['results']) == 1
+            index.close()
+
+    def test_incremental_reindex(self):
+        """Test unchanged files are skipped and changed ones refreshed."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = MetadataIndex(os.path.join(tmpdir, 'index.db'))
+            path, size, mtime = _png(os.path.join(tmpdir, 'a.png'), parameters='first prompt')
+
+            assert index.index_files([(path, size, mtime)]) == 1
+            assert index.index_files([(path, size, mtime)]) == 0
+
+            path, size, mtime = _png(path, parameters='second prompt entirely')
+            os.utime(path, (mtime + 10, mtime + 10))
+            assert index.index_files([(path, size, mtime + 10)]) == 1
+
+            assert index.search('first')['total'] == 0
+            assert index.search('second')['total'] == 1
+            assert index.remove([path]) == 1
+            assert index.search('second')['total'] == 0
+            index.close()
+
+
+class TestSyncIngest:
+    """Test sync batches feeding the index through the event manager."""
+
+    def test_transferred_batch_is_indexed(self, monkeypatch):
+        """Test per-file events reach the index as one coalesced batch."""
+        files = [FileStat(path=f'/src/img{i}.png', size=10, mtime=100.0 + i) for i in range(3)]
+        prompts = {f'img{i}.png': f'prompt number{i}' for i in range(3)}
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dest = os.path.join(tmpdir, 'dst')
+            os.makedirs(dest)
+            index = MetadataIndex(os.path.join(tmpdir, 'index.db'))
+            ingest = MetadataIndexIngest(index)
+            batches = []
+            original = ingest.on_batch_synced
+
+            async def recording(events):
+                batches.append(events)
+                return await original(events)
+
+            ingest.on_batch_synced = recording
+            events = MediaEventManager()
+            events.subscribe(MediaEvent.BATCH_SYNCED, ingest)
+
+            engine = SyncEngine(
+                FakeTransport(files, contents={rel: png_bytes(p) for rel, p in prompts.items()}),
+                os.path.join(tmpdir, 'manifest.db'),
+                event_manager=events,
+                sync_id='sync_1'
+            )
+            config = SyncConfig(source_type='forge', source_host='h', source_port=22,
+                                dest_path=dest, parallel_transfers=1, generate_xmp=False)
+            async def sync_and_drain():
+                await engine.sync_folder('/src', dest, config)
+                await events.flush()
+
+            asyncio.run(sync_and_drain())
+
+            assert len(batches) == 1
+            assert {e.sync_id for e in batches[0]} == {'sync_1'}
+            assert index.search('number1')['results'][0]['path'] == os.path.join(dest, 'img1.png')
+            assert index.get_stats() == {'total_files': 3, 'with_metadata': 3}
+            index.close()
+
+
+class TestSearchEndpoint:
+    """Test the /media/search route."""
+
+    def test_search_endpoint(self, monkeypatch):
+        """Test query parameters, pagination and validation."""
+        from app.api.media import bp
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = MetadataIndex(os.path.join(tmpdir, 'index.db'))
+            index.index_files([_png(os.path.join(tmpdir, 'a.png'), parameters=FORGE_PARAMETERS)])
+            monkeypatch.setattr(index_module, '_metadata_index', index)
+
+            app = Flask(__name__)
+            app.register_blueprint(bp)
+            client = app.test_client()
+
+            data = client.get('/media/search?q=castle&seed=1234&per_page=10').get_json()
+            assert data['success']
+            assert data['total'] == 1
+            assert data['per_page'] == 10
+            assert data['results'][0]['model'] == 'juggernautXL_v9'
+
+            assert client.get('/media/search?page=abc').status_code == 400
+            assert client.get('/media/search/stats').get_json()['total_files'] == 1
+            index.close()
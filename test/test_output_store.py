@@ -0,0 +1,138 @@
+"""
+Tests for retrieving and serving ComfyUI outputs
+"""
+
+import os
+import re
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from flask import Flask
+
+from app.api import create
+from app.create.comfyui_client import ComfyUIClient
+from app.create.output_store import OutputStore
+
+from test_comfyui_client import StubTunnel
+from test_execution_monitor import _wait_for
+
+VIDEO = os.urandom(3 * 1024 * 1024 + 17)
+
+
+class FakeView(BaseHTTPRequestHandler):
+    """Serves /view with Range support; can drop the first response halfway."""
+
+    drop_first = False
+    ranges = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        start = 0
+        match = re.match(r'bytes=(\d+)-', self.headers.get('Range', ''))
+        if match:
+            start = int(match.group(1))
+        FakeView.ranges.append(start)
+        body = VIDEO[start:]
+        self.send_response(206 if match else 200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', str(len(body)))
+        if match:
+            self.send_header('Content-Range', f'bytes {start}-{len(VIDEO) - 1}/{len(VIDEO)}')
+        self.end_headers()
+        if FakeView.drop_first:
+            FakeView.drop_first = False
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.connection.shutdown(2)
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def client():
+    FakeView.ranges = []
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), FakeView)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield ComfyUIClient('host', 22, tunnel=StubTunnel(httpd.server_address[1]))
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def store():
+    with tempfile.TemporaryDirectory() as root:
+        store = OutputStore(root)
+        yield store
+        store.shutdown()
+
+
+class TestOutputStore:
+    """Test retrieval into the content-addressed store."""
+
+    def test_completion_fetches_outputs(self, client, store):
+        """Test a successful completion downloads every output once, by content."""
+        outputs = {
+            '9': {'videos': [{'filename': 'clip.mp4', 'subfolder': 'v', 'type': 'output'}]},
+            '10': {'images': [{'filename': 'same.mp4', 'subfolder': '', 'type': 'output'}]}
+        }
+
+        store.on_complete(client, 'p1', {'status': 'failed', 'outputs': outputs})
+        store.on_complete(client, 'p1', {'status': 'success', 'outputs': outputs})
+
+        assert _wait_for(lambda: len(store.prompt_files('p1')) == 2)
+        clip, same = store.get('p1', 'clip.mp4', 'v'), store.get('p1', 'same.mp4')
+        assert clip.done.wait(10) and same.done.wait(10)
+        assert clip.state == same.state == 'complete'
+        assert clip.digest == same.digest and clip.path == same.path
+        with open(clip.path, 'rb') as f:
+            assert f.read() == VIDEO
+        assert os.listdir(store.partial_dir) == []
+        assert {r.filename for r in OutputStore(store.root).prompt_files('p1')} == {'clip.mp4', 'same.mp4'}
+
+    def test_resumes_after_dropped_connection(self, client, store):
+        """Test a broken transfer resumes with a Range request instead of starting over."""
+        FakeView.drop_first = True
+
+        record = store.fetch(client, 'p1', 'clip.mp4')
+
+        assert record.done.wait(10)
+        assert record.state == 'complete' and record.size == len(VIDEO)
+        assert FakeView.ranges[0] == 0 and FakeView.ranges[1] > 0
+        with open(record.path, 'rb') as f:
+            assert f.read() == VIDEO
+
+    def test_iter_file_streams_while_downloading(self, client, store):
+        """Test a reader started before the download finishes gets every byte."""
+        record = store.fetch(client, 'p1', 'clip.mp4')
+
+        assert b''.join(store.iter_file(record)) == VIDEO
+
+
+class TestServeOutput:
+    """Test the serving endpoint's caching and range support."""
+
+    def test_etag_and_range(self, client, store, monkeypatch):
+        """Test stored outputs are served with their digest as ETag and honour Range."""
+        monkeypatch.setattr(create, 'get_output_store', lambda: store)
+        app = Flask(__name__)
+        app.register_blueprint(create.bp)
+        record = store.fetch(client, 'p1', 'clip.mp4')
+        assert record.done.wait(10)
+        web = app.test_client()
+        url = '/create/outputs/p1/file?filename=clip.mp4'
+
+        full = web.get(url)
+        partial = web.get(url, headers={'Range': 'bytes=10-19'})
+        cached = web.get(url, headers={'If-None-Match': f'"{record.digest}"'})
+        missing = web.get('/create/outputs/p2/file?filename=clip.mp4')
+
+        assert full.status_code == 200 and full.data == VIDEO
+        assert full.headers['ETag'] == f'"{record.digest}"'
+        assert full.headers['Content-Type'] == 'video/mp4'
+        assert partial.status_code == 206 and partial.data == VIDEO[10:20]
+        assert cached.status_code == 304
+        assert missing.status_code == 404
@@ -0,0 +1,96 @@
+"""
+Tests for the chunk-walking PNG metadata reader
+"""
+
+import json
+import os
+import struct
+import tempfile
+import zlib
+
+import pytest
+from PIL import Image, PngImagePlugin
+
+from app.utils.png_metadata import read_png_text, read_generation_metadata
+from app.utils.xmp_tool import extract_prompt
+
+
+def _save_png(path, texts=(), size=(8, 8)):
+    info = PngImagePlugin.PngInfo()
+    for key, value, kwargs in texts:
+        info.add_text(key, value, **kwargs)
+    Image.new('RGB', size, color='blue').save(path, pnginfo=info)
+    return path
+
+
+def _chunk(chunk_type, data):
+    crc = zlib.crc32(chunk_type + data) & 0xffffffff
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', crc)
+
+
+class TestPngMetadata:
+    """Test reading text chunks without decoding pixels."""
+
+    def test_text_chunk_variants_match_pillow(self):
+        """Test tEXt, zTXt and iTXt payloads decode like Pillow's."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = _save_png(os.path.join(tmpdir, 'a.png'), [
+                ('parameters', 'a cat, Steps: 20', {}),
+                ('compressed', 'x' * 500, {'zip': True}),
+                ('unicode', 'café ☕ 猫', {}),
+                ('unicode_zip', '猫' * 200, {'zip': True}),
+            ])
+
+            with Image.open(path) as img:
+                expected = dict(img.text)
+
+            assert read_png_text(path) == expected
+
+    def test_generation_metadata(self):
+        """Test Forge and ComfyUI keys are returned, others are not."""
+        workflow = json.dumps({'nodes': [{'id': 1, 'type': 'KSampler'}]})
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = _save_png(os.path.join(tmpdir, 'comfy.png'), [
+                ('prompt', '{"3": {"class_type": "KSampler"}}', {}),
+                ('workflow', workflow, {}),
+                ('Software', 'ComfyUI', {}),
+            ])
+
+            metadata = read_generation_metadata(path)
+
+            assert set(metadata) == {'prompt', 'workflow'}
+            assert json.loads(metadata['workflow']) == json.loads(workflow)
+
+    def test_stops_at_first_idat(self):
+        """Test text chunks after the image data are not read."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'late.png')
+            ihdr = struct.pack('>IIBBBBB', 1, 1, 8, 0, 0, 0, 0)
+            with open(path, 'wb') as f:
+                f.write(b'\x89PNG\r\n\x1a\n')
+                f.write(_chunk(b'IHDR', ihdr))
+                f.write(_chunk(b'tEXt', b'parameters\0early'))
+                f.write(_chunk(b'IDAT', zlib.compress(b'\0\0')))
+                f.write(_chunk(b'tEXt', b'late\0ignored'))
+                f.write(_chunk(b'IEND', b''))
+
+            assert read_png_text(path) == {'parameters': 'early'}
+
+    def test_rejects_non_png(self):
+        """Test non-PNG input raises ValueError."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'fake.png')
+            Image.new('RGB', (4, 4)).save(path, format='JPEG')
+
+            with pytest.raises(ValueError):
+                read_png_text(path)
+            assert extract_prompt(path) is None
+
+    def test_xmp_tool_uses_reader(self):
+        """Test extract_prompt reads parameters and tolerates missing ones."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with_prompt = _save_png(os.path.join(tmpdir, 'p.png'), [('parameters', '  a dog\x01 ', {})])
+            without = _save_png(os.path.join(tmpdir, 'n.png'))
+
+            assert extract_prompt(with_prompt) == 'a dog'
+            assert extract_prompt(without) == ''
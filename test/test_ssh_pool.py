@@ -0,0 +1,198 @@
+"""
+Tests for the shared SSH connection pool
+"""
+
+import asyncio
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from app.utils.ssh_pool import SSHConnectionPool
+
+
+@pytest.fixture
+def pool():
+    with tempfile.TemporaryDirectory() as control_dir:
+        yield SSHConnectionPool(control_dir=control_dir, idle_timeout=60, max_sessions_per_host=2, start_reaper=False)
+
+
+class TestCommandBuilders:
+    """Test argv construction."""
+
+    def test_ssh_command_uses_control_master(self, pool):
+        """Test that ssh argv routes through the ControlMaster socket."""
+        cmd = pool.ssh_command('10.0.0.1', 2222, 'echo ok')
+
+        assert cmd[0] == 'ssh'
+        assert cmd[1:3] == ['-p', '2222']
+        assert 'ControlMaster=auto' in cmd
+        assert f'ControlPath={pool.control_path("10.0.0.1", 2222)}' in cmd
+        assert cmd[-2:] == ['root@10.0.0.1', 'echo ok']
+
+    def test_control_path_is_per_destination(self, pool):
+        """Test that each (host, port, user) gets its own socket."""
+        a = pool.control_path('10.0.0.1', 2222)
+        b = pool.control_path('10.0.0.1', 2223)
+        c = pool.control_path('10.0.0.1', 2222, user='ubuntu')
+
+        assert len({a, b, c}) == 3
+        assert pool.control_path('10.0.0.1', '2222') == a
+
+    def test_security_options_get_their_own_master(self, pool):
+        """Test callers with a different host key policy or key never share a master."""
+        lax = pool.control_path('host', 22, options={'StrictHostKeyChecking': 'no'})
+        strict = pool.control_path('host', 22, options={'StrictHostKeyChecking': 'yes'})
+        keyed = pool.control_path('host', 22, identity_file='/root/.ssh/id_ed25519',
+                                  options={'StrictHostKeyChecking': 'yes'})
+
+        assert len({lax, strict, keyed, pool.control_path('host', 22)}) == 4
+        assert pool.control_path('host', 22, options={'StrictHostKeyChecking': 'yes'}) == strict
+        cmd = pool.ssh_command('host', 22, 'ls', options={'StrictHostKeyChecking': 'yes'})
+        assert f'ControlPath={strict}' in cmd
+
+    def test_extra_options_and_identity(self, pool):
+        """Test that caller options are appended."""
+        cmd = pool.ssh_command(
+            'host', 22, 'ls',
+            identity_file='/root/.ssh/id_ed25519',
+            options={'StrictHostKeyChecking': 'yes'}
+        )
+
+        assert '-i' in cmd
+        assert 'StrictHostKeyChecking=yes' in cmd
+
+    def test_scp_and_rsync_share_master(self, pool):
+        """Test that scp and rsync reuse the same socket as ssh."""
+        path = pool.control_path('host', 22)
+        scp = pool.scp_command('host', 22, '/tmp/a', 'root@host:/tmp/a')
+        shell = pool.rsync_shell('host', 22)
+
+        assert scp[:3] == ['scp', '-P', '22']
+        assert f'ControlPath={path}' in scp
+        assert f'ControlPath={path}' in shell
+
+    def test_forward_command_bypasses_master(self, pool):
+        """Test that a port forward gets its own connection bound to loopback."""
+        cmd = pool.forward_command('host', 2222, 40001, 18188, options={'StrictHostKeyChecking': 'yes'})
+
+        assert cmd[:4] == ['ssh', '-p', '2222', '-N']
+        assert cmd[cmd.index('-L') + 1] == '127.0.0.1:40001:localhost:18188'
+        assert 'ControlPath=none' in cmd
+        assert 'ExitOnForwardFailure=yes' in cmd
+        assert 'StrictHostKeyChecking=yes' in cmd
+        assert cmd[-1] == 'root@host'
+
+
+class TestExecution:
+    """Test pooled execution."""
+
+    def test_run_returns_completed_process(self, pool):
+        """Test that run delegates to subprocess.run."""
+        completed = subprocess.CompletedProcess(args=[], returncode=0, stdout='ok\n', stderr='')
+        with patch('app.utils.ssh_pool.subprocess.run', return_value=completed) as mock_run:
+            result = pool.run('host', 22, 'echo ok', timeout=5)
+
+        assert result.stdout == 'ok\n'
+        args, kwargs = mock_run.call_args
+        assert args[0][-1] == 'echo ok'
+        assert kwargs['timeout'] == 5
+        assert pool.get_stats()['hosts'][0]['total_sessions'] == 1
+
+    def test_per_host_concurrency_cap(self, pool):
+        """Test that no more than max_sessions_per_host calls run at once."""
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0}
+
+        def slow_run(*args, **kwargs):
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            time.sleep(0.05)
+            with lock:
+                state['active'] -= 1
+            return subprocess.CompletedProcess(args=[], returncode=0, stdout='', stderr='')
+
+        with patch('app.utils.ssh_pool.subprocess.run', side_effect=slow_run):
+            threads = [threading.Thread(target=pool.run, args=('host', 22, 'true')) for _ in range(6)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert state['peak'] == 2
+
+    def test_run_async(self, pool):
+        """Test the async variant returns (returncode, stdout, stderr)."""
+        proc = MagicMock()
+        proc.returncode = 0
+
+        async def communicate(input=None):
+            return b'out', b''
+
+        proc.communicate = communicate
+
+        async def fake_exec(*args, **kwargs):
+            return proc
+
+        with patch('app.utils.ssh_pool.asyncio.create_subprocess_exec', side_effect=fake_exec):
+            result = asyncio.run(pool.run_async('host', 22, 'ls'))
+
+        assert result == (0, b'out', b'')
+
+    def test_cancelled_wait_returns_its_slot(self, pool):
+        """Test a call cancelled while waiting for a session slot doesn't leak it."""
+        entry = pool._get_host('host', 22, 'root')
+        entry.semaphore.acquire()
+        entry.semaphore.acquire()
+
+        async def scenario():
+            task = asyncio.ensure_future(pool.run_async('host', 22, 'ls'))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            entry.semaphore.release()
+            entry.semaphore.release()
+            # Let the abandoned acquire finish and give its slot back
+            await asyncio.sleep(0.2)
+
+        asyncio.run(scenario())
+
+        assert entry.semaphore.acquire(blocking=False)
+        assert entry.semaphore.acquire(blocking=False)
+
+
+class TestLifecycle:
+    """Test idle expiry and health checks."""
+
+    def test_close_idle_expires_unused_masters(self, pool):
+        """Test that idle masters are closed and forgotten."""
+        pool.ssh_command('host', 22, 'true')
+        next(iter(pool._hosts.values())).last_used = time.time() - 120
+
+        assert pool.close_idle() == 1
+        assert pool.get_stats()['hosts'] == []
+
+    def test_close_idle_keeps_recent_masters(self, pool):
+        """Test that recently used masters are kept."""
+        pool.ssh_command('host', 22, 'true')
+
+        assert pool.close_idle() == 0
+        assert len(pool.get_stats()['hosts']) == 1
+
+    def test_stale_socket_removed_on_failed_check(self, pool):
+        """Test that a dead master's socket is removed before reuse."""
+        path = pool.control_path('host', 22)
+        open(path, 'w').close()
+
+        failed = subprocess.CompletedProcess(args=[], returncode=255, stdout='', stderr='No such master')
+        ok = subprocess.CompletedProcess(args=[], returncode=0, stdout='', stderr='')
+        with patch('app.utils.ssh_pool.subprocess.run', side_effect=[failed, ok]):
+            pool.run('host', 22, 'true')
+
+        assert not os.path.exists(path)
@@ -0,0 +1,209 @@
+"""
+Tests for the SSH/rsync transport
+"""
+
+import asyncio
+import contextlib
+import os
+import sys
+import tempfile
+
+import pytest
+
+from app.sync.models import FileStat
+from app.sync.transport.ssh_rsync import SSHRsyncAdapter
+
+
+class TestRsyncStreaming:
+    """Test incremental parsing of rsync output."""
+
+    def test_run_rsync_streams_progress_and_items(self):
+        """Test progress2 and itemized lines are reported as they arrive."""
+        adapter = SSHRsyncAdapter(host='example.com', port=22)
+        script = (
+            "printf 'cd+++++++++ sub/\\n'; "
+            "printf '>f+++++++++ sub/a.png\\n'; "
+            "printf '      1,024  50%%    1.00MB/s    0:00:01 (xfr#1, to-chk=1/2)\\r'; "
+            "printf '>f.st...... b.png\\n'; "
+            "printf '      2,048 100%%    1.00MB/s    0:00:00 (xfr#2, to-chk=0/2)\\r'; "
+            "printf 'total size is 2,048  speedup is 1.00\\n'"
+        )
+        updates = []
+
+        output = asyncio.run(adapter._run_rsync(['sh', '-c', script], progress_callback=updates.append))
+
+        assert output.returncode == 0
+        assert output.received_files == ['sub/a.png', 'b.png']
+        assert output.bytes_transferred == 2048
+        assert output.total_size == 2048
+        assert len({u['transfer_id'] for u in updates}) == 1
+        assert updates[-1]['transferred_files'] == 2
+        assert updates[-1]['estimated_total_files'] == 2
+        assert any(u['estimated_total_bytes'] == 2048 for u in updates)
+
+    def test_up_to_date_run_reports_no_bytes(self):
+        """Test a run that sent nothing reports 0 bytes, not the tree's total size."""
+        adapter = SSHRsyncAdapter(host='example.com', port=22)
+
+        output = asyncio.run(adapter._run_rsync(
+            ['sh', '-c', "printf 'total size is 5,000,000,000  speedup is 1.00\\n'"]
+        ))
+
+        assert output.total_size == 5_000_000_000
+        assert output.bytes_transferred == 0
+
+    def test_run_rsync_feeds_stdin(self):
+        """Test the --files-from list is written to rsync's stdin."""
+        adapter = SSHRsyncAdapter(host='example.com', port=22)
+
+        output = asyncio.run(adapter._run_rsync(
+            ['sh', '-c', "tr '\\0' '\\n' | sed 's/^/>f+++++++++ /'"],
+            stdin_data=b'a.png\0b.png\0'
+        ))
+
+        assert output.received_files == ['a.png', 'b.png']
+
+    def test_interrupted_files_resume_from_partials(self):
+        """Test the retry of an interrupted file runs rsync in delta mode."""
+        from app.sync.transport.ssh_rsync import RsyncOutput
+
+        adapter = SSHRsyncAdapter(host='example.com', port=22)
+        commands = []
+        outputs = [
+            RsyncOutput(returncode=23, received_files=['a.png'], stderr='connection reset'),
+            RsyncOutput(returncode=0, received_files=['b.png'])
+        ]
+
+        async def fake_run(cmd, stdin_data=None, progress_callback=None):
+            commands.append((cmd, stdin_data))
+            return outputs.pop(0)
+
+        adapter._run_rsync = fake_run
+        with tempfile.TemporaryDirectory() as tmpdir:
+            first = asyncio.run(adapter.transfer_files('/src', tmpdir, ['a.png', 'b.png']))
+            second = asyncio.run(adapter.transfer_files('/src', tmpdir, first.failed))
+
+        assert first.failed == ['b.png']
+        assert '--whole-file' in commands[0][0]
+        assert '--no-whole-file' in commands[1][0]
+        assert commands[1][1] == b'b.png'
+        assert second.success
+        assert adapter._interrupted == set()
+
+
+class StreamPool:
+    """SSH pool stand-in whose streamed commands print canned output."""
+
+    def __init__(self, output, returncode=0):
+        self.output = output
+        self.returncode = returncode
+        self.commands = []
+
+    @contextlib.asynccontextmanager
+    async def stream_async(self, host, port, command, user='root', identity_file=None, options=None):
+        self.commands.append(command)
+        with tempfile.NamedTemporaryFile() as output:
+            output.write(self.output)
+            output.flush()
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable, '-c',
+                'import sys; sys.stdout.buffer.write(open(sys.argv[1], "rb").read()); '
+                'sys.stderr.write("find: denied"); sys.exit(int(sys.argv[2]))',
+                output.name, str(self.returncode),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                yield proc
+            finally:
+                if proc.returncode is None:
+                    proc.kill()
+                    await proc.wait()
+
+
+class TestStreamingListing:
+    """Test the remote listing is parsed as it streams."""
+
+    def test_records_split_across_reads(self):
+        """Test records spanning read chunks and odd filenames parse intact."""
+        from app.sync.transport.ssh_rsync import READ_CHUNK_SIZE
+
+        names = [f'/src/dir {i}/img|{i}\n.png' for i in range(3 * READ_CHUNK_SIZE // 30)]
+        adapter = SSHRsyncAdapter(host='example.com', port=22)
+        adapter.pool = StreamPool(b''.join(f'{i} {i}.5 {n}'.encode() + b'\0' for i, n in enumerate(names)))
+
+        async def collect():
+            return [stat async for stat in adapter.iter_files('/src')]
+
+        files = asyncio.run(collect())
+
+        assert [f.path for f in files] == names
+        assert files[-1].size == len(names) - 1
+        assert files[-1].mtime == len(names) - 0.5
+        assert not hasattr(files[0], '__dict__')
+
+    def test_remote_paths_are_quoted(self):
+        """Test folder names with spaces or shell syntax reach find and rsync verbatim."""
+        class ShellPool:
+            @contextlib.asynccontextmanager
+            async def stream_async(self, host, port, command, user='root', identity_file=None, options=None):
+                proc = await asyncio.create_subprocess_exec(
+                    'sh', '-c', command,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=self.cwd
+                )
+                yield proc
+                await proc.wait()
+
+        adapter = SSHRsyncAdapter(host='example.com', port=22)
+        adapter.pool = ShellPool()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            adapter.pool.cwd = tmpdir
+            folder = os.path.join(tmpdir, 'day one; touch pwned')
+            os.makedirs(folder)
+            with open(os.path.join(folder, 'a.png'), 'wb') as f:
+                f.write(b'abc')
+
+            files = asyncio.run(adapter.list_files(folder))
+
+            assert [f.path for f in files] == [os.path.join(folder, 'a.png')]
+            assert not os.path.exists(os.path.join(tmpdir, 'pwned'))
+
+        from app.sync.transport.ssh_rsync import RsyncOutput
+
+        commands = []
+
+        async def fake_run(cmd, stdin_data=None, progress_callback=None):
+            commands.append(cmd)
+            return RsyncOutput(returncode=0)
+
+        adapter = SSHRsyncAdapter(host='example.com', port=22)
+        adapter._run_rsync = fake_run
+        with tempfile.TemporaryDirectory() as tmpdir:
+            asyncio.run(adapter.transfer_files('/src/day one', tmpdir, ['a.png']))
+
+        assert '--protect-args' in commands[0]
+        assert 'root@example.com:/src/day one/' in commands[0]
+
+    def test_failure_raises_but_list_is_empty(self):
+        """Test a failed find raises from iter_files and keeps list_files' empty result."""
+        adapter = SSHRsyncAdapter(host='example.com', port=22)
+        adapter.pool = StreamPool(b'1 1.0 /src/a.png\0', returncode=1)
+
+        async def collect():
+            return [stat async for stat in adapter.iter_files('/src')]
+
+        with pytest.raises(Exception, match='find: denied'):
+            asyncio.run(collect())
+        assert asyncio.run(adapter.list_files('/src')) == []
+
+    def test_ssh_incremental_find_predicate(self):
+        """Test the remote find is filtered by mtime."""
+        adapter = SSHRsyncAdapter(host='example.com', port=22)
+        adapter.pool = StreamPool(b'10 1500.5 /src/a.png\0')
+        files = asyncio.run(adapter.list_files_since('/src', 1500.0))
+
+        assert '-newermt @1500.000000' in adapter.pool.commands[0]
+        assert files == [FileStat(path='/src/a.png', size=10, mtime=1500.5)]
@@ -348,6 +348,45 @@ class TestSyncAPI(unittest.TestCase):
         
         mock_run_sync.assert_called_once_with('vast.example.com', '12345', 'VastAI', cleanup=False)
 
+    @patch('app.sync.sync_api.VastManager')
+    @patch('app.sync.sync_api.start_fleet_sync_v2')
+    def test_sync_vastai_fleet(self, mock_fleet_sync, mock_vast_manager):
+        """Test fleet sync starts every running instance with a public IP"""
+        mock_instance = MagicMock()
+        mock_instance.list_instances.return_value = [
+            {'id': 1, 'cur_state': 'running', 'public_ipaddr': '1.2.3.4', 'ssh_port': 100},
+            {'id': 2, 'cur_state': 'running', 'public_ipaddr': '1.2.3.4', 'ssh_port': 200},
+            {'id': 3, 'cur_state': 'stopped', 'public_ipaddr': '5.6.7.8', 'ssh_port': 300},
+            {'id': 4, 'cur_state': 'running'}
+        ]
+        mock_vast_manager.return_value = mock_instance
+
+        mock_fleet_sync.return_value = {
+            'success': True,
+            'fleet_id': 'fleet-uuid',
+            'sync_id': 'fleet_20250101_000000_abc',
+            'jobs': {}
+        }
+
+        response = self.app.post('/sync/vastai/fleet',
+                                json={'bandwidth_limit_mbps': 200, 'per_host_transfers': 4},
+                                content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        data = json.loads(response.data)
+        self.assertTrue(data['success'])
+        self.assertEqual(data['skipped_instances'], [4])
+        self.assertEqual(len(data['instances']), 2)
+
+        mock_fleet_sync.assert_called_once_with(
+            [('vast-1', '1.2.3.4', '100'), ('vast-2', '1.2.3.4', '200')],
+            'VastAI',
+            cleanup=True,
+            folders=None,
+            bandwidth_limit_mbps=200,
+            per_host_transfers=4
+        )
+
     @patch('app.sync.sync_api.subprocess.run')
     def test_vastai_set_ui_home_success(self, mock_subprocess):
         """Test successful VastAI UI_HOME setting"""
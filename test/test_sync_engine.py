@@ -0,0 +1,214 @@
+"""
+Tests for SyncEngine retries and change scanning
+"""
+
+import asyncio
+import os
+import tempfile
+
+from app.sync.models import FileStat
+from app.sync.engine.sync_engine import SyncEngine
+
+from conftest import FakeTransport, sync_config
+
+
+class TestRetries:
+    """Test batch-level retries of failed files."""
+
+    def test_only_failed_files_are_retried(self):
+        """Test a flaky file is retried alone until it succeeds."""
+        files = [FileStat(path=f'/src/img{i}.png', size=100, mtime=100.0) for i in range(4)]
+        transport = FakeTransport(files, failures={'img1.png': 2})
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = SyncEngine(transport, os.path.join(tmpdir, 'manifest.db'))
+            result = asyncio.run(engine.sync_folder('/src', '/dst', sync_config(workers=1)))
+
+            assert result.success
+            assert result.files_transferred == 4
+            assert transport.batches[1:] == [['img1.png'], ['img1.png']]
+            assert len(engine.manifest.manifest) == 4
+
+    def test_retries_replace_failed_attempt_progress(self):
+        """Test a retried batch's progress doesn't stack on the failed attempt's partial counters."""
+        from app.sync.progress import TransferProgressTracker
+
+        files = [FileStat(path=f'/src/img{i}.png', size=100, mtime=100.0) for i in range(4)]
+        transport = FakeTransport(files, failures={'img1.png': 2})
+        updates = []
+        tracker = TransferProgressTracker(updates.append, min_interval=0)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = SyncEngine(transport, os.path.join(tmpdir, 'manifest.db'))
+            asyncio.run(engine.sync_folder('/src', '/dst', sync_config(workers=1), tracker.update))
+
+        counters = [u for u in updates if 'transferred_bytes' in u]
+        assert max(u['transferred_bytes'] for u in counters) == 400
+        assert counters[-1]['transferred_bytes'] == 400
+        assert counters[-1]['transferred_files'] == 4
+        assert counters[-1]['total_bytes'] == 400
+
+    def test_gives_up_after_retry_attempts(self):
+        """Test persistent failures stop after retry_attempts retries."""
+        files = [FileStat(path=f'/src/img{i}.png', size=100, mtime=100.0) for i in range(2)]
+        transport = FakeTransport(files, failures={'img0.png': 99})
+        config = sync_config(workers=1)
+        config.retry_attempts = 2
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = SyncEngine(transport, os.path.join(tmpdir, 'manifest.db'))
+            result = asyncio.run(engine.sync_folder('/src', '/dst', config))
+
+            assert not result.success
+            assert len(transport.batches) == 3
+            assert 'after 3 attempt(s)' in result.errors[0]
+            assert '/src/img0.png' not in engine.manifest.manifest
+
+    def test_retry_delay_backs_off_with_jitter(self):
+        """Test delays double per attempt, stay within jitter bounds and cap out."""
+        from app.sync.engine.sync_engine import retry_delay, MAX_RETRY_DELAY
+
+        for attempt, full in [(1, 5), (2, 10), (3, 20)]:
+            delays = [retry_delay(5, attempt) for _ in range(50)]
+            assert all(full / 2 <= d <= full for d in delays)
+        assert retry_delay(5, 20) <= MAX_RETRY_DELAY
+
+
+class TestIncrementalListing:
+    """Test watermark-based incremental listing."""
+
+    def test_second_sync_lists_incrementally(self):
+        """Test the watermark limits the listing to new files."""
+        files = [FileStat(path=f'/src/img{i}.png', size=10, mtime=1000.0 + i) for i in range(5)]
+        transport = FakeTransport(files)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = SyncEngine(transport, os.path.join(tmpdir, 'manifest.db'))
+
+            asyncio.run(engine.sync_folder('/src', '/dst', sync_config()))
+            assert transport.listings == [('full', None)]
+            assert engine.manifest.get_watermark('/src').max_mtime == 1004.0
+
+            files.append(FileStat(path='/src/new.png', size=10, mtime=2000.0))
+            transport.batches.clear()
+            result = asyncio.run(engine.sync_folder('/src', '/dst', sync_config()))
+
+            assert transport.listings[-1] == ('since', 1002.0)
+            assert transport.batches == [['new.png']]
+            assert result.files_transferred == 1
+            assert engine.manifest.get_watermark('/src').max_mtime == 2000.0
+
+    def test_failed_files_hold_back_watermark(self):
+        """Test a failed file stays inside the next incremental window."""
+        files = [FileStat(path=f'/src/img{i}.png', size=10, mtime=1000.0 + i * 100) for i in range(4)]
+        transport = FakeTransport(files, fail={'img1.png'})
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = SyncEngine(transport, os.path.join(tmpdir, 'manifest.db'))
+            asyncio.run(engine.sync_folder('/src', '/dst', sync_config()))
+
+            assert engine.manifest.get_watermark('/src').max_mtime < 1100.0
+
+            transport.fail.clear()
+            transport.batches.clear()
+            asyncio.run(engine.sync_folder('/src', '/dst', sync_config()))
+
+            assert transport.listings[-1][0] == 'since'
+            assert transport.batches == [['img1.png']]
+            assert engine.manifest.get_watermark('/src').max_mtime == 1300.0
+
+    def test_full_reconcile_when_due_or_disabled(self):
+        """Test periodic and opt-out full listings."""
+        files = [FileStat(path='/src/a.png', size=10, mtime=1000.0)]
+        transport = FakeTransport(files)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = SyncEngine(transport, os.path.join(tmpdir, 'manifest.db'))
+            config = sync_config()
+            asyncio.run(engine.sync_folder('/src', '/dst', config))
+
+            config.full_reconcile_hours = 0
+            asyncio.run(engine.sync_folder('/src', '/dst', config))
+
+            config.full_reconcile_hours = 24
+            config.incremental_listing = False
+            asyncio.run(engine.sync_folder('/src', '/dst', config))
+
+            assert [mode for mode, _ in transport.listings] == ['full', 'full', 'full']
+
+    def test_full_reconcile_prunes_deleted_entries(self):
+        """Test a full listing drops manifest entries for removed files; incremental ones keep them."""
+        files = [FileStat(path=f'/src/img{i}.png', size=10, mtime=1000.0 + i) for i in range(3)]
+        transport = FakeTransport(files)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = SyncEngine(transport, os.path.join(tmpdir, 'manifest.db'))
+            config = sync_config()
+            asyncio.run(engine.sync_folder('/src', '/dst', config))
+            assert len(engine.manifest.manifest) == 3
+
+            del files[0]
+            asyncio.run(engine.sync_folder('/src', '/dst', config))
+            assert transport.listings[-1][0] == 'since'
+            assert '/src/img0.png' in engine.manifest.manifest
+
+            config.full_reconcile_hours = 0
+            asyncio.run(engine.sync_folder('/src', '/dst', config))
+            assert transport.listings[-1][0] == 'full'
+            assert '/src/img0.png' not in engine.manifest.manifest
+            assert len(engine.manifest.manifest) == 2
+            engine.manifest.close()
+
+    def test_incremental_listing_does_not_report_deletions(self):
+        """Test files outside the incremental window aren't seen as deleted."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            from app.sync.engine.manifest import ManifestManager
+            manager = ManifestManager(os.path.join(tmpdir, 'manifest.db'))
+            manager.update_many([FileStat(path='/src/old.png', size=1, mtime=1.0)])
+
+            _, _, deleted = manager.get_changes([], prefix='/src', detect_deletions=False)
+            assert deleted == []
+            _, _, deleted = manager.get_changes([], prefix='/src')
+            assert deleted == ['/src/old.png']
+            manager.close()
+
+
+class TestChunkedScan:
+    """Test the listing is diffed against the manifest in chunks."""
+
+    def test_engine_diffs_listing_in_chunks(self, monkeypatch):
+        """Test only changed files survive the chunked diff."""
+        from app.sync.engine import sync_engine
+
+        monkeypatch.setattr(sync_engine, 'SCAN_CHUNK_SIZE', 3)
+        files = [FileStat(path=f'/src/img{i}.png', size=10, mtime=1000.0 + i) for i in range(10)]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = SyncEngine(FakeTransport(files), os.path.join(tmpdir, 'manifest.db'))
+            engine.manifest.update_many(files[:7])
+
+            full_scan, changed, deleted, newest = asyncio.run(engine._scan_changes('/src', sync_config()))
+
+            assert full_scan
+            assert [f.path for f in changed] == [f.path for f in files[7:]]
+            assert deleted == []
+            assert newest == 1009.0
+
+    def test_full_scan_reports_deletions(self, monkeypatch):
+        """Test a chunked full listing reports manifest entries it no longer lists."""
+        from app.sync.engine import sync_engine
+
+        monkeypatch.setattr(sync_engine, 'SCAN_CHUNK_SIZE', 3)
+        files = [FileStat(path=f'/src/img{i}.png', size=10, mtime=1000.0 + i) for i in range(10)]
+        gone = FileStat(path='/src/gone.png', size=10, mtime=900.0)
+        other = FileStat(path='/srcother/keep.png', size=10, mtime=900.0)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = SyncEngine(FakeTransport(files), os.path.join(tmpdir, 'manifest.db'))
+            engine.manifest.update_many(files + [gone, other])
+
+            full_scan, changed, deleted, _ = asyncio.run(engine._scan_changes('/src', sync_config()))
+
+            assert full_scan
+            assert changed == []
+            assert deleted == ['/src/gone.png']
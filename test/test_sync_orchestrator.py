@@ -0,0 +1,348 @@
+"""
+Tests for the orchestrator's long-lived event loop and job cancellation
+"""
+
+import asyncio
+import threading
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from app.sync.orchestrator import SyncOrchestrator
+from app.sync.models import SyncConfig, SyncResult
+
+
+def _config():
+    return SyncConfig(
+        source_type='forge',
+        source_host='host',
+        source_port=22,
+        dest_path='/media',
+        folders=['a'],
+        enable_cleanup=False
+    )
+
+
+async def _fixed_pairs(self, config, transport):
+    return [('/src/a', '/dst/a')]
+
+
+@pytest.fixture
+def orchestrator():
+    with tempfile.TemporaryDirectory() as manifest_dir:
+        orch = SyncOrchestrator(manifest_dir=manifest_dir)
+        yield orch
+        orch.shutdown()
+
+
+class TestEventLoopService:
+    """Test the background event loop."""
+
+    def test_jobs_run_on_shared_loop_thread(self, orchestrator):
+        """Test submitted work runs on one loop, not the caller's thread."""
+        async def whoami():
+            return threading.current_thread().name, asyncio.get_running_loop()
+
+        name1, loop1 = orchestrator.run(whoami(), timeout=5)
+        name2, loop2 = orchestrator.run(whoami(), timeout=5)
+
+        assert name1 == 'sync-orchestrator-loop'
+        assert loop1 is loop2
+        assert name1 != threading.current_thread().name
+
+    def test_concurrent_jobs_complete(self, orchestrator):
+        """Test several jobs progress concurrently on the loop."""
+        async def fake_sync(engine, src, dest, config, progress_callback=None):
+            await asyncio.sleep(0.2)
+            return SyncResult(success=True, files_transferred=1, bytes_transferred=10, duration=0.2)
+
+        with patch('app.sync.orchestrator.SyncEngine.sync_folder', new=fake_sync), \
+                patch.object(SyncOrchestrator, '_plan_folder_pairs', new=_fixed_pairs):
+            jobs = [orchestrator.run(orchestrator.start_sync(_config()), timeout=5) for _ in range(3)]
+            finished = [orchestrator.run(orchestrator.wait_for_job(job.id, timeout=5), timeout=10) for job in jobs]
+
+        assert [job.status for job in finished] == ['complete'] * 3
+
+    def test_job_closes_manifest(self, orchestrator):
+        """Test each job's manifest connection is closed whether it succeeds or fails."""
+        from app.sync.engine.manifest import ManifestManager
+
+        async def fake_sync(engine, folder_pairs, config, progress_callback=None):
+            if config.source_port == 23:
+                raise RuntimeError('boom')
+            return [SyncResult(success=True, files_transferred=0, bytes_transferred=0, duration=0)]
+
+        closed = []
+        real_close = ManifestManager.close
+
+        def close(manifest):
+            closed.append(manifest)
+            real_close(manifest)
+
+        failing = _config()
+        failing.source_port = 23
+        with patch('app.sync.orchestrator.SyncEngine.sync_folders_parallel', new=fake_sync), \
+                patch.object(SyncOrchestrator, '_plan_folder_pairs', new=_fixed_pairs), \
+                patch.object(ManifestManager, 'close', new=close):
+            jobs = [orchestrator.run(orchestrator.start_sync(c), timeout=5) for c in (_config(), failing)]
+            finished = [orchestrator.run(orchestrator.wait_for_job(job.id, timeout=5), timeout=10) for job in jobs]
+
+        assert [job.status for job in finished] == ['complete', 'failed']
+        assert len(closed) == 2
+
+    def test_cancel_job_cancels_running_task(self, orchestrator):
+        """Test cancellation propagates into the running transfer."""
+        started = threading.Event()
+        cancelled = threading.Event()
+
+        async def hanging_sync(engine, src, dest, config, progress_callback=None):
+            started.set()
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with patch('app.sync.orchestrator.SyncEngine.sync_folder', new=hanging_sync), \
+                patch.object(SyncOrchestrator, '_plan_folder_pairs', new=_fixed_pairs):
+            job = orchestrator.run(orchestrator.start_sync(_config()), timeout=5)
+            assert started.wait(5)
+
+            assert orchestrator.run(orchestrator.cancel_job(job.id), timeout=5)
+
+        assert cancelled.is_set()
+        assert job.status == 'cancelled'
+        assert job.end_time is not None
+        assert orchestrator.list_active_jobs() == []
+        assert orchestrator.progress_manager.list_active() == []
+        assert not orchestrator.run(orchestrator.cancel_job(job.id), timeout=5)
+
+    def test_wait_for_job_times_out_or_is_cancelled_without_stopping_job(self, orchestrator):
+        """Test a waiter giving up, or being cancelled, leaves the job running."""
+        release = asyncio.Event()
+
+        async def blocked_sync(engine, src, dest, config, progress_callback=None):
+            await release.wait()
+            return SyncResult(success=True, files_transferred=1, bytes_transferred=10, duration=0.1)
+
+        async def cancelled_waiter(job_id):
+            waiter = asyncio.ensure_future(orchestrator.wait_for_job(job_id))
+            await asyncio.sleep(0.05)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            release.set()
+
+        with patch('app.sync.orchestrator.SyncEngine.sync_folder', new=blocked_sync), \
+                patch.object(SyncOrchestrator, '_plan_folder_pairs', new=_fixed_pairs):
+            job = orchestrator.run(orchestrator.start_sync(_config()), timeout=5)
+
+            waited = orchestrator.run(orchestrator.wait_for_job(job.id, timeout=0.05), timeout=5)
+            assert waited.status not in ('complete', 'failed', 'cancelled')
+            orchestrator.run(cancelled_waiter(job.id), timeout=5)
+            finished = orchestrator.run(orchestrator.wait_for_job(job.id, timeout=5), timeout=10)
+
+        assert finished.status == 'complete'
+
+
+class TestRsyncCancellation:
+    """Test that cancelling a transfer kills its subprocess."""
+
+    def test_run_rsync_kills_process_on_cancel(self):
+        """Test the rsync child does not outlive a cancelled transfer."""
+        from app.sync.transport.ssh_rsync import SSHRsyncAdapter
+
+        adapter = SSHRsyncAdapter(host='example.com', port=22)
+        procs = []
+        real_exec = asyncio.create_subprocess_exec
+
+        async def tracking_exec(*args, **kwargs):
+            proc = await real_exec(*args, **kwargs)
+            procs.append(proc)
+            return proc
+
+        async def scenario():
+            with patch('app.sync.transport.ssh_rsync.asyncio.create_subprocess_exec', side_effect=tracking_exec):
+                task = asyncio.ensure_future(adapter._run_rsync(['sleep', '30']))
+                await asyncio.sleep(0.2)
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+            return await procs[0].wait()
+
+        returncode = asyncio.run(scenario())
+        assert returncode is not None and returncode < 0
+
+
+class TestRemoteTreePlanning:
+    """Test single-call tree discovery and folder pair planning."""
+
+    def test_remote_tree_script(self):
+        """Test the discovery script resolves UI_HOME and sizes each subdir."""
+        import os
+        import subprocess
+        from app.sync.transport.ssh_rsync import SSHRsyncAdapter
+
+        with tempfile.TemporaryDirectory() as home:
+            day = os.path.join(home, 'outputs', 'txt2img-images', '2025-01-01')
+            os.makedirs(os.path.join(day, 'nested'))
+            with open(os.path.join(day, 'a.png'), 'w') as f:
+                f.write('abc')
+            with open(os.path.join(day, 'nested', 'b.png'), 'w') as f:
+                f.write('abcd')
+
+            adapter = SSHRsyncAdapter(host='example.com', port=22)
+
+            async def run_locally(command, input=None):
+                proc = subprocess.run(
+                    ['sh', '-c', command], input=input, capture_output=True,
+                    env={**os.environ, 'UI_HOME': home}
+                )
+                return proc.returncode, proc.stdout, proc.stderr
+
+            adapter._run_remote = run_locally
+            tree = asyncio.run(adapter.get_remote_tree(None, ['txt2img-images', 'WAN']))
+
+        assert tree.base_path == os.path.join(home, 'outputs')
+        assert tree.missing_folders == ['WAN']
+        day_entry = [s for s in tree.subdirs if s.name == '2025-01-01'][0]
+        assert (day_entry.files, day_entry.bytes) == (2, 7)
+
+    def test_plan_folder_pairs_per_subdir(self, orchestrator):
+        """Test subdirs become pairs under the discovered output root."""
+        from app.sync.models import RemoteTree, RemoteSubdir
+
+        class TreeTransport:
+            calls = 0
+
+            async def get_remote_tree(self, base_path, folders):
+                TreeTransport.calls += 1
+                return RemoteTree(base_path='/ws/out', subdirs=[
+                    RemoteSubdir('txt2img-images', '', 0, 0),
+                    RemoteSubdir('txt2img-images', '2025-01-01', 3, 30),
+                    RemoteSubdir('txt2img-images', '2025-01-02', 0, 0),
+                    RemoteSubdir('WAN', '', 2, 20),
+                    RemoteSubdir('WAN', 'clips', 1, 10),
+                ])
+
+        config = SyncConfig(
+            source_type='comfyui', source_host='h', source_port=22,
+            dest_path='/media', folders=['txt2img-images', 'WAN']
+        )
+        pairs = asyncio.run(orchestrator._plan_folder_pairs(config, TreeTransport()))
+
+        assert TreeTransport.calls == 1
+        assert config.source_path is None
+        assert pairs == [
+            ('/ws/out/txt2img-images/2025-01-01', '/media/txt2img-images/2025-01-01'),
+            ('/ws/out/WAN', '/media/WAN'),
+        ]
+
+    def test_nested_workers_share_transfer_budget(self):
+        """Test folder and bucket parallelism never exceed parallel_transfers."""
+        from app.sync.engine.sync_engine import SyncEngine
+        from app.sync.models import FileStat, BatchTransferResult
+        from app.sync.transport import TransportAdapter
+
+        state = {'active': 0, 'peak': 0}
+
+        class SlowTransport(TransportAdapter):
+            async def list_files(self, path):
+                return [FileStat(path=f'{path}/f{i}', size=10, mtime=1.0) for i in range(6)]
+
+            async def transfer_file(self, source, dest, progress_callback=None):
+                raise NotImplementedError
+
+            async def transfer_folder(self, source, dest, progress_callback=None):
+                raise NotImplementedError
+
+            async def transfer_files(self, source_root, dest, relative_paths, progress_callback=None):
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+                await asyncio.sleep(0.02)
+                state['active'] -= 1
+                return BatchTransferResult(success=True, bytes_transferred=0, duration=0,
+                                           transferred=list(relative_paths))
+
+            async def delete_file(self, path):
+                return True
+
+            async def get_file_stat(self, path):
+                raise NotImplementedError
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            import os
+            engine = SyncEngine(SlowTransport(), os.path.join(tmpdir, 'm.db'))
+            config = _config()
+            config.parallel_transfers = 3
+            pairs = [(f'/src/d{i}', f'/dst/d{i}') for i in range(5)]
+            results = asyncio.run(engine.sync_folders_parallel(pairs, config))
+
+        assert all(r.success for r in results)
+        assert sum(r.files_transferred for r in results) == 30
+        assert state['peak'] == 3
+
+
+class TestFleetSync:
+    """Test concurrent syncs across instances."""
+
+    def test_plan_fleet_caps_host_workers_and_shares_budget(self):
+        """Test members are namespaced, share a per-address cap and share one budget."""
+        configs = {'vast-1': _config(), 'vast-2': _config(), 'vast-3': _config()}
+        configs['vast-3'].source_host = 'other'
+
+        planned = SyncOrchestrator._plan_fleet(configs, 300, 4, 'fleet_x')
+
+        assert planned['vast-1'].dest_path == '/media/vast-1'
+        assert planned['vast-1'].instance_name == 'vast-1'
+        assert all(c.parallel_transfers == 4 and c.host_transfer_limit == 4 for c in planned.values())
+        assert all(c.bandwidth_limit_mbps == 300 for c in planned.values())
+        assert all(c.bandwidth_group == 'fleet_x' for c in planned.values())
+
+    def test_transport_uses_controller_budget(self, orchestrator):
+        """Test a sync's budget is handed to the transfer controller."""
+        config = _config()
+        config.bandwidth_limit_mbps = 100
+        config.parallel_transfers = 4
+
+        transport = orchestrator._make_transport(config, 'sync_1')
+
+        assert transport.controller is orchestrator.transfer_controller
+        assert transport.max_workers == 4
+        assert transport.budgets == [('sync_1', 100)]
+        assert transport.host_limit is None
+        config.bandwidth_group = 'fleet_x'
+        assert orchestrator._make_transport(config, 'sync_1').budgets == [('fleet_x', 100)]
+        config.bandwidth_limit_mbps = None
+        assert orchestrator._make_transport(config, 'sync_1').budgets == []
+
+    def test_fleet_runs_members_and_aggregates_progress(self, orchestrator):
+        """Test members run concurrently and roll up into one progress record."""
+        dests = []
+
+        async def fake_sync(engine, src, dest, config, progress_callback=None):
+            dests.append(dest)
+            await asyncio.sleep(0.1)
+            return SyncResult(success=True, files_transferred=2, bytes_transferred=10, duration=0.1)
+
+        with patch('app.sync.orchestrator.SyncEngine.sync_folder', new=fake_sync), \
+                patch.object(SyncOrchestrator, '_plan_folder_pairs', new=_fixed_pairs):
+            fleet = orchestrator.run(
+                orchestrator.start_fleet_sync({'vast-1': _config(), 'vast-2': _config()}),
+                timeout=5
+            )
+            for job_id in fleet.members.values():
+                orchestrator.run(orchestrator.wait_for_job(job_id, timeout=5), timeout=10)
+            orchestrator.run(asyncio.sleep(0.1), timeout=5)
+
+        assert fleet.status == 'complete'
+        assert sorted(fleet.members) == ['vast-1', 'vast-2']
+        jobs = [orchestrator.get_job_status(job_id) for job_id in fleet.members.values()]
+        assert sorted(job.config.dest_path for job in jobs) == ['/media/vast-1', '/media/vast-2']
+        assert len({job.config.instance_name for job in jobs}) == 2
+
+        progress = orchestrator.progress_manager.get_progress(fleet.sync_id)
+        assert progress.status == 'complete'
+        assert progress.total_folders == 2
+        assert orchestrator.get_fleet_status(fleet.id) is fleet
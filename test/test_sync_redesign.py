@@ -105,8 +105,9 @@ class TestManifestManager:
             assert manager2.manifest['/test/file.png'].size == 1000
         
         finally:
-            if os.path.exists(manifest_path):
-                os.unlink(manifest_path)
+            for path in (manifest_path, manifest_path[:-len('.json')] + '.db'):
+                if os.path.exists(path):
+                    os.unlink(path)
     
     def test_get_changes(self):
         """Test change detection."""
@@ -137,10 +138,75 @@ class TestManifestManager:
             assert '/test/file2.png' in new
             assert '/test/file3.png' in modified
             assert len(deleted) == 0
-        
+
         finally:
-            if os.path.exists(manifest_path):
-                os.unlink(manifest_path)
+            for path in (manifest_path, manifest_path[:-len('.json')] + '.db'):
+                if os.path.exists(path):
+                    os.unlink(path)
+
+    def test_update_many_and_prefix_deletions(self):
+        """Test batched upserts and prefix-scoped deletion detection."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = ManifestManager(os.path.join(tmpdir, 'manifest.db'))
+
+            written = manager.update_many(
+                FileStat(path=f'/out/{folder}/file{i}.png', size=i, mtime=100.0)
+                for folder in ('a', 'b')
+                for i in range(50)
+            )
+            assert written == 100
+            assert len(manager.manifest) == 100
+
+            # Folder 'a' lost one file; folder 'b' was not listed at all
+            remote_files = [
+                FileStat(path=f'/out/a/file{i}.png', size=i, mtime=100.0)
+                for i in range(1, 50)
+            ]
+            new, modified, deleted = manager.get_changes(remote_files, prefix='/out/a')
+
+            assert new == []
+            assert modified == []
+            assert deleted == ['/out/a/file0.png']
+
+            manager.close()
+
+    def test_batch_rolls_back_on_error(self):
+        """Test that a failed batch leaves the manifest untouched."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = ManifestManager(os.path.join(tmpdir, 'manifest.db'))
+
+            with pytest.raises(RuntimeError):
+                with manager.batch():
+                    manager.update_manifest('/x.png', FileStat(path='/x.png', size=1, mtime=1.0))
+                    raise RuntimeError("boom")
+
+            assert '/x.png' not in manager.manifest
+            manager.close()
+
+    def test_legacy_json_manifest_is_migrated(self):
+        """Test one-time import of a legacy JSON manifest."""
+        import json
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            legacy_path = os.path.join(tmpdir, 'forge_host.json')
+            with open(legacy_path, 'w') as f:
+                json.dump({
+                    '/out/file.png': {
+                        'path': '/out/file.png',
+                        'size': 10,
+                        'mtime': 5.0,
+                        'checksum': 'abc',
+                        'last_sync': '2025-10-21T12:00:00'
+                    }
+                }, f)
+
+            manager = ManifestManager(legacy_path)
+
+            assert manager.manifest['/out/file.png'].checksum == 'abc'
+            assert not os.path.exists(legacy_path)
+            assert os.path.exists(legacy_path + '.migrated')
+            assert manager.get_stats()['total_files'] == 1
+            manager.close()
 
 
 class TestProgressManager:
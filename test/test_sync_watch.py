@@ -0,0 +1,195 @@
+"""
+Tests for watch-mode sync
+"""
+
+import asyncio
+import contextlib
+import os
+import subprocess
+import tempfile
+import time
+
+from app.sync.models import FileStat, WatchStatus
+from app.sync.transport.ssh_rsync import SSHRsyncAdapter, WATCH_SCRIPT
+from app.sync.engine.sync_engine import SyncEngine
+from app.sync.engine.watcher import FolderWatcher
+
+from conftest import FakeTransport, sync_config
+
+
+class LocalPool:
+    """Runs 'remote' commands with the local shell instead of ssh."""
+
+    @contextlib.asynccontextmanager
+    async def stream_async(self, host, port, command, user='root', identity_file=None, options=None):
+        proc = await asyncio.create_subprocess_exec(
+            'sh', '-c', f'exec {command}',
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            yield proc
+        finally:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+
+
+class TestWatchScript:
+    """Test the remote watch script against a local folder."""
+
+    def test_reports_new_files(self):
+        """Test files written after the watch starts come back as stats."""
+        adapter = SSHRsyncAdapter('host', 22)
+        adapter.pool = LocalPool()
+        modes = []
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.makedirs(os.path.join(tmpdir, 'sub'))
+            with open(os.path.join(tmpdir, 'old.png'), 'wb') as f:
+                f.write(b'old')
+            os.utime(os.path.join(tmpdir, 'old.png'), (1, 1))
+            path = os.path.join(tmpdir, 'sub', 'new.png')
+
+            async def watch():
+                feed = adapter.watch_files([tmpdir], poll_interval=0.1, settle_seconds=0, on_mode=modes.append)
+                try:
+                    async for stat in feed:
+                        return stat
+                finally:
+                    await feed.aclose()
+
+            async def write():
+                while not modes:
+                    await asyncio.sleep(0.05)
+                # Give inotifywait time to set up its watches
+                await asyncio.sleep(0.5)
+                with open(path, 'wb') as f:
+                    f.write(b'12345')
+
+            async def run():
+                writer = asyncio.create_task(write())
+                stat = await asyncio.wait_for(watch(), 10)
+                await writer
+                return stat
+
+            stat = asyncio.run(run())
+
+        assert modes and modes[0] in ('inotify', 'poll')
+        assert stat.path == path
+        assert stat.size == 5
+
+    def test_exits_when_channel_closes(self):
+        """Test a dropped channel ends the inotify session, not only its heartbeat."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            stub = os.path.join(tmpdir, 'inotifywait')
+            pid_file = os.path.join(tmpdir, 'stub.pid')
+            with open(stub, 'w') as f:
+                f.write(f'#!/bin/sh\necho $$ > {pid_file}\nexec sleep 60\n')
+            os.chmod(stub, 0o755)
+
+            # sshd starts the command in its own session
+            proc = subprocess.Popen(
+                ['sh', '-c', WATCH_SCRIPT.replace('sleep 15', 'sleep 1'), 'sh', '0', '1', tmpdir],
+                stdout=subprocess.PIPE,
+                env={**os.environ, 'PATH': f"{tmpdir}:{os.environ['PATH']}"},
+                start_new_session=True
+            )
+            try:
+                assert proc.stdout.readline() == b'#mode inotify\n'
+                deadline = time.monotonic() + 5
+                while not os.path.exists(pid_file) and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                with open(pid_file) as f:
+                    stub_pid = int(f.read())
+
+                proc.stdout.close()
+                proc.wait(timeout=5)
+
+                deadline = time.monotonic() + 5
+                while _alive(stub_pid) and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                assert not _alive(stub_pid)
+            finally:
+                if proc.poll() is None:
+                    os.killpg(proc.pid, 9)
+                    proc.wait()
+
+
+def _alive(pid):
+    """True while `pid` runs; zombies awaiting reaping count as gone."""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+
+class TestFolderWatcher:
+    """Test debouncing, micro-batching and reconnects."""
+
+    def _watcher(self, tmpdir, transport, **config_fields):
+        config = sync_config(workers=1)
+        config.generate_xmp = False
+        for key, value in config_fields.items():
+            setattr(config, key, value)
+        engine = SyncEngine(transport, os.path.join(tmpdir, 'manifest.db'))
+        status = WatchStatus(watch_id='watch_test', source_host='host', source_port=22, roots=['/src'])
+        return FolderWatcher(engine, transport, config, [('/src', '/dst')], status, reconnect_delay=0.05)
+
+    def test_debounced_micro_batches(self):
+        """Test repeat events coalesce and ready files go out in bounded batches."""
+        transport = FakeTransport()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            watcher = self._watcher(tmpdir, transport, watch_debounce_seconds=0.2, watch_max_batch=2)
+
+            async def run():
+                transport.feed = asyncio.Queue()
+                task = asyncio.create_task(watcher.run())
+                for name in ['a.png', 'b.png', 'a.png', 'c.png']:
+                    await transport.feed.put(FileStat(path=f'/src/{name}', size=1, mtime=1))
+                await asyncio.sleep(0.05)
+                assert transport.batches == []
+
+                await asyncio.sleep(0.5)
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+            asyncio.run(run())
+
+        assert sorted(len(b) for b in transport.batches) == [1, 2]
+        assert sorted(p for b in transport.batches for p in b) == ['a.png', 'b.png', 'c.png']
+        assert watcher.status.mode == 'test'
+        assert watcher.status.files_seen == 4
+        assert watcher.status.files_synced == 3
+        assert watcher.status.batches == 2
+
+    def test_reconnect_flushes_and_skips_synced(self):
+        """Test a dropped feed sends pending files and reconnects without resending."""
+        transport = FakeTransport()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            watcher = self._watcher(tmpdir, transport, watch_debounce_seconds=30)
+
+            async def run():
+                transport.feed = asyncio.Queue()
+                task = asyncio.create_task(watcher.run())
+                await transport.feed.put(FileStat(path='/src/a.png', size=1, mtime=1))
+                await transport.feed.put(None)
+                while transport.sessions < 2:
+                    await asyncio.sleep(0.01)
+
+                # Same file reported again after the reconnect is already in the manifest
+                await transport.feed.put(FileStat(path='/src/a.png', size=1, mtime=1))
+                await transport.feed.put(None)
+                while transport.sessions < 3:
+                    await asyncio.sleep(0.01)
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+            asyncio.run(run())
+
+        assert transport.batches == [['a.png']]
+        assert watcher.status.reconnects == 2
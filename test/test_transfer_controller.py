@@ -0,0 +1,152 @@
+"""
+Tests for the adaptive transfer controller
+"""
+
+import asyncio
+import time
+
+from app.sync.transport.transfer_controller import TransferController, mbps_to_bwlimit, MIN_SAMPLE_BYTES
+
+
+async def _transfer(controller, host='h:22', max_workers=4, budgets=None, nbytes=0, seconds=0.0,
+                    success=True, hold=0.0):
+    async with controller.slot(host, max_workers, budgets) as slot:
+        await asyncio.sleep(hold)
+        slot.started = time.monotonic() - seconds
+        slot.done(nbytes, success)
+        return slot.bwlimit_kib
+
+
+def _limit(controller, host='h:22'):
+    return next(s['limit'] for s in controller.get_stats() if s['host'] == host)
+
+
+class TestConcurrency:
+    """Test AIMD limits per host."""
+
+    def test_starts_at_half_and_grows_on_success(self):
+        """Test successes add workers up to the ceiling."""
+        controller = TransferController()
+
+        async def run():
+            await _transfer(controller)
+            assert _limit(controller) == 2
+            for _ in range(20):
+                await _transfer(controller)
+
+        asyncio.run(run())
+        assert _limit(controller) == 4
+
+    def test_failures_halve_limit(self):
+        """Test a failed transfer halves the limit, never below one."""
+        controller = TransferController()
+
+        async def run():
+            for _ in range(40):
+                await _transfer(controller, max_workers=8)
+            assert _limit(controller) == 8
+            await _transfer(controller, max_workers=8, success=False)
+            assert _limit(controller) == 4
+            for _ in range(5):
+                await _transfer(controller, max_workers=8, success=False)
+
+        asyncio.run(run())
+        stats = controller.get_stats()[0]
+        assert stats['limit'] == 1
+        assert stats['failed'] == 6
+
+    def test_exception_counts_as_failure(self):
+        """Test an error inside the slot lowers the limit."""
+        controller = TransferController()
+
+        async def run():
+            try:
+                async with controller.slot('h:22', 4):
+                    raise OSError('connection reset')
+            except OSError:
+                pass
+
+        asyncio.run(run())
+        assert controller.get_stats()[0]['failed'] == 1
+        assert controller.get_stats()[0]['active'] == 0
+
+    def test_active_never_exceeds_limit(self):
+        """Test waiting transfers are held back until a slot frees up."""
+        controller = TransferController()
+        peak = 0
+
+        async def worker():
+            nonlocal peak
+            async with controller.slot('h:22', 4) as slot:
+                peak = max(peak, controller.get_stats()[0]['active'])
+                await asyncio.sleep(0.01)
+                slot.done(0, True)
+
+        async def run():
+            await asyncio.gather(*[worker() for _ in range(12)])
+
+        asyncio.run(run())
+        assert peak <= 4
+        assert controller.get_stats()[0]['completed'] == 12
+
+    def test_address_limit_is_shared_across_ports(self):
+        """Test instances on one address never exceed its cap together."""
+        controller = TransferController()
+        active = {'now': 0, 'peak': 0}
+
+        async def worker(port):
+            async with controller.slot(f'h:{port}', 4, address='h', address_limit=3) as slot:
+                active['now'] += 1
+                active['peak'] = max(active['peak'], active['now'])
+                await asyncio.sleep(0.01)
+                active['now'] -= 1
+                slot.done(0, True)
+
+        async def run():
+            await asyncio.gather(*[worker(port) for port in range(22, 27) for _ in range(4)])
+
+        asyncio.run(run())
+        assert active['peak'] == 3
+        assert sum(s['completed'] for s in controller.get_stats()) == 20
+
+    def test_no_growth_without_throughput_gain(self):
+        """Test a level that doesn't beat the one below stops growing and steps back."""
+        controller = TransferController()
+        big = MIN_SAMPLE_BYTES * 10
+
+        async def run():
+            # Level 2: 2 workers x 10 MB/s
+            await _transfer(controller, nbytes=big, seconds=big / 10e6)
+            await _transfer(controller, nbytes=big, seconds=big / 10e6)
+            assert _limit(controller) == 2
+            # Level 1 history says one worker alone reached 25 MB/s
+            controller._hosts['h:22'].rates[1] = 25e6
+            await _transfer(controller, nbytes=big, seconds=big / 10e6)
+
+        asyncio.run(run())
+        assert _limit(controller) == 1
+
+
+class TestBandwidth:
+    """Test budget shares."""
+
+    def test_unlimited_without_budget(self):
+        """Test no --bwlimit is set when nothing is budgeted."""
+        controller = TransferController()
+        assert asyncio.run(_transfer(controller)) is None
+
+    def test_budget_split_by_host_capacity(self):
+        """Test a group's budget is divided by the concurrency its hosts allow."""
+        controller = TransferController(total_budget_mbps=1000)
+
+        async def run():
+            # Host starts at limit 2 of 4
+            return await asyncio.gather(
+                _transfer(controller, 'a:22', budgets=[('sync', 100)], hold=0.02),
+                _transfer(controller, 'b:22', max_workers=2, hold=0.02),
+            )
+
+        sync_share, other_share = asyncio.run(run())
+        assert sync_share == mbps_to_bwlimit(50)
+        # Global budget spans both hosts: limits 2 + 1
+        assert other_share == mbps_to_bwlimit(1000 / 3)
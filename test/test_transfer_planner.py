@@ -0,0 +1,88 @@
+"""
+Tests for the manifest-driven transfer planner
+"""
+
+import asyncio
+import os
+import tempfile
+
+from app.sync.models import FileStat
+from app.sync.engine.sync_engine import SyncEngine
+from app.sync.engine.transfer_planner import TransferPlanner, relative_path
+
+from conftest import FakeTransport, sync_config
+
+
+class TestTransferPlanner:
+    """Test plan construction."""
+
+    def test_buckets_are_size_balanced(self):
+        """Test greedy assignment keeps bucket sizes close."""
+        files = [FileStat(path=f'/src/f{i}', size=size, mtime=0) for i, size in
+                 enumerate([100, 90, 80, 40, 30, 20, 10, 10, 10, 10])]
+
+        plan = TransferPlanner().plan('/src', '/dst', files, workers=3)
+
+        loads = sorted(b.total_bytes for b in plan.buckets)
+        assert len(plan.buckets) == 3
+        assert plan.total_files == 10
+        assert plan.total_bytes == 400
+        assert loads[-1] - loads[0] <= 10
+
+    def test_never_more_buckets_than_files(self):
+        """Test small diffs don't spawn idle workers."""
+        files = [FileStat(path='/src/a', size=1, mtime=0)]
+        plan = TransferPlanner().plan('/src', '/dst', files, workers=8)
+
+        assert len(plan.buckets) == 1
+        assert plan.buckets[0].relative_paths('/src') == ['a']
+
+    def test_min_bucket_bytes_limits_workers(self):
+        """Test tiny transfers stay on a single worker."""
+        files = [FileStat(path=f'/src/f{i}', size=10, mtime=0) for i in range(10)]
+        plan = TransferPlanner(min_bucket_bytes=1000).plan('/src', '/dst', files, workers=4)
+
+        assert len(plan.buckets) == 1
+
+    def test_relative_path(self):
+        """Test stripping the source root."""
+        assert relative_path('/workspace/out/', '/workspace/out/sub/a.png') == 'sub/a.png'
+        assert relative_path('/workspace/out', '/other/a.png') == 'other/a.png'
+
+
+class TestPlannedSync:
+    """Test SyncEngine executing a transfer plan."""
+
+    def test_only_changed_files_are_transferred(self):
+        """Test the diff drives per-file transfers and manifest updates."""
+        files = [FileStat(path=f'/src/img{i}.png', size=1000 + i, mtime=100.0) for i in range(10)]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = SyncEngine(FakeTransport(files), os.path.join(tmpdir, 'manifest.db'))
+            engine.manifest.update_many(files[:6])
+
+            result = asyncio.run(engine.sync_folder('/src', '/dst', sync_config()))
+
+            sent = sorted(p for batch in engine.transport.batches for p in batch)
+            assert sent == [f'img{i}.png' for i in range(6, 10)]
+            assert result.success
+            assert result.files_transferred == 4
+            assert result.bytes_transferred == sum(f.size for f in files[6:])
+            assert len(engine.manifest.manifest) == 10
+
+    def test_failed_files_stay_out_of_manifest(self):
+        """Test per-file failures are retried by the next diff."""
+        files = [FileStat(path=f'/src/img{i}.png', size=100, mtime=100.0) for i in range(4)]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            transport = FakeTransport(files, fail={'img2.png'})
+            engine = SyncEngine(transport, os.path.join(tmpdir, 'manifest.db'))
+
+            result = asyncio.run(engine.sync_folder('/src', '/dst', sync_config(workers=2)))
+
+            assert not result.success
+            assert result.files_transferred == 3
+            assert '/src/img2.png' not in engine.manifest.manifest
+
+            new, modified, _ = engine.manifest.get_changes(files)
+            assert new == ['/src/img2.png']
@@ -0,0 +1,111 @@
+"""
+Tests for rsync progress parsing and job-level progress aggregation
+"""
+
+import pytest
+
+from app.utils.progress_parsers import RsyncProgressParser
+from app.sync.progress import ProgressManager, TransferProgressTracker
+
+
+class TestRsyncProgressParser:
+    """Test parsing of rsync progress2/itemize output."""
+
+    def test_progress2_line(self):
+        """Test a progress2 line with transfer counters."""
+        result = RsyncProgressParser.parse_line(
+            '    1,234,567  45%   10.00MB/s    0:00:12 (xfr#3, to-chk=10/20)'
+        )
+
+        assert result['type'] == 'progress'
+        assert result['bytes'] == 1234567
+        assert result['percent'] == 45
+        assert result['speed'] == '10.00MB/s'
+        assert result['xfr'] == 3
+        assert result['total_files'] == 20
+
+    def test_progress2_line_without_counters(self):
+        """Test progress2 output before the first file completes."""
+        result = RsyncProgressParser.parse_line('         32,768   0%    0.00kB/s    0:00:00')
+
+        assert result['type'] == 'progress'
+        assert result['bytes'] == 32768
+        assert 'total_files' not in result
+
+    def test_itemized_lines(self):
+        """Test only received regular files are flagged as received."""
+        received = RsyncProgressParser.parse_line('>f+++++++++ sub/a b.png')
+        directory = RsyncProgressParser.parse_line('cd+++++++++ sub/')
+
+        assert received['type'] == 'item'
+        assert received['path'] == 'sub/a b.png'
+        assert received['received']
+        assert directory['type'] == 'item'
+        assert not directory['received']
+
+    def test_stats_and_noise(self):
+        """Test the stats tail and unrelated lines."""
+        stats = RsyncProgressParser.parse_line('total size is 2,048  speedup is 1.00')
+
+        assert stats == {'type': 'stats', 'total_size': 2048}
+        assert RsyncProgressParser.parse_line('receiving incremental file list') is None
+
+
+class TestTransferProgressTracker:
+    """Test aggregation across concurrent transfers."""
+
+    def test_sums_workers_and_uses_planned_totals(self):
+        """Test per-transfer counters are summed into job totals."""
+        updates = []
+        tracker = TransferProgressTracker(updates.append, min_interval=0)
+
+        tracker.update({'stage': 'transferring', 'planned_files': 4, 'planned_bytes': 1000})
+        tracker.update({'transfer_id': 'a', 'transferred_bytes': 100, 'transferred_files': 1, 'current_file': 'x.png'})
+        tracker.update({'transfer_id': 'b', 'transferred_bytes': 300, 'transferred_files': 1, 'current_file': 'y.png'})
+        tracker.update({'transfer_id': 'a', 'transferred_bytes': 200, 'transferred_files': 2})
+
+        assert updates[0]['stage'] == 'transferring'
+        assert updates[0]['total_files'] == 4
+        assert 'planned_files' not in updates[0]
+        assert updates[-1] == {
+            'transferred_bytes': 500,
+            'transferred_files': 3,
+            'total_bytes': 1000,
+            'total_files': 4,
+            'current_file': 'y.png'
+        }
+
+    def test_throttles_and_flushes(self):
+        """Test rapid updates are coalesced and flushed at the end."""
+        updates = []
+        tracker = TransferProgressTracker(updates.append, min_interval=60)
+
+        for i in range(1, 50):
+            tracker.update({'transfer_id': 'a', 'transferred_bytes': i * 10, 'transferred_files': i})
+
+        assert len(updates) == 1
+        tracker.flush()
+        assert len(updates) == 2
+        assert updates[-1]['transferred_files'] == 49
+        tracker.flush()
+        assert len(updates) == 2
+
+    def test_drives_progress_manager(self):
+        """Test aggregated updates produce a live percentage."""
+        manager = ProgressManager()
+        manager.create_progress('sync_1', 'job_1')
+        tracker = TransferProgressTracker(
+            lambda update: manager.update_progress('sync_1', update), min_interval=0
+        )
+
+        tracker.update({'planned_files': 2, 'planned_bytes': 1000})
+        tracker.update({'transfer_id': 'a', 'transferred_bytes': 250, 'transferred_files': 1})
+
+        progress = manager.get_progress('sync_1')
+        assert progress.transferred_bytes == 250
+        assert progress.total_bytes == 1000
+        assert progress.progress_percent == 25.0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,97 @@
+"""
+Tests for XMP sidecar generation
+"""
+
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+from app.sync.models import FileStat
+from app.sync.engine.sync_engine import SyncEngine
+
+from conftest import FakeTransport, sync_config, png_bytes
+
+
+@pytest.fixture
+def xmp_pipeline(monkeypatch):
+    from app.sync.engine import xmp_pipeline as module
+
+    pipeline = module.XmpPipeline(max_workers=1)
+    monkeypatch.setattr(module, '_xmp_pipeline', pipeline)
+    yield pipeline
+    pipeline.shutdown()
+
+
+class TestXmpPipeline:
+    """Test sidecar generation for received images."""
+
+    def test_sync_writes_sidecars_once(self, xmp_pipeline):
+        """Test received images get sidecars and are marked done in the manifest."""
+        files = [FileStat(path=f'/src/img{i}.png', size=10, mtime=100.0) for i in range(3)]
+        prompts = {'img0.png': 'a cat', 'img1.png': 'a dog', 'img2.png': ''}
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dest = os.path.join(tmpdir, 'dst')
+            os.makedirs(dest)
+            transport = FakeTransport(files, contents={rel: png_bytes(p) for rel, p in prompts.items()})
+            engine = SyncEngine(transport, os.path.join(tmpdir, 'manifest.db'))
+
+            result = asyncio.run(engine.sync_folder('/src', dest, sync_config()))
+
+            assert result.xmp_written == 2
+            with open(os.path.join(dest, 'img0.png.xmp')) as f:
+                assert 'a cat' in f.read()
+            assert not os.path.exists(os.path.join(dest, 'img2.png.xmp'))
+            assert engine.manifest.pending_xmp(f.path for f in files) == []
+
+            # A modified image is pending again until re-processed
+            engine.manifest.update_many([FileStat(path='/src/img0.png', size=11, mtime=200.0)])
+            assert engine.manifest.pending_xmp(['/src/img0.png', '/src/img1.png']) == ['/src/img0.png']
+
+    def test_disabled_or_not_received(self, xmp_pipeline):
+        """Test no sidecars without generate_xmp or for files rsync skipped."""
+        files = [FileStat(path='/src/a.png', size=10, mtime=100.0)]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dest = os.path.join(tmpdir, 'dst')
+            os.makedirs(dest)
+            transport = FakeTransport(files, contents={'a.png': png_bytes('prompt')})
+            engine = SyncEngine(transport, os.path.join(tmpdir, 'manifest.db'))
+
+            config = sync_config()
+            config.generate_xmp = False
+            asyncio.run(engine.sync_folder('/src', dest, config))
+            assert not os.path.exists(os.path.join(dest, 'a.png.xmp'))
+
+            files[0] = FileStat(path='/src/a.png', size=12, mtime=150.0)
+            original = transport.transfer_files
+
+            async def skipped(*args, **kwargs):
+                result = await original(*args, **kwargs)
+                result.received = []
+                return result
+
+            transport.transfer_files = skipped
+            result = asyncio.run(engine.sync_folder('/src', dest, sync_config()))
+            assert result.files_transferred == 1
+            assert not os.path.exists(os.path.join(dest, 'a.png.xmp'))
+
+    def test_existing_and_missing_images(self, xmp_pipeline):
+        """Test outcome grouping for existing sidecars and missing files."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            image = os.path.join(tmpdir, 'a.png')
+            from PIL import Image
+            Image.new('RGB', (2, 2)).save(image)
+            with open(image + '.xmp', 'w') as f:
+                f.write('keep')
+
+            result = asyncio.run(xmp_pipeline.process([
+                image, os.path.join(tmpdir, 'gone.png'), os.path.join(tmpdir, 'notes.txt')
+            ]))
+
+            assert result.existing == [image]
+            assert result.failed == [os.path.join(tmpdir, 'gone.png')]
+            with open(image + '.xmp') as f:
+                assert f.read() == 'keep'